@@ -0,0 +1,199 @@
+"""
+Pure ASGI middlewares for the app (no BaseHTTPMiddleware: streamed responses
+pass through chunk by chunk).
+"""
+import itertools
+import logging
+import os
+import random
+import time
+from typing import Iterable
+
+from core.compression import StreamCompressor, choose_encoding, compress_bytes, server_encodings
+from core.logger import logger, request_id_ctx
+
+# Streamed line-by-line: each chunk is compressed and flushed immediately
+STREAMING_TYPES = ("application/x-ndjson", "text/event-stream")
+COMPRESSIBLE_TYPES = STREAMING_TYPES + (
+    "application/json",
+    "application/javascript",
+    "application/yaml",
+    "application/x-yaml",
+    "image/svg+xml",
+    "text/",
+)
+
+
+def _header(headers: Iterable, name: bytes) -> str:
+    for key, value in headers:
+        if key.lower() == name:
+            return value.decode("latin-1")
+    return ""
+
+
+class CompressionMiddleware:
+    """
+    gzip/br response compression aware of the content type.
+
+    - JSON and text bodies sent in one piece are compressed when they have at
+      least `minimum_size` bytes;
+    - NDJSON/SSE streams are compressed per chunk with a sync flush, so every
+      event still reaches the client as soon as it is produced;
+    - responses that already carry a Content-Encoding (pre-compressed logos),
+      partial content and non-text types pass through untouched.
+    """
+
+    def __init__(self, app, minimum_size: int = 1024, level: int = 6):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.level = level
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(_header(scope["headers"], b"accept-encoding"), server_encodings())
+        if not encoding:
+            await self.app(scope, receive, send)
+            return
+        responder = _CompressedResponse(self, encoding, send)
+        await self.app(scope, receive, responder.wrapped_send)
+
+
+class _CompressedResponse:
+    def __init__(self, middleware: CompressionMiddleware, encoding: str, send):
+        self.app = middleware.app
+        self.minimum_size = middleware.minimum_size
+        self.level = middleware.level
+        self.encoding = encoding
+        self.send = send
+        self.start = None
+        self.compressor = None
+        self.passthrough = False
+        self.streaming = False
+
+    def _compressible(self, message) -> bool:
+        headers = message.get("headers", [])
+        if message["status"] in (204, 206, 304) or _header(headers, b"content-encoding") \
+                or _header(headers, b"content-range"):
+            return False
+        content_type = _header(headers, b"content-type").lower()
+        return content_type.startswith(COMPRESSIBLE_TYPES)
+
+    def _start_message(self, content_length: int = None):
+        headers = [(k, v) for k, v in self.start.get("headers", []) if k.lower() not in (b"content-length", b"vary")]
+        vary = _header(self.start.get("headers", []), b"vary")
+        headers.append((b"content-encoding", self.encoding.encode()))
+        headers.append((b"vary", (vary + ", Accept-Encoding" if vary else "Accept-Encoding").encode()))
+        if content_length is not None:
+            headers.append((b"content-length", str(content_length).encode()))
+        return {**self.start, "headers": headers}
+
+    async def wrapped_send(self, message):
+        if message["type"] == "http.response.start":
+            if not self._compressible(message):
+                self.passthrough = True
+                await self.send(message)
+                return
+            self.start = message
+            content_type = _header(message.get("headers", []), b"content-type").lower()
+            self.streaming = content_type.startswith(STREAMING_TYPES)
+            return
+
+        if self.passthrough or message["type"] != "http.response.body":
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.compressor is None:
+            if not more_body and not self.streaming:
+                # Whole body in one message: compress only when it pays off
+                if len(body) < self.minimum_size:
+                    await self.send(self.start)
+                    await self.send(message)
+                    return
+                compressed = compress_bytes(body, self.encoding, self.level)
+                await self.send(self._start_message(len(compressed)))
+                await self.send({"type": "http.response.body", "body": compressed})
+                return
+            self.compressor = StreamCompressor(self.encoding, self.level)
+            await self.send(self._start_message())
+
+        if more_body:
+            chunk = self.compressor.compress(body, flush=self.streaming)
+        else:
+            chunk = self.compressor.compress(body) + self.compressor.finish()
+        if chunk or not more_body:
+            await self.send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+
+# Request IDs: random per-process prefix + counter (cheaper than uuid4 per request)
+_REQUEST_ID_PREFIX = os.urandom(6).hex()
+_request_counter = itertools.count(1)
+
+
+def new_request_id() -> str:
+    return f"{_REQUEST_ID_PREFIX}-{next(_request_counter):x}"
+
+
+class AccessLogMiddleware:
+    """
+    Request ID (X-Request-ID, propagated through request_id_ctx) and access log.
+
+    Paths in `skip_paths` (health checks) are never logged; successful requests
+    are sampled at `sample_rate`, while errors and requests slower than
+    `slow_ms` are always logged. The log call only enqueues the record: the
+    JSON line is written by the logger's background thread.
+    """
+
+    def __init__(self, app, sample_rate: float = 1.0, slow_ms: int = 1000, skip_paths: Iterable[str] = ()):
+        self.app = app
+        self.sample_rate = sample_rate
+        self.slow_ms = slow_ms
+        self.skip_paths = frozenset(skip_paths)
+
+    def _should_log(self, path: str, status: int, duration_ms: float) -> bool:
+        if path in self.skip_paths:
+            return False
+        if status >= 400 or duration_ms >= self.slow_ms:
+            return True
+        return self.sample_rate >= 1 or random.random() < self.sample_rate
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = _header(scope["headers"], b"x-request-id") or new_request_id()
+        token = request_id_ctx.set(request_id)
+        request_id_header = (b"x-request-id", request_id.encode("latin-1"))
+        status = 500
+        start = time.perf_counter()
+
+        async def send_with_request_id(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message = {**message, "headers": [*message.get("headers", []), request_id_header]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            duration_ms = (time.perf_counter() - start) * 1000
+            path = scope["path"]
+            if self._should_log(path, status, duration_ms) and logger.isEnabledFor(logging.INFO):
+                client = scope.get("client")
+                logger.info(
+                    "Request processed",
+                    extra={"extra_fields": {
+                        "method": scope["method"],
+                        "path": path,
+                        "status": status,
+                        "duration_ms": round(duration_ms, 2),
+                        "ip": client[0] if client else "unknown"
+                    }, "rate_limit": False}
+                )
+            request_id_ctx.reset(token)
@@ -0,0 +1,48 @@
+"""
+Response helpers shared by the routers.
+"""
+from fastapi import Request, Response
+from fastapi.responses import JSONResponse
+
+from config import settings
+from core import json_codec
+from core.compression import choose_encoding
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSONResponse rendered by core.json_codec (orjson/msgspec when installed).
+    Default response class of the app; large listings return it directly so
+    their rows skip jsonable_encoder as well.
+    """
+
+    def render(self, content) -> bytes:
+        return json_codec.dumps(content)
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """If-None-Match check (weak comparison, as required for 304)."""
+    for candidate in (if_none_match or "").split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.replace("W/", "", 1).strip('"') == etag:
+            return True
+    return False
+
+
+def cached_asset_response(request: Request, asset, cache_control: str = None) -> Response:
+    """
+    Serve an EncodedAsset: 304 when the client's ETag still matches, otherwise
+    the pre-compressed encoding the client accepts (or the raw body).
+    """
+    headers = {
+        "ETag": f'W/"{asset.etag}"',
+        "Cache-Control": cache_control or f"public, max-age={settings.LOGO_MAX_AGE_SECONDS}, must-revalidate",
+        "Vary": "Accept-Encoding",
+    }
+    if etag_matches(request.headers.get("if-none-match"), asset.etag):
+        return Response(status_code=304, headers=headers)
+    encoding = choose_encoding(request.headers.get("accept-encoding", ""), asset.encodings)
+    if encoding:
+        headers["Content-Encoding"] = encoding
+        return Response(content=asset.encodings[encoding], media_type=asset.media_type, headers=headers)
+    return Response(content=asset.body, media_type=asset.media_type, headers=headers)
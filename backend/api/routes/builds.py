@@ -1,32 +1,129 @@
-from fastapi import APIRouter, HTTPException, BackgroundTasks
-from fastapi.responses import FileResponse
-from pathlib import Path
-import os
+import asyncio
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+from typing import Optional
+from core import json_codec
 from core.logger import logger
+from models.build import BulkBuildRequest
 
 router = APIRouter(tags=["Builds"])
 
-TEMP_BUILD_DIR = Path("/tmp/build-contexts")
+@router.get("/queue")
+def get_build_queue():
+    """
+    Returns the build queue depth per status and the builds running on this backend.
+    """
+    from core import database
+    from services.docker.build_scheduler import scheduler
+    return {
+        "statuses": database.count_build_jobs_by_status(),
+        "max_workers": scheduler.max_workers,
+        "worker_id": scheduler.worker_id,
+        "active_jobs": sorted(scheduler.active_jobs())
+    }
+
+@router.post("/platform-base")
+def build_platform_base(min_tools: Optional[int] = None):
+    """
+    Recomputes the packages shared by at least `min_tools` tools and queues the
+    platform base image builds. Tools adopt the base on their next build.
+    """
+    from services.docker import platform_base
+    try:
+        return {"status": "queued", "bases": platform_base.build_platform_bases(min_tools)}
+    except Exception as e:
+        logger.error("Failed to build platform base", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/platform-base/report")
+def get_platform_base_report():
+    """
+    Registry bytes saved by shared layers across the catalogue.
+    """
+    from services.docker import platform_base
+    try:
+        return platform_base.savings_report()
+    except Exception as e:
+        logger.error("Failed to compute platform base report", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/bulk")
+def start_bulk_build(request: BulkBuildRequest):
+    """
+    Rebuilds a workspace and/or a list of tools: shared platform bases first,
+    then the tool builds, at most `max_parallel` at a time.
+    Progress is streamed by GET /bulk/{bulk_id}/events.
+    """
+    from services.docker import bulk_build
+    if not request.workspace and not request.tool_ids:
+        raise HTTPException(status_code=400, detail="Provide a workspace or tool_ids")
+    try:
+        bulk = bulk_build.start_bulk_build(request.workspace, request.tool_ids,
+                                           max_parallel=request.max_parallel, priority=request.priority)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        logger.error("Failed to start bulk build", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+
+    selected = {tool["tool_id"] for tool in bulk.tools}
+    return {
+        "status": "started",
+        "bulk_id": bulk.id,
+        "platform_bases": [base["tool_id"] for base in bulk.bases],
+        "tools": sorted(selected),
+        "skipped": sorted(set(request.tool_ids or []) - selected),
+        "events_url": f"/api/builds/bulk/{bulk.id}/events"
+    }
+
+@router.get("/bulk/{bulk_id}/events")
+async def stream_bulk_build_events(bulk_id: str, since: int = 0):
+    """
+    Aggregated progress of a bulk build as NDJSON (one event per line).
+    `since` resumes the feed after the last `seq` received.
+    """
+    from services.docker import bulk_build
+    bulk = bulk_build.get_bulk_build(bulk_id)
+    if not bulk:
+        raise HTTPException(status_code=404, detail="Bulk build not found")
+
+    async def event_generator():
+        seq = since
+        while True:
+            finished = bulk.finished
+            for event in bulk.events_since(seq):
+                yield json_codec.ndjson_line(event)
+                seq = event["seq"] + 1
+            if finished:
+                break
+            await asyncio.sleep(0.5)
+
+    return StreamingResponse(event_generator(), media_type="application/x-ndjson")
 
 @router.get("/context/{job_id}")
-def get_build_context(job_id: str, background_tasks: BackgroundTasks):
+def get_build_context(job_id: str):
     """
-    Serves the build context tarball for a specific job.
-    Called by Kaniko inside the cluster.
+    Streams the build context tarball for a specific job from the context store.
+    Called by Kaniko inside the cluster; X-Content-SHA256 carries the expected hash.
     """
-    tar_path = TEMP_BUILD_DIR / f"{job_id}.tar.gz"
+    from services.docker.context_store import context_store, iter_chunks
     
-    if not tar_path.exists():
+    entry = context_store.get(job_id)
+    if not entry:
         logger.warning("Build context not found", extra={"extra_fields": {"job_id": job_id}})
         raise HTTPException(status_code=404, detail="Context not found")
-        
-    logger.info("Serving build context", extra={"extra_fields": {"job_id": job_id}})
     
-    # We explicitly do NOT delete it here immediately because Kaniko might retry or connection might break.
-    # Cleanup is handled by the builder service after job completion.
+    data, context_hash = entry
+    logger.info("Serving build context", extra={"extra_fields": {"job_id": job_id, "sha256": context_hash}})
     
-    return FileResponse(
-        path=tar_path,
+    # Not removed here: Kaniko might retry. The builder discards it after job completion.
+    return StreamingResponse(
+        iter_chunks(data),
         media_type="application/gzip",
-        filename=f"context-{job_id}.tar.gz"
+        headers={
+            "Content-Length": str(len(data)),
+            "Content-Disposition": f'attachment; filename="context-{job_id}.tar.gz"',
+            "ETag": f'"{context_hash}"',
+            "X-Content-SHA256": context_hash,
+        }
     )
@@ -5,6 +5,7 @@ from fastapi import APIRouter, HTTPException
 from fastapi.responses import StreamingResponse
 
 from models.tool import ToolExecutionRequest
+from api.responses import FastJSONResponse
 from services import execution_service
 from core import database
 
@@ -56,10 +57,16 @@ def get_execution_statistics():
         "platform": platform_stats
     }
 
+@router.get("/warmup")
+def get_image_warmup_status():
+    """Imagens mantidas pré-carregadas nos nós e tempo de pull (cold start) por nó"""
+    from services.execution.image_warmup import warmup_controller
+    return warmup_controller.status()
+
 @router.get("")
 def list_executions(limit: int = 50):
     """Lista execuções recentes"""
-    return database.get_executions(limit)
+    return FastJSONResponse(database.get_executions(limit))
 
 @router.get("/{execution_id}")
 def get_execution(execution_id: str):
@@ -1,11 +1,13 @@
 """
 Rotas de MCP Servers (Model Context Protocol)
 """
-from fastapi import APIRouter, HTTPException, Response, Request, Header
+from fastapi import APIRouter, HTTPException, Request, Header
 from typing import Dict, Any, Optional
 
 from models.mcp import MCPCreateRequest, MCPUpdateRequest
+from api.responses import cached_asset_response
 from services import mcp_manager, mcp_server
+from services.logo_cache import logo_cache
 
 router = APIRouter(prefix="/api/mcps", tags=["MCP Servers"])
 
@@ -26,7 +28,8 @@ def create_mcp_server(request: MCPCreateRequest):
             name=request.name,
             description=request.description,
             tool_ids=request.tool_ids,
-            env_vars=[e.dict() for e in request.env_vars] if request.env_vars else []
+            env_vars=[e.dict() for e in request.env_vars] if request.env_vars else [],
+            rate_limits=request.rate_limits.dict(exclude_none=True) if request.rate_limits else None
         )
         return {
             "status": "success",
@@ -62,7 +65,8 @@ def update_mcp_server(mcp_id: str, request: MCPUpdateRequest):
             description=request.description,
             tool_ids=request.tool_ids,
             status=request.status,
-            env_vars=[e.dict() for e in request.env_vars] if request.env_vars is not None else None
+            env_vars=[e.dict() for e in request.env_vars] if request.env_vars is not None else None,
+            rate_limits=request.rate_limits.dict(exclude_none=True) if request.rate_limits is not None else None
         )
         if not success:
             raise HTTPException(status_code=404, detail="MCP server not found")
@@ -96,13 +100,22 @@ def regenerate_mcp_api_key(mcp_id: str):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/{mcp_id}/connections")
+def get_mcp_connections(mcp_id: str):
+    """Lista as conexões SSE ativas (heartbeat recente) de um servidor MCP"""
+    try:
+        connections = mcp_manager.get_active_connections(mcp_id)
+        return {"live": len(connections), "connections": connections}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.get("/{mcp_id}/logo")
-def get_mcp_logo(mcp_id: str):
-    """Obtém o logo de um servidor MCP"""
-    logo = mcp_manager.get_mcp_logo(mcp_id)
+def get_mcp_logo(mcp_id: str, request: Request):
+    """Obtém o logo de um servidor MCP (ETag/304 e gzip/brotli)"""
+    logo = logo_cache.get('mcp', mcp_id)
     if not logo:
         raise HTTPException(status_code=404, detail="Logo not found")
-    return Response(content=logo, media_type="image/svg+xml", headers={"Cache-Control": "public, max-age=3600"})
+    return cached_asset_response(request, logo)
 
 @router.post("/{mcp_id}/logo")
 def upload_mcp_logo(mcp_id: str, request: Dict):
@@ -2,9 +2,9 @@
 Settings API Routes
 Handles platform configuration including registry settings
 """
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Header, HTTPException
 from fastapi.responses import StreamingResponse
-from typing import Dict
+from typing import Dict, Optional
 from pydantic import BaseModel
 import subprocess
 import asyncio
@@ -34,59 +34,64 @@ def start_async_build(request: BuildRequest) -> Dict:
         raise HTTPException(500, f"Failed to start build: {str(e)}")
 
 @router.get("/settings/registry/build/{job_id}/status")
-def get_build_status(job_id: str) -> Dict:
-    """Get build job status"""
-    status = docker_build_service.get_build_status(job_id)
+def get_build_status(job_id: str, log_offset: Optional[int] = None) -> Dict:
+    """Get build job status (with `log_offset`, only the logs after it)"""
+    status = docker_build_service.get_build_status(job_id, log_offset)
     if status.get("status") == "not_found":
         raise HTTPException(404, "Job not found")
     return status
 
-async def log_generator(job_id: str):
-    """Generate SSE events for build logs"""
-    last_pos = 0
-    poll_interval = 0.5
+# Without LISTEN (e.g. listener reconnecting) the stream falls back to polling
+LOG_POLL_FALLBACK_SECONDS = 0.5
+LOG_KEEPALIVE_SECONDS = 15
+
+async def log_generator(job_id: str, offset: int = 0):
+    """
+    Generate SSE events for build logs.
+    Only the logs after `offset` are read, and only when the job changed
+    (NOTIFY); each event id is the offset to resume from (Last-Event-ID).
+    """
+    from services.docker.build_events import build_events
+    loop = asyncio.get_running_loop()
     
-    while True:
-        job = database.get_build_job(job_id)
-        if not job:
-            yield f"event: error\ndata: Job {job_id} not found\n\n"
-            break
+    with build_events.subscription(job_id) as changed:
+        while True:
+            changed.clear()
+            page = await loop.run_in_executor(None, database.read_build_logs, job_id, offset)
+            if not page:
+                yield f"event: error\ndata: Job {job_id} not found\n\n"
+                break
             
-        logs = job.get('logs') or ""
-        
-        # Send new logs
-        if len(logs) > last_pos:
-            # Split new content by lines to ensure clean events if needed, 
-            # but usually sending the chunk is fine for terminals.
-            # We'll send the raw chunk.
-            new_data = logs[last_pos:]
-            # Escape newlines for SSE data payload if necessary, but usually libraries handle it.
-            # For simple terminal streaming, we can send line by line or raw.
-            # Let's clean it up for SSE format: "data: <content>\n\n"
-            # If content has newlines, SSE expects "data: line1\ndata: line2\n\n".
+            status = page.get('status')
+            finished = status in ['SUCCESS', 'FAILED']
+            chunk = page['chunk']
+            if not finished:
+                # Hold back a trailing partial line until it is complete
+                chunk = chunk[:chunk.rfind('\n') + 1]
             
-            for line in new_data.splitlines(keepends=True):
-                # Clean line ending
-                clean_line = line.rstrip('\n')
-                yield f"data: {clean_line}\n\n"
-                
-            last_pos = len(logs)
+            # SSE expects one "data:" per line
+            for line in chunk.splitlines(keepends=True):
+                offset += len(line)
+                yield f"id: {offset}\ndata: {line.rstrip(chr(10))}\n\n"
             
-        # Check termination
-        status = job.get('status')
-        if status in ['SUCCESS', 'FAILED']:
-            # Send one last check just in case logs updated with status
-            # Then close
-            yield f"event: {status.lower()}\ndata: {status}\n\n"
-            yield "event: close\ndata: closed\n\n"
-            break
+            if finished:
+                yield f"event: {status.lower()}\ndata: {status}\n\n"
+                yield "event: close\ndata: closed\n\n"
+                break
             
-        await asyncio.sleep(poll_interval)
+            timeout = LOG_KEEPALIVE_SECONDS if build_events.listening else LOG_POLL_FALLBACK_SECONDS
+            try:
+                await asyncio.wait_for(changed.wait(), timeout)
+            except asyncio.TimeoutError:
+                if build_events.listening:
+                    yield ": keepalive\n\n"
 
 @router.get("/settings/registry/build/{job_id}/logs")
-async def stream_build_logs(job_id: str):
-    """Stream logs via SSE"""
-    return StreamingResponse(log_generator(job_id), media_type="text/event-stream")
+async def stream_build_logs(job_id: str, offset: int = 0, last_event_id: Optional[str] = Header(None)):
+    """Stream logs via SSE (resumes from `offset` or the Last-Event-ID header)"""
+    if last_event_id and last_event_id.isdigit():
+        offset = int(last_event_id)
+    return StreamingResponse(log_generator(job_id, offset), media_type="text/event-stream")
 
 
 @router.get("/settings/registry")
@@ -106,7 +111,13 @@ def get_registry_config() -> Dict:
 def save_registry_config(config: RegistryConfig) -> Dict:
     """Save registry configuration"""
     try:
-        saved = database.save_registry_config(config.dict())
+        data = config.dict()
+        # Build cache fields omitted by the client keep their stored values
+        existing = database.get_registry_config() or {}
+        for field in ("build_cache_enabled", "build_cache_repo", "build_cache_ttl", "build_cache_volume"):
+            if field not in config.__fields_set__ and existing.get(field) is not None:
+                data[field] = existing[field]
+        saved = database.save_registry_config(data)
         # Don't expose password in response
         if 'password' in saved:
             saved['password'] = "***" if saved.get('password') else None
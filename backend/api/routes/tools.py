@@ -2,24 +2,29 @@
 Rotas de Ferramentas (Tools)
 Refactored for Phase 3: Total DB Persistence
 """
-from fastapi import APIRouter, HTTPException, Response
+from fastapi import APIRouter, HTTPException, Request
 from fastapi.responses import StreamingResponse
 import uuid
-from typing import Dict
+from typing import Dict, Optional
 import os
 import json
 import yaml
 
+from api.responses import FastJSONResponse, cached_asset_response
 from core.logger import logger
 
 from models.tool import (
     CreateToolRequest,
     UpdateToolRequest,
     ToolContentRequest,
+    SyncManifestRequest,
+    SyncBatchRequest,
+    SyncExportRequest,
     LogoUploadRequest,
     TestToolRequest
 )
 from services import tool_service, execution_service
+from services.logo_cache import EncodedAsset, logo_cache
 from core import database
 
 router = APIRouter(prefix="/api/tools", tags=["Tools"])
@@ -27,13 +32,18 @@ router = APIRouter(prefix="/api/tools", tags=["Tools"])
 @router.get("")
 def list_tools():
     """Lista todas as ferramentas agrupadas por categoria"""
-    return tool_service.scan_tools()
+    return FastJSONResponse(tool_service.scan_tools())
+
+@router.get("/changes")
+def list_tool_changes(since: int = 0, limit: int = 500):
+    """Ferramentas alteradas desde a revisão `since` do catálogo (com hashes do conteúdo)"""
+    return FastJSONResponse(tool_service.get_catalogue_feed(since, limit))
 
 @router.get("/{category}/{tool_id}")
 def get_tool_details(category: str, tool_id: str):
     """Obtém metadados de uma ferramenta específica"""
     full_id = f"{category}/{tool_id}"
-    tool = database.get_tool(full_id)
+    tool = tool_service.find_tool(full_id)
     
     if not tool:
         raise HTTPException(status_code=404, detail="Tool not found")
@@ -56,7 +66,7 @@ def get_tool_details(category: str, tool_id: str):
         "configuration": expanded.get('configuration', ""),
         "docker": expanded.get('docker'),
         "resources": expanded.get('resources'),
-        "has_logo": database.get_logo('tool', full_id) is not None
+        "has_logo": logo_cache.has('tool', full_id)
     }
 
 @router.post("")
@@ -117,19 +127,18 @@ def delete_tool(category: str, tool_id: str):
         raise HTTPException(status_code=404, detail="Tool not found")
     return {"status": "success"}
 
-@router.get("/{category}/{tool_id}/logo")
-def get_tool_logo(category: str, tool_id: str):
-    """Obtém o logo de uma ferramenta ou retorna placeholder"""
-    logo = tool_service.get_tool_logo(category, tool_id)
-    if not logo:
-        # Retornar SVG placeholder ao invés de 404
-        placeholder_svg = f'''<svg xmlns="http://www.w3.org/2000/svg" width="64" height="64" viewBox="0 0 24 24" fill="none" stroke="#6272a4" stroke-width="2" stroke-linecap="round" stroke-linejoin="round">
+# SVG placeholder servido ao invés de 404 para ferramentas sem logo
+PLACEHOLDER_LOGO = EncodedAsset.build(b'''<svg xmlns="http://www.w3.org/2000/svg" width="64" height="64" viewBox="0 0 24 24" fill="none" stroke="#6272a4" stroke-width="2" stroke-linecap="round" stroke-linejoin="round">
             <rect x="3" y="3" width="18" height="18" rx="2" ry="2"></rect>
             <line x1="9" y1="9" x2="15" y2="15"></line>
             <line x1="15" y1="9" x2="9" y2="15"></line>
-        </svg>'''
-        return Response(content=placeholder_svg, media_type="image/svg+xml", headers={"Cache-Control": "public, max-age=3600"})
-    return Response(content=logo, media_type="image/svg+xml", headers={"Cache-Control": "public, max-age=3600"})
+        </svg>''')
+
+@router.get("/{category}/{tool_id}/logo")
+def get_tool_logo(category: str, tool_id: str, request: Request):
+    """Obtém o logo de uma ferramenta ou retorna placeholder (ETag/304 e gzip/brotli)"""
+    logo = logo_cache.get('tool', f"{category}/{tool_id}")
+    return cached_asset_response(request, logo or PLACEHOLDER_LOGO)
 
 @router.post("/{category}/{tool_id}/logo")
 def upload_tool_logo(category: str, tool_id: str, payload: LogoUploadRequest):
@@ -144,15 +153,14 @@ def upload_tool_logo(category: str, tool_id: str, payload: LogoUploadRequest):
 @router.delete("/{category}/{tool_id}/logo")
 def delete_tool_logo(category: str, tool_id: str):
     """Deleta o logo de uma ferramenta"""
-    full_id = f"{category}/{tool_id}"
-    database.delete_logo('tool', full_id)
+    tool_service.delete_tool_logo(category, tool_id)
     return {"status": "success", "message": "Logo deleted"}
 
 # File content endpoints (DB ONLY)
 @router.get("/content")
 def get_file_content(path: str = None, tool_id: str = None, file_type: str = "py"):
     """Lê o conteúdo de uma ferramenta pelo ID do banco (ou infere do path)"""
-    target_id = tool_id or tool_service.resolve_tool_id_from_path(path)
+    target_id = tool_service.resolve_tool_id(tool_id, path)
     if not target_id:
         raise HTTPException(status_code=400, detail="tool_id or valid path is required")
         
@@ -165,7 +173,7 @@ def get_file_content(path: str = None, tool_id: str = None, file_type: str = "py
 @router.post("/content")
 def save_file_content(request: ToolContentRequest):
     """Salva conteúdo APENAS no banco de dados"""
-    target_id = request.tool_id or tool_service.resolve_tool_id_from_path(request.path)
+    target_id = tool_service.resolve_tool_id(request.tool_id, request.path)
     if not target_id:
         raise HTTPException(status_code=400, detail="tool_id or valid path is required")
         
@@ -175,9 +183,28 @@ def save_file_content(request: ToolContentRequest):
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+# Bulk sync (CLI): manifest of hashes first, then only the changed files in one batch
+@router.post("/sync/manifest")
+def sync_manifest(request: SyncManifestRequest):
+    """Compara o manifesto (path, sha256) da CLI com o catálogo e retorna os arquivos diferentes"""
+    changed = tool_service.diff_sync_manifest([entry.dict() for entry in request.entries])
+    return {"changed": changed, "unchanged": len(request.entries) - len(changed)}
+
+@router.post("/sync/batch")
+def sync_batch(request: SyncBatchRequest):
+    """Salva os arquivos alterados em uma única transação (uma invalidação do catálogo)"""
+    result = tool_service.save_tool_contents([file.dict() for file in request.files])
+    failed = sum(1 for r in result['results'] if r.get('error'))
+    return {"status": "success" if not failed else "partial", "failed": failed, **result}
+
+@router.post("/sync/export")
+def sync_export(request: SyncExportRequest):
+    """Script e YAML de várias ferramentas em uma única requisição (pull incremental)"""
+    return FastJSONResponse({"tools": tool_service.export_tools(request.tool_ids)})
+
 @router.post("/{category}/{tool_id}/build")
-def trigger_tool_build(category: str, tool_id: str):
-    """Dispara manualmente o build Docker de uma ferramenta"""
+def trigger_tool_build(category: str, tool_id: str, priority: Optional[int] = None):
+    """Dispara manualmente o build Docker de uma ferramenta (enfileirado; maior prioridade executa antes)"""
     full_id = f"{category}/{tool_id}"
     tool = database.get_tool(full_id)
     
@@ -193,8 +220,10 @@ def trigger_tool_build(category: str, tool_id: str):
          
     try:
         from services.docker_build_service import trigger_build_async
-        job_id = trigger_build_async(category, tool_id, docker_config)
-        return {"status": "success", "job_id": job_id, "message": "Build started"}
+        from services.docker.build_scheduler import PRIORITY_NORMAL
+        job_id = trigger_build_async(category, tool_id, docker_config,
+                                     priority=PRIORITY_NORMAL if priority is None else priority)
+        return {"status": "success", "job_id": job_id, "message": "Build queued"}
     except Exception as e:
         logger.error("Error triggering manual build", exc_info=True, extra={"extra_fields": {"tool_id": tool_id, "category": category}})
         raise HTTPException(status_code=500, detail=f"Failed to trigger build: {str(e)}")
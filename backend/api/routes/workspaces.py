@@ -1,10 +1,12 @@
 """
 Rotas de Workspaces (Categorias de Ferramentas)
 """
-from fastapi import APIRouter, HTTPException, Response
+from fastapi import APIRouter, HTTPException, Request
 
 from models.workspace import CreateWorkspaceRequest, UpdateWorkspaceRequest
+from api.responses import cached_asset_response
 from services import tool_service
+from services.logo_cache import logo_cache
 
 router = APIRouter(prefix="/api/workspaces", tags=["Workspaces"])
 
@@ -44,12 +46,17 @@ def delete_workspace(name: str):
     return {"status": "success"}
 
 @router.get("/{name}/logo")
-def get_workspace_logo(name: str):
-    """Obtém o logo de um workspace"""
-    logo = tool_service.get_category_logo(name)
+def get_workspace_logo(name: str, request: Request):
+    """Obtém o logo de um workspace (ETag/304 e gzip/brotli)"""
+    logo = logo_cache.get('category', name)
     if not logo:
         raise HTTPException(status_code=404, detail="Logo not found")
-    return Response(content=logo, media_type="image/svg+xml", headers={"Cache-Control": "public, max-age=3600"})
+    return cached_asset_response(request, logo)
+
+@router.get("/{name}/logos")
+def get_workspace_logos(name: str, request: Request):
+    """Logo do workspace e de todas as suas ferramentas em uma única resposta"""
+    return cached_asset_response(request, tool_service.get_workspace_logos(name))
 
 @router.post("/{name}/logo")
 def upload_workspace_logo(name: str, request: dict):
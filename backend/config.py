@@ -34,6 +34,70 @@ class Settings:
     DOCKER_REGISTRY: str = os.getenv("DOCKER_REGISTRY", "10.98.175.36:80")
     # DOCKER_REGISTRY_PUSH: Endereço usado pelo Kaniko para Push (DNS interno do cluster)
     DOCKER_REGISTRY_PUSH: str = os.getenv("DOCKER_REGISTRY_PUSH", "registry.kube-system")
+    # Uploads de camadas simultâneos por push (cliente de registry nativo)
+    REGISTRY_UPLOAD_CONCURRENCY: int = int(os.getenv("REGISTRY_UPLOAD_CONCURRENCY", "4"))
+    
+    # MCP tools/call: limites de saída retornada ao agente (caracteres)
+    # A saída completa continua disponível na execução persistida
+    MCP_RESULT_MAX_CHARS: int = int(os.getenv("MCP_RESULT_MAX_CHARS", "262144"))
+    MCP_LOG_MAX_CHARS: int = int(os.getenv("MCP_LOG_MAX_CHARS", "65536"))
+    # Tamanho máximo de página em resources/read
+    MCP_RESOURCE_PAGE_MAX_CHARS: int = int(os.getenv("MCP_RESOURCE_PAGE_MAX_CHARS", "1048576"))
+    # Rate limiting: validade de um lease de execução, renovado a cada 1/3 enquanto a
+    # execução roda (só expira se a réplica caiu), e sugestão de retry quando a cota
+    # de concorrência está cheia
+    MCP_LEASE_TTL_SECONDS: int = int(os.getenv("MCP_LEASE_TTL_SECONDS", "300"))
+    MCP_CONCURRENCY_RETRY_SECONDS: int = int(os.getenv("MCP_CONCURRENCY_RETRY_SECONDS", "5"))
+    # Conexões SSE: intervalo de gravação em lote dos heartbeats e idade máxima
+    # de um heartbeat antes da conexão ser considerada morta
+    MCP_HEARTBEAT_FLUSH_SECONDS: int = int(os.getenv("MCP_HEARTBEAT_FLUSH_SECONDS", "30"))
+    MCP_CONNECTION_STALE_SECONDS: int = int(os.getenv("MCP_CONNECTION_STALE_SECONDS", "120"))
+    
+    # Builds: workers por processo do backend e fila persistente em build_jobs
+    # (jobs sem heartbeat por BUILD_STALE_SECONDS voltam para a fila)
+    BUILD_MAX_WORKERS: int = int(os.getenv("BUILD_MAX_WORKERS", "2"))
+    BUILD_QUEUE_POLL_SECONDS: int = int(os.getenv("BUILD_QUEUE_POLL_SECONDS", "5"))
+    BUILD_HEARTBEAT_SECONDS: int = int(os.getenv("BUILD_HEARTBEAT_SECONDS", "15"))
+    BUILD_STALE_SECONDS: int = int(os.getenv("BUILD_STALE_SECONDS", "90"))
+    # Monitor dos pods do Kaniko (um watch por processo): intervalo de leitura
+    # incremental dos logs e tempo máximo até o pod do build iniciar
+    BUILD_LOG_POLL_SECONDS: int = int(os.getenv("BUILD_LOG_POLL_SECONDS", "2"))
+    BUILD_POD_START_TIMEOUT_SECONDS: int = int(os.getenv("BUILD_POD_START_TIMEOUT_SECONDS", "300"))
+    # Contextos de build do Kaniko (tabela build_contexts, lida por qualquer worker/réplica,
+    # com cache LRU em memória; ambos com TTL)
+    BUILD_CONTEXT_MAX_ENTRIES: int = int(os.getenv("BUILD_CONTEXT_MAX_ENTRIES", "64"))
+    BUILD_CONTEXT_MAX_BYTES: int = int(os.getenv("BUILD_CONTEXT_MAX_BYTES", str(256 * 1024 * 1024)))
+    BUILD_CONTEXT_TTL_SECONDS: int = int(os.getenv("BUILD_CONTEXT_TTL_SECONDS", "1800"))
+    # Imagem base da plataforma: pacotes usados por pelo menos N ferramentas
+    PLATFORM_BASE_MIN_TOOLS: int = int(os.getenv("PLATFORM_BASE_MIN_TOOLS", "3"))
+    # Builds em lote: builds de ferramentas simultâneos por lote e intervalo de acompanhamento
+    BULK_BUILD_MAX_PARALLEL: int = int(os.getenv("BULK_BUILD_MAX_PARALLEL", "4"))
+    BULK_BUILD_POLL_SECONDS: int = int(os.getenv("BULK_BUILD_POLL_SECONDS", "2"))
+    # Pré-pull das imagens mais usadas nos nós (DaemonSet), com base no histórico
+    # de execuções dos últimos N dias e nas imagens construídas nas últimas N horas
+    IMAGE_WARMUP_ENABLED: bool = os.getenv("IMAGE_WARMUP_ENABLED", "true").lower() == "true"
+    IMAGE_WARMUP_MAX_IMAGES: int = int(os.getenv("IMAGE_WARMUP_MAX_IMAGES", "10"))
+    IMAGE_WARMUP_WINDOW_DAYS: int = int(os.getenv("IMAGE_WARMUP_WINDOW_DAYS", "7"))
+    IMAGE_WARMUP_RECENT_BUILD_HOURS: int = int(os.getenv("IMAGE_WARMUP_RECENT_BUILD_HOURS", "24"))
+    IMAGE_WARMUP_INTERVAL_SECONDS: int = int(os.getenv("IMAGE_WARMUP_INTERVAL_SECONDS", "300"))
+    # Catálogo de ferramentas em memória: invalidado por LISTEN/NOTIFY; sem o listener,
+    # as leituras consultam as mudanças no banco no máximo a cada N segundos
+    # (também o prazo dos logos em cache nessa situação)
+    CATALOGUE_POLL_SECONDS: int = int(os.getenv("CATALOGUE_POLL_SECONDS", "1"))
+    # Logos em memória (LRU) e validade no navegador (revalidada por ETag)
+    LOGO_CACHE_MAX_ENTRIES: int = int(os.getenv("LOGO_CACHE_MAX_ENTRIES", "2048"))
+    LOGO_MAX_AGE_SECONDS: int = int(os.getenv("LOGO_MAX_AGE_SECONDS", "60"))
+    # Configurações YAML das ferramentas já interpretadas (LRU pelo hash do texto)
+    YAML_CACHE_MAX_ENTRIES: int = int(os.getenv("YAML_CACHE_MAX_ENTRIES", "1024"))
+    # Compressão das respostas (gzip/br): corpos JSON a partir de N bytes;
+    # streams NDJSON/SSE são comprimidos e enviados chunk a chunk
+    COMPRESSION_MIN_SIZE: int = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+    COMPRESSION_LEVEL: int = int(os.getenv("COMPRESSION_LEVEL", "6"))
+    # Access log: fração das requisições bem-sucedidas registrada (erros e as mais
+    # lentas que N ms sempre entram) e caminhos que nunca são registrados
+    ACCESS_LOG_SAMPLE_RATE: float = float(os.getenv("ACCESS_LOG_SAMPLE_RATE", "1.0"))
+    ACCESS_LOG_SLOW_MS: int = int(os.getenv("ACCESS_LOG_SLOW_MS", "1000"))
+    ACCESS_LOG_SKIP_PATHS: list = [p for p in os.getenv("ACCESS_LOG_SKIP_PATHS", "/health,/ping").split(",") if p]
     
     # Tools
     TOOLS_BASE_DIR: str = os.getenv(
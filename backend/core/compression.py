@@ -0,0 +1,101 @@
+"""
+Content-encoding helpers shared by pre-compressed assets (logos) and the
+response compression middleware. Brotli is used when the `brotli` package is
+installed; gzip is always available.
+"""
+import gzip
+import zlib
+from typing import Dict, Iterable, Optional
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+BROTLI_AVAILABLE = brotli is not None
+
+# Preference order when the client accepts several encodings
+PREFERRED_ENCODINGS = ("br", "gzip")
+
+
+def gzip_bytes(data: bytes, level: int = 9) -> bytes:
+    # mtime=0: same input -> same bytes
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+def brotli_bytes(data: bytes, quality: int = 11) -> Optional[bytes]:
+    if not BROTLI_AVAILABLE:
+        return None
+    return brotli.compress(data, quality=quality)
+
+
+def compress_variants(data: bytes) -> Dict[str, bytes]:
+    """gzip/br encodings of `data`, keeping only those smaller than the original."""
+    variants = {"gzip": gzip_bytes(data), "br": brotli_bytes(data)}
+    return {name: body for name, body in variants.items() if body is not None and len(body) < len(data)}
+
+
+class StreamCompressor:
+    """
+    Incremental gzip/br encoder. compress(chunk, flush=True) returns bytes the
+    client can decode right away (sync flush), as streamed responses need.
+    """
+
+    def __init__(self, encoding: str, level: int = 6):
+        self.encoding = encoding
+        if encoding == "br":
+            # brotli quality 0-11; dynamic content favours speed
+            self._brotli = brotli.Compressor(quality=min(level, 5))
+        else:
+            self._brotli = None
+            self._zlib = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes, flush: bool = False) -> bytes:
+        if self._brotli:
+            out = self._brotli.process(data)
+            return out + self._brotli.flush() if flush else out
+        out = self._zlib.compress(data)
+        return out + self._zlib.flush(zlib.Z_SYNC_FLUSH) if flush else out
+
+    def finish(self) -> bytes:
+        if self._brotli:
+            return self._brotli.finish()
+        return self._zlib.flush(zlib.Z_FINISH)
+
+
+def compress_bytes(data: bytes, encoding: str, level: int = 6) -> bytes:
+    compressor = StreamCompressor(encoding, level)
+    return compressor.compress(data) + compressor.finish()
+
+
+def server_encodings() -> Iterable[str]:
+    """Encodings this process can produce on the fly."""
+    return PREFERRED_ENCODINGS if BROTLI_AVAILABLE else ("gzip",)
+
+
+def accepted_encodings(accept_encoding: str) -> Dict[str, float]:
+    """Accept-Encoding header -> {encoding: q}."""
+    accepted = {}
+    for part in (accept_encoding or "").lower().split(","):
+        name, _, params = part.strip().partition(";")
+        if not name:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name.strip()] = q
+    return accepted
+
+
+def choose_encoding(accept_encoding: str, available: Iterable[str]) -> Optional[str]:
+    """Best encoding among `available` the client accepts (None = identity)."""
+    accepted = accepted_encodings(accept_encoding)
+    available = set(available)
+    for name in PREFERRED_ENCODINGS:
+        if name in available and accepted.get(name, accepted.get("*", 0)) > 0:
+            return name
+    return None
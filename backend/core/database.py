@@ -18,6 +18,36 @@ def init_db():
             )
         ''')
         
+        # Migration: Tag executions started through an MCP server (idempotent)
+        try:
+            cursor.execute('ALTER TABLE executions ADD COLUMN IF NOT EXISTS mcp_id TEXT')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_executions_mcp_id ON executions (mcp_id, start_time)')
+        except Exception:
+            conn.rollback()
+        else:
+            conn.commit()
+        
+        # Migration: Tool id and image of each execution (hot image warmup)
+        try:
+            cursor.execute('ALTER TABLE executions ADD COLUMN IF NOT EXISTS tool_id TEXT')
+            cursor.execute('ALTER TABLE executions ADD COLUMN IF NOT EXISTS image TEXT')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_executions_tool_id ON executions (tool_id, start_time)')
+        except Exception:
+            conn.rollback()
+        else:
+            conn.commit()
+        
+        # Image pulls reported by the kubelet (cold start time per node)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS image_pulls (
+                event_uid TEXT PRIMARY KEY, image TEXT NOT NULL, node TEXT,
+                source TEXT, cached BOOLEAN DEFAULT FALSE, seconds REAL,
+                pulled_at TEXT NOT NULL
+            )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_image_pulls_image ON image_pulls (image, pulled_at)')
+        conn.commit()
+        
         # MCP Servers table
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS mcp_servers (
@@ -36,6 +66,29 @@ def init_db():
         else:
             conn.commit()
         
+        # Migration: Ensure rate_limits column exists (idempotent)
+        try:
+            cursor.execute('ALTER TABLE mcp_servers ADD COLUMN IF NOT EXISTS rate_limits TEXT DEFAULT \'{}\'')
+        except Exception:
+            conn.rollback()
+        else:
+            conn.commit()
+        
+        # MCP rate limiting: token buckets and concurrent execution leases
+        # (shared by all backend replicas)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS mcp_rate_buckets (
+                bucket_key TEXT PRIMARY KEY, tokens DOUBLE PRECISION NOT NULL,
+                updated_at DOUBLE PRECISION NOT NULL
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS mcp_execution_leases (
+                id TEXT PRIMARY KEY, mcp_id TEXT NOT NULL, tool_id TEXT,
+                acquired_at DOUBLE PRECISION NOT NULL, expires_at DOUBLE PRECISION NOT NULL
+            )
+        ''')
+        
         # MCP Connections table
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS mcp_connections (
@@ -62,6 +115,16 @@ def init_db():
             )
         ''')
         
+        # Migration: logo content hash (ETag) and encodings compressed once at upload (idempotent)
+        try:
+            cursor.execute('ALTER TABLE logos ADD COLUMN IF NOT EXISTS content_hash TEXT')
+            cursor.execute('ALTER TABLE logos ADD COLUMN IF NOT EXISTS svg_gzip BYTEA')
+            cursor.execute('ALTER TABLE logos ADD COLUMN IF NOT EXISTS svg_br BYTEA')
+        except Exception:
+            conn.rollback()
+        else:
+            conn.commit()
+        
         # Workspaces table
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS workspaces (
@@ -79,6 +142,15 @@ def init_db():
             )
         ''')
         
+        # Catalogue revisions: latest change per tool/workspace (cache invalidation + change feed)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS catalogue_changes (
+                revision BIGSERIAL PRIMARY KEY, entity_type TEXT NOT NULL, entity_id TEXT NOT NULL,
+                op TEXT NOT NULL, changed_at TEXT NOT NULL
+            )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_catalogue_changes_entity ON catalogue_changes (entity_type, entity_id)')
+        
         # Registry Config table
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS registry_config (
@@ -88,6 +160,17 @@ def init_db():
                 created_at TEXT NOT NULL, updated_at TEXT NOT NULL
             )
         ''')
+        
+        # Migration: Kaniko build cache settings (idempotent)
+        try:
+            cursor.execute('ALTER TABLE registry_config ADD COLUMN IF NOT EXISTS build_cache_enabled BOOLEAN DEFAULT TRUE')
+            cursor.execute('ALTER TABLE registry_config ADD COLUMN IF NOT EXISTS build_cache_repo TEXT')
+            cursor.execute('ALTER TABLE registry_config ADD COLUMN IF NOT EXISTS build_cache_ttl TEXT')
+            cursor.execute('ALTER TABLE registry_config ADD COLUMN IF NOT EXISTS build_cache_volume TEXT')
+        except Exception:
+            conn.rollback()
+        else:
+            conn.commit()
 
         # Build Jobs table
         cursor.execute('''
@@ -97,6 +180,55 @@ def init_db():
             )
         ''')
         
+        # Migration: Persistent build queue columns (idempotent)
+        try:
+            cursor.execute('ALTER TABLE build_jobs ADD COLUMN IF NOT EXISTS category TEXT')
+            cursor.execute('ALTER TABLE build_jobs ADD COLUMN IF NOT EXISTS docker_config TEXT')
+            cursor.execute('ALTER TABLE build_jobs ADD COLUMN IF NOT EXISTS build_hash TEXT')
+            cursor.execute('ALTER TABLE build_jobs ADD COLUMN IF NOT EXISTS priority INTEGER DEFAULT 0')
+            cursor.execute('ALTER TABLE build_jobs ADD COLUMN IF NOT EXISTS worker_id TEXT')
+            cursor.execute('ALTER TABLE build_jobs ADD COLUMN IF NOT EXISTS heartbeat TEXT')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_build_jobs_queue ON build_jobs (status, priority, created_at)')
+            cursor.execute('ALTER TABLE build_jobs ADD COLUMN IF NOT EXISTS cache_stats TEXT')
+        except Exception:
+            conn.rollback()
+        else:
+            conn.commit()
+        
+        # Image build index: content hash of the build inputs -> pushed image/digest
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS image_builds (
+                build_hash TEXT PRIMARY KEY, tool_id TEXT NOT NULL, image_tag TEXT NOT NULL,
+                digest TEXT, created_at TEXT NOT NULL, updated_at TEXT NOT NULL
+            )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_image_builds_tool ON image_builds (tool_id, updated_at)')
+        
+        # Shared platform base images (frequently shared packages, one per upstream base image)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS platform_base_images (
+                base_image TEXT PRIMARY KEY, tool_id TEXT NOT NULL, apt_packages TEXT,
+                pip_packages TEXT, build_hash TEXT NOT NULL, tool_count INTEGER DEFAULT 0,
+                updated_at TEXT NOT NULL
+            )
+        ''')
+        
+        # Kaniko build contexts, readable by every worker/replica serving /api/builds/context
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS build_contexts (
+                job_id TEXT PRIMARY KEY, sha256 TEXT NOT NULL, data BYTEA NOT NULL,
+                expires_at DOUBLE PRECISION NOT NULL
+            )
+        ''')
+        
+        # Last uncached duration of each build step (used to estimate cache time saved)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS build_step_timings (
+                step_key TEXT PRIMARY KEY, command TEXT NOT NULL,
+                seconds DOUBLE PRECISION NOT NULL, updated_at TEXT NOT NULL
+            )
+        ''')
+        
         conn.commit()
     except Exception as e:
         logger.error("Error initializing database", exc_info=True)
@@ -114,6 +246,8 @@ from core.repositories.tool_repo import *
 from core.repositories.registry_repo import *
 from core.repositories.mcp_repo import *
 from core.repositories.platform_stats_repo import *
+from core.repositories.rate_limit_repo import *
+from core.repositories.catalogue_repo import *
 
 # Initialize DB on import if possible
 try:
@@ -0,0 +1,85 @@
+"""
+JSON encoding for API responses and NDJSON/SSE streams.
+The backend is chosen once at import: orjson, then msgspec, then the stdlib
+`json` module. JSON_BACKEND=stdlib (or orjson/msgspec) forces a choice.
+Output is compact UTF-8, like FastAPI's JSONResponse.
+"""
+import datetime
+import decimal
+import enum
+import json
+import os
+import uuid
+from typing import Any
+
+_requested = os.getenv("JSON_BACKEND", "auto").lower()
+
+orjson = None
+msgspec = None
+if _requested in ("auto", "orjson"):
+    try:
+        import orjson
+    except ImportError:  # optional dependency
+        orjson = None
+if orjson is None and _requested in ("auto", "msgspec"):
+    try:
+        import msgspec
+    except ImportError:  # optional dependency
+        msgspec = None
+
+BACKEND = "orjson" if orjson else "msgspec" if msgspec else "stdlib"
+
+
+def _default(obj: Any) -> Any:
+    """Types the backends do not encode natively (mirrors jsonable_encoder)."""
+    if isinstance(obj, (datetime.datetime, datetime.date, datetime.time)):
+        return obj.isoformat()
+    if isinstance(obj, decimal.Decimal):
+        return int(obj) if obj == obj.to_integral_value() else float(obj)
+    if isinstance(obj, uuid.UUID):
+        return str(obj)
+    if isinstance(obj, enum.Enum):
+        return obj.value
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    if isinstance(obj, (bytes, bytearray, memoryview)):
+        return bytes(obj).decode("utf-8", errors="replace")
+    if isinstance(obj, dict):
+        return dict(obj)
+    if hasattr(obj, "dict"):  # pydantic models
+        return obj.dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+if orjson:
+    _OPTIONS = orjson.OPT_NON_STR_KEYS
+    _NDJSON_OPTIONS = _OPTIONS | orjson.OPT_APPEND_NEWLINE
+
+    def dumps(obj: Any) -> bytes:
+        return orjson.dumps(obj, default=_default, option=_OPTIONS)
+
+    def ndjson_line(obj: Any) -> bytes:
+        return orjson.dumps(obj, default=_default, option=_NDJSON_OPTIONS)
+
+elif msgspec:
+    _encoder = msgspec.json.Encoder(enc_hook=_default)
+
+    def dumps(obj: Any) -> bytes:
+        return _encoder.encode(obj)
+
+    def ndjson_line(obj: Any) -> bytes:
+        return _encoder.encode(obj) + b"\n"
+
+else:
+    _stdlib_encoder = json.JSONEncoder(default=_default, ensure_ascii=False, separators=(",", ":"))
+
+    def dumps(obj: Any) -> bytes:
+        return _stdlib_encoder.encode(obj).encode("utf-8")
+
+    def ndjson_line(obj: Any) -> bytes:
+        return (_stdlib_encoder.encode(obj) + "\n").encode("utf-8")
+
+
+def dumps_str(obj: Any) -> str:
+    """Same as dumps() for producers that need text (SSE `data:` fields)."""
+    return dumps(obj).decode("utf-8")
@@ -35,3 +35,8 @@ def get_core_client() -> client.CoreV1Api:
     """Get Kubernetes Core API client"""
     setup_kubernetes()
     return client.CoreV1Api()
+
+def get_apps_client() -> client.AppsV1Api:
+    """Get Kubernetes Apps API client"""
+    setup_kubernetes()
+    return client.AppsV1Api()
@@ -1,10 +1,14 @@
+import atexit
 import logging
+import queue
 import sys
 import os
-import json
 import contextvars
-from datetime import datetime
-from logging.handlers import RotatingFileHandler
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+from core.json_codec import dumps_str
 
 # Configuração de diretório de logs
 LOG_DIR = "logs"
@@ -19,13 +23,52 @@ request_id_ctx = contextvars.ContextVar("request_id", default=None)
 # Habilitar JSON por padrão se não estiver em ambiente de dev
 USE_JSON_LOGS = os.getenv("USE_JSON_LOGS", "true").lower() == "true"
 
+# Registros aguardando a thread de escrita (cheia: novos registros são descartados)
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+
+# Nível mínimo (DEBUG só quando pedido; logger.debug vira um teste de nível barato)
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+
+# Registros repetidos (mesma linha e mensagem): no máximo N por janela de N segundos (0 desliga)
+LOG_RATE_LIMIT_BURST = int(os.getenv("LOG_RATE_LIMIT_BURST", "50"))
+LOG_RATE_LIMIT_WINDOW_SECONDS = float(os.getenv("LOG_RATE_LIMIT_WINDOW_SECONDS", "10"))
+
 class JSONFormatter(logging.Formatter):
-    """Formatador de logs em JSON para nível Enterprise"""
+    """
+    Formatador de logs em JSON para nível Enterprise.
+    Cada registro é formatado uma única vez (a linha fica no registro e é
+    reaproveitada pelos demais handlers); os campos fixos por logger/nível e o
+    prefixo do timestamp (por segundo) ficam em cache.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._static_fields = {}
+        self._second = (None, "")
+
+    def _static(self, record) -> dict:
+        key = (record.name, record.levelno)
+        fields = self._static_fields.get(key)
+        if fields is None:
+            fields = self._static_fields[key] = {"level": record.levelname, "logger": record.name}
+        return fields
+
+    def _timestamp(self, created: float) -> str:
+        second = int(created)
+        cached_second, prefix = self._second
+        if second != cached_second:
+            prefix = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(second))
+            self._second = (second, prefix)
+        return f"{prefix}.{int((created - second) * 1e6):06d}Z"
+
     def format(self, record):
+        cached = record.__dict__.get("_json_line")
+        if cached and cached[0] is self:
+            return cached[1]
+
         log_record = {
-            "timestamp": datetime.utcnow().isoformat() + "Z",
-            "level": record.levelname,
-            "logger": record.name,
+            "timestamp": self._timestamp(record.created),
+            **self._static(record),
             "module": record.module,
             "function": record.funcName,
             "line": record.lineno,
@@ -46,16 +89,96 @@ class JSONFormatter(logging.Formatter):
         # Se houver exceção, formatar o traceback
         if record.exc_info:
             log_record["exception"] = self.formatException(record.exc_info)
-            
-        return json.dumps(log_record)
+        elif record.exc_text:
+            log_record["exception"] = record.exc_text
 
-def setup_logger(name: str):
-    """Configura um logger estruturado (JSON ou Texto)"""
-    logger = logging.getLogger(name)
-    logger.setLevel(logging.DEBUG)
-    
-    if logger.handlers:
-        return logger
+        # Registros iguais descartados pelo RateLimitFilter desde o último emitido
+        suppressed = record.__dict__.get("suppressed")
+        if suppressed:
+            log_record["suppressed"] = suppressed
+
+        line = dumps_str(log_record)
+        record._json_line = (self, line)
+        return line
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Limita registros repetitivos: até `burst` registros por janela para o mesmo
+    ponto de chamada, mensagem e extra_fields (registros com contexto
+    diferente, ex.: outro job_id, não se descartam entre si). O primeiro registro da janela seguinte leva o
+    número de descartados em `suppressed`. extra={"rate_limit": False} isenta
+    o registro (ex.: access log, que já tem amostragem própria).
+    """
+    MAX_KEYS = 1000
+
+    def __init__(self, burst: int, window_seconds: float):
+        super().__init__()
+        self.burst = burst
+        self.window = window_seconds
+        self._lock = threading.Lock()
+        self._buckets = {}  # key -> [início da janela, emitidos, descartados]
+
+    def filter(self, record) -> bool:
+        if self.burst <= 0 or not getattr(record, "rate_limit", True) or not isinstance(record.msg, str):
+            return True
+        fields = getattr(record, "extra_fields", None)
+        key = (record.name, record.levelno, record.pathname, record.lineno, record.msg,
+               repr(sorted(fields.items())) if isinstance(fields, dict) else None)
+        now = record.created
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None or now - bucket[0] >= self.window:
+                if bucket and bucket[2]:
+                    record.suppressed = bucket[2]
+                if bucket is None and len(self._buckets) >= self.MAX_KEYS:
+                    self._buckets = {k: b for k, b in self._buckets.items() if now - b[0] < self.window}
+                self._buckets[key] = [now, 1, 0]
+                return True
+            if bucket[1] < self.burst:
+                bucket[1] += 1
+                return True
+            bucket[2] += 1
+            return False
+
+class ContextQueueHandler(QueueHandler):
+    """
+    Enfileira o registro sem formatá-lo: a formatação e a escrita (stdout e
+    arquivo) acontecem na thread do QueueListener. Aqui só se resolve o que
+    depende da thread atual (mensagem, Request ID da ContextVar, traceback).
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        record.message = record.getMessage()
+        record.msg, record.args = record.message, None
+        rid = request_id_ctx.get()
+        if rid:
+            record.request_id = rid
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+_queue_handler = None
+_listener = None
+
+
+def _create_queue_handler() -> ContextQueueHandler:
+    """Handlers reais (console e arquivo) atrás de uma fila com escrita em background"""
+    global _queue_handler, _listener
+    if _queue_handler:
+        return _queue_handler
 
     # Determinar o formatador
     if USE_JSON_LOGS:
@@ -68,15 +191,39 @@ def setup_logger(name: str):
     # Handler para console (stdout)
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setFormatter(formatter)
-    logger.addHandler(console_handler)
 
     # Handler para arquivo (com rotação)
     file_handler = RotatingFileHandler(
         LOG_FILE, maxBytes=10*1024*1024, backupCount=5
     )
     file_handler.setFormatter(formatter)
-    logger.addHandler(file_handler)
 
+    log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    _queue_handler = ContextQueueHandler(log_queue)
+    _queue_handler.addFilter(RateLimitFilter(LOG_RATE_LIMIT_BURST, LOG_RATE_LIMIT_WINDOW_SECONDS))
+    _listener = QueueListener(log_queue, console_handler, file_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_log_writer)
+    return _queue_handler
+
+
+def stop_log_writer():
+    """Esvazia a fila e para a thread de escrita (shutdown do app / saída do processo)"""
+    global _listener
+    if _listener:
+        listener, _listener = _listener, None
+        listener.stop()
+
+
+def setup_logger(name: str):
+    """Configura um logger estruturado (JSON ou Texto)"""
+    logger = logging.getLogger(name)
+    logger.setLevel(LOG_LEVEL)
+    
+    if logger.handlers:
+        return logger
+
+    logger.addHandler(_create_queue_handler())
     return logger
 
 # Logger principal
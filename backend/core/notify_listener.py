@@ -0,0 +1,71 @@
+"""
+Postgres LISTEN helper: one dedicated connection per channel and process,
+reconnecting on errors. Notifications are handed to a callback on the
+listener thread; `on_connect` runs after every (re)connect so consumers can
+catch up on what they missed while disconnected.
+"""
+import select
+import threading
+import time
+from typing import Callable, Optional
+
+from core import db_base
+from core.logger import logger
+
+
+class NotifyListener:
+    def __init__(self, channel: str, on_notify: Callable[[str], None],
+                 on_connect: Optional[Callable[[], None]] = None, reconnect_delay: float = 2.0):
+        self.channel = channel
+        self.on_notify = on_notify
+        self.on_connect = on_connect
+        self.reconnect_delay = reconnect_delay
+        self.listening = False
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+
+    def start(self):
+        with self._lock:
+            if self._thread:
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._listen, name=f"listen-{self.channel}", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        with self._lock:
+            self._thread = None
+
+    def _listen(self):
+        while not self._stop.is_set():
+            conn = None
+            try:
+                conn = db_base.get_db_connection()
+                conn.autocommit = True
+                conn.cursor().execute(f"LISTEN {self.channel}")
+                self.listening = True
+                if self.on_connect:
+                    self.on_connect()
+                while not self._stop.is_set():
+                    if select.select([conn], [], [], 5)[0]:
+                        conn.poll()
+                        payloads = [notify.payload for notify in conn.notifies]
+                        conn.notifies.clear()
+                        for payload in payloads:
+                            try:
+                                self.on_notify(payload)
+                            except Exception:
+                                logger.warning("Notification handler failed", exc_info=True,
+                                               extra={"extra_fields": {"channel": self.channel}})
+            except Exception:
+                logger.warning("Postgres listener disconnected", exc_info=True, extra={"extra_fields": {"channel": self.channel}})
+                time.sleep(self.reconnect_delay)
+            finally:
+                self.listening = False
+                if conn is not None:
+                    try:
+                        conn.close()
+                    except Exception:
+                        pass
@@ -1,9 +1,13 @@
+import json
 import uuid
 from datetime import datetime
-from typing import Dict
+from typing import Dict, List, Optional, Tuple
 import psycopg2.extras
 from core.db_base import get_db_connection
 
+# NOTIFY channel signalled (payload: job id) on every log append or status change
+BUILD_EVENTS_CHANNEL = "build_events"
+
 def create_build_job(tool_id: str) -> str:
     """Create a new build job and return its ID"""
     conn = get_db_connection()
@@ -22,6 +26,126 @@ def create_build_job(tool_id: str) -> str:
     finally:
         conn.close()
 
+def enqueue_build_job(tool_id: str, category: str, docker_config: Dict,
+                      build_hash: str = None, priority: int = 0) -> Tuple[str, bool]:
+    """
+    Add a build to the persistent queue.
+    A PENDING job for the same tool and build hash is reused (its priority raised
+    if needed). Returns (job_id, collapsed).
+    """
+    conn = get_db_connection()
+    try:
+        c = conn.cursor()
+        # Serializes enqueues of the same tool across replicas
+        c.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", (f"build-queue:{tool_id}",))
+        c.execute('''
+            SELECT id FROM build_jobs
+            WHERE tool_id = %s AND status = 'PENDING' AND build_hash IS NOT DISTINCT FROM %s
+            ORDER BY created_at ASC LIMIT 1
+        ''', (tool_id, build_hash))
+        row = c.fetchone()
+        now = datetime.utcnow().isoformat()
+        
+        if row:
+            job_id = row[0]
+            c.execute('''
+                UPDATE build_jobs SET priority = GREATEST(COALESCE(priority, 0), %s), updated_at = %s
+                WHERE id = %s
+            ''', (priority, now, job_id))
+            conn.commit()
+            return job_id, True
+        
+        job_id = str(uuid.uuid4())
+        c.execute('''
+            INSERT INTO build_jobs (id, tool_id, status, logs, created_at, updated_at,
+                                    category, docker_config, build_hash, priority)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+        ''', (job_id, tool_id, "PENDING", "", now, now, category, json.dumps(docker_config), build_hash, priority))
+        conn.commit()
+        return job_id, False
+    finally:
+        conn.close()
+
+def claim_next_build_job(worker_id: str) -> Optional[Dict]:
+    """Atomically move the highest-priority PENDING job to RUNNING for this worker"""
+    conn = get_db_connection()
+    try:
+        c = conn.cursor(cursor_factory=psycopg2.extras.DictCursor)
+        now = datetime.utcnow().isoformat()
+        c.execute('''
+            UPDATE build_jobs SET status = 'RUNNING', worker_id = %s, heartbeat = %s, updated_at = %s
+            WHERE id = (
+                SELECT id FROM build_jobs
+                WHERE status = 'PENDING' AND docker_config IS NOT NULL
+                ORDER BY priority DESC, created_at ASC
+                LIMIT 1 FOR UPDATE SKIP LOCKED
+            )
+            RETURNING *
+        ''', (worker_id, now, now))
+        row = c.fetchone()
+        conn.commit()
+        if not row:
+            return None
+        job = dict(row)
+        job['docker_config'] = json.loads(job['docker_config']) if job.get('docker_config') else {}
+        return job
+    finally:
+        conn.close()
+
+def heartbeat_build_jobs(job_ids: List[str]):
+    """Refresh the heartbeat of builds running on this worker"""
+    if not job_ids:
+        return
+    conn = get_db_connection()
+    try:
+        c = conn.cursor()
+        c.execute('''
+            UPDATE build_jobs SET heartbeat = %s
+            WHERE id = ANY(%s) AND status = 'RUNNING'
+        ''', (datetime.utcnow().isoformat(), list(job_ids)))
+        conn.commit()
+    finally:
+        conn.close()
+
+def requeue_stale_build_jobs(cutoff: str) -> int:
+    """Return RUNNING jobs whose worker stopped heartbeating (e.g. backend restart) to the queue"""
+    conn = get_db_connection()
+    try:
+        c = conn.cursor()
+        c.execute('''
+            UPDATE build_jobs
+            SET status = 'PENDING', worker_id = NULL,
+                logs = COALESCE(logs, '') || %s
+            WHERE status = 'RUNNING' AND docker_config IS NOT NULL AND heartbeat < %s
+        ''', ("\n♻️  Build worker lost, job re-queued.\n", cutoff))
+        count = c.rowcount
+        conn.commit()
+        return count
+    finally:
+        conn.close()
+
+def count_build_jobs_by_status() -> Dict[str, int]:
+    """Queue depth per status"""
+    conn = get_db_connection()
+    try:
+        c = conn.cursor()
+        c.execute('SELECT status, COUNT(*) FROM build_jobs GROUP BY status')
+        return {status: count for status, count in c.fetchall()}
+    finally:
+        conn.close()
+
+def get_build_job_statuses(job_ids: List[str]) -> Dict[str, str]:
+    """Status of several build jobs in one query"""
+    if not job_ids:
+        return {}
+    conn = get_db_connection()
+    try:
+        c = conn.cursor()
+        c.execute('SELECT id, status FROM build_jobs WHERE id = ANY(%s)', (list(job_ids),))
+        return {job_id: status for job_id, status in c.fetchall()}
+    finally:
+        conn.close()
+
 def update_build_job(job_id: str, status: str, image_tag: str = None):
     """Update job status and optionally image tag"""
     conn = get_db_connection()
@@ -40,6 +164,7 @@ def update_build_job(job_id: str, status: str, image_tag: str = None):
         params.append(job_id)
         
         c.execute(query, tuple(params))
+        c.execute('SELECT pg_notify(%s, %s)', (BUILD_EVENTS_CHANNEL, job_id))
         conn.commit()
     finally:
         conn.close()
@@ -54,10 +179,39 @@ def append_build_logs(job_id: str, new_logs: str):
             SET logs = COALESCE(logs, '') || %s 
             WHERE id = %s
         ''', (new_logs, job_id))
+        c.execute('SELECT pg_notify(%s, %s)', (BUILD_EVENTS_CHANNEL, job_id))
         conn.commit()
     finally:
         conn.close()
 
+def read_build_logs(job_id: str, offset: int = 0, length: Optional[int] = None) -> Optional[Dict]:
+    """
+    A build job without its full logs: status fields and a slice of the logs (character offsets).
+    Only the requested slice leaves the database.
+    Returns None if the job does not exist.
+    """
+    conn = get_db_connection()
+    try:
+        c = conn.cursor(cursor_factory=psycopg2.extras.DictCursor)
+        if length is None:
+            c.execute('''
+                SELECT id, tool_id, status, created_at, updated_at, image_tag, cache_stats,
+                       COALESCE(LENGTH(logs), 0) AS total,
+                       COALESCE(SUBSTR(logs, %s), '') AS chunk
+                FROM build_jobs WHERE id = %s
+            ''', (offset + 1, job_id))
+        else:
+            c.execute('''
+                SELECT id, tool_id, status, created_at, updated_at, image_tag, cache_stats,
+                       COALESCE(LENGTH(logs), 0) AS total,
+                       COALESCE(SUBSTR(logs, %s, %s), '') AS chunk
+                FROM build_jobs WHERE id = %s
+            ''', (offset + 1, length, job_id))
+        row = c.fetchone()
+        return dict(row) if row else None
+    finally:
+        conn.close()
+
 def get_build_job(job_id: str) -> Dict:
     """Get build job details"""
     conn = get_db_connection()
@@ -68,3 +222,202 @@ def get_build_job(job_id: str) -> Dict:
         return dict(row) if row else None
     finally:
         conn.close()
+
+def update_build_cache_stats(job_id: str, stats: Dict):
+    """Store per-build Kaniko cache statistics"""
+    conn = get_db_connection()
+    try:
+        c = conn.cursor()
+        c.execute('UPDATE build_jobs SET cache_stats = %s WHERE id = %s', (json.dumps(stats), job_id))
+        conn.commit()
+    finally:
+        conn.close()
+
+def get_build_step_timings(step_keys: List[str]) -> Dict[str, float]:
+    """Last uncached duration (seconds) per build step key"""
+    if not step_keys:
+        return {}
+    conn = get_db_connection()
+    try:
+        c = conn.cursor()
+        c.execute('SELECT step_key, seconds FROM build_step_timings WHERE step_key = ANY(%s)', (list(step_keys),))
+        return {key: seconds for key, seconds in c.fetchall()}
+    finally:
+        conn.close()
+
+def save_build_step_timings(timings: Dict[str, Dict]):
+    """Upsert uncached step durations: {step_key: {'command': ..., 'seconds': ...}}"""
+    if not timings:
+        return
+    conn = get_db_connection()
+    try:
+        c = conn.cursor()
+        now = datetime.utcnow().isoformat()
+        psycopg2.extras.execute_values(c, '''
+            INSERT INTO build_step_timings (step_key, command, seconds, updated_at) VALUES %s
+            ON CONFLICT (step_key) DO UPDATE SET seconds = EXCLUDED.seconds, updated_at = EXCLUDED.updated_at
+        ''', [(key, t['command'][:2000], t['seconds'], now) for key, t in timings.items()])
+        conn.commit()
+    finally:
+        conn.close()
+
+# ============================================================================
+# IMAGE BUILD INDEX (content hash -> pushed image)
+# ============================================================================
+
+def get_image_build(build_hash: str) -> Optional[Dict]:
+    """Get the pushed image recorded for a build hash"""
+    conn = get_db_connection()
+    try:
+        c = conn.cursor(cursor_factory=psycopg2.extras.DictCursor)
+        c.execute('SELECT * FROM image_builds WHERE build_hash = %s', (build_hash,))
+        row = c.fetchone()
+        return dict(row) if row else None
+    finally:
+        conn.close()
+
+def save_image_build(build_hash: str, tool_id: str, image_tag: str, digest: str = None):
+    """Record (or refresh) a pushed image; the most recently saved row is the tool's current image"""
+    conn = get_db_connection()
+    try:
+        c = conn.cursor()
+        now = datetime.utcnow().isoformat()
+        c.execute('''
+            INSERT INTO image_builds (build_hash, tool_id, image_tag, digest, created_at, updated_at)
+            VALUES (%s, %s, %s, %s, %s, %s)
+            ON CONFLICT (build_hash) DO UPDATE SET
+                tool_id = EXCLUDED.tool_id,
+                image_tag = EXCLUDED.image_tag,
+                digest = COALESCE(EXCLUDED.digest, image_builds.digest),
+                updated_at = EXCLUDED.updated_at
+        ''', (build_hash, tool_id, image_tag, digest, now, now))
+        conn.commit()
+    finally:
+        conn.close()
+
+def get_current_image_build(tool_id: str) -> Optional[Dict]:
+    """Get the image of the latest successful (or reused) build of a tool"""
+    conn = get_db_connection()
+    try:
+        c = conn.cursor(cursor_factory=psycopg2.extras.DictCursor)
+        c.execute('''
+            SELECT * FROM image_builds WHERE tool_id = %s
+            ORDER BY updated_at DESC LIMIT 1
+        ''', (tool_id,))
+        row = c.fetchone()
+        return dict(row) if row else None
+    finally:
+        conn.close()
+
+def list_current_image_builds() -> List[Dict]:
+    """Current image of every tool (latest recorded build per tool)"""
+    conn = get_db_connection()
+    try:
+        c = conn.cursor(cursor_factory=psycopg2.extras.DictCursor)
+        c.execute('''
+            SELECT DISTINCT ON (tool_id) * FROM image_builds
+            ORDER BY tool_id, updated_at DESC
+        ''')
+        return [dict(row) for row in c.fetchall()]
+    finally:
+        conn.close()
+
+# ============================================================================
+# PLATFORM BASE IMAGES
+# ============================================================================
+
+def _platform_base_row(row) -> Dict:
+    base = dict(row)
+    base['apt_packages'] = json.loads(base['apt_packages']) if base.get('apt_packages') else []
+    base['pip_packages'] = json.loads(base['pip_packages']) if base.get('pip_packages') else []
+    return base
+
+def save_platform_base(base_image: str, tool_id: str, apt_packages: List[str],
+                       pip_packages: List[str], build_hash: str, tool_count: int):
+    """Create or replace the shared base definition for an upstream base image"""
+    conn = get_db_connection()
+    try:
+        c = conn.cursor()
+        c.execute('''
+            INSERT INTO platform_base_images (base_image, tool_id, apt_packages, pip_packages, build_hash, tool_count, updated_at)
+            VALUES (%s, %s, %s, %s, %s, %s, %s)
+            ON CONFLICT (base_image) DO UPDATE SET
+                tool_id = EXCLUDED.tool_id, apt_packages = EXCLUDED.apt_packages,
+                pip_packages = EXCLUDED.pip_packages, build_hash = EXCLUDED.build_hash,
+                tool_count = EXCLUDED.tool_count, updated_at = EXCLUDED.updated_at
+        ''', (base_image, tool_id, json.dumps(apt_packages), json.dumps(pip_packages),
+              build_hash, tool_count, datetime.utcnow().isoformat()))
+        conn.commit()
+    finally:
+        conn.close()
+
+def get_platform_base(base_image: str) -> Optional[Dict]:
+    """Shared base definition joined with its built image (image_tag/digest are NULL until built)"""
+    conn = get_db_connection()
+    try:
+        c = conn.cursor(cursor_factory=psycopg2.extras.DictCursor)
+        c.execute('''
+            SELECT p.*, b.image_tag, b.digest FROM platform_base_images p
+            LEFT JOIN image_builds b ON b.build_hash = p.build_hash
+            WHERE p.base_image = %s
+        ''', (base_image,))
+        row = c.fetchone()
+        return _platform_base_row(row) if row else None
+    finally:
+        conn.close()
+
+def list_platform_bases() -> List[Dict]:
+    conn = get_db_connection()
+    try:
+        c = conn.cursor(cursor_factory=psycopg2.extras.DictCursor)
+        c.execute('''
+            SELECT p.*, b.image_tag, b.digest FROM platform_base_images p
+            LEFT JOIN image_builds b ON b.build_hash = p.build_hash
+            ORDER BY p.base_image
+        ''')
+        return [_platform_base_row(row) for row in c.fetchall()]
+    finally:
+        conn.close()
+
+# ============================================================================
+# BUILD CONTEXTS (tar.gz served to the Kaniko init container)
+# ============================================================================
+
+def save_build_context(job_id: str, sha256: str, data: bytes, ttl_seconds: float):
+    """Store a job's build context for every backend process; expired contexts are purged here"""
+    conn = get_db_connection()
+    try:
+        c = conn.cursor()
+        c.execute('DELETE FROM build_contexts WHERE expires_at < EXTRACT(EPOCH FROM clock_timestamp())')
+        c.execute('''
+            INSERT INTO build_contexts (job_id, sha256, data, expires_at)
+            VALUES (%s, %s, %s, EXTRACT(EPOCH FROM clock_timestamp()) + %s)
+            ON CONFLICT (job_id) DO UPDATE SET
+                sha256 = EXCLUDED.sha256, data = EXCLUDED.data, expires_at = EXCLUDED.expires_at
+        ''', (job_id, sha256, data, ttl_seconds))
+        conn.commit()
+    finally:
+        conn.close()
+
+def get_build_context(job_id: str) -> Optional[Tuple[bytes, str]]:
+    """(data, sha256) of a job's unexpired build context"""
+    conn = get_db_connection()
+    try:
+        c = conn.cursor()
+        c.execute('''
+            SELECT data, sha256 FROM build_contexts
+            WHERE job_id = %s AND expires_at >= EXTRACT(EPOCH FROM clock_timestamp())
+        ''', (job_id,))
+        row = c.fetchone()
+        return (bytes(row[0]), row[1]) if row else None
+    finally:
+        conn.close()
+
+def delete_build_context(job_id: str):
+    conn = get_db_connection()
+    try:
+        c = conn.cursor()
+        c.execute('DELETE FROM build_contexts WHERE job_id = %s', (job_id,))
+        conn.commit()
+    finally:
+        conn.close()
@@ -0,0 +1,64 @@
+import json
+from datetime import datetime
+from typing import Dict, List
+import psycopg2.extras
+from core.db_base import get_db_connection
+
+# NOTIFY channel signalled on every tool/workspace change. Payload: revision,
+# entity_type, entity_id, op for one entity; revision and since (read the
+# changes after it) for a batch
+CATALOGUE_CHANNEL = "catalogue_changes"
+
+def record_catalogue_change(cursor, entity_type: str, entity_id: str, op: str = "upsert") -> int:
+    """
+    Bump the catalogue revision for one entity inside the caller's transaction.
+    Only the latest change per entity is kept, so the table stays as small as
+    the catalogue. The NOTIFY is delivered when the transaction commits.
+    """
+    return record_catalogue_changes(cursor, entity_type, [entity_id], op)
+
+def record_catalogue_changes(cursor, entity_type: str, entity_ids: List[str], op: str = "upsert") -> int:
+    """
+    Batch form of record_catalogue_change: one NOTIFY for all entities.
+    Revisions come from a sequence at insert time, so writers are serialized
+    until commit: a reader that sees revision N never misses an earlier one
+    still in flight.
+    """
+    entity_ids = list(dict.fromkeys(entity_ids))
+    if not entity_ids:
+        return 0
+    cursor.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", (CATALOGUE_CHANNEL,))
+    now = datetime.utcnow().isoformat()
+    cursor.execute('DELETE FROM catalogue_changes WHERE entity_type = %s AND entity_id = ANY(%s)', (entity_type, entity_ids))
+    revisions = [row[0] for row in psycopg2.extras.execute_values(cursor, '''
+        INSERT INTO catalogue_changes (entity_type, entity_id, op, changed_at) VALUES %s RETURNING revision
+    ''', [(entity_type, entity_id, op, now) for entity_id in entity_ids], fetch=True)]
+    if len(entity_ids) == 1:
+        payload = {"revision": revisions[0], "entity_type": entity_type, "entity_id": entity_ids[0], "op": op}
+    else:
+        payload = {"revision": max(revisions), "since": min(revisions) - 1}
+    cursor.execute('SELECT pg_notify(%s, %s)', (CATALOGUE_CHANNEL, json.dumps(payload)))
+    return max(revisions)
+
+def get_catalogue_revision() -> int:
+    """Current catalogue version stamp (0 before the first change)."""
+    conn = get_db_connection()
+    try:
+        c = conn.cursor()
+        c.execute('SELECT COALESCE(MAX(revision), 0) FROM catalogue_changes')
+        return c.fetchone()[0]
+    finally:
+        conn.close()
+
+def get_catalogue_changes(since: int = 0, limit: int = 1000) -> List[Dict]:
+    """Latest change of every entity modified after `since`, oldest first."""
+    conn = get_db_connection()
+    try:
+        c = conn.cursor(cursor_factory=psycopg2.extras.DictCursor)
+        c.execute('''
+            SELECT revision, entity_type, entity_id, op, changed_at FROM catalogue_changes
+            WHERE revision > %s ORDER BY revision ASC LIMIT %s
+        ''', (since, limit))
+        return [dict(row) for row in c.fetchall()]
+    finally:
+        conn.close()
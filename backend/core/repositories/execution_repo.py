@@ -4,7 +4,7 @@ from typing import List, Dict, Optional
 import psycopg2.extras
 from core.db_base import get_db_connection
 
-def create_execution(id: str, tool_name: str, tool_path: str, arguments: Dict, status: str = "running"):
+def create_execution(id: str, tool_name: str, tool_path: str, arguments: Dict, status: str = "running", mcp_id: Optional[str] = None):
     conn = get_db_connection()
     try:
         c = conn.cursor()
@@ -13,8 +13,8 @@ def create_execution(id: str, tool_name: str, tool_path: str, arguments: Dict, s
         target = arguments.get("target") or arguments.get("url") or arguments.get("ip") or arguments.get("domain") or ""
         
         c.execute('''
-            INSERT INTO executions (id, tool_name, tool_path, arguments, target, status, start_time, logs, result)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+            INSERT INTO executions (id, tool_name, tool_path, arguments, target, status, start_time, logs, result, mcp_id)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
         ''', (
             id, 
             tool_name, 
@@ -24,7 +24,8 @@ def create_execution(id: str, tool_name: str, tool_path: str, arguments: Dict, s
             status, 
             datetime.utcnow().isoformat(), 
             "", 
-            ""
+            "",
+            mcp_id
         ))
         conn.commit()
     finally:
@@ -62,6 +63,67 @@ def update_execution(id: str, status: str = None, logs: str = None, result: str
     finally:
         conn.close()
     
+def set_execution_image(id: str, tool_id: Optional[str], image: str):
+    """Records which tool image an execution ran (no-op for ad-hoc runs without a record)"""
+    conn = get_db_connection()
+    try:
+        c = conn.cursor()
+        c.execute('UPDATE executions SET tool_id = %s, image = %s WHERE id = %s', (tool_id, image, id))
+        conn.commit()
+    finally:
+        conn.close()
+
+def get_hot_tools(since: str, limit: int) -> List[Dict]:
+    """Most executed tools since `since` (ISO timestamp)"""
+    conn = get_db_connection()
+    try:
+        c = conn.cursor(cursor_factory=psycopg2.extras.DictCursor)
+        c.execute('''
+            SELECT tool_id, COUNT(*) AS runs FROM executions
+            WHERE tool_id IS NOT NULL AND start_time >= %s
+            GROUP BY tool_id ORDER BY runs DESC, tool_id LIMIT %s
+        ''', (since, limit))
+        return [dict(row) for row in c.fetchall()]
+    finally:
+        conn.close()
+
+def save_image_pulls(pulls: List[Dict]) -> int:
+    """Stores kubelet pull events (idempotent per event uid); returns rows inserted"""
+    if not pulls:
+        return 0
+    conn = get_db_connection()
+    try:
+        c = conn.cursor()
+        psycopg2.extras.execute_values(c, '''
+            INSERT INTO image_pulls (event_uid, image, node, source, cached, seconds, pulled_at)
+            VALUES %s ON CONFLICT (event_uid) DO NOTHING
+        ''', [(p['event_uid'], p['image'], p.get('node'), p.get('source'), p.get('cached', False),
+               p.get('seconds'), p['pulled_at']) for p in pulls])
+        inserted = c.rowcount
+        conn.commit()
+        return inserted
+    finally:
+        conn.close()
+
+def get_image_pull_stats(since: str) -> List[Dict]:
+    """Per image and node: cold pulls, average/max pull seconds and warm starts"""
+    conn = get_db_connection()
+    try:
+        c = conn.cursor(cursor_factory=psycopg2.extras.DictCursor)
+        c.execute('''
+            SELECT image, node,
+                   COUNT(*) FILTER (WHERE NOT cached) AS cold_pulls,
+                   COUNT(*) FILTER (WHERE cached) AS warm_starts,
+                   AVG(seconds) FILTER (WHERE NOT cached) AS avg_pull_seconds,
+                   MAX(seconds) FILTER (WHERE NOT cached) AS max_pull_seconds,
+                   COUNT(*) FILTER (WHERE NOT cached AND source = 'execution') AS cold_executions
+            FROM image_pulls WHERE pulled_at >= %s
+            GROUP BY image, node ORDER BY image, node
+        ''', (since,))
+        return [dict(row) for row in c.fetchall()]
+    finally:
+        conn.close()
+
 def get_executions(limit: int = 50) -> List[Dict]:
     conn = get_db_connection()
     try:
@@ -84,6 +146,53 @@ def get_execution(id: str) -> Optional[Dict]:
     finally:
         conn.close()
 
+def get_mcp_executions(mcp_id: str, limit: int = 50, offset: int = 0) -> List[Dict]:
+    """Lists executions started through an MCP server without loading result/log bodies."""
+    conn = get_db_connection()
+    try:
+        c = conn.cursor(cursor_factory=psycopg2.extras.DictCursor)
+        c.execute('''
+            SELECT id, tool_name, status, start_time, end_time,
+                   COALESCE(LENGTH(result), 0) AS result_size,
+                   COALESCE(LENGTH(logs), 0) AS logs_size,
+                   LEFT(LTRIM(result), 1) AS result_head
+            FROM executions
+            WHERE mcp_id = %s
+            ORDER BY start_time DESC
+            LIMIT %s OFFSET %s
+        ''', (mcp_id, limit, offset))
+        return [dict(row) for row in c.fetchall()]
+    finally:
+        conn.close()
+
+def read_execution_field(id: str, field: str, offset: int = 0, length: Optional[int] = None) -> Optional[Dict]:
+    """
+    Reads a slice of an execution's result or logs column (character offsets).
+    Only the requested slice leaves the database.
+    Returns None if the execution does not exist.
+    """
+    if field not in ('result', 'logs'):
+        raise ValueError(f"Invalid execution field: {field}")
+    conn = get_db_connection()
+    try:
+        c = conn.cursor(cursor_factory=psycopg2.extras.DictCursor)
+        if length is None:
+            c.execute(f'''
+                SELECT mcp_id, COALESCE(LENGTH({field}), 0) AS total,
+                       COALESCE(SUBSTR({field}, %s), '') AS chunk
+                FROM executions WHERE id = %s
+            ''', (offset + 1, id))
+        else:
+            c.execute(f'''
+                SELECT mcp_id, COALESCE(LENGTH({field}), 0) AS total,
+                       COALESCE(SUBSTR({field}, %s, %s), '') AS chunk
+                FROM executions WHERE id = %s
+            ''', (offset + 1, length, id))
+        row = c.fetchone()
+        return dict(row) if row else None
+    finally:
+        conn.close()
+
 def get_execution_stats() -> Dict:
     """Retorna estatísticas agregadas de execuções"""
     conn = get_db_connection()
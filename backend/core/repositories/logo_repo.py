@@ -1,18 +1,47 @@
+import hashlib
+import json
 from datetime import datetime
-from typing import Optional
+from typing import Dict, List, Optional
+import psycopg2.extras
+from core.compression import compress_variants
 from core.db_base import get_db_connection
+from core.repositories.catalogue_repo import record_catalogue_change
+
+# NOTIFY channel signalled on every logo save/delete (payload: entity_type, entity_id)
+LOGO_EVENTS_CHANNEL = "logo_changes"
+
+# Logo owners that are part of the tool catalogue (has_logo) -> (entity type, table, key)
+CATALOGUE_LOGO_ENTITIES = {'tool': ('tool', 'tools', 'id'), 'category': ('workspace', 'workspaces', 'name')}
+
+def _record_logo_change(c, entity_type: str, entity_id: str):
+    """A logo change is a catalogue change of its owner, while the owner exists."""
+    if entity_type not in CATALOGUE_LOGO_ENTITIES:
+        return
+    catalogue_type, table, key = CATALOGUE_LOGO_ENTITIES[entity_type]
+    c.execute(f'SELECT 1 FROM {table} WHERE {key} = %s', (entity_id,))
+    if c.fetchone():
+        record_catalogue_change(c, catalogue_type, entity_id)
+
+def _notify_logo_change(c, entity_type: str, entity_id: str):
+    c.execute('SELECT pg_notify(%s, %s)', (LOGO_EVENTS_CHANNEL, json.dumps({"entity_type": entity_type, "entity_id": entity_id})))
 
 def save_logo(entity_type: str, entity_id: str, svg_content: str):
-    """Save or update a logo in the database."""
+    """Save or update a logo in the database (with its hash and compressed encodings)."""
+    data = svg_content.encode('utf-8')
+    variants = compress_variants(data)
     conn = get_db_connection()
     try:
         c = conn.cursor()
         c.execute('''
-            INSERT INTO logos (entity_type, entity_id, svg_content, updated_at)
-            VALUES (%s, %s, %s, %s)
+            INSERT INTO logos (entity_type, entity_id, svg_content, updated_at, content_hash, svg_gzip, svg_br)
+            VALUES (%s, %s, %s, %s, %s, %s, %s)
             ON CONFLICT (entity_type, entity_id) 
-            DO UPDATE SET svg_content = EXCLUDED.svg_content, updated_at = EXCLUDED.updated_at
-        ''', (entity_type, entity_id, svg_content, datetime.utcnow().isoformat()))
+            DO UPDATE SET svg_content = EXCLUDED.svg_content, updated_at = EXCLUDED.updated_at,
+                content_hash = EXCLUDED.content_hash, svg_gzip = EXCLUDED.svg_gzip, svg_br = EXCLUDED.svg_br
+        ''', (entity_type, entity_id, svg_content, datetime.utcnow().isoformat(),
+              hashlib.sha256(data).hexdigest(), variants.get('gzip'), variants.get('br')))
+        _record_logo_change(c, entity_type, entity_id)
+        _notify_logo_change(c, entity_type, entity_id)
         conn.commit()
     finally:
         conn.close()
@@ -31,6 +60,35 @@ def get_logo(entity_type: str, entity_id: str) -> Optional[str]:
     finally:
         conn.close()
 
+def get_logo_entry(entity_type: str, entity_id: str) -> Optional[Dict]:
+    """Logo with its content hash and stored encodings (None for logos saved before they existed)."""
+    conn = get_db_connection()
+    try:
+        c = conn.cursor(cursor_factory=psycopg2.extras.DictCursor)
+        c.execute('''
+            SELECT svg_content, content_hash, svg_gzip, svg_br FROM logos
+            WHERE entity_type = %s AND entity_id = %s
+        ''', (entity_type, entity_id))
+        row = c.fetchone()
+        return dict(row) if row else None
+    finally:
+        conn.close()
+
+def get_logo_hashes(entity_type: str, entity_ids: List[str]) -> Dict[str, str]:
+    """sha256 (hex) of the logos of several entities, computed in the database."""
+    if not entity_ids:
+        return {}
+    conn = get_db_connection()
+    try:
+        c = conn.cursor()
+        c.execute('''
+            SELECT entity_id, encode(sha256(convert_to(svg_content, 'UTF8')), 'hex') FROM logos
+            WHERE entity_type = %s AND entity_id = ANY(%s)
+        ''', (entity_type, list(entity_ids)))
+        return {row[0]: row[1] for row in c.fetchall()}
+    finally:
+        conn.close()
+
 def delete_logo(entity_type: str, entity_id: str):
     """Delete a logo from the database."""
     conn = get_db_connection()
@@ -38,6 +96,9 @@ def delete_logo(entity_type: str, entity_id: str):
         c = conn.cursor()
         c.execute('DELETE FROM logos WHERE entity_type = %s AND entity_id = %s', 
                  (entity_type, entity_id))
+        if c.rowcount:
+            _record_logo_change(c, entity_type, entity_id)
+            _notify_logo_change(c, entity_type, entity_id)
         conn.commit()
     finally:
         conn.close()
@@ -1,22 +1,25 @@
 import json
-from datetime import datetime
+from datetime import datetime, timedelta
 from typing import List, Dict, Any, Optional
 import psycopg2.extras
+from config import settings
 from core.db_base import get_db_connection
 
-def create_mcp_server(mcp_id: str, name: str, description: str, api_key_hash: str, tool_ids: List[str], env_vars: List[Dict[str, Any]] = []) -> Dict[str, Any]:
+def create_mcp_server(mcp_id: str, name: str, description: str, api_key_hash: str, tool_ids: List[str], env_vars: List[Dict[str, Any]] = [], rate_limits: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
     conn = get_db_connection()
     try:
         cursor = conn.cursor()
         now = datetime.utcnow().isoformat()
+        rate_limits = rate_limits or {}
         cursor.execute('''
-            INSERT INTO mcp_servers (id, name, description, api_key_hash, tool_ids, env_vars, created_at, updated_at, status)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-        ''', (mcp_id, name, description, api_key_hash, json.dumps(tool_ids), json.dumps(env_vars), now, now, 'active'))
+            INSERT INTO mcp_servers (id, name, description, api_key_hash, tool_ids, env_vars, rate_limits, created_at, updated_at, status)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+        ''', (mcp_id, name, description, api_key_hash, json.dumps(tool_ids), json.dumps(env_vars), json.dumps(rate_limits), now, now, 'active'))
         conn.commit()
         return {
             'id': mcp_id, 'name': name, 'description': description,
-            'tool_ids': tool_ids, 'env_vars': env_vars, 'created_at': now, 'status': 'active'
+            'tool_ids': tool_ids, 'env_vars': env_vars, 'rate_limits': rate_limits,
+            'created_at': now, 'status': 'active'
         }
     finally:
         conn.close()
@@ -31,6 +34,7 @@ def get_mcp_server(mcp_id: str) -> Optional[Dict[str, Any]]:
         res = dict(row)
         res['tool_ids'] = json.loads(res['tool_ids']) if res['tool_ids'] else []
         res['env_vars'] = json.loads(res.get('env_vars') or '[]')
+        res['rate_limits'] = json.loads(res.get('rate_limits') or '{}')
         return res
     finally:
         conn.close()
@@ -46,6 +50,7 @@ def list_mcp_servers() -> List[Dict[str, Any]]:
             res = dict(row)
             res['tool_ids'] = json.loads(res['tool_ids']) if res['tool_ids'] else []
             res['env_vars'] = json.loads(res.get('env_vars') or '[]')
+            res['rate_limits'] = json.loads(res.get('rate_limits') or '{}')
             servers.append(res)
         return servers
     finally:
@@ -67,6 +72,9 @@ def update_mcp_server(mcp_id: str, update_data: Dict[str, Any]) -> bool:
             elif key == 'env_vars':
                 updates.append("env_vars = %s")
                 params.append(json.dumps(value))
+            elif key == 'rate_limits' and value is not None:
+                updates.append("rate_limits = %s")
+                params.append(json.dumps(value))
             elif key == 'api_key_hash':
                 updates.append("api_key_hash = %s")
                 params.append(value)
@@ -108,30 +116,74 @@ def record_connection(connection_id: str, mcp_id: str, client_info: str):
     finally:
         conn.close()
 
-def update_connection_ping(connection_id: str):
+def remove_connection(connection_id: str):
     conn = get_db_connection()
     try:
         cursor = conn.cursor()
-        cursor.execute('UPDATE mcp_connections SET last_ping = %s WHERE id = %s', 
-                     (datetime.utcnow().isoformat(), connection_id))
+        cursor.execute('DELETE FROM mcp_connections WHERE id = %s', (connection_id,))
         conn.commit()
     finally:
         conn.close()
 
-def remove_connection(connection_id: str):
+def upsert_connection_pings(connections: List[Dict[str, Any]]):
+    """Writes the heartbeat of many connections in a single statement."""
+    if not connections:
+        return
     conn = get_db_connection()
     try:
         cursor = conn.cursor()
-        cursor.execute('DELETE FROM mcp_connections WHERE id = %s', (connection_id,))
+        psycopg2.extras.execute_values(cursor, '''
+            INSERT INTO mcp_connections (id, mcp_id, client_info, connected_at, last_ping)
+            VALUES %s
+            ON CONFLICT (id) DO UPDATE SET last_ping = EXCLUDED.last_ping
+        ''', [
+            (c['id'], c['mcp_id'], c['client_info'], c['connected_at'], c['last_ping'])
+            for c in connections
+        ])
         conn.commit()
     finally:
         conn.close()
 
+def remove_connections(connection_ids: List[str]):
+    if not connection_ids:
+        return
+    conn = get_db_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute('DELETE FROM mcp_connections WHERE id = ANY(%s)', (list(connection_ids),))
+        conn.commit()
+    finally:
+        conn.close()
+
+def delete_stale_connections(cutoff: str) -> int:
+    """Deletes connections whose last heartbeat is older than cutoff (ISO timestamp)."""
+    conn = get_db_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute('DELETE FROM mcp_connections WHERE last_ping < %s', (cutoff,))
+        deleted = cursor.rowcount
+        conn.commit()
+        return deleted
+    finally:
+        conn.close()
+
+def live_since() -> str:
+    """Heartbeat cutoff: connections with an older last_ping are considered dead."""
+    return (datetime.utcnow() - timedelta(seconds=settings.MCP_CONNECTION_STALE_SECONDS)).isoformat()
+
 def get_active_connections(mcp_id: str) -> List[Dict[str, Any]]:
     conn = get_db_connection()
     try:
         cursor = conn.cursor(cursor_factory=psycopg2.extras.DictCursor)
-        cursor.execute('SELECT * FROM mcp_connections WHERE mcp_id = %s ORDER BY connected_at DESC', (mcp_id,))
+        cursor.execute('''
+            SELECT * FROM mcp_connections WHERE mcp_id = %s AND last_ping >= %s
+            ORDER BY connected_at DESC
+        ''', (mcp_id, live_since()))
         return [dict(row) for row in cursor.fetchall()]
     finally:
         conn.close()
+
+def count_live_connections(cursor) -> int:
+    """Live connections across all replicas (rows with a recent heartbeat), on the caller's cursor."""
+    cursor.execute('SELECT COUNT(*) FROM mcp_connections WHERE last_ping >= %s', (live_since(),))
+    return cursor.fetchone()[0]
@@ -1,6 +1,7 @@
 from typing import Dict
 import psycopg2.extras
 from core.db_base import get_db_connection
+from core.repositories.mcp_repo import count_live_connections
 
 def get_platform_stats() -> Dict:
     """Retorna estatísticas gerais da plataforma"""
@@ -14,10 +15,8 @@ def get_platform_stats() -> Dict:
         mcp_total = mcp_row['total'] if mcp_row else 0
         mcp_active = mcp_row['active'] if mcp_row else 0
         
-        # MCP Connections
-        c.execute('SELECT COUNT(*) as total FROM mcp_connections')
-        conn_row = c.fetchone()
-        mcp_connections = conn_row['total'] if conn_row else 0
+        # MCP Connections (apenas conexões com heartbeat recente)
+        mcp_connections = count_live_connections(c)
         
         # Builds
         c.execute('''
@@ -0,0 +1,97 @@
+from typing import List, Dict, Optional, Tuple
+from core.db_base import get_db_connection
+
+def acquire_mcp_execution_slot(
+    mcp_id: str,
+    lease_id: str,
+    tool_id: Optional[str],
+    buckets: List[Tuple[str, str, float, float]],
+    concurrency: List[Tuple[str, Optional[str], int]],
+    lease_ttl_seconds: float,
+    concurrency_retry_seconds: float
+) -> Dict:
+    """
+    Atomically checks rate limits and concurrency quotas for an MCP execution.
+
+    buckets: (scope, bucket_key, refill_per_second, burst) token buckets to charge one token from.
+    concurrency: (scope, tool_id or None for the whole MCP, max_concurrent) quotas to check.
+
+    All checks run in one transaction under a per-MCP advisory lock and use the
+    database clock, so the result is consistent across backend replicas.
+    Returns {'allowed': True} (and records a lease) or
+    {'allowed': False, 'scope', 'limit', 'retry_after'}.
+    """
+    conn = get_db_connection()
+    try:
+        c = conn.cursor()
+        c.execute('SELECT pg_advisory_xact_lock(hashtext(%s))', (f"mcp-quota:{mcp_id}",))
+        c.execute('SELECT EXTRACT(EPOCH FROM clock_timestamp())')
+        now = float(c.fetchone()[0])
+        
+        # Expired leases belong to executions that never released them (crashed replica)
+        c.execute('DELETE FROM mcp_execution_leases WHERE mcp_id = %s AND expires_at < %s', (mcp_id, now))
+        
+        for scope, scoped_tool_id, max_concurrent in concurrency:
+            if scoped_tool_id is None:
+                c.execute('SELECT COUNT(*) FROM mcp_execution_leases WHERE mcp_id = %s', (mcp_id,))
+            else:
+                c.execute('SELECT COUNT(*) FROM mcp_execution_leases WHERE mcp_id = %s AND tool_id = %s',
+                          (mcp_id, scoped_tool_id))
+            if c.fetchone()[0] >= max_concurrent:
+                conn.rollback()
+                return {'allowed': False, 'scope': scope, 'limit': 'max_concurrent',
+                        'retry_after': concurrency_retry_seconds}
+        
+        new_levels = []
+        for scope, bucket_key, rate, burst in buckets:
+            c.execute('SELECT tokens, updated_at FROM mcp_rate_buckets WHERE bucket_key = %s FOR UPDATE',
+                      (bucket_key,))
+            row = c.fetchone()
+            if row:
+                tokens = min(burst, row[0] + max(0.0, now - row[1]) * rate)
+            else:
+                tokens = burst
+            if tokens < 1:
+                conn.rollback()
+                return {'allowed': False, 'scope': scope, 'limit': 'requests_per_minute',
+                        'retry_after': (1 - tokens) / rate}
+            new_levels.append((bucket_key, tokens - 1))
+        
+        for bucket_key, tokens in new_levels:
+            c.execute('''
+                INSERT INTO mcp_rate_buckets (bucket_key, tokens, updated_at)
+                VALUES (%s, %s, %s)
+                ON CONFLICT (bucket_key) DO UPDATE SET tokens = EXCLUDED.tokens, updated_at = EXCLUDED.updated_at
+            ''', (bucket_key, tokens, now))
+        
+        if concurrency:
+            c.execute('''
+                INSERT INTO mcp_execution_leases (id, mcp_id, tool_id, acquired_at, expires_at)
+                VALUES (%s, %s, %s, %s, %s)
+            ''', (lease_id, mcp_id, tool_id, now, now + lease_ttl_seconds))
+        
+        conn.commit()
+        return {'allowed': True}
+    finally:
+        conn.close()
+
+def renew_mcp_execution_slot(lease_id: str, lease_ttl_seconds: float) -> bool:
+    """Pushes a running execution's lease expiry forward; False if it was already reaped."""
+    conn = get_db_connection()
+    try:
+        c = conn.cursor()
+        c.execute('UPDATE mcp_execution_leases SET expires_at = EXTRACT(EPOCH FROM clock_timestamp()) + %s WHERE id = %s',
+                  (lease_ttl_seconds, lease_id))
+        conn.commit()
+        return c.rowcount > 0
+    finally:
+        conn.close()
+
+def release_mcp_execution_slot(lease_id: str):
+    conn = get_db_connection()
+    try:
+        c = conn.cursor()
+        c.execute('DELETE FROM mcp_execution_leases WHERE id = %s', (lease_id,))
+        conn.commit()
+    finally:
+        conn.close()
@@ -24,6 +24,10 @@ def save_registry_config(config: Dict) -> Dict:
                     password = %s,
                     namespace = %s,
                     use_local_fallback = %s,
+                    build_cache_enabled = %s,
+                    build_cache_repo = %s,
+                    build_cache_ttl = %s,
+                    build_cache_volume = %s,
                     updated_at = %s
                 WHERE id = %s
             ''', (
@@ -33,14 +37,20 @@ def save_registry_config(config: Dict) -> Dict:
                 config.get('password'),
                 config.get('namespace'),
                 config.get('use_local_fallback', True),
+                config.get('build_cache_enabled', True),
+                config.get('build_cache_repo'),
+                config.get('build_cache_ttl'),
+                config.get('build_cache_volume'),
                 now,
                 existing['id']
             ))
         else:
             # Insert new
             c.execute('''
-                INSERT INTO registry_config (type, url, username, password, namespace, use_local_fallback, created_at, updated_at)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+                INSERT INTO registry_config (type, url, username, password, namespace, use_local_fallback,
+                                             build_cache_enabled, build_cache_repo, build_cache_ttl, build_cache_volume,
+                                             created_at, updated_at)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
             ''', (
                 config.get('type', 'local'),
                 config.get('url'),
@@ -48,6 +58,10 @@ def save_registry_config(config: Dict) -> Dict:
                 config.get('password'),
                 config.get('namespace'),
                 config.get('use_local_fallback', True),
+                config.get('build_cache_enabled', True),
+                config.get('build_cache_repo'),
+                config.get('build_cache_ttl'),
+                config.get('build_cache_volume'),
                 now,
                 now
             ))
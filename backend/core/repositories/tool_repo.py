@@ -3,6 +3,7 @@ from datetime import datetime
 from typing import List, Dict, Optional
 import psycopg2.extras
 from core.db_base import get_db_connection
+from core.repositories.catalogue_repo import record_catalogue_change, record_catalogue_changes
 
 def save_tool(tool_id: str, name: str, category: str, script_code: str, arguments: List[Dict] = None, description: str = "", configuration: str = ""):
     conn = get_db_connection()
@@ -20,26 +21,75 @@ def save_tool(tool_id: str, name: str, category: str, script_code: str, argument
                 configuration = EXCLUDED.configuration,
                 updated_at = EXCLUDED.updated_at
         ''', (tool_id, name, category, script_code, json.dumps(arguments) if arguments else "[]", description, configuration, now, now))
+        record_catalogue_change(c, 'tool', tool_id)
         conn.commit()
     finally:
         conn.close()
 
-def get_all_tools() -> List[Dict]:
-    from pathlib import Path
-    from config import settings
-    
+def save_tools_batch(tools: List[Dict]):
+    """
+    Upsert many tools in one transaction (bulk sync). Missing workspaces are
+    created, and the catalogue revision is bumped once for the whole batch.
+    """
+    if not tools:
+        return
+    conn = get_db_connection()
+    try:
+        c = conn.cursor()
+        now = datetime.utcnow().isoformat()
+        categories = sorted({tool['category'] for tool in tools})
+        c.execute('SELECT name FROM workspaces WHERE name = ANY(%s)', (categories,))
+        new_categories = sorted(set(categories) - {row[0] for row in c.fetchall()})
+        if new_categories:
+            psycopg2.extras.execute_values(c, '''
+                INSERT INTO workspaces (name, description, created_at) VALUES %s ON CONFLICT (name) DO NOTHING
+            ''', [(name, "", now) for name in new_categories])
+            record_catalogue_changes(c, 'workspace', new_categories)
+        psycopg2.extras.execute_values(c, '''
+            INSERT INTO tools (id, name, category, script_code, arguments, description, configuration, created_at, updated_at)
+            VALUES %s
+            ON CONFLICT (id) DO UPDATE SET 
+                name = EXCLUDED.name,
+                script_code = EXCLUDED.script_code,
+                arguments = EXCLUDED.arguments,
+                description = EXCLUDED.description,
+                configuration = EXCLUDED.configuration,
+                updated_at = EXCLUDED.updated_at
+        ''', [(tool['id'], tool['name'], tool['category'], tool['script_code'],
+               json.dumps(tool.get('arguments')) if tool.get('arguments') else "[]",
+               tool.get('description') or "", tool.get('configuration') or "", now, now) for tool in tools])
+        record_catalogue_changes(c, 'tool', [tool['id'] for tool in tools])
+        conn.commit()
+    finally:
+        conn.close()
+
+def get_all_tools(tool_id: Optional[str] = None, category: Optional[str] = None,
+                  tool_ids: Optional[List[str]] = None) -> List[Dict]:
+    """Catalogue rows (with has_logo), optionally restricted to some tools or one category."""
     conn = get_db_connection()
     try:
         c = conn.cursor(cursor_factory=psycopg2.extras.DictCursor)
+        filters, params = [], []
+        if tool_id is not None:
+            filters.append('t.id = %s')
+            params.append(tool_id)
+        if tool_ids is not None:
+            filters.append('t.id = ANY(%s)')
+            params.append(list(tool_ids))
+        if category is not None:
+            filters.append('t.category = %s')
+            params.append(category)
+        where = f"WHERE {' AND '.join(filters)}" if filters else ""
         # Efficiently check for logo existence via LEFT JOIN
-        query = '''
+        query = f'''
             SELECT t.*, 
                    CASE WHEN l.entity_id IS NOT NULL THEN true ELSE false END as has_logo 
             FROM tools t 
             LEFT JOIN logos l ON l.entity_type = 'tool' AND l.entity_id = t.id 
+            {where}
             ORDER BY t.category ASC, t.name ASC
         '''
-        c.execute(query)
+        c.execute(query, params)
         rows = c.fetchall()
         tools = []
         for row in rows:
@@ -77,6 +127,7 @@ def delete_tool(tool_id: str):
     try:
         c = conn.cursor()
         c.execute('DELETE FROM tools WHERE id = %s', (tool_id,))
+        record_catalogue_change(c, 'tool', tool_id, 'delete')
         conn.commit()
     finally:
         conn.close()
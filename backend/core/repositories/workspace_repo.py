@@ -2,6 +2,7 @@ from datetime import datetime
 from typing import List, Dict, Optional
 import psycopg2.extras
 from core.db_base import get_db_connection
+from core.repositories.catalogue_repo import record_catalogue_change
 
 def save_workspace(name: str, description: str = "", is_visible: bool = True):
     conn = get_db_connection()
@@ -14,6 +15,7 @@ def save_workspace(name: str, description: str = "", is_visible: bool = True):
                 description = EXCLUDED.description,
                 is_visible = EXCLUDED.is_visible
         ''', (name, description, is_visible, datetime.utcnow().isoformat()))
+        record_catalogue_change(c, 'workspace', name)
         conn.commit()
     finally:
         conn.close()
@@ -44,7 +46,13 @@ def delete_workspace(name: str):
     conn = get_db_connection()
     try:
         c = conn.cursor()
+        # Tools go with the workspace (ON DELETE CASCADE): record them for the change feed
+        c.execute('SELECT id FROM tools WHERE category = %s', (name,))
+        tool_ids = [row[0] for row in c.fetchall()]
         c.execute('DELETE FROM workspaces WHERE name = %s', (name,))
+        for tool_id in tool_ids:
+            record_catalogue_change(c, 'tool', tool_id, 'delete')
+        record_catalogue_change(c, 'workspace', name, 'delete')
         conn.commit()
     finally:
         conn.close()
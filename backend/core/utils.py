@@ -47,12 +47,14 @@ def get_docker_registry() -> str:
     # Fallback to environment variable or default
     return settings.DOCKER_REGISTRY
 
-def generate_image_tag(tool_identifier: str) -> str:
+def generate_image_tag(tool_identifier: str, build_hash: str = None) -> str:
     """
     Generate authoritative Docker image tag from tool identifier.
     Extracts slug if path (e.g. 'Network/nmap_scan' -> 'nmap_scan')
     Sanitizes slug (e.g. 'nmap_scan' -> 'nmap-scan')
     Returns: {DOCKER_REGISTRY}/security-platform-tool-nmap-scan:latest
+    With build_hash (content-addressed builds) the tag is the first 16 hex
+    chars of the hash instead of 'latest'.
     
     Registry is determined by:
     1. Database config (set via frontend /settings page)
@@ -60,9 +62,10 @@ def generate_image_tag(tool_identifier: str) -> str:
     3. Default: mcp-registry.security-platform.svc:5000
     """
     registry = get_docker_registry()
+    version = build_hash[:16] if build_hash else "latest"
     
     if not tool_identifier:
-        return f"{registry}/security-platform-tool-unknown:latest"
+        return f"{registry}/security-platform-tool-unknown:{version}"
         
     # Extract slug if path
     slug = tool_identifier
@@ -70,4 +73,18 @@ def generate_image_tag(tool_identifier: str) -> str:
         slug = tool_identifier.split('/')[-1]
         
     safe_slug = sanitize_k8s_name(slug)
-    return f"{registry}/security-platform-tool-{safe_slug}:latest"
+    return f"{registry}/security-platform-tool-{safe_slug}:{version}"
+
+def pin_image_digest(image_tag: str, digest: str = None) -> str:
+    """
+    Pin an image reference to a digest: 'reg:5000/img:tag' + 'sha256:..' -> 'reg:5000/img@sha256:..'.
+    Returns the tag unchanged when no digest is known.
+    """
+    if not digest:
+        return image_tag
+    repository = image_tag.split('@', 1)[0]
+    name_start = repository.rfind('/') + 1
+    tag_sep = repository.rfind(':')
+    if tag_sep >= name_start:
+        repository = repository[:tag_sep]
+    return f"{repository}@{digest}"
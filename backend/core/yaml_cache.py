@@ -0,0 +1,115 @@
+"""
+Parsed tool configuration cache.
+Tool configurations are YAML strings stored in the database and parsed on every
+execution, detail request and MCP tools/list. Parsed results are cached in a
+bounded LRU keyed by the sha256 of the text, using libyaml's CSafeLoader when
+PyYAML was built with it. Cached values are shared, so they are returned
+frozen: callers that need to modify a configuration take a copy with thaw().
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any
+
+import yaml
+
+from config import settings
+
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:  # PyYAML without libyaml
+    from yaml import SafeLoader
+
+
+def _readonly(self, *args, **kwargs):
+    raise TypeError(f"'{type(self).__name__}' is a cached configuration, use thaw() to modify a copy")
+
+
+class FrozenDict(dict):
+    """dict that rejects mutation (still a dict for isinstance, json and equality)."""
+    __setitem__ = __delitem__ = __ior__ = _readonly
+    update = pop = popitem = clear = setdefault = _readonly
+
+    def __reduce__(self):
+        return FrozenDict, (dict(self),)
+
+    def __deepcopy__(self, memo):
+        return thaw(self)
+
+
+class FrozenList(list):
+    """list that rejects mutation (still a list for isinstance, json and equality)."""
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _readonly
+    append = extend = insert = remove = pop = clear = sort = reverse = _readonly
+
+    def __reduce__(self):
+        return FrozenList, (list(self),)
+
+    def __deepcopy__(self, memo):
+        return thaw(self)
+
+
+def freeze(value: Any) -> Any:
+    if isinstance(value, dict):
+        return FrozenDict((k, freeze(v)) for k, v in value.items())
+    if isinstance(value, list):
+        return FrozenList(freeze(v) for v in value)
+    return value
+
+
+def thaw(value: Any) -> Any:
+    """Mutable deep copy of a (frozen) parsed configuration."""
+    if isinstance(value, dict):
+        return {k: thaw(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [thaw(v) for v in value]
+    return value
+
+
+def parse_yaml(text: str) -> Any:
+    """Uncached parse with the fastest available safe loader."""
+    return yaml.load(text, Loader=SafeLoader)
+
+
+def config_digest(text: str) -> bytes:
+    """Cache key of a configuration text (sha256), shared with derived caches."""
+    return hashlib.sha256(text.encode('utf-8')).digest()
+
+
+class ParsedConfigCache:
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[bytes, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def load(self, text: str) -> Any:
+        """Frozen parse of `text`. Parse errors propagate and are not cached."""
+        key = config_digest(text)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+        value = freeze(parse_yaml(text))
+        with self._lock:
+            self.misses += 1
+            self._entries[key] = value
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+config_cache = ParsedConfigCache(settings.YAML_CACHE_MAX_ENTRIES)
+
+
+def load_config(text: str) -> Any:
+    """Parsed (frozen) tool configuration; empty text -> None, like yaml.safe_load."""
+    if not text:
+        return None
+    return config_cache.load(text)
@@ -1,8 +1,9 @@
 from fastapi import FastAPI, Request
 from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
-import time
-import uuid
+from api.middleware import AccessLogMiddleware, CompressionMiddleware
+from api.responses import FastJSONResponse
+import os
 from config import settings
 from api.routes import auth, executions, tools, workspaces, mcps, settings as settings_routes, builds
 from core.logger import logger, request_id_ctx
@@ -11,7 +12,8 @@ from core.logger import logger, request_id_ctx
 app = FastAPI(
     title="ContextWorks API",
     description="Plataforma enterprise de execução de ferramentas de segurança",
-    version="2.0.0"
+    version="2.0.0",
+    default_response_class=FastJSONResponse
 )
 
 # Exception Handler Global (Enterprise Style)
@@ -27,31 +29,12 @@ async def global_exception_handler(request: Request, exc: Exception):
         }
     )
 
-# Middleware para Logging de requisições com Traceability
-@app.middleware("http")
-async def log_requests(request: Request, call_next):
-    request_id = request.headers.get("X-Request-ID", str(uuid.uuid4()))
-    token = request_id_ctx.set(request_id)
-    
-    start_time = time.time()
-    try:
-        response = await call_next(request)
-        process_time = (time.time() - start_time) * 1000
-        
-        logger.info(
-            "Request processed",
-            extra={"extra_fields": {
-                "method": request.method,
-                "path": request.url.path,
-                "status": response.status_code,
-                "duration_ms": round(process_time, 2),
-                "ip": request.client.host if request.client else "unknown"
-            }}
-        )
-        response.headers["X-Request-ID"] = request_id
-        return response
-    finally:
-        request_id_ctx.reset(token)
+# Compressão gzip/br (JSON acima do limite; NDJSON/SSE chunk a chunk)
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.COMPRESSION_MIN_SIZE,
+    level=settings.COMPRESSION_LEVEL,
+)
 
 # Configurar CORS
 app.add_middleware(
@@ -63,6 +46,14 @@ app.add_middleware(
     expose_headers=["*"],
 )
 
+# Request ID e access log (ASGI puro; a escrita do log fica na thread do logger)
+app.add_middleware(
+    AccessLogMiddleware,
+    sample_rate=settings.ACCESS_LOG_SAMPLE_RATE,
+    slow_ms=settings.ACCESS_LOG_SLOW_MS,
+    skip_paths=settings.ACCESS_LOG_SKIP_PATHS,
+)
+
 # Registrar rotas
 app.include_router(auth.router)
 app.include_router(executions.router, prefix="/api/executions")
@@ -74,6 +65,34 @@ app.include_router(mcps.mcp_router)
 app.include_router(settings_routes.router, prefix="/api")
 app.include_router(builds.router, prefix="/api/builds")
 
+@app.on_event("startup")
+async def startup_event():
+    # Retoma a fila persistente de builds (inclusive jobs de réplicas que caíram)
+    from services.docker.build_scheduler import scheduler
+    scheduler.start()
+    # Mantém as imagens mais usadas pré-carregadas nos nós do cluster
+    if os.getenv("KUBERNETES_SERVICE_HOST") and settings.IMAGE_WARMUP_ENABLED:
+        from services.execution.image_warmup import warmup_controller
+        warmup_controller.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    # Remove as sessões MCP deste processo e para o flush de heartbeats
+    from services import mcp_manager
+    await mcp_manager.connection_registry.stop()
+    from services.docker.build_scheduler import scheduler
+    scheduler.stop()
+    from services.docker.kaniko_monitor import kaniko_monitor
+    kaniko_monitor.stop()
+    from services.execution.image_warmup import warmup_controller
+    warmup_controller.stop()
+    from services.docker.build_events import build_events
+    build_events.stop()
+    from services.tool.catalogue_cache import catalogue_cache
+    catalogue_cache.stop()
+    from services.logo_cache import logo_cache
+    logo_cache.stop()
+
 @app.get("/")
 def read_root():
     return {
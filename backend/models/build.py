@@ -0,0 +1,11 @@
+"""
+Modelos Pydantic para Builds
+"""
+from pydantic import BaseModel
+from typing import List, Optional
+
+class BulkBuildRequest(BaseModel):
+    workspace: Optional[str] = None
+    tool_ids: Optional[List[str]] = None  # IDs completos (categoria/ferramenta)
+    max_parallel: Optional[int] = None
+    priority: Optional[int] = None
@@ -11,11 +11,20 @@ class MCPEnvVar(BaseModel):
     required: bool = False
     tool_ids: Optional[List[str]] = []
 
+class MCPRateLimit(BaseModel):
+    requests_per_minute: Optional[float] = None
+    burst: Optional[int] = None
+    max_concurrent: Optional[int] = None
+
+class MCPRateLimits(MCPRateLimit):
+    tools: Optional[Dict[str, MCPRateLimit]] = None  # Limites por ferramenta (tool_id)
+
 class MCPCreateRequest(BaseModel):
     name: str
     description: str
     tool_ids: List[str]
     env_vars: Optional[List[MCPEnvVar]] = []
+    rate_limits: Optional[MCPRateLimits] = None
 
 class MCPUpdateRequest(BaseModel):
     name: Optional[str] = None
@@ -23,3 +32,4 @@ class MCPUpdateRequest(BaseModel):
     tool_ids: Optional[List[str]] = None
     status: Optional[str] = None
     env_vars: Optional[List[MCPEnvVar]] = None
+    rate_limits: Optional[MCPRateLimits] = None
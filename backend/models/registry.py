@@ -38,6 +38,26 @@ class RegistryConfig(BaseModel):
         description="Fallback to local cluster registry if push fails"
     )
     
+    build_cache_enabled: bool = Field(
+        default=True,
+        description="Reuse Kaniko layers through a registry cache repository"
+    )
+    
+    build_cache_repo: Optional[str] = Field(
+        default=None,
+        description="Cache repository (default: <destination registry>/security-platform-cache)"
+    )
+    
+    build_cache_ttl: Optional[str] = Field(
+        default=None,
+        description="Cached layer TTL, Go duration (default: 336h)"
+    )
+    
+    build_cache_volume: Optional[str] = Field(
+        default=None,
+        description="PVC name for the persistent base-image cache (populated by the Kaniko warmer)"
+    )
+    
     class Config:
         json_schema_extra = {
             "example": {
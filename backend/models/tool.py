@@ -16,6 +16,23 @@ class ToolContentRequest(BaseModel):
     tool_id: Optional[str] = None
     content: str
 
+class SyncManifestEntry(BaseModel):
+    path: str  # Category/tool.py ou Category/tool.yaml
+    hash: str  # sha256 (hex) do conteúdo local
+
+class SyncManifestRequest(BaseModel):
+    entries: List[SyncManifestEntry]
+
+class SyncFile(BaseModel):
+    path: str
+    content: str
+
+class SyncBatchRequest(BaseModel):
+    files: List[SyncFile]
+
+class SyncExportRequest(BaseModel):
+    tool_ids: List[str]
+
 class CreateToolRequest(BaseModel):
     category: str
     name: str
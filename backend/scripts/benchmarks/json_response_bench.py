@@ -0,0 +1,100 @@
+"""
+Cost of rendering large JSON responses and NDJSON streams.
+Compares FastAPI's default path (jsonable_encoder + JSONResponse) with
+FastJSONResponse returned directly, on a synthetic tool catalogue and a page
+of executions carrying their logs; then encodes NDJSON execution events.
+
+    python scripts/benchmarks/json_response_bench.py [--tools 500] [--executions 50] [--runs 20]
+"""
+import argparse
+import datetime
+import json
+import os
+import sys
+import timeit
+
+# Add the backend directory to sys.path
+backend_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from api.responses import FastJSONResponse
+from core import json_codec
+
+
+def sample_catalogue(count: int) -> list:
+    now = datetime.datetime(2026, 1, 1, 12, 0, 0)
+    return [{
+        "id": f"Category{i % 12}/tool_{i}",
+        "name": f"tool_{i}",
+        "category": f"Category{i % 12}",
+        "description": f"Synthetic tool number {i} " * 6,
+        "script_code": "import sys\n" + "print('scanning target')\n" * 80,
+        "configuration": "name: tool\n" + "".join(f"  arg_{a}: string\n" for a in range(40)),
+        "arguments": [{"name": f"arg_{a}", "type": "string", "description": f"Argument {a}", "required": a == 0}
+                      for a in range(20)],
+        "has_logo": i % 3 == 0,
+        "created_at": now,
+        "updated_at": now,
+    } for i in range(count)]
+
+
+def sample_executions(count: int) -> list:
+    start = datetime.datetime(2026, 1, 1, 12, 0, 0)
+    return [{
+        "id": f"job-{i:06d}",
+        "tool_id": f"Category{i % 12}/tool_{i}",
+        "status": "success",
+        "arguments": json.dumps({"target": "10.0.0.1", "ports": "1-1024"}),
+        "logs": "".join(f"[{n:05d}] Discovered open port {n}/tcp on 10.0.0.1\n" for n in range(2000)),
+        "result": json.dumps({"open_ports": list(range(0, 1024, 7))}),
+        "start_time": start,
+        "end_time": start + datetime.timedelta(seconds=42),
+    } for i in range(count)]
+
+
+def sample_events(count: int) -> list:
+    return [{"type": "stdout", "data": f"[{n:05d}] Discovered open port {n}/tcp on 10.0.0.1"} for n in range(count)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tools", type=int, default=500, help="tools in the catalogue")
+    parser.add_argument("--executions", type=int, default=50, help="executions in the page")
+    parser.add_argument("--runs", type=int, default=20, help="renders per measurement")
+    opts = parser.parse_args()
+
+    payloads = [("catalogue", sample_catalogue(opts.tools)), ("executions", sample_executions(opts.executions))]
+    events = sample_events(10000)
+
+    print(f"json backend: {json_codec.BACKEND}, {opts.runs} runs")
+    for label, payload in payloads:
+        size = len(FastJSONResponse(payload).body)
+        print(f"{label} ({len(payload)} rows, {size / 1024:.0f} KiB)")
+        cases = [
+            ("JSONResponse", lambda: JSONResponse(jsonable_encoder(payload))),
+            ("FastJSONResponse", lambda: FastJSONResponse(payload)),
+        ]
+        baseline = None
+        for name, func in cases:
+            per_call = min(timeit.repeat(func, number=opts.runs, repeat=3)) / opts.runs
+            baseline = baseline or per_call
+            print(f"{name:>18}: {per_call * 1e3:10.2f} ms/response  ({baseline / per_call:6.1f}x)")
+
+    print(f"ndjson ({len(events)} execution events)")
+    cases = [
+        ("json.dumps", lambda: [json.dumps(e) + "\n" for e in events]),
+        ("ndjson_line", lambda: [json_codec.ndjson_line(e) for e in events]),
+    ]
+    baseline = None
+    for name, func in cases:
+        per_call = min(timeit.repeat(func, number=opts.runs, repeat=3)) / opts.runs
+        baseline = baseline or per_call
+        print(f"{name:>18}: {per_call * 1e3:10.2f} ms/stream    ({baseline / per_call:6.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
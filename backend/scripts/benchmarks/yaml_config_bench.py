@@ -0,0 +1,62 @@
+"""
+Per-execution cost of parsing a tool configuration.
+Compares yaml.safe_load (what every execution paid before), the libyaml
+CSafeLoader and the parsed-config cache on a synthetic configuration with a
+large argument schema.
+
+    python scripts/benchmarks/yaml_config_bench.py [--args 200] [--runs 200]
+"""
+import argparse
+import os
+import sys
+import timeit
+
+# Add the backend directory to sys.path
+backend_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+import yaml
+
+from core.yaml_cache import ParsedConfigCache, SafeLoader
+
+
+def sample_configuration(arg_count: int) -> str:
+    properties = {
+        f"arg_{i}": {"type": "string", "description": f"Argument number {i} " * 4,
+                     "default": f"value-{i}", "enum": [f"value-{i}", f"other-{i}"]}
+        for i in range(arg_count)
+    }
+    return yaml.dump({
+        "name": "Benchmark Tool",
+        "description": "Synthetic configuration",
+        "docker": {"docker_mode": "custom", "base_image": "python:3.11-slim",
+                   "apt_packages": ["nmap", "curl", "git"], "pip_packages": ["requests", "pyyaml"]},
+        "resources": {"requests": {"cpu": "100m", "memory": "256Mi"}},
+        "schema": {"type": "object", "properties": properties, "required": ["arg_0"]},
+    }, sort_keys=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--args", type=int, default=200, help="arguments in the schema")
+    parser.add_argument("--runs", type=int, default=200, help="parses per measurement")
+    opts = parser.parse_args()
+
+    text = sample_configuration(opts.args)
+    cache = ParsedConfigCache(max_entries=16)
+    cases = [("yaml.safe_load", lambda: yaml.safe_load(text))]
+    if SafeLoader is not yaml.SafeLoader:
+        cases.append(("CSafeLoader", lambda: yaml.load(text, Loader=SafeLoader)))
+    cases.append(("cached", lambda: cache.load(text)))
+
+    print(f"configuration: {len(text)} bytes, {opts.args} arguments, {opts.runs} runs")
+    baseline = None
+    for name, func in cases:
+        per_call = min(timeit.repeat(func, number=opts.runs, repeat=3)) / opts.runs
+        baseline = baseline or per_call
+        print(f"{name:>16}: {per_call * 1e6:10.1f} us/execution  ({baseline / per_call:7.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Kaniko layer caching.
+Builds push/reuse RUN layers through a registry cache repository
+(--cache-repo) and can read base images from a persistent volume populated
+by the Kaniko warmer (--cache-dir). Both are configured in the registry
+settings. KanikoCacheStats parses the executor log to report cache hits and
+misses per build, and estimates the time saved from the last uncached
+duration of each hit step.
+"""
+import hashlib
+import re
+import time
+from typing import Dict, List, Optional
+
+CACHE_DIR = "/cache"
+DEFAULT_CACHE_TTL = "336h"
+CACHE_REPO_NAME = "security-platform-cache"
+WARMER_IMAGE = "gcr.io/kaniko-project/warmer:latest"
+
+# "INFO[0012] message" -> elapsed seconds since the executor started
+_LOG_PREFIX = re.compile(r'^(?:[A-Z]+)\[(\d+)\]\s*(.*)$')
+_INSTRUCTIONS = ("RUN ", "COPY ", "ADD ", "ENV ", "WORKDIR ", "USER ", "ARG ", "LABEL ")
+_HIT = "Using caching version of cmd: "
+_MISS = "No cached layer found for cmd "
+_BASE_CACHED = re.compile(r'^Found (sha256:[0-9a-f]+) in local cache')
+_FROM = re.compile(r'^\s*FROM\s+(\S+)', re.IGNORECASE | re.MULTILINE)
+
+
+def cache_settings(registry_config: Optional[Dict]) -> Dict:
+    """Normalized cache settings from the registry configuration (enabled by default)."""
+    registry_config = registry_config or {}
+    return {
+        "enabled": registry_config.get("build_cache_enabled") is not False,
+        "repo": registry_config.get("build_cache_repo") or None,
+        "ttl": registry_config.get("build_cache_ttl") or DEFAULT_CACHE_TTL,
+        "volume": registry_config.get("build_cache_volume") or None,
+    }
+
+
+def default_cache_repo(destination: str) -> str:
+    """Cache repository next to the destination image: 'reg/ns/img:tag' -> 'reg/ns/security-platform-cache'."""
+    repository = destination.split("@", 1)[0]
+    if "/" not in repository:
+        return CACHE_REPO_NAME
+    return f"{repository.rsplit('/', 1)[0]}/{CACHE_REPO_NAME}"
+
+
+def kaniko_cache_args(cache: Dict, destination: str) -> List[str]:
+    if not cache["enabled"]:
+        return []
+    args = [
+        "--cache=true",
+        f"--cache-repo={cache['repo'] or default_cache_repo(destination)}",
+        f"--cache-ttl={cache['ttl']}",
+    ]
+    if cache["volume"]:
+        args.append(f"--cache-dir={CACHE_DIR}")
+    return args
+
+
+def base_images(dockerfile_content: str) -> List[str]:
+    """External images referenced by FROM (stage aliases excluded), in order."""
+    images, stages = [], set()
+    for line in dockerfile_content.splitlines():
+        match = _FROM.match(line)
+        if not match:
+            continue
+        image = match.group(1)
+        parts = line.split()
+        if len(parts) >= 4 and parts[2].lower() == "as":
+            stages.add(parts[3].lower())
+        if image.lower() not in stages and image not in images:
+            images.append(image)
+    return images
+
+
+def step_key(command: str) -> str:
+    return hashlib.sha256(command.strip().encode("utf-8")).hexdigest()
+
+
+class KanikoCacheStats:
+    """Incremental parser of Kaniko executor log lines."""
+
+    def __init__(self):
+        self.hits: List[str] = []
+        self.misses: List[str] = []
+        self.base_image_hits = 0
+        self.durations: Dict[str, float] = {}
+        self._current: Optional[str] = None
+        self._current_start = 0.0
+        self._last_ts = 0.0
+        self._clock_start = time.monotonic()
+
+    def feed(self, line: str):
+        match = _LOG_PREFIX.match(line.strip())
+        if match:
+            ts, message = float(match.group(1)), match.group(2)
+        else:
+            ts, message = time.monotonic() - self._clock_start, line.strip()
+        self._last_ts = max(self._last_ts, ts)
+
+        if message.startswith(_HIT):
+            self.hits.append(message[len(_HIT):].strip())
+        elif message.startswith(_MISS):
+            self.misses.append(message[len(_MISS):].strip())
+        elif _BASE_CACHED.match(message):
+            self.base_image_hits += 1
+        elif message.startswith(_INSTRUCTIONS):
+            self._close_step(ts)
+            self._current, self._current_start = message, ts
+        elif message.startswith(("Pushing image", "Pushed ")):
+            self._close_step(ts)
+
+    def _close_step(self, ts: float):
+        if self._current is not None:
+            self.durations[self._current] = max(ts - self._current_start, 0.0)
+            self._current = None
+
+    def finish(self, previous_durations: Dict[str, float]) -> Dict:
+        """
+        Summary stats. previous_durations maps step_key -> last uncached duration;
+        time saved = sum over hit steps of (uncached duration - duration now).
+        """
+        self._close_step(self._last_ts)
+        saved = 0.0
+        for command in self.hits:
+            before = previous_durations.get(step_key(command))
+            if before is not None:
+                saved += max(before - self.durations.get(command, 0.0), 0.0)
+        return {
+            "cache_hits": len(self.hits),
+            "cache_misses": len(self.misses),
+            "base_image_hits": self.base_image_hits,
+            "time_saved_seconds": round(saved, 1),
+            "build_seconds": round(self._last_ts, 1),
+        }
+
+    def uncached_timings(self) -> Dict[str, Dict]:
+        """Durations of steps that actually ran (cache misses), keyed by step_key."""
+        missed = set(self.misses)
+        return {
+            step_key(command): {"command": command, "seconds": seconds}
+            for command, seconds in self.durations.items() if command in missed
+        }
@@ -8,6 +8,7 @@ from typing import Dict
 from core import database
 from core.logger import logger
 from .registry_adapter import push_image_to_registry
+from . import build_index, platform_base
 
 REPO_ROOT = Path(__file__).parent.parent.parent.parent
 BUILD_SCRIPT = REPO_ROOT / "docker" / "build-tool-images.py"
@@ -31,7 +32,8 @@ def run_build_thread(job_id: str, category: str, tool_name: str, docker_config:
             full_tool_id = f"{category}/{tool_name}"
             tool_data = database.get_tool(full_tool_id)
             
-            if not tool_data:
+            # Platform base images are built from a generated config, not a catalogue tool
+            if not tool_data and category != platform_base.PLATFORM_CATEGORY:
                 database.append_build_logs(job_id, f"❌ Tool {full_tool_id} not found in database\n")
                 database.update_build_job(job_id, "FAILED")
                 return
@@ -43,7 +45,14 @@ def run_build_thread(job_id: str, category: str, tool_name: str, docker_config:
             temp_dir = Path(tempfile.mkdtemp(prefix=f"native_build_{tool_name}_"))
             builder = ImageBuilderService(build_dir=temp_dir)
             
-            success, image_tag, build_logs = builder.build_tool_image(tool_name, docker_config, job_id)
+            # Content-addressed target tag (None for pre-existing images)
+            image_tag, build_hash = None, None
+            dockerfile_content = platform_base.render_dockerfile(tool_name, docker_config)
+            if dockerfile_content:
+                image_tag, build_hash = build_index.build_target(full_tool_id, docker_config, dockerfile_content)
+            
+            success, image_tag, build_logs = builder.build_tool_image(tool_name, docker_config, job_id, image_tag=image_tag,
+                                                                     dockerfile_content=dockerfile_content)
             
             # Stream logs to DB
             database.append_build_logs(job_id, build_logs)
@@ -55,10 +64,12 @@ def run_build_thread(job_id: str, category: str, tool_name: str, docker_config:
 
             database.append_build_logs(job_id, "\n📦 Build successful. Initiating image push/load sequence...\n")
             
-            push_result = push_image_to_registry(tool_name, docker_config, job_id)
+            push_result = push_image_to_registry(tool_name, docker_config, job_id, image_tag=image_tag)
             
             if push_result['status'] == 'success':
                 tag = push_result.get('image', 'unknown')
+                if build_hash:
+                    build_index.record_build(full_tool_id, build_hash, tag, push_result.get('digest'))
                 msg = f"\n✅ Successfully {'loaded into ' + push_result['loaded_to'] + ' cluster' if 'loaded_to' in push_result else 'pushed to registry'}: {tag}\n"
                 database.update_build_job(job_id, "SUCCESS", image_tag=tag)
                 database.append_build_logs(job_id, msg)
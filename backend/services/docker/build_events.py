@@ -0,0 +1,60 @@
+"""
+Build event broadcaster.
+Log appends and status changes of build jobs send a Postgres NOTIFY (payload:
+job id). One LISTEN connection per backend process wakes the asyncio
+subscribers of that job (SSE log streams), so viewers read only new log
+bytes when something changed and nothing is read while a build is quiet.
+Notifications from other replicas arrive through the same channel.
+"""
+import asyncio
+import threading
+from contextlib import contextmanager
+from typing import Dict, Set, Tuple
+
+from core.notify_listener import NotifyListener
+from core.repositories.build_repo import BUILD_EVENTS_CHANNEL
+
+
+class BuildEventBroadcaster:
+    """Fans NOTIFY payloads out to per-job asyncio events."""
+
+    def __init__(self, channel: str):
+        self._subscribers: Dict[str, Set[Tuple[asyncio.AbstractEventLoop, asyncio.Event]]] = {}
+        self._lock = threading.Lock()
+        self._listener = NotifyListener(channel, self.publish)
+
+    @property
+    def listening(self) -> bool:
+        return self._listener.listening
+
+    def start(self):
+        self._listener.start()
+
+    def stop(self):
+        self._listener.stop()
+
+    @contextmanager
+    def subscription(self, job_id: str):
+        """asyncio.Event set whenever the job's logs or status change."""
+        self.start()
+        entry = (asyncio.get_running_loop(), asyncio.Event())
+        with self._lock:
+            self._subscribers.setdefault(job_id, set()).add(entry)
+        try:
+            yield entry[1]
+        finally:
+            with self._lock:
+                subscribers = self._subscribers.get(job_id)
+                if subscribers:
+                    subscribers.discard(entry)
+                    if not subscribers:
+                        del self._subscribers[job_id]
+
+    def publish(self, job_id: str):
+        with self._lock:
+            subscribers = list(self._subscribers.get(job_id, ()))
+        for loop, event in subscribers:
+            loop.call_soon_threadsafe(event.set)
+
+
+build_events = BuildEventBroadcaster(BUILD_EVENTS_CHANNEL)
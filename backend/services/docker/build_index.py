@@ -0,0 +1,82 @@
+"""
+Content-addressed tool images.
+The tag of a built tool image is derived from a hash of its generated
+Dockerfile and build inputs, and the image_builds table maps that hash to the
+pushed image and digest. Identical inputs are never rebuilt, and executions
+are pinned to the digest of the tool's current build.
+"""
+import hashlib
+from typing import Dict, Optional, Tuple
+
+from core import database, utils
+from .registry_adapter import construct_remote_tag, image_exists
+
+# Bump when the build pipeline changes the produced image for identical inputs
+BUILD_HASH_VERSION = "1"
+
+BUILD_CONFIG_KEYS = ("apt_packages", "pip_packages", "run_commands", "dockerfile", "base_image")
+
+
+def is_build_config(docker_config: Dict) -> bool:
+    """True if the docker config describes an image we build (vs. a pre-existing image)."""
+    if not docker_config:
+        return False
+    if docker_config.get("docker_mode") in ["build", "custom"]:
+        return True
+    return any(k in docker_config for k in BUILD_CONFIG_KEYS)
+
+
+def compute_build_hash(tool_id: str, dockerfile_content: str) -> str:
+    """sha256 over everything that determines the image: pipeline version, tool and Dockerfile."""
+    digest = hashlib.sha256()
+    for part in (BUILD_HASH_VERSION, tool_id, dockerfile_content):
+        data = part.encode("utf-8")
+        # Length-prefix each input so concatenations cannot collide
+        digest.update(len(data).to_bytes(8, "big"))
+        digest.update(data)
+    return digest.hexdigest()
+
+
+def build_target(tool_id: str, docker_config: Dict, dockerfile_content: str) -> Tuple[str, str]:
+    """
+    Returns (image_tag, build_hash) for a build.
+    Internal images get a content-addressed tag; an explicit custom image name is kept.
+    """
+    build_hash = compute_build_hash(tool_id, dockerfile_content)
+    image_tag = docker_config.get("image")
+    if not image_tag or "security-platform-tool-" in image_tag:
+        image_tag = utils.generate_image_tag(tool_id, build_hash)
+    return image_tag, build_hash
+
+
+def find_reusable_build(build_hash: str, image_tag: str, registry_config: Optional[Dict] = None) -> Optional[Dict]:
+    """
+    The recorded build for this hash, if it was pushed under the tag this build
+    would publish (same registry) and the registry still has it (a wiped or
+    garbage-collected registry means rebuilding). Images loaded straight into
+    a local cluster have no registry to check.
+    """
+    existing = database.get_image_build(build_hash)
+    if not existing:
+        return None
+    registry_config = registry_config or database.get_registry_config() or {"type": "internal"}
+    if existing.get("image_tag") != construct_remote_tag(image_tag, registry_config):
+        return None
+    if registry_config["type"] != "local" and not image_exists(existing["image_tag"], existing.get("digest"), registry_config):
+        return None
+    return existing
+
+
+def record_build(tool_id: str, build_hash: str, image_tag: str, digest: Optional[str] = None):
+    """Marks the image as the tool's current build."""
+    if digest and not digest.startswith("sha256:"):
+        digest = None
+    database.save_image_build(build_hash, tool_id, image_tag, digest)
+
+
+def current_image(tool_id: str) -> Optional[str]:
+    """Digest-pinned (or content-tagged) reference of the tool's current build."""
+    build = database.get_current_image_build(tool_id)
+    if not build:
+        return None
+    return utils.pin_image_digest(build["image_tag"], build.get("digest"))
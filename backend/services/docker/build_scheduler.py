@@ -0,0 +1,159 @@
+"""
+Build scheduler: bounded worker pool over the persistent build queue.
+Builds are queued in build_jobs (PENDING) and claimed, up to a fixed number
+of concurrent slots, with FOR UPDATE SKIP LOCKED, so several backend replicas
+can share the queue. Kaniko builds hold no thread while running (the pod
+monitor resolves their future); local Docker builds run on a thread pool.
+Running jobs are heartbeated; jobs of a worker that died (e.g. backend
+restart) are re-queued once their heartbeat goes stale.
+"""
+import concurrent.futures
+import os
+import socket
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Set
+
+from config import settings
+from core import database
+from core.logger import logger
+
+# Queue priorities (higher runs first)
+PRIORITY_BACKGROUND = 0     # automatic builds after a tool is saved
+PRIORITY_NORMAL = 10        # builds requested explicitly (UI, CLI, settings)
+
+
+class BuildScheduler:
+    """Runs at most `max_workers` queued builds at a time per backend process."""
+
+    def __init__(self, max_workers: int, poll_interval: float,
+                 heartbeat_interval: float, stale_after: float):
+        self.max_workers = max(1, max_workers)
+        self.poll_interval = poll_interval
+        self.heartbeat_interval = heartbeat_interval
+        self.stale_after = stale_after
+        self.worker_id = f"{socket.gethostname()}-{os.getpid()}"
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._active: Set[str] = set()
+        self._slots = threading.BoundedSemaphore(self.max_workers)
+        self._executor = concurrent.futures.ThreadPoolExecutor(self.max_workers, thread_name_prefix="build-worker")
+        self._threads = []
+
+    def start(self):
+        """Starts the dispatcher (idempotent); resumes whatever is already queued."""
+        with self._lock:
+            if self._threads:
+                return
+            self._stop.clear()
+            thread = threading.Thread(target=self._dispatch_loop, name="build-dispatcher", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+            thread = threading.Thread(target=self._heartbeat_loop, name="build-heartbeat", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        logger.info("Build scheduler started", extra={"extra_fields": {"workers": self.max_workers, "worker_id": self.worker_id}})
+
+    def stop(self):
+        self._stop.set()
+        self._wakeup.set()
+        with self._lock:
+            self._threads = []
+
+    def submit(self, category: str, tool_name: str, docker_config: Dict,
+               build_hash: Optional[str] = None, priority: int = PRIORITY_NORMAL) -> str:
+        """Queues a build and returns its job id (an equivalent PENDING job is reused)."""
+        tool_id = f"{category}/{tool_name}"
+        job_id, collapsed = database.enqueue_build_job(tool_id, category, docker_config, build_hash, priority)
+        if collapsed:
+            logger.info("Build already queued, reusing job", extra={"extra_fields": {"tool_id": tool_id, "job_id": job_id}})
+        else:
+            database.append_build_logs(job_id, f"🕒 Queued (priority {priority})\n")
+        self.start()
+        self._wakeup.set()
+        return job_id
+
+    def active_jobs(self) -> Set[str]:
+        with self._lock:
+            return set(self._active)
+
+    def _dispatch_loop(self):
+        while not self._stop.is_set():
+            # A slot is held from claim until the build's future resolves
+            if not self._slots.acquire(timeout=self.poll_interval):
+                continue
+            try:
+                job = database.claim_next_build_job(self.worker_id)
+            except Exception:
+                logger.error("Failed to claim build job", exc_info=True)
+                job = None
+
+            if not job:
+                self._slots.release()
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+                continue
+
+            with self._lock:
+                self._active.add(job['id'])
+            started = self._executor.submit(self._run, job)
+            started.add_done_callback(lambda done, job=job: self._started(job, done))
+
+    def _started(self, job: Dict, future: concurrent.futures.Future):
+        """Kaniko builds return the monitor's future: keep the slot until it resolves."""
+        if not future.exception() and isinstance(future.result(), concurrent.futures.Future):
+            future.result().add_done_callback(lambda done: self._finished(job, done))
+        else:
+            self._finished(job, future)
+
+    def _finished(self, job: Dict, future: concurrent.futures.Future):
+        try:
+            error = future.exception()
+            if error:
+                logger.error("Build worker error", exc_info=error, extra={"extra_fields": {"job_id": job['id']}})
+                database.append_build_logs(job['id'], f"\n💥 Internal System Error: {str(error)}\n")
+                database.update_build_job(job['id'], "FAILED")
+        except Exception:
+            logger.error("Failed to record build failure", exc_info=True, extra={"extra_fields": {"job_id": job['id']}})
+        finally:
+            with self._lock:
+                self._active.discard(job['id'])
+            self._slots.release()
+            self._wakeup.set()
+
+    def _run(self, job: Dict) -> Optional[concurrent.futures.Future]:
+        """
+        Starts one claimed job. Kaniko (K8s) returns once the Job is submitted, with
+        a future resolved by the pod monitor; local Docker builds run to completion.
+        """
+        category = job['category']
+        tool_name = job['tool_id'][len(category) + 1:]
+        docker_config = job['docker_config']
+
+        if os.getenv("KUBERNETES_SERVICE_HOST"):
+            from .kaniko_builder import kaniko_service
+            return kaniko_service.start_build(job['id'], category, tool_name, docker_config)
+        else:
+            from .build_engine import run_build_thread
+            run_build_thread(job['id'], category, tool_name, docker_config)
+
+    def _heartbeat_loop(self):
+        while not self._stop.wait(self.heartbeat_interval):
+            try:
+                database.heartbeat_build_jobs(list(self.active_jobs()))
+                cutoff = (datetime.utcnow() - timedelta(seconds=self.stale_after)).isoformat()
+                requeued = database.requeue_stale_build_jobs(cutoff)
+                if requeued:
+                    logger.warning("Re-queued stale build jobs", extra={"extra_fields": {"count": requeued}})
+                    self._wakeup.set()
+            except Exception:
+                logger.error("Build heartbeat failed", exc_info=True)
+
+
+scheduler = BuildScheduler(
+    max_workers=settings.BUILD_MAX_WORKERS,
+    poll_interval=settings.BUILD_QUEUE_POLL_SECONDS,
+    heartbeat_interval=settings.BUILD_HEARTBEAT_SECONDS,
+    stale_after=settings.BUILD_STALE_SECONDS
+)
@@ -0,0 +1,199 @@
+"""
+Bulk builds: rebuild a whole workspace (or a list of tools) in one request.
+The selected tools form a dependency graph on the platform base images they
+start FROM: those bases are built first, each tool is queued as soon as its
+base is done (tools pick up the new base digest when their Dockerfile is
+rendered), and at most `max_parallel` tool builds of the batch are in flight.
+Every job's progress is aggregated into one event feed per bulk build.
+"""
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from config import settings
+from core import database
+from core.logger import logger
+from . import platform_base
+from .registry_adapter import should_build_image
+
+FINAL_STATUSES = ("SUCCESS", "FAILED")
+MAX_TRACKED_BULK_BUILDS = 50
+
+
+def select_tools(workspace: Optional[str] = None, tool_ids: Optional[List[str]] = None) -> List[Dict]:
+    """Buildable catalogue tools of a workspace and/or in `tool_ids`."""
+    wanted = set(tool_ids or [])
+    selected = []
+    for tool_id, docker_config in platform_base.catalogue_docker_configs():
+        category, tool_name = tool_id.split("/", 1)
+        if workspace and category != workspace:
+            continue
+        if wanted and tool_id not in wanted:
+            continue
+        if not should_build_image(docker_config):
+            continue
+        selected.append({"tool_id": tool_id, "category": category, "tool_name": tool_name,
+                         "docker_config": docker_config})
+    return selected
+
+
+def plan_bulk_build(tools: List[Dict], min_tools: Optional[int] = None) -> Dict:
+    """
+    Dependency graph of the batch: the platform bases used by the selected
+    tools, and for every tool the base it depends on (None for standalone tools).
+    """
+    bases = {plan["base_image"]: plan for plan in platform_base.plan_platform_bases(min_tools)}
+    needed: Dict[str, Dict] = {}
+    for tool in tools:
+        tool["depends_on"] = None
+        if not platform_base.uses_platform_base(tool["docker_config"]):
+            continue
+        plan = bases.get(tool["docker_config"].get("base_image", platform_base.DEFAULT_BASE_IMAGE))
+        if plan:
+            needed[plan["tool_id"]] = plan
+            tool["depends_on"] = plan["tool_id"]
+    return {"bases": list(needed.values()), "tools": tools}
+
+
+class BulkBuild:
+    """One batch: drives its builds through the build queue and records an event feed."""
+
+    def __init__(self, plan: Dict, max_parallel: int, priority: int, poll_interval: float):
+        self.id = str(uuid.uuid4())
+        self.bases = plan["bases"]
+        self.tools = plan["tools"]
+        self.max_parallel = max(1, max_parallel)
+        self.priority = priority
+        self.poll_interval = poll_interval
+        self.events: List[Dict] = []
+        self.finished = False
+        self._cond = threading.Condition()
+        self._jobs: Dict[str, Dict] = {}        # job_id -> {"tool_id", "stage", "status"}
+        self._base_status: Dict[str, str] = {}  # base tool_id -> final status
+
+    def emit(self, event: Dict):
+        with self._cond:
+            event["seq"] = len(self.events)
+            self.events.append(event)
+            self._cond.notify_all()
+
+    def events_since(self, seq: int) -> List[Dict]:
+        with self._cond:
+            return self.events[seq:]
+
+    def start(self):
+        threading.Thread(target=self.run, name=f"bulk-build-{self.id[:8]}", daemon=True).start()
+
+    def _submit(self, tool_id: str, docker_config: Dict, stage: str):
+        from services.docker_build_service import trigger_build_async
+        category, tool_name = tool_id.split("/", 1)
+        try:
+            job_id = trigger_build_async(category, tool_name, docker_config, priority=self.priority)
+        except Exception as e:
+            logger.error("Bulk build submit failed", exc_info=True, extra={"extra_fields": {"bulk_id": self.id, "tool_id": tool_id}})
+            self.emit({"type": "job", "stage": stage, "tool_id": tool_id, "job_id": None, "status": "FAILED", "error": str(e)})
+            return None
+        self._jobs[job_id] = {"tool_id": tool_id, "stage": stage, "status": None}
+        return job_id
+
+    def _refresh(self):
+        """Emits a job event for every status change (one query for all open jobs)."""
+        open_jobs = [job_id for job_id, job in self._jobs.items() if job["status"] not in FINAL_STATUSES]
+        for job_id, status in database.get_build_job_statuses(open_jobs).items():
+            job = self._jobs[job_id]
+            if status == job["status"]:
+                continue
+            job["status"] = status
+            self.emit({"type": "job", "stage": job["stage"], "tool_id": job["tool_id"], "job_id": job_id, "status": status})
+            if job["stage"] == "platform_base" and status in FINAL_STATUSES:
+                self._base_status[job["tool_id"]] = status
+                if status == "FAILED":
+                    self.emit({"type": "warning", "tool_id": job["tool_id"],
+                               "message": "Platform base build failed; dependent tools are built on the upstream base image"})
+
+    def _progress(self, counts: Dict[str, int]):
+        self.emit({"type": "progress", "total": len(self.tools), **counts})
+
+    def run(self):
+        self.emit({"type": "plan", "bulk_id": self.id, "max_parallel": self.max_parallel,
+                   "platform_bases": [base["tool_id"] for base in self.bases],
+                   "tools": [{"tool_id": t["tool_id"], "depends_on": t["depends_on"]} for t in self.tools]})
+        try:
+            for base in self.bases:
+                if not self._submit(base["tool_id"], base["docker_config"], "platform_base"):
+                    self._base_status[base["tool_id"]] = "FAILED"
+
+            pending = list(self.tools)
+            tool_jobs: Dict[str, str] = {}  # tool_id -> job_id
+            failed_submits = 0
+            last_counts = None
+            while True:
+                self._refresh()
+                in_flight = sum(1 for job_id in tool_jobs.values()
+                                if self._jobs[job_id]["status"] not in FINAL_STATUSES)
+                for tool in list(pending):
+                    if in_flight >= self.max_parallel:
+                        break
+                    if tool["depends_on"] and tool["depends_on"] not in self._base_status:
+                        continue  # base still building
+                    pending.remove(tool)
+                    job_id = self._submit(tool["tool_id"], tool["docker_config"], "tool")
+                    if job_id:
+                        tool_jobs[tool["tool_id"]] = job_id
+                        in_flight += 1
+                    else:
+                        failed_submits += 1
+
+                statuses = [self._jobs[job_id]["status"] for job_id in tool_jobs.values()]
+                counts = {
+                    "succeeded": statuses.count("SUCCESS"),
+                    "failed": statuses.count("FAILED") + failed_submits,
+                    "running": in_flight,
+                    "waiting": len(pending),
+                }
+                if counts != last_counts:
+                    self._progress(counts)
+                    last_counts = counts
+                if not pending and not in_flight:
+                    break
+                time.sleep(self.poll_interval)
+            self.emit({"type": "done", "succeeded": counts["succeeded"], "failed": counts["failed"]})
+        except Exception as e:
+            logger.error("Bulk build failed", exc_info=True, extra={"extra_fields": {"bulk_id": self.id}})
+            self.emit({"type": "error", "message": str(e)})
+        finally:
+            with self._cond:
+                self.finished = True
+                self._cond.notify_all()
+
+
+_bulk_builds: "OrderedDict[str, BulkBuild]" = OrderedDict()
+_registry_lock = threading.Lock()
+
+
+def start_bulk_build(workspace: Optional[str] = None, tool_ids: Optional[List[str]] = None,
+                     max_parallel: Optional[int] = None, priority: Optional[int] = None) -> BulkBuild:
+    """Plans and starts a bulk build; raises ValueError when nothing matches."""
+    from .build_scheduler import PRIORITY_NORMAL
+
+    tools = select_tools(workspace, tool_ids)
+    if not tools:
+        raise ValueError("No buildable tools matched")
+    bulk = BulkBuild(plan_bulk_build(tools),
+                     max_parallel=max_parallel or settings.BULK_BUILD_MAX_PARALLEL,
+                     priority=PRIORITY_NORMAL if priority is None else priority,
+                     poll_interval=settings.BULK_BUILD_POLL_SECONDS)
+    with _registry_lock:
+        _bulk_builds[bulk.id] = bulk
+        while len(_bulk_builds) > MAX_TRACKED_BULK_BUILDS:
+            _bulk_builds.popitem(last=False)
+    bulk.start()
+    logger.info("Bulk build started", extra={"extra_fields": {"bulk_id": bulk.id, "tools": len(tools), "platform_bases": len(bulk.bases)}})
+    return bulk
+
+
+def get_bulk_build(bulk_id: str) -> Optional[BulkBuild]:
+    with _registry_lock:
+        return _bulk_builds.get(bulk_id)
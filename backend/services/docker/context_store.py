@@ -0,0 +1,123 @@
+"""
+Store of Kaniko build contexts.
+Contexts are generated as deterministic tar.gz bytes (fixed mtimes/owners),
+addressed by their sha256 and saved in Postgres (build_contexts) with a TTL,
+so any worker or replica behind the Service URL can serve them and nothing is
+left on disk when a build crashes. A bounded in-memory LRU in front of the
+table serves repeated downloads. The Kaniko init container downloads the
+context from /api/builds/context/{job_id} and verifies the hash.
+"""
+import gzip
+import hashlib
+import io
+import tarfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterator, Optional, Tuple
+
+from config import settings
+from core import database
+from core.logger import logger
+
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+def build_context_archive(files: Dict[str, bytes]) -> bytes:
+    """Deterministic tar.gz of the given files: same files -> same bytes -> same hash."""
+    raw = io.BytesIO()
+    with tarfile.open(fileobj=raw, mode="w", format=tarfile.PAX_FORMAT) as tar:
+        for name in sorted(files):
+            data = files[name]
+            info = tarfile.TarInfo(name=name)
+            info.size = len(data)
+            info.mode = 0o644
+            info.mtime = 0
+            info.uid = info.gid = 0
+            info.uname = info.gname = ""
+            tar.addfile(info, io.BytesIO(data))
+    compressed = io.BytesIO()
+    with gzip.GzipFile(fileobj=compressed, mode="wb", mtime=0) as gz:
+        gz.write(raw.getvalue())
+    return compressed.getvalue()
+
+
+class BuildContextStore:
+    """build_contexts table behind a bounded (entries and bytes) LRU, both with expiry."""
+
+    def __init__(self, max_entries: int, max_bytes: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[bytes, str, float]]" = OrderedDict()
+        self._bytes = 0
+
+    def put(self, job_id: str, data: bytes) -> str:
+        """Stores a context and returns its sha256."""
+        digest = hashlib.sha256(data).hexdigest()
+        database.save_build_context(job_id, digest, data, self.ttl_seconds)
+        self._cache(job_id, data, digest)
+        return digest
+
+    def _cache(self, job_id: str, data: bytes, digest: str):
+        with self._lock:
+            self._remove(job_id)
+            self._entries[job_id] = (data, digest, time.monotonic() + self.ttl_seconds)
+            self._bytes += len(data)
+            self._evict()
+
+    def get(self, job_id: str) -> Optional[Tuple[bytes, str]]:
+        """(data, sha256) of a live context, or None if missing/expired."""
+        with self._lock:
+            entry = self._entries.get(job_id)
+            if entry is not None and entry[2] < time.monotonic():
+                self._remove(job_id)
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(job_id)
+                return entry[0], entry[1]
+        # Saved by another worker/replica
+        stored = database.get_build_context(job_id)
+        if stored is None:
+            return None
+        self._cache(job_id, *stored)
+        return stored
+
+    def discard(self, job_id: str):
+        with self._lock:
+            self._remove(job_id)
+        try:
+            database.delete_build_context(job_id)
+        except Exception:
+            # The row expires with its TTL and is purged by a later put()
+            logger.warning("Failed to delete build context", exc_info=True, extra={"extra_fields": {"job_id": job_id}})
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self._bytes}
+
+    def _remove(self, job_id: str):
+        entry = self._entries.pop(job_id, None)
+        if entry is not None:
+            self._bytes -= len(entry[0])
+
+    def _evict(self):
+        now = time.monotonic()
+        for job_id in [k for k, (_, _, expires) in self._entries.items() if expires < now]:
+            self._remove(job_id)
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            self._remove(next(iter(self._entries)))
+
+
+def iter_chunks(data: bytes, chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[bytes]:
+    view = memoryview(data)
+    for offset in range(0, len(data), chunk_size):
+        yield bytes(view[offset:offset + chunk_size])
+
+
+context_store = BuildContextStore(
+    max_entries=settings.BUILD_CONTEXT_MAX_ENTRIES,
+    max_bytes=settings.BUILD_CONTEXT_MAX_BYTES,
+    ttl_seconds=settings.BUILD_CONTEXT_TTL_SECONDS
+)
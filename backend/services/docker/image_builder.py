@@ -18,8 +18,15 @@ class ImageBuilderService:
         self.build_root_dir = build_dir
         self.build_root_dir.mkdir(parents=True, exist_ok=True)
 
-    def generate_dockerfile(self, tool_name: str, docker_config: Dict, context_path: Path) -> Optional[str]:
-        """Generate Dockerfile content based on configuration"""
+    @staticmethod
+    def generate_dockerfile(tool_name: str, docker_config: Dict, context_path: Optional[Path] = None,
+                            platform_base: Optional[Dict] = None) -> Optional[str]:
+        """
+        Generate Dockerfile content based on configuration (pure: same config -> same bytes).
+        platform_base: built shared base image for the tool's base_image (see platform_base.py);
+        the tool then starts FROM it and installs only its own extra packages.
+        Packages are de-duplicated and sorted so equivalent configs produce identical layers.
+        """
         
         # Option 1: Use existing image (no build needed)
         has_build_config = any(k in docker_config for k in ["apt_packages", "pip_packages", "run_commands", "dockerfile", "base_image"])
@@ -42,15 +49,23 @@ class ImageBuilderService:
         
         # Option 3: Auto-generate from dependencies and commands
         base_image = docker_config.get("base_image", "python:3.11-slim")
-        apt_packages = docker_config.get("apt_packages", [])
-        pip_packages = docker_config.get("pip_packages", [])
+        apt_packages = sorted(set(docker_config.get("apt_packages") or []))
+        pip_packages = sorted(set(docker_config.get("pip_packages") or []))
         run_commands = docker_config.get("run_commands", [])
         
+        from_image = base_image
+        if platform_base and platform_base.get("base_image") == base_image:
+            from_image = platform_base["image"]
+            shared_apt = set(platform_base.get("apt_packages") or [])
+            shared_pip = set(platform_base.get("pip_packages") or [])
+            apt_packages = [pkg for pkg in apt_packages if pkg not in shared_apt]
+            pip_packages = [pkg for pkg in pip_packages if pkg not in shared_pip]
+        
         # Multi-stage build support
         final_base = docker_config.get("final_base")
         final_run_commands = docker_config.get("final_run_commands", [])
         
-        dockerfile = f"FROM {base_image} as builder\n\n"
+        dockerfile = f"FROM {from_image} as builder\n\n"
         
         # Add user if specified
         if "user" in docker_config:
@@ -126,9 +141,12 @@ class ImageBuilderService:
         
         return dockerfile
 
-    def build_tool_image(self, tool_name: str, docker_config: Dict, job_id: str) -> Tuple[bool, str, str]:
+    def build_tool_image(self, tool_name: str, docker_config: Dict, job_id: str, image_tag: Optional[str] = None,
+                         dockerfile_content: Optional[str] = None) -> Tuple[bool, str, str]:
         """
         Builds the Docker image for a specific tool.
+        image_tag: target tag (content-addressed, see build_index); generated when omitted.
+        dockerfile_content: pre-rendered Dockerfile (e.g. rebased on the platform base).
         Returns: (success, image_tag, logs)
         """
         logs = []
@@ -139,12 +157,12 @@ class ImageBuilderService:
             else:
                 logger.info(msg, extra={"extra_fields": {"job_id": job_id, "tool_name": tool_name}})
 
-        # Use authoritative tag generation
-        image_tag = docker_config.get("image")
-        
-        # If no explicit override, generate authoritative tag
-        if not image_tag or "security-platform-tool-" in image_tag:
-             image_tag = utils.generate_image_tag(tool_name)
+        # A tag passed by the caller (content-addressed) is used as-is
+        if not image_tag:
+            image_tag = docker_config.get("image")
+            # If no explicit override, generate authoritative tag
+            if not image_tag or "security-platform-tool-" in image_tag:
+                image_tag = utils.generate_image_tag(tool_name)
         
         log(f"🔨 Starting build for {tool_name} -> {image_tag}")
         
@@ -156,7 +174,8 @@ class ImageBuilderService:
         
         try:
             # Generate Dockerfile
-            dockerfile_content = self.generate_dockerfile(tool_name, docker_config, tool_build_dir)
+            if dockerfile_content is None:
+                dockerfile_content = self.generate_dockerfile(tool_name, docker_config, tool_build_dir)
             if not dockerfile_content:
                 # If no content returned, maybe it's using a pre-existing image without build config?
                 # But if we are here, we probably wanted to build.
@@ -1,95 +1,81 @@
 import os
-import tarfile
-import tempfile
-from pathlib import Path
+import concurrent.futures
 from typing import Dict, Optional
-import time
-import re
-import shutil
 
-from kubernetes import client, config, watch
+from kubernetes import client, config
 import psycopg2.extras
 
 from config import settings
 from core import database, utils
 from core.logger import logger
 from services.docker.registry_adapter import construct_remote_tag
-from services.docker.image_builder import ImageBuilderService
+from services.docker import build_index, build_cache, platform_base
+from services.docker.context_store import build_context_archive, context_store
+from services.docker.kaniko_monitor import kaniko_monitor
 
 class KanikoBuilderService:
-    def __init__(self):
-        # Determine where to store temporary build contexts
-        # In a real K8s deployment, this directory should be ephemeral or managed.
-        self.temp_base = Path("/tmp/build-contexts")
-        self.temp_base.mkdir(parents=True, exist_ok=True)
-
-    def prepare_context(self, job_id: str, category: str, tool_name: str, docker_config: Dict) -> Optional[Path]:
+    def prepare_context(self, job_id: str, category: str, tool_name: str, docker_config: Dict,
+                        dockerfile_content: Optional[str] = None) -> Optional[str]:
         """
-        Generates the build context and archives it into a .tar.gz file.
-        Returns the path to the tarball.
+        Generates the build context in memory and stores it in the context store.
+        Returns the sha256 of the tar.gz (verified by the init container).
         """
-        # Create a temp directory for this build
-        build_dir = Path(tempfile.mkdtemp(prefix=f"kaniko_ctx_{job_id}_"))
-        
         try:
-            # Use ImageBuilderService logic to generate Dockerfile and copy files
-            # We pass the temp dir as the build root
-            builder = ImageBuilderService(build_dir=build_dir)
-            
-            # We assume ImageBuilderService.generate_dockerfile is modular enough
-            # We need to manually drive it because build_tool_image does the build too.
-            # Reuse logic from ImageBuilderService.build_tool_image basically:
-            
-            # Context dir inside the temp root
-            context_dir = build_dir / f"context"
-            context_dir.mkdir(parents=True)
-            
             # Generate Dockerfile
-            dockerfile_content = builder.generate_dockerfile(tool_name, docker_config, context_dir)
+            if dockerfile_content is None:
+                dockerfile_content = platform_base.render_dockerfile(tool_name, docker_config)
             if not dockerfile_content:
                 # If no content, maybe we can't build.
                 logger.error("Failed to generate Dockerfile", extra={"extra_fields": {"tool_name": tool_name, "job_id": job_id}})
                 return None
-                
-            (context_dir / "Dockerfile").write_text(dockerfile_content)
             
-            # Now archive the context_dir
-            tar_path = self.temp_base / f"{job_id}.tar.gz"
-            with tarfile.open(tar_path, "w:gz") as tar:
-                tar.add(context_dir, arcname=".")
-                
-            logger.info("Context tarball created", extra={"extra_fields": {"job_id": job_id, "tar_path": str(tar_path), "size_bytes": tar_path.stat().st_size}})
-            return tar_path
+            archive = build_context_archive({"Dockerfile": dockerfile_content.encode("utf-8")})
+            context_hash = context_store.put(job_id, archive)
+            
+            logger.info("Context archive created", extra={"extra_fields": {"job_id": job_id, "sha256": context_hash, "size_bytes": len(archive)}})
+            return context_hash
             
         except Exception as e:
             logger.error("Error preparing context for Kaniko", exc_info=True, extra={"extra_fields": {"job_id": job_id, "tool_name": tool_name}})
             return None
-        finally:
-            # Cleanup the uncompressed dir
-            if build_dir.exists():
-                shutil.rmtree(build_dir)
 
-    def trigger_build(self, job_id: str, category: str, tool_name: str, docker_config: Dict):
+    def trigger_build(self, job_id: str, category: str, tool_name: str, docker_config: Dict) -> bool:
+        """
+        Runs a Kaniko build and blocks until it finishes.
+        """
+        return self.start_build(job_id, category, tool_name, docker_config).result()
+
+    def start_build(self, job_id: str, category: str, tool_name: str, docker_config: Dict) -> concurrent.futures.Future:
         """
         Creates and submits a Kubernetes Job to run Kaniko.
+        Returns a future resolved (True/False) by the pod monitor when the build ends;
+        no thread is held while the build runs.
         """
+        failed: concurrent.futures.Future = concurrent.futures.Future()
+        failed.set_result(False)
         # 1. Prepare Context
         database.append_build_logs(job_id, "📦 Preparing build context...\n")
-        tar_path = self.prepare_context(job_id, category, tool_name, docker_config)
+        dockerfile_content = platform_base.render_dockerfile(tool_name, docker_config)
+        context_hash = self.prepare_context(job_id, category, tool_name, docker_config, dockerfile_content)
         
-        if not tar_path:
+        if not context_hash:
             database.update_build_job(job_id, "FAILED")
             database.append_build_logs(job_id, "❌ Failed to prepare build context.\n")
-            return
+            return failed
 
         # 2. Determine Destination
         # Default to internal registry if not configured
         registry_config = database.get_registry_config() or {"type": "internal"}
         
-        # Calculate image tag
-        image_tag = docker_config.get("image")
-        if not image_tag or "security-platform-tool-" in image_tag:
-             image_tag = utils.generate_image_tag(tool_name)
+        # Calculate image tag (content-addressed: hash of Dockerfile + build inputs)
+        full_tool_id = f"{category}/{tool_name}"
+        build_hash = None
+        if dockerfile_content:
+            image_tag, build_hash = build_index.build_target(full_tool_id, docker_config, dockerfile_content)
+        else:
+            image_tag = docker_config.get("image")
+            if not image_tag or "security-platform-tool-" in image_tag:
+                 image_tag = utils.generate_image_tag(tool_name)
         
         # Determine destination string (Kaniko format)
         destination = ""
@@ -110,6 +96,7 @@ class KanikoBuilderService:
         else:
              # External Registry
              destination = construct_remote_tag(image_tag, registry_config)
+             image_tag = destination
              database.append_build_logs(job_id, f"🎯 Destination: {registry_config['type']} ({destination})\n")
 
 
@@ -148,7 +135,12 @@ class KanikoBuilderService:
         
         # Init Container: Download and Extract Context
         # wget -O /tmp/context.tar.gz {url} && tar -xzf /tmp/context.tar.gz -C /workspace
-        init_cmd = f"wget -q -O /tmp/context.tar.gz '{context_url}' && tar -xzf /tmp/context.tar.gz -C /workspace"
+        # The sha256 check rejects truncated or stale contexts before Kaniko starts
+        init_cmd = (
+            f"wget -q -O /tmp/context.tar.gz '{context_url}' && "
+            f"echo '{context_hash}  /tmp/context.tar.gz' | sha256sum -c - && "
+            f"tar -xzf /tmp/context.tar.gz -C /workspace"
+        )
         
         init_container = client.V1Container(
             name="context-init",
@@ -156,16 +148,42 @@ class KanikoBuilderService:
             command=["sh", "-c", init_cmd],
             volume_mounts=volume_mounts
         )
+        init_containers = [init_container]
+        
+        # Layer cache (registry cache repo) and optional persistent base-image cache
+        cache = build_cache.cache_settings(registry_config)
+        kaniko_volume_mounts = list(volume_mounts)
+        if cache["enabled"] and cache["volume"]:
+            volumes.append(client.V1Volume(
+                name="kaniko-cache",
+                persistent_volume_claim=client.V1PersistentVolumeClaimVolumeSource(claim_name=cache["volume"])
+            ))
+            cache_mount = client.V1VolumeMount(name="kaniko-cache", mount_path=build_cache.CACHE_DIR)
+            kaniko_volume_mounts.append(cache_mount)
+            # The warmer downloads base images missing from the cache volume
+            warm_images = build_cache.base_images(dockerfile_content or "")
+            if warm_images:
+                init_containers.append(client.V1Container(
+                    name="cache-warmer",
+                    image=build_cache.WARMER_IMAGE,
+                    args=[f"--cache-dir={build_cache.CACHE_DIR}"] + [f"--image={img}" for img in warm_images],
+                    volume_mounts=[cache_mount]
+                ))
+        cache_args = build_cache.kaniko_cache_args(cache, destination)
+        if cache_args:
+            database.append_build_logs(job_id, f"🧊 Layer cache: {' '.join(cache_args)}\n")
 
         # Kaniko Args - Always push to registry
         kaniko_args = [
             f"--dockerfile=Dockerfile",
             f"--context=dir:///workspace",
             f"--destination={destination}",
+            # Kaniko writes the pushed digest here; read back from the pod status
+            "--digest-file=/dev/termination-log",
             "--force",
             "--insecure",
             "--skip-tls-verify"
-        ]
+        ] + cache_args
         
         env_vars = []
         
@@ -184,14 +202,14 @@ class KanikoBuilderService:
                     metadata=client.V1ObjectMeta(labels={"job-type": "kaniko-build", "build-id": job_id}),
                     spec=client.V1PodSpec(
                         restart_policy="Never",
-                        init_containers=[init_container],
+                        init_containers=init_containers,
                         containers=[
                             client.V1Container(
                                 name="kaniko",
                                 image="gcr.io/kaniko-project/executor:latest",
                                 args=kaniko_args,
                                 env=env_vars,
-                                volume_mounts=volume_mounts
+                                volume_mounts=kaniko_volume_mounts
                             )
                         ],
                         volumes=volumes
@@ -203,112 +221,25 @@ class KanikoBuilderService:
         try:
             logger.info("Launching Kaniko Build Job", extra={"extra_fields": {"job_name": job_name, "build_id": job_id, "tool_name": tool_name}})
             database.append_build_logs(job_id, f"🚀 Launching Kaniko Job: {job_name}\n")
-            batch_v1.create_namespaced_job(namespace=settings.K8S_NAMESPACE, body=job)
+            try:
+                batch_v1.create_namespaced_job(namespace=settings.K8S_NAMESPACE, body=job)
+            except client.exceptions.ApiException as e:
+                # A re-queued job (worker restarted) may still have its Kaniko Job running
+                if e.status != 409:
+                    raise
+                database.append_build_logs(job_id, f"🔁 Kaniko Job {job_name} already exists, re-attaching...\n")
             
-            # Monitor Job
-            self.monitor_job(job_id, job_name, batch_v1, destination)
+            # Monitor Job (pod events, logs and the pushed digest come from the shared watch)
+            database.append_build_logs(job_id, "⏳ Waiting for builder pod to initialize...\n")
+            return kaniko_monitor.track(job_id, job_name, destination,
+                                        tool_id=full_tool_id, build_hash=build_hash, image_tag=image_tag)
             
         except Exception as e:
             logger.error("Failed to create Kaniko K8s Job", exc_info=True, extra={"extra_fields": {"job_id": job_id, "tool_name": tool_name}})
             database.update_build_job(job_id, "FAILED")
             database.append_build_logs(job_id, f"💥 Failed to create K8s Job: {e}\n")
-
-    def monitor_job(self, job_id: str, job_name: str, batch_api, destination: str):
-        """
-        Polls the job status and streams logs to DB.
-        """
-        core_v1 = client.CoreV1Api()
-        namespace = settings.K8S_NAMESPACE
-        
-        # Wait for pod and main container to start
-        pod_name = None
-        database.append_build_logs(job_id, "⏳ Waiting for builder pod to initialize...\n")
-        
-        start_time = time.time()
-        while time.time() - start_time < 120:
-            pods = core_v1.list_namespaced_pod(namespace, label_selector=f"job-name={job_name}")
-            if pods.items:
-                pod = pods.items[0]
-                pod_name = pod.metadata.name
-                
-                # Check for Init Container Failures
-                if pod.status.init_container_statuses:
-                    for init_status in pod.status.init_container_statuses:
-                        if init_status.state.terminated and init_status.state.terminated.exit_code != 0:
-                            database.update_build_job(job_id, "FAILED")
-                            init_logs = ""
-                            try:
-                                init_logs = core_v1.read_namespaced_pod_log(name=pod_name, namespace=namespace, container="context-init")
-                            except:
-                                init_logs = "Could not fetch init logs."
-                            database.append_build_logs(job_id, f"❌ Init Container Failed: {init_status.state.terminated.reason}\nLogs:\n{init_logs}\n")
-                            return
-
-                # Check Main Container Status
-                if pod.status.container_statuses:
-                    for status in pod.status.container_statuses:
-                        if status.name == "kaniko":
-                            if status.state.running or status.state.terminated:
-                                break # Ready to stream
-                    else:
-                        time.sleep(1)
-                        continue # specific container not found or not ready
-                    break # inner break triggered
-            
-            time.sleep(2)
-            
-        if not pod_name:
-            database.update_build_job(job_id, "FAILED")
-            database.append_build_logs(job_id, "❌ Timeout waiting for builder pod.\n")
-            return
-
-        # Stream Logs
-        try:
-            database.append_build_logs(job_id, f"📜 Streaming logs from {pod_name}...\n")
-            
-            # ANSI escape code regex
-            ansi_escape = re.compile(r'\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])')
-            
-            # Watch logs (blocking)
-            w = watch.Watch()
-            for e in w.stream(core_v1.read_namespaced_pod_log, name=pod_name, namespace=namespace, container="kaniko"):
-                # Strip ANSI codes
-                clean_line = ansi_escape.sub('', e)
-                database.append_build_logs(job_id, f"[Kaniko] {clean_line}\n")
-                
-            # Wait a moment for Job status to update (Kubernetes needs time after pod completes)
-            time.sleep(3)
-            
-            # Get all logs to check for success indicators
-            all_logs = database.get_build_job(job_id).get('logs', '')
-            
-            # Check final status - Kaniko success is indicated by "Pushed" message
-            job = batch_api.read_namespaced_job(job_name, namespace)
-            build_succeeded = (job.status.succeeded and job.status.succeeded > 0) or ('Pushed' in all_logs and 'sha256:' in all_logs)
-            
-            if build_succeeded:
-                database.update_build_job(job_id, "SUCCESS", image_tag=destination)
-                database.append_build_logs(job_id, "\n✅ Build & Push Successful!\n")
-            else:
-                database.update_build_job(job_id, "FAILED")
-                database.append_build_logs(job_id, "\n❌ Build Failed.\n")
-                
-        except Exception as e:
-             database.append_build_logs(job_id, f"Error monitoring logs: {e}\n")
-             # Try to check status one last time
-             all_logs = database.get_build_job(job_id).get('logs', '')
-             job = batch_api.read_namespaced_job(job_name, namespace)
-             build_succeeded = (job.status.succeeded and job.status.succeeded > 0) or ('Pushed' in all_logs and 'sha256:' in all_logs)
-             
-             if build_succeeded:
-                 database.update_build_job(job_id, "SUCCESS", image_tag=destination)
-             else:
-                 database.update_build_job(job_id, "FAILED")
-        
-        # Cleanup Context
-        context_file = self.temp_base / f"{job_id}.tar.gz"
-        if context_file.exists():
-            context_file.unlink()
+            context_store.discard(job_id)
+            return failed
 
 # Global Instance
 kaniko_service = KanikoBuilderService()
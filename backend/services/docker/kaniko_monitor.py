@@ -0,0 +1,367 @@
+"""
+Event-driven monitor for Kaniko build pods.
+A single namespace-wide watch on pods labelled job-type=kaniko-build feeds
+pod events to per-build handlers running on one asyncio loop. Handlers poll
+the kaniko container log incrementally while it runs (short API calls, no
+thread held per build), parse cache stats and the pushed digest from the
+stream, and resolve a future when the build ends, so one backend can track
+hundreds of concurrent builds.
+"""
+import asyncio
+import calendar
+import concurrent.futures
+import math
+import re
+import threading
+import time
+from typing import Dict, List, Optional
+
+from kubernetes import client, watch
+
+from config import settings
+from core import database
+from core.logger import logger
+from . import build_cache, build_index
+from .context_store import context_store
+
+BUILD_POD_SELECTOR = "job-type=kaniko-build"
+
+# Extra seconds requested before the last seen log line (clock skew between
+# the backend and the node); the overlap is dropped by timestamp
+LOG_SINCE_MARGIN_SECONDS = 5
+
+_ANSI_ESCAPE = re.compile(r'\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])')
+_PUSHED_DIGEST = re.compile(r'Pushed \S+@(sha256:[0-9a-f]{64})')
+
+
+def parse_pushed_digest(line: str) -> Optional[str]:
+    match = _PUSHED_DIGEST.search(line)
+    return match.group(1) if match else None
+
+
+def split_timestamp(line: str):
+    """'2024-01-01T00:00:00.123Z message' -> (timestamp, message) (from timestamps=True logs)."""
+    timestamp, _, message = line.partition(" ")
+    return timestamp, message
+
+
+def timestamp_key(timestamp: str) -> str:
+    """
+    Sortable form of an RFC3339Nano timestamp: the fraction is padded to 9
+    digits (the kubelet trims trailing zeros, so raw strings don't compare).
+    """
+    seconds, _, fraction = timestamp.rstrip("Z").partition(".")
+    return f"{seconds}.{fraction.ljust(9, '0')}"
+
+
+def _state_name(state) -> Optional[str]:
+    """'running', 'terminated' or 'waiting' for a V1ContainerState."""
+    for name in ("running", "terminated", "waiting"):
+        if state is not None and getattr(state, name, None):
+            return name
+    return None
+
+
+def timestamp_epoch(timestamp: str) -> float:
+    seconds, _, fraction = timestamp.rstrip("Z").partition(".")
+    return calendar.timegm(time.strptime(seconds, "%Y-%m-%dT%H:%M:%S")) + float(f"0.{fraction or 0}")
+
+
+class KanikoBuildHandler:
+    """State of one tracked build; all methods run on the monitor loop."""
+
+    def __init__(self, monitor: "KanikoBuildMonitor", job_id: str, job_name: str, destination: str,
+                 tool_id: Optional[str] = None, build_hash: Optional[str] = None, image_tag: Optional[str] = None):
+        self.monitor = monitor
+        self.job_id = job_id
+        self.job_name = job_name
+        self.destination = destination
+        self.tool_id = tool_id
+        self.build_hash = build_hash
+        self.image_tag = image_tag
+        self.future: concurrent.futures.Future = concurrent.futures.Future()
+        self.cache_stats = build_cache.KanikoCacheStats()
+        self.digest: Optional[str] = None
+        self.pod_name: Optional[str] = None
+        self._last_log_ts = ""
+        self._last_log_key = ""
+        # Lines already stored with the last timestamp (several lines may share it)
+        self._last_key_lines = 0
+        self._log_task: Optional[asyncio.Task] = None
+        self._header_logged = False
+        self._timeout: Optional[asyncio.TimerHandle] = None
+        # Init container states last seen: any change re-arms the start timeout
+        self._init_progress = ()
+        # Set before the first await of a terminal event: concurrent pod events
+        # must not fetch the final logs (or finish) twice
+        self._closing = False
+        self._done = False
+
+    async def _db(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(None, fn, *args)
+
+    async def log(self, message: str):
+        await self._db(database.append_build_logs, self.job_id, message)
+
+    def arm_timeout(self, seconds: float):
+        if self._timeout:
+            self._timeout.cancel()
+        loop = asyncio.get_running_loop()
+        self._timeout = loop.call_later(seconds, lambda: loop.create_task(self._on_timeout()))
+
+    async def _on_timeout(self):
+        if self._done or self._log_task is not None:
+            return
+        if any(state == "running" for _, state in self._init_progress):
+            # Context fetch / cache warm-up still at work: not stuck scheduling
+            self.arm_timeout(self.monitor.pod_start_timeout)
+            return
+        await self.log("❌ Timeout waiting for builder pod.\n")
+        await self.finish(False)
+
+    def _track_init_progress(self, init_statuses):
+        progress = tuple((s.name, _state_name(s.state)) for s in init_statuses)
+        if progress != self._init_progress:
+            self._init_progress = progress
+            if self._timeout and self._log_task is None:
+                self.arm_timeout(self.monitor.pod_start_timeout)
+
+    async def on_pod(self, pod):
+        if self._done or self._closing:
+            return
+        self.pod_name = pod.metadata.name
+        status = pod.status
+        self._track_init_progress(status.init_container_statuses or [])
+
+        for init_status in status.init_container_statuses or []:
+            terminated = init_status.state.terminated if init_status.state else None
+            if terminated and terminated.exit_code != 0:
+                self._closing = True
+                init_logs = await self._read_log(init_status.name) or "Could not fetch init logs."
+                await self.log(f"❌ Init Container Failed: {terminated.reason}\nLogs:\n{init_logs}\n")
+                await self.finish(False)
+                return
+
+        for container in status.container_statuses or []:
+            if container.name != "kaniko" or not container.state:
+                continue
+            if container.state.terminated:
+                self._closing = True
+                terminated = container.state.terminated
+                if self._log_task:
+                    self._log_task.cancel()
+                await self._log_header()
+                await self._fetch_new_logs()
+                if not self.digest and terminated.message:
+                    # --digest-file=/dev/termination-log
+                    self.digest = terminated.message.strip() or None
+                await self.finish(terminated.exit_code == 0)
+                return
+            if container.state.running and self._log_task is None:
+                # Assigned before any await: one poller per build
+                self._log_task = asyncio.get_running_loop().create_task(self._poll_logs())
+
+        if status.phase == "Failed":
+            self._closing = True
+            await self.finish(False)
+
+    async def _read_log(self, container: str, **kwargs) -> Optional[str]:
+        try:
+            return await self._db(lambda: self.monitor.core_v1.read_namespaced_pod_log(
+                name=self.pod_name, namespace=self.monitor.namespace, container=container, **kwargs))
+        except Exception:
+            return None
+
+    async def _log_header(self):
+        if not self._header_logged:
+            self._header_logged = True
+            await self.log(f"📜 Streaming logs from {self.pod_name}...\n")
+
+    async def _poll_logs(self):
+        await self._log_header()
+        while not self._done:
+            await self._fetch_new_logs()
+            await asyncio.sleep(self.monitor.log_poll_interval)
+
+    async def _fetch_new_logs(self):
+        """
+        Reads log lines newer than the last one seen and appends them in one DB
+        write. The API client has no sinceTime, so the read starts a few seconds
+        (since_seconds) before the last seen line and the overlap with the
+        previous read is dropped: lines older than its last timestamp, and as
+        many lines at that timestamp as it stored.
+        """
+        kwargs = {}
+        if self._last_log_ts:
+            behind = time.time() - timestamp_epoch(self._last_log_ts)
+            kwargs["since_seconds"] = max(math.ceil(behind) + LOG_SINCE_MARGIN_SECONDS, 1)
+        text = await self._read_log("kaniko", timestamps=True, **kwargs)
+        if not text:
+            return
+        lines: List[str] = []
+        since_key, overlap = self._last_log_key, self._last_key_lines
+        for raw in text.splitlines():
+            timestamp, message = split_timestamp(raw)
+            key = timestamp_key(timestamp)
+            if key < since_key:
+                continue
+            if key == since_key and overlap:
+                overlap -= 1
+                continue
+            if key > self._last_log_key:
+                self._last_log_ts, self._last_log_key, self._last_key_lines = timestamp, key, 0
+            if key == self._last_log_key:
+                self._last_key_lines += 1
+            clean_line = _ANSI_ESCAPE.sub('', message)
+            self.cache_stats.feed(clean_line)
+            self.digest = parse_pushed_digest(clean_line) or self.digest
+            lines.append(f"[Kaniko] {clean_line}\n")
+        if lines:
+            await self.log("".join(lines))
+
+    async def finish(self, succeeded: bool):
+        if self._done:
+            return
+        self._done = True
+        if self._timeout:
+            self._timeout.cancel()
+        if self._log_task:
+            self._log_task.cancel()
+        try:
+            await self._db(self._finalize, succeeded)
+        except Exception:
+            logger.error("Failed to finalize Kaniko build", exc_info=True, extra={"extra_fields": {"job_id": self.job_id}})
+        finally:
+            self.monitor.forget(self.job_id)
+            if not self.future.done():
+                self.future.set_result(succeeded)
+
+    def _finalize(self, succeeded: bool):
+        """Blocking DB bookkeeping (runs in the executor)."""
+        context_store.discard(self.job_id)
+        try:
+            hit_keys = [build_cache.step_key(cmd) for cmd in self.cache_stats.hits]
+            stats = self.cache_stats.finish(database.get_build_step_timings(hit_keys))
+            database.save_build_step_timings(self.cache_stats.uncached_timings())
+            database.update_build_cache_stats(self.job_id, stats)
+            database.append_build_logs(
+                self.job_id,
+                f"🧊 Cache: {stats['cache_hits']} hit(s), {stats['cache_misses']} miss(es), "
+                f"~{stats['time_saved_seconds']}s saved\n"
+            )
+        except Exception:
+            logger.warning("Failed to record build cache stats", exc_info=True, extra={"extra_fields": {"job_id": self.job_id}})
+
+        if succeeded:
+            if self.tool_id and self.build_hash and self.image_tag:
+                try:
+                    build_index.record_build(self.tool_id, self.build_hash, self.image_tag, self.digest)
+                except Exception:
+                    logger.error("Failed to record image build", exc_info=True, extra={"extra_fields": {"tool_id": self.tool_id}})
+            database.update_build_job(self.job_id, "SUCCESS", image_tag=self.destination)
+            database.append_build_logs(self.job_id, "\n✅ Build & Push Successful!\n")
+            # Pre-pull the new image on the nodes before its first execution
+            from services.execution.image_warmup import warmup_controller
+            warmup_controller.request_refresh()
+        else:
+            database.update_build_job(self.job_id, "FAILED")
+            database.append_build_logs(self.job_id, "\n❌ Build Failed.\n")
+
+
+class KanikoBuildMonitor:
+    """One pod watch + one asyncio loop for every Kaniko build of this process."""
+
+    def __init__(self, namespace: str, log_poll_interval: float, pod_start_timeout: float):
+        self.namespace = namespace
+        self.log_poll_interval = log_poll_interval
+        self.pod_start_timeout = pod_start_timeout
+        self.core_v1 = None
+        self._handlers: Dict[str, KanikoBuildHandler] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def start(self):
+        with self._lock:
+            if self._loop:
+                return
+            self.core_v1 = client.CoreV1Api()
+            self._loop = asyncio.new_event_loop()
+            threading.Thread(target=self._loop.run_forever, name="kaniko-monitor-loop", daemon=True).start()
+            threading.Thread(target=self._watch_pods, name="kaniko-pod-watch", daemon=True).start()
+
+    def stop(self):
+        self._stop.set()
+        if self._loop:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+
+    def track(self, job_id: str, job_name: str, destination: str, **kwargs) -> concurrent.futures.Future:
+        """Registers a build; the returned future resolves to True/False when it ends."""
+        self.start()
+        handler = KanikoBuildHandler(self, job_id, job_name, destination, **kwargs)
+
+        def register():
+            self._handlers[job_id] = handler
+            handler.arm_timeout(self.pod_start_timeout)
+            self._loop.create_task(self._sync_existing_pod(handler))
+        self._loop.call_soon_threadsafe(register)
+        return handler.future
+
+    async def _sync_existing_pod(self, handler: KanikoBuildHandler):
+        """
+        Feeds the pod's current state to a new handler: the pod of a re-attached
+        job (409 on create) may have finished already and sends no more events.
+        """
+        selector = f"{BUILD_POD_SELECTOR},build-id={handler.job_id}"
+        try:
+            pods = await asyncio.get_running_loop().run_in_executor(
+                None, lambda: self.core_v1.list_namespaced_pod(self.namespace, label_selector=selector))
+        except Exception:
+            logger.warning("Could not read Kaniko build pod", exc_info=True, extra={"extra_fields": {"job_id": handler.job_id}})
+            return
+        for pod in pods.items:
+            await handler.on_pod(pod)
+
+    def forget(self, job_id: str):
+        self._handlers.pop(job_id, None)
+
+    def active_builds(self) -> int:
+        return len(self._handlers)
+
+    def _dispatch(self, pod):
+        build_id = (pod.metadata.labels or {}).get("build-id")
+        handler = self._handlers.get(build_id)
+        if handler:
+            self._loop.create_task(handler.on_pod(pod))
+
+    def _watch_pods(self):
+        """The single namespace-wide watch; reconnects (and re-lists) on errors or expiry."""
+        resource_version = None
+        while not self._stop.is_set():
+            try:
+                w = watch.Watch()
+                kwargs = {"label_selector": BUILD_POD_SELECTOR, "timeout_seconds": 300}
+                if resource_version:
+                    kwargs["resource_version"] = resource_version
+                for event in w.stream(self.core_v1.list_namespaced_pod, self.namespace, **kwargs):
+                    pod = event["object"]
+                    resource_version = pod.metadata.resource_version
+                    self._loop.call_soon_threadsafe(self._dispatch, pod)
+                    if self._stop.is_set():
+                        w.stop()
+            except client.exceptions.ApiException as e:
+                if e.status == 410:
+                    resource_version = None  # history expired: re-list
+                else:
+                    logger.warning("Kaniko pod watch failed", exc_info=True)
+                    time.sleep(2)
+            except Exception:
+                logger.warning("Kaniko pod watch failed", exc_info=True)
+                time.sleep(2)
+
+
+kaniko_monitor = KanikoBuildMonitor(
+    namespace=settings.K8S_NAMESPACE,
+    log_poll_interval=settings.BUILD_LOG_POLL_SECONDS,
+    pod_start_timeout=settings.BUILD_POD_START_TIMEOUT_SECONDS
+)
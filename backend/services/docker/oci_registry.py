@@ -0,0 +1,333 @@
+"""
+Native OCI registry client (Docker Registry HTTP API v2).
+Pushes images without the docker CLI: auth tokens are cached until they
+expire, blobs already in the registry are skipped after a HEAD, missing
+layers are uploaded concurrently, and a push whose manifest is already
+in the registry (same config digest) finishes after a single request.
+Images are read from `docker save` archives (legacy and OCI layouts).
+"""
+import base64
+import concurrent.futures
+import hashlib
+import json
+import os
+import re
+import subprocess
+import tarfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+from core.logger import logger
+
+OCI_MANIFEST = "application/vnd.oci.image.manifest.v1+json"
+OCI_CONFIG = "application/vnd.oci.image.config.v1+json"
+OCI_LAYER = "application/vnd.oci.image.layer.v1.tar"
+OCI_LAYER_GZIP = "application/vnd.oci.image.layer.v1.tar+gzip"
+MANIFEST_ACCEPT = ", ".join([
+    OCI_MANIFEST,
+    "application/vnd.docker.distribution.manifest.v2+json",
+    "application/vnd.oci.image.index.v1+json",
+    "application/vnd.docker.distribution.manifest.list.v2+json",
+])
+
+DEFAULT_TOKEN_TTL = 60      # registry token spec default for expires_in
+TOKEN_EXPIRY_MARGIN = 10    # refresh a bit before the registry does
+CHUNK_SIZE = 1024 * 1024
+
+
+class RegistryError(Exception):
+    """Unexpected registry response."""
+
+    def __init__(self, message: str, status: Optional[int] = None):
+        super().__init__(message)
+        self.status = status
+
+
+@dataclass
+class Blob:
+    """A blob to push: content comes from `path` or `data`."""
+    digest: str
+    size: int
+    media_type: str
+    path: Optional[str] = None
+    data: Optional[bytes] = None
+
+    def descriptor(self) -> Dict:
+        return {"mediaType": self.media_type, "digest": self.digest, "size": self.size}
+
+
+class TokenCache:
+    """
+    Bearer tokens per (realm, service, scope, user), kept until expiry, and the
+    last auth challenge per registry (later requests authenticate up front).
+    Shared by the upload threads, so every access holds the lock.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tokens: Dict[Tuple, Tuple[str, float]] = {}
+        self._challenges: Dict[str, Tuple[str, Dict[str, str]]] = {}
+
+    def challenge(self, registry: str) -> Optional[Tuple[str, Dict[str, str]]]:
+        with self._lock:
+            return self._challenges.get(registry)
+
+    def set_challenge(self, registry: str, challenge: Tuple[str, Dict[str, str]]):
+        with self._lock:
+            self._challenges[registry] = challenge
+
+    def get(self, key: Tuple) -> Optional[str]:
+        with self._lock:
+            entry = self._tokens.get(key)
+            if entry and entry[1] > time.time():
+                return entry[0]
+            self._tokens.pop(key, None)
+            return None
+
+    def put(self, key: Tuple, token: str, expires_in: Optional[float]):
+        ttl = max((expires_in or DEFAULT_TOKEN_TTL) - TOKEN_EXPIRY_MARGIN, 1)
+        with self._lock:
+            self._tokens[key] = (token, time.time() + ttl)
+
+    def clear(self):
+        with self._lock:
+            self._tokens.clear()
+            self._challenges.clear()
+
+
+token_cache = TokenCache()
+
+
+def _basic(credentials: Tuple[str, str]) -> str:
+    return "Basic " + base64.b64encode(f"{credentials[0]}:{credentials[1]}".encode()).decode()
+
+
+def parse_challenge(header: str) -> Tuple[str, Dict[str, str]]:
+    """'Bearer realm="...",service="..."' -> ('bearer', {'realm': ..., 'service': ...})."""
+    scheme, _, rest = header.partition(" ")
+    return scheme.lower(), dict(re.findall(r'(\w+)="([^"]*)"', rest))
+
+
+class RegistryClient:
+    """Client for one registry host; thread-safe (used by the concurrent uploads)."""
+
+    def __init__(self, registry: str, insecure: bool = False, credentials: Optional[Tuple[str, str]] = None,
+                 timeout: float = 60, max_workers: int = 4):
+        self.registry = registry
+        self.base_url = f"{'http' if insecure else 'https'}://{registry}"
+        self.credentials = credentials
+        self.timeout = timeout
+        self.max_workers = max(1, max_workers)
+
+    # -- HTTP / auth -------------------------------------------------------
+
+    def _send(self, method: str, url: str, headers: Dict, data=None):
+        request = urllib.request.Request(url, data=data, method=method, headers=headers)
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return response.status, response.headers, b"" if method == "HEAD" else response.read()
+        except urllib.error.HTTPError as e:
+            return e.code, e.headers, b"" if method == "HEAD" else e.read()
+
+    def _auth_header(self, scope: str) -> Optional[str]:
+        challenge = token_cache.challenge(self.registry)
+        if not challenge:
+            return None
+        scheme, params = challenge
+        if scheme == "basic":
+            return _basic(self.credentials) if self.credentials else None
+        key = (params.get("realm"), params.get("service"), scope, self.credentials[0] if self.credentials else None)
+        token = token_cache.get(key)
+        if token is None:
+            query = {"scope": scope}
+            if params.get("service"):
+                query["service"] = params["service"]
+            headers = {"Authorization": _basic(self.credentials)} if self.credentials else {}
+            status, _, body = self._send("GET", f"{params['realm']}?{urllib.parse.urlencode(query)}", headers)
+            if status != 200:
+                raise RegistryError(f"Token request to {params['realm']} failed ({status})", status)
+            payload = json.loads(body)
+            token = payload.get("token") or payload.get("access_token")
+            token_cache.put(key, token, payload.get("expires_in"))
+        return f"Bearer {token}"
+
+    def request(self, method: str, url: str, repository: str, headers: Optional[Dict] = None, data=None,
+                actions: str = "pull,push"):
+        """Sends a request with cached auth; answers a 401 challenge once."""
+        if not url.startswith(("http://", "https://")):
+            url = self.base_url + url
+        scope = f"repository:{repository}:{actions}"
+        for attempt in range(2):
+            all_headers = dict(headers or {})
+            auth = self._auth_header(scope)
+            if auth:
+                all_headers["Authorization"] = auth
+            if hasattr(data, "seek"):
+                data.seek(0)
+            status, response_headers, body = self._send(method, url, all_headers, data)
+            challenge = response_headers.get("WWW-Authenticate") if status == 401 and response_headers else None
+            if not challenge or attempt:
+                return status, response_headers, body
+            token_cache.set_challenge(self.registry, parse_challenge(challenge))
+        return status, response_headers, body
+
+    # -- Blobs --------------------------------------------------------------
+
+    def blob_exists(self, repository: str, digest: str) -> Optional[int]:
+        """Size of the blob if the registry already has it, else None."""
+        status, headers, _ = self.request("HEAD", f"/v2/{repository}/blobs/{digest}", repository)
+        if status == 200:
+            return int(headers.get("Content-Length") or 0)
+        if status == 404:
+            return None
+        raise RegistryError(f"HEAD blob {digest} failed ({status})", status)
+
+    def upload_blob(self, repository: str, blob: Blob):
+        """Monolithic upload (POST to open the session, PUT with the content)."""
+        status, headers, body = self.request("POST", f"/v2/{repository}/blobs/uploads/", repository)
+        if status != 202:
+            raise RegistryError(f"Opening upload for {blob.digest} failed ({status}): {body[:200]!r}", status)
+        location = urllib.parse.urljoin(self.base_url + "/", headers["Location"])
+        location += ("&" if "?" in location else "?") + urllib.parse.urlencode({"digest": blob.digest})
+        put_headers = {"Content-Type": "application/octet-stream", "Content-Length": str(blob.size)}
+        if blob.path:
+            with open(blob.path, "rb") as content:
+                status, _, body = self.request("PUT", location, repository, put_headers, content)
+        else:
+            status, _, body = self.request("PUT", location, repository, put_headers, blob.data)
+        if status != 201:
+            raise RegistryError(f"Uploading {blob.digest} failed ({status}): {body[:200]!r}", status)
+
+    def push_blobs(self, repository: str, blobs: List[Blob],
+                   log: Optional[Callable[[str], None]] = None) -> Dict:
+        """Uploads the blobs the registry lacks, concurrently; returns push stats."""
+        stats = {"uploaded": 0, "skipped": 0, "bytes_uploaded": 0}
+        lock = threading.Lock()
+
+        def push(blob: Blob):
+            if self.blob_exists(repository, blob.digest) is not None:
+                with lock:
+                    stats["skipped"] += 1
+                return
+            self.upload_blob(repository, blob)
+            with lock:
+                stats["uploaded"] += 1
+                stats["bytes_uploaded"] += blob.size
+            if log:
+                log(f"  ⬆️  {blob.digest[:19]} ({blob.size / 1e6:.1f} MB)")
+
+        if not blobs:
+            return stats
+        # The first request answers the auth challenge; the rest reuse the cached token
+        push(blobs[0])
+        with concurrent.futures.ThreadPoolExecutor(self.max_workers) as pool:
+            for future in [pool.submit(push, blob) for blob in blobs[1:]]:
+                future.result()
+        return stats
+
+    # -- Manifests ------------------------------------------------------------
+
+    def get_manifest(self, repository: str, reference: str) -> Optional[Tuple[Dict, str]]:
+        """(manifest, digest) or None when the reference does not exist."""
+        status, headers, body = self.request("GET", f"/v2/{repository}/manifests/{reference}", repository,
+                                             {"Accept": MANIFEST_ACCEPT}, actions="pull")
+        if status == 404:
+            return None
+        if status != 200:
+            raise RegistryError(f"GET manifest {repository}:{reference} failed ({status})", status)
+        digest = headers.get("Docker-Content-Digest") or "sha256:" + hashlib.sha256(body).hexdigest()
+        return json.loads(body), digest
+
+    def put_manifest(self, repository: str, reference: str, manifest: Dict) -> str:
+        body = json.dumps(manifest, separators=(",", ":")).encode()
+        media_type = manifest.get("mediaType", OCI_MANIFEST)
+        status, headers, response = self.request("PUT", f"/v2/{repository}/manifests/{reference}", repository,
+                                                 {"Content-Type": media_type}, body)
+        if status not in (200, 201):
+            raise RegistryError(f"PUT manifest {repository}:{reference} failed ({status}): {response[:200]!r}", status)
+        return headers.get("Docker-Content-Digest") or "sha256:" + hashlib.sha256(body).hexdigest()
+
+    def push_image(self, repository: str, reference: str, config: Blob, layers: List[Blob],
+                   log: Optional[Callable[[str], None]] = None) -> Tuple[str, Dict]:
+        """Pushes config + layers and tags the manifest; returns (manifest digest, stats)."""
+        stats = self.push_blobs(repository, layers + [config], log)
+        manifest = {
+            "schemaVersion": 2,
+            "mediaType": OCI_MANIFEST,
+            "config": config.descriptor(),
+            "layers": [layer.descriptor() for layer in layers],
+        }
+        return self.put_manifest(repository, reference, manifest), stats
+
+
+# ============================================================================
+# LOCAL DOCKER IMAGES
+# ============================================================================
+
+def _sha256_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return "sha256:" + digest.hexdigest()
+
+
+def _layer_media_type(path: str) -> str:
+    with open(path, "rb") as f:
+        return OCI_LAYER_GZIP if f.read(2) == b"\x1f\x8b" else OCI_LAYER
+
+
+def load_saved_image(archive_path: str, workdir: str) -> Tuple[Blob, List[Blob]]:
+    """Config and layer blobs of a `docker save` archive (extracted into `workdir`)."""
+    with tarfile.open(archive_path) as archive:
+        manifest = json.load(archive.extractfile("manifest.json"))[0]
+        wanted = [manifest["Config"]] + manifest["Layers"]
+        archive.extractall(workdir, members=[m for m in archive.getmembers() if m.name in wanted])
+
+    config_path = os.path.join(workdir, manifest["Config"])
+    with open(config_path, "rb") as f:
+        config_data = f.read()
+    config = Blob("sha256:" + hashlib.sha256(config_data).hexdigest(), len(config_data), OCI_CONFIG, data=config_data)
+    layers = []
+    for name in manifest["Layers"]:
+        path = os.path.join(workdir, name)
+        layers.append(Blob(_sha256_file(path), os.path.getsize(path), _layer_media_type(path), path=path))
+    return config, layers
+
+
+def local_image_id(image_ref: str) -> Optional[str]:
+    """Image id (config digest) of a local Docker image."""
+    result = subprocess.run(["docker", "image", "inspect", "--format", "{{.Id}}", image_ref],
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        return None
+    return result.stdout.strip() or None
+
+
+def push_docker_image(client: RegistryClient, image_ref: str, repository: str, reference: str, workdir: str,
+                      log: Optional[Callable[[str], None]] = None) -> Dict:
+    """
+    Pushes a local Docker image. Skipped entirely when the registry already has
+    a manifest for `reference` with the same config; otherwise only missing blobs move.
+    """
+    image_id = local_image_id(image_ref)
+    if image_id:
+        existing = client.get_manifest(repository, reference)
+        if existing and (existing[0].get("config") or {}).get("digest") == image_id:
+            return {"digest": existing[1], "uploaded": 0, "skipped": len(existing[0].get("layers", [])) + 1,
+                    "bytes_uploaded": 0, "unchanged": True}
+
+    archive_path = os.path.join(workdir, "image.tar")
+    result = subprocess.run(["docker", "save", "-o", archive_path, image_ref], capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RegistryError(f"docker save failed: {result.stderr.strip()}")
+    config, layers = load_saved_image(archive_path, os.path.join(workdir, "image"))
+    os.remove(archive_path)
+    digest, stats = client.push_image(repository, reference, config, layers, log)
+    logger.info("Image pushed", extra={"extra_fields": {"repository": repository, "reference": reference, **stats}})
+    return {"digest": digest, "unchanged": False, **stats}
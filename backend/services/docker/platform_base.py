@@ -0,0 +1,179 @@
+"""
+Shared platform base images.
+Packages used by many tools (git, curl, requests, ...) are installed once in
+a platform base image per upstream base image (e.g. python:3.11-slim). Tools
+built on the same upstream image start FROM the digest-pinned platform base
+and add only their own extra packages, so the shared layers are built and
+stored once. A tool can opt out with `platform_base: false` in its docker
+config.
+"""
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+from config import settings
+from core import database, utils
+from core.yaml_cache import load_config, thaw
+from core.logger import logger
+from . import build_index
+from .image_builder import ImageBuilderService
+from .registry_adapter import fetch_manifest_layers
+
+PLATFORM_CATEGORY = "_platform"
+DEFAULT_BASE_IMAGE = "python:3.11-slim"
+
+
+def base_tool_id(base_image: str) -> str:
+    return f"{PLATFORM_CATEGORY}/base-{utils.sanitize_k8s_name(base_image)}"
+
+
+def uses_platform_base(docker_config: Dict) -> bool:
+    return (
+        build_index.is_build_config(docker_config)
+        and docker_config.get("platform_base") is not False
+        and "dockerfile" not in docker_config
+    )
+
+
+def get_platform_base(base_image: str) -> Optional[Dict]:
+    """The built platform base for an upstream image ({'image': pinned ref, ...}), if any."""
+    base = database.get_platform_base(base_image)
+    if not base or not base.get("image_tag"):
+        return None
+    base["image"] = utils.pin_image_digest(base["image_tag"], base.get("digest"))
+    return base
+
+
+def render_dockerfile(tool_name: str, docker_config: Dict) -> Optional[str]:
+    """Tool Dockerfile, rebased on the platform base when one is built for its base image."""
+    platform = None
+    if uses_platform_base(docker_config):
+        try:
+            platform = get_platform_base(docker_config.get("base_image", DEFAULT_BASE_IMAGE))
+        except Exception:
+            logger.warning("Platform base lookup failed, using upstream base image", exc_info=True,
+                           extra={"extra_fields": {"tool_name": tool_name}})
+    return ImageBuilderService.generate_dockerfile(tool_name, docker_config, platform_base=platform)
+
+
+def catalogue_docker_configs() -> List[Tuple[str, Dict]]:
+    """(tool_id, docker config) of every catalogue tool that has one."""
+    configs = []
+    for tool in database.get_all_tools():
+        try:
+            config = load_config(tool.get('configuration') or '') or {}
+        except Exception:
+            continue
+        docker_config = config.get('docker') if isinstance(config, dict) else None
+        if isinstance(docker_config, dict):
+            configs.append((tool['id'], thaw(docker_config)))
+    return configs
+
+
+def compute_shared_packages(configs: List[Tuple[str, Dict]], min_tools: int) -> Dict[str, Dict]:
+    """Per upstream base image: packages used by at least `min_tools` tools (sorted)."""
+    groups: Dict[str, Dict] = {}
+    for _, docker_config in configs:
+        if not uses_platform_base(docker_config):
+            continue
+        group = groups.setdefault(docker_config.get("base_image", DEFAULT_BASE_IMAGE),
+                                  {"apt": Counter(), "pip": Counter(), "tools": 0})
+        group["tools"] += 1
+        group["apt"].update(set(docker_config.get("apt_packages") or []))
+        group["pip"].update(set(docker_config.get("pip_packages") or []))
+
+    shared = {}
+    for base_image, group in groups.items():
+        apt = sorted(pkg for pkg, count in group["apt"].items() if count >= min_tools)
+        pip = sorted(pkg for pkg, count in group["pip"].items() if count >= min_tools)
+        if apt or pip:
+            shared[base_image] = {"apt_packages": apt, "pip_packages": pip, "tool_count": group["tools"]}
+    return shared
+
+
+def base_docker_config(base_image: str, apt_packages: List[str], pip_packages: List[str]) -> Dict:
+    return {
+        "base_image": base_image,
+        "apt_packages": apt_packages,
+        "pip_packages": pip_packages,
+        "platform_base": False,
+    }
+
+
+def plan_platform_bases(min_tools: Optional[int] = None) -> List[Dict]:
+    """
+    Recomputes the shared package sets from the catalogue and stores the definitions.
+    A changed definition replaces the previous one right away: until its image is
+    built, tools using that base image render FROM the upstream image.
+    """
+    min_tools = min_tools or settings.PLATFORM_BASE_MIN_TOOLS
+    plans = []
+    for base_image, shared in compute_shared_packages(catalogue_docker_configs(), min_tools).items():
+        tool_id = base_tool_id(base_image)
+        docker_config = base_docker_config(base_image, shared["apt_packages"], shared["pip_packages"])
+        dockerfile = ImageBuilderService.generate_dockerfile(tool_id.split("/", 1)[1], docker_config)
+        _, build_hash = build_index.build_target(tool_id, docker_config, dockerfile)
+        database.save_platform_base(base_image, tool_id, shared["apt_packages"], shared["pip_packages"],
+                                    build_hash, shared["tool_count"])
+        plans.append({"base_image": base_image, "tool_id": tool_id, "build_hash": build_hash,
+                      "docker_config": docker_config, **shared})
+    return plans
+
+
+def build_platform_bases(min_tools: Optional[int] = None, priority: Optional[int] = None) -> List[Dict]:
+    """Plans and queues the platform base builds (reused when unchanged)."""
+    from services.docker_build_service import trigger_build_async
+    from .build_scheduler import PRIORITY_NORMAL
+
+    results = []
+    for plan in plan_platform_bases(min_tools):
+        category, tool_name = plan["tool_id"].split("/", 1)
+        job_id = trigger_build_async(category, tool_name, plan["docker_config"],
+                                     priority=PRIORITY_NORMAL if priority is None else priority)
+        results.append({
+            "base_image": plan["base_image"],
+            "job_id": job_id,
+            "apt_packages": plan["apt_packages"],
+            "pip_packages": plan["pip_packages"],
+            "tool_count": plan["tool_count"],
+        })
+    return results
+
+
+def savings_report() -> Dict:
+    """
+    Registry bytes saved by layer sharing across the catalogue:
+    logical bytes (sum of every tool image) minus stored bytes (unique layers).
+    """
+    registry_config = database.get_registry_config()
+    layer_sizes: Dict[str, int] = {}
+    layer_refs: Counter = Counter()
+    logical_bytes, images, errors = 0, 0, []
+
+    for build in database.list_current_image_builds():
+        if build["tool_id"].startswith(f"{PLATFORM_CATEGORY}/"):
+            continue  # base layers are counted through the tools built on them
+        ref = utils.pin_image_digest(build["image_tag"], build.get("digest"))
+        try:
+            layers = fetch_manifest_layers(ref, registry_config)
+        except Exception as e:
+            errors.append({"tool_id": build["tool_id"], "image": ref, "error": str(e)})
+            continue
+        images += 1
+        for digest, size in layers:
+            logical_bytes += size
+            layer_sizes[digest] = size
+            layer_refs[digest] += 1
+
+    stored_bytes = sum(layer_sizes.values())
+    return {
+        "images": images,
+        "logical_bytes": logical_bytes,
+        "stored_bytes": stored_bytes,
+        "bytes_saved": logical_bytes - stored_bytes,
+        "shared_layers": sum(1 for count in layer_refs.values() if count > 1),
+        "platform_bases": [
+            {k: base.get(k) for k in ("base_image", "apt_packages", "pip_packages", "tool_count", "image_tag", "digest")}
+            for base in database.list_platform_bases()
+        ],
+        "errors": errors,
+    }
@@ -1,12 +1,20 @@
 import os
+import re
+import base64
 import subprocess
-from typing import Dict, Optional
+import tempfile
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+from config import settings
 from core import database, utils
 from core.logger import logger
+from .oci_registry import RegistryClient, RegistryError, push_docker_image, token_cache
 
-def push_image_to_registry(tool_name: str, docker_config: Dict, job_id: str = None) -> Dict:
+def push_image_to_registry(tool_name: str, docker_config: Dict, job_id: str = None, image_tag: str = None) -> Dict:
     """
     Push built image to configured registry or load into local cluster.
+    image_tag: the locally built tag (defaults to the authoritative tag).
+    The result carries the pushed 'digest' when the registry reports one.
     """
     def log(msg: str):
         if job_id:
@@ -20,8 +28,8 @@ def push_image_to_registry(tool_name: str, docker_config: Dict, job_id: str = No
         # Use authoritative tag generation
         generated_tag = utils.generate_image_tag(tool_name)
         
-        local_tag = docker_config.get("image")
-        if not local_tag or "security-platform-tool-" in local_tag:
+        local_tag = image_tag or docker_config.get("image")
+        if not local_tag or ("security-platform-tool-" in local_tag and not image_tag):
              local_tag = generated_tag
         
         if registry_config["type"] == "local":
@@ -29,46 +37,64 @@ def push_image_to_registry(tool_name: str, docker_config: Dict, job_id: str = No
             return auto_load_to_k8s(local_tag, job_id)
         else:
             log(f"📤 Pushing {local_tag} to {registry_config['type']} registry...")
-            if not docker_login(registry_config):
-                if registry_config.get("use_local_fallback"):
-                    log("⚠️ Registry login failed, falling back to local load")
-                    return auto_load_to_k8s(local_tag, job_id)
-                return {"status": "failed", "error": "Registry login failed"}
-                
             target_tag = construct_remote_tag(local_tag, registry_config)
-            subprocess.run(["docker", "tag", local_tag, target_tag], check=True)
-            result = subprocess.run(["docker", "push", target_tag], capture_output=True, text=True)
-            
-            if result.returncode == 0:
-                log(f"✅ Successfully pushed {target_tag}")
-                return {"status": "success", "image": target_tag}
-            else:
-                error_msg = result.stderr
+            registry, repository, reference = split_image_ref(target_tag)
+            try:
+                client = registry_client(registry, registry_config)
+                with tempfile.TemporaryDirectory(prefix="push_") as workdir:
+                    result = push_docker_image(client, local_tag, repository, reference, workdir, log)
+            except Exception as e:
+                error_msg = str(e)
                 log(f"❌ Push failed: {error_msg}")
                 if registry_config.get("use_local_fallback"):
                     log("⚠️ Push failed, falling back to local load")
                     return auto_load_to_k8s(local_tag, job_id)
                 return {"status": "failed", "error": f"Push failed: {error_msg}"}
+            
+            if result["unchanged"]:
+                log(f"⏭️  {target_tag} already in registry, nothing to upload")
+            else:
+                log(f"✅ Successfully pushed {target_tag} ({result['uploaded']} blob(s) uploaded, "
+                    f"{result['skipped']} already present, {result['bytes_uploaded'] / 1e6:.1f} MB)")
+            return {"status": "success", "image": target_tag, "digest": result["digest"]}
                 
     except Exception as e:
         log(f"❌ Error during image push: {e}")
         return {"status": "failed", "error": str(e)}
 
-def docker_login(config: Dict) -> bool:
+def registry_credentials(config: Optional[Dict]) -> Optional[Tuple[str, str]]:
+    """(username, password) for the configured registry, if any."""
+    if not config:
+        return None
+    if config.get("type") == "ecr":
+        return _ecr_credentials(config)
+    if config.get("username") and config.get("password"):
+        return config["username"], config["password"]
+    return None
+
+def _ecr_credentials(config: Dict) -> Optional[Tuple[str, str]]:
+    """ECR authorization token (cached until it expires); boto3 is optional."""
+    url = config.get("url") or ""
+    cached = token_cache.get(("ecr", url))
+    if cached:
+        return "AWS", cached
     try:
-        if config["type"] == "dockerhub":
-            if not config.get("username") or not config.get("password"):
-                return False
-            cmd = ["docker", "login", "-u", config["username"], "--password-stdin"]
-            process = subprocess.run(cmd, input=config["password"], capture_output=True, text=True)
-            return process.returncode == 0
-        elif config["type"] == "ecr":
-            cmd = f"aws ecr get-login-password --region us-east-1 | docker login --username AWS --password-stdin {config.get('url')}"
-            process = subprocess.run(cmd, shell=True, capture_output=True)
-            return process.returncode == 0
-        return True
-    except Exception:
-        return False
+        import boto3
+    except ImportError:
+        # Without boto3 the stored password must be a current `aws ecr get-login-password` token
+        return ("AWS", config["password"]) if config.get("password") else None
+    match = re.search(r"\.ecr\.([a-z0-9-]+)\.amazonaws\.com", url)
+    ecr = boto3.client("ecr", region_name=match.group(1) if match else "us-east-1")
+    data = ecr.get_authorization_token()["authorizationData"][0]
+    username, password = base64.b64decode(data["authorizationToken"]).decode().split(":", 1)
+    token_cache.put(("ecr", url), password, (data["expiresAt"] - datetime.now(timezone.utc)).total_seconds())
+    return username, password
+
+def registry_client(registry: str, registry_config: Optional[Dict] = None) -> RegistryClient:
+    """Registry client with the configured credentials (plain HTTP for the internal registry)."""
+    internal = registry in (settings.DOCKER_REGISTRY, settings.DOCKER_REGISTRY_PUSH)
+    return RegistryClient(registry, insecure=internal, credentials=registry_credentials(registry_config),
+                          max_workers=settings.REGISTRY_UPLOAD_CONCURRENCY)
 
 def construct_remote_tag(local_tag: str, config: Dict) -> str:
     image_part = local_tag.split("/")[-1]
@@ -120,3 +146,45 @@ def should_build_image(docker_config: Dict) -> bool:
         return docker_config["image"].startswith("security-platform-tool-")
         
     return has_build_config
+
+# ============================================================================
+# REGISTRY MANIFESTS (Docker Registry HTTP API v2)
+# ============================================================================
+
+def split_image_ref(image_ref: str) -> Tuple[str, str, str]:
+    """'reg:5000/ns/img:tag' -> ('reg:5000', 'ns/img', 'tag'); digests are kept as reference."""
+    name, reference = image_ref, "latest"
+    if "@" in name:
+        name, reference = name.split("@", 1)
+    elif ":" in name.rsplit("/", 1)[-1]:
+        name, reference = name.rsplit(":", 1)
+    first = name.split("/", 1)[0]
+    if "/" in name and ("." in first or ":" in first or first == "localhost"):
+        registry, repository = name.split("/", 1)
+    else:
+        registry, repository = "registry-1.docker.io", name if "/" in name else f"library/{name}"
+    return registry, repository, reference
+
+def image_exists(image_tag: str, digest: Optional[str] = None, registry_config: Optional[Dict] = None) -> bool:
+    """True if the registry still serves the image (its digest when known, else the tag)."""
+    if settings.DOCKER_REGISTRY != settings.DOCKER_REGISTRY_PUSH and image_tag.startswith(settings.DOCKER_REGISTRY + "/"):
+        # Internal images are tagged with the node-side address; the backend reaches the push one
+        image_tag = settings.DOCKER_REGISTRY_PUSH + image_tag[len(settings.DOCKER_REGISTRY):]
+    registry, repository, reference = split_image_ref(image_tag)
+    client = registry_client(registry, registry_config)
+    return client.get_manifest(repository, digest or reference) is not None
+
+def fetch_manifest_layers(image_ref: str, registry_config: Optional[Dict] = None) -> List[Tuple[str, int]]:
+    """(digest, compressed size) of each layer of an image, read from its registry."""
+    registry, repository, reference = split_image_ref(image_ref)
+    client = registry_client(registry, registry_config)
+    found = client.get_manifest(repository, reference)
+    if not found:
+        raise RegistryError(f"Manifest not found: {image_ref}", 404)
+    manifest = found[0]
+    if "manifests" in manifest:
+        # Multi-arch index: use linux/amd64 (or the first entry)
+        entries = manifest["manifests"]
+        chosen = next((m for m in entries if (m.get("platform") or {}).get("architecture") == "amd64"), entries[0])
+        manifest = client.get_manifest(repository, chosen["digest"])[0]
+    return [(layer["digest"], int(layer.get("size", 0))) for layer in manifest.get("layers", [])]
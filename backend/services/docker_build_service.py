@@ -5,14 +5,16 @@ Refactored for Triplo Check: Modularized.
 """
 import subprocess
 import os
-import threading
-from typing import Dict, Optional
+import json
+from typing import Dict, Optional, Tuple
 from pathlib import Path
+from core import utils
 from core.logger import logger
 
 # Modular imports
 from .docker.registry_adapter import push_image_to_registry, should_build_image as _should_build_base
-from .docker.build_engine import run_build_thread, BUILD_SCRIPT
+from .docker.build_engine import BUILD_SCRIPT
+from .docker import build_scheduler
 
 # Re-exporting for backward compatibility
 should_build_image = _should_build_base
@@ -55,39 +57,72 @@ def trigger_build(category: str, tool_name: str, docker_config: Dict) -> Dict:
     except Exception as e:
         return {"status": "failed", "stderr": str(e), "returncode": -1}
 
-def trigger_build_async(category: str, tool_name: str, docker_config: Dict) -> str:
+def trigger_build_async(category: str, tool_name: str, docker_config: Dict,
+                        priority: int = build_scheduler.PRIORITY_NORMAL) -> str:
     """
     Trigger Docker image build for a tool (asynchronous).
-    Uses Kaniko if running in K8s, otherwise local Docker.
+    The build is queued in build_jobs and run by the bounded build scheduler
+    (Kaniko if running in K8s, otherwise local Docker). Unchanged inputs reuse
+    the already pushed image; an equivalent pending build is reused.
     """
     from core import database
-    job_id = database.create_build_job(f"{category}/{tool_name}")
+    from .docker import build_index
     
-    if os.getenv("KUBERNETES_SERVICE_HOST"):
-        # Kubernetes Environment: Use Kaniko
-        from .docker.kaniko_builder import kaniko_service
-        thread = threading.Thread(
-            target=kaniko_service.trigger_build,
-            args=(job_id, category, tool_name, docker_config)
-        )
-    else:
-        # Local Environment: Use Docker Socket
-        thread = threading.Thread(
-            target=run_build_thread,
-            args=(job_id, category, tool_name, docker_config)
-        )
-        
-    thread.daemon = True
-    thread.start()
+    full_tool_id = f"{category}/{tool_name}"
+    image_tag, build_hash = _build_target(full_tool_id, tool_name, docker_config)
+    
+    if build_hash:
+        try:
+            existing = build_index.find_reusable_build(build_hash, image_tag)
+        except Exception:
+            logger.warning("Build index lookup failed, building", exc_info=True, extra={"extra_fields": {"tool_name": tool_name}})
+            existing = None
+        if existing:
+            job_id = database.create_build_job(full_tool_id)
+            _complete_with_existing_image(job_id, full_tool_id, build_hash, existing)
+            return job_id
+    
+    return build_scheduler.scheduler.submit(category, tool_name, docker_config, build_hash=build_hash, priority=priority)
+
+def _build_target(full_tool_id: str, tool_name: str, docker_config: Dict) -> Tuple[Optional[str], Optional[str]]:
+    """(image_tag, build_hash) of the build, or (None, None) for pre-existing images."""
+    from .docker import build_index, platform_base
     
-    return job_id
+    dockerfile_content = platform_base.render_dockerfile(tool_name, docker_config)
+    if not dockerfile_content:
+        return None, None
+    return build_index.build_target(full_tool_id, docker_config, dockerfile_content)
 
-def get_build_status(job_id: str) -> Dict:
+def _complete_with_existing_image(job_id: str, full_tool_id: str, build_hash: str, existing: Dict):
+    """
+    Completes the job without building: an image for the same build hash
+    (identical Dockerfile and inputs) was already pushed.
+    """
+    from core import database
+    from .docker import build_index
+    
+    # Re-recording makes it the tool's current image again (e.g. after a config revert)
+    build_index.record_build(full_tool_id, build_hash, existing['image_tag'], existing.get('digest'))
+    pinned = utils.pin_image_digest(existing['image_tag'], existing.get('digest'))
+    database.append_build_logs(job_id, f"⏭️  Build inputs unchanged (hash {build_hash[:16]}); reusing {pinned}\n")
+    database.update_build_job(job_id, "SUCCESS", image_tag=existing['image_tag'])
+    logger.info("Skipped build, image already in registry", extra={"extra_fields": {"tool_id": full_tool_id, "build_hash": build_hash}})
+
+def get_build_status(job_id: str, log_offset: Optional[int] = None) -> Dict:
     """
     Get status of an async build job.
+    With log_offset, 'logs' only holds what was appended after that offset
+    and 'log_offset' is the offset to ask for next.
     """
     from core import database
-    job = database.get_build_job(job_id)
+    if log_offset is None:
+        job = database.get_build_job(job_id)
+    else:
+        # Only the new slice of the logs is read
+        job = database.read_build_logs(job_id, log_offset)
+        if job:
+            job['logs'] = job.pop('chunk')
+            job['log_offset'] = log_offset + len(job['logs'])
     if not job:
         return {"status": "not_found"}
         
@@ -98,7 +133,9 @@ def get_build_status(job_id: str) -> Dict:
         "logs": job['logs'],
         "created_at": job['created_at'],
         "updated_at": job['updated_at'],
-        "image_tag": job.get('image_tag')
+        "image_tag": job.get('image_tag'),
+        "log_offset": job.get('log_offset', len(job['logs'] or "")),
+        "cache_stats": json.loads(job['cache_stats']) if job.get('cache_stats') else None
     }
 
 # Fix exported should_build_image logic if it was different
@@ -0,0 +1,246 @@
+"""
+Image warmup: keeps the most used tool images pre-pulled on every node.
+Execution history ranks tools by runs; their current images (plus images
+built recently) become init containers of a pre-puller DaemonSet, so the
+kubelet of each node pulls them before the first execution lands there.
+Pulled events of pre-puller and execution pods are recorded to track
+cold-start pull time per node.
+"""
+import hashlib
+import re
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from kubernetes import client
+
+from config import settings
+from core import database, utils
+from core import kubernetes as k8s_core
+from core.logger import logger
+
+PREPULLER_NAME = "tool-image-prepuller"
+PAUSE_IMAGE = "registry.k8s.io/pause:3.9"
+# Static binary copied into a shared volume so every warm container can exit
+# immediately, whatever its image ships (no shell/python needed)
+BUSYBOX_IMAGE = "busybox:1.36-musl"
+IMAGES_ANNOTATION = "security-platform/warm-images"
+
+_PULLED = re.compile(r'Successfully pulled image "([^"]+)" in ([0-9.]+[a-zµ]+(?:[0-9.]+[a-zµ]+)*)')
+_PRESENT = re.compile(r'Container image "([^"]+)" already present on machine')
+_DURATION_PART = re.compile(r'([0-9.]+)(h|ms|µs|us|ns|m|s)')
+_DURATION_UNITS = {"h": 3600.0, "m": 60.0, "s": 1.0, "ms": 1e-3, "µs": 1e-6, "us": 1e-6, "ns": 1e-9}
+
+
+def parse_go_duration(text: str) -> Optional[float]:
+    """'1m2.5s' -> 62.5 (the format of kubelet pull durations)."""
+    parts = _DURATION_PART.findall(text or "")
+    if not parts:
+        return None
+    return round(sum(float(value) * _DURATION_UNITS[unit] for value, unit in parts), 3)
+
+
+def _event_time(event) -> str:
+    ts = event.last_timestamp or event.event_time or event.metadata.creation_timestamp
+    if not ts:
+        return datetime.utcnow().isoformat()
+    return ts.replace(tzinfo=None).isoformat()
+
+
+def parse_pull_event(event) -> Optional[Dict]:
+    """Image pull (cold) or already-present (warm) start from a kubelet Pulled event."""
+    message = event.message or ""
+    pulled = _PULLED.search(message)
+    present = None if pulled else _PRESENT.search(message)
+    if not pulled and not present:
+        return None
+    pod_name = (event.involved_object.name if event.involved_object else "") or ""
+    if pod_name.startswith(PREPULLER_NAME):
+        source = "warmup"
+    elif pod_name.startswith("kaniko-build-"):
+        source = "build"
+    else:
+        source = "execution"
+    return {
+        "event_uid": event.metadata.uid,
+        "image": (pulled or present).group(1),
+        "node": event.source.host if event.source else None,
+        "source": source,
+        "cached": present is not None,
+        "seconds": parse_go_duration(pulled.group(2)) if pulled else 0.0,
+        "pulled_at": _event_time(event),
+    }
+
+
+def select_warm_images(max_images: int, window_days: int, recent_build_hours: int) -> List[Dict]:
+    """Hot tool images (most runs first), then images built recently, capped at `max_images`."""
+    from .resolver import get_tool_config_from_data
+
+    since = (datetime.utcnow() - timedelta(days=window_days)).isoformat()
+    selected: Dict[str, Dict] = {}
+    for row in database.get_hot_tools(since, max_images):
+        tool = database.get_tool(row['tool_id'])
+        if not tool:
+            continue
+        image = get_tool_config_from_data(tool)["image"]
+        selected.setdefault(image, {"image": image, "tool_id": row['tool_id'], "runs": row['runs'], "reason": "hot"})
+
+    built_after = (datetime.utcnow() - timedelta(hours=recent_build_hours)).isoformat()
+    recent = [b for b in database.list_current_image_builds()
+              if b['updated_at'] >= built_after and not b['tool_id'].startswith("_platform/")]
+    for build in sorted(recent, key=lambda b: b['updated_at'], reverse=True):
+        image = utils.pin_image_digest(build['image_tag'], build.get('digest'))
+        selected.setdefault(image, {"image": image, "tool_id": build['tool_id'], "runs": 0, "reason": "recent_build"})
+    return list(selected.values())[:max_images]
+
+
+def images_fingerprint(images: List[str]) -> str:
+    return hashlib.sha256("\n".join(images).encode()).hexdigest()[:16]
+
+
+def prepuller_daemonset(namespace: str, images: List[str]) -> client.V1DaemonSet:
+    """DaemonSet whose pods pull every warm image (init containers) then idle on pause."""
+    labels = {"app": PREPULLER_NAME}
+    tiny = client.V1ResourceRequirements(requests={"cpu": "5m", "memory": "8Mi"}, limits={"cpu": "50m", "memory": "32Mi"})
+    bin_mount = client.V1VolumeMount(name="warmup-bin", mount_path="/warmup")
+    init_containers = [client.V1Container(
+        name="install-true",
+        image=BUSYBOX_IMAGE,
+        command=["cp", "/bin/busybox", "/warmup/busybox"],
+        volume_mounts=[bin_mount],
+        resources=tiny
+    )]
+    for index, image in enumerate(images):
+        init_containers.append(client.V1Container(
+            name=f"warm-{index}",
+            image=image,
+            image_pull_policy="IfNotPresent",
+            command=["/warmup/busybox", "true"],
+            volume_mounts=[bin_mount],
+            resources=tiny
+        ))
+    return client.V1DaemonSet(
+        api_version="apps/v1",
+        kind="DaemonSet",
+        metadata=client.V1ObjectMeta(name=PREPULLER_NAME, namespace=namespace, labels=labels,
+                                     annotations={IMAGES_ANNOTATION: images_fingerprint(images)}),
+        spec=client.V1DaemonSetSpec(
+            selector=client.V1LabelSelector(match_labels=labels),
+            update_strategy=client.V1DaemonSetUpdateStrategy(
+                type="RollingUpdate",
+                rolling_update=client.V1RollingUpdateDaemonSet(max_unavailable="25%")
+            ),
+            template=client.V1PodTemplateSpec(
+                metadata=client.V1ObjectMeta(labels=labels),
+                spec=client.V1PodSpec(
+                    init_containers=init_containers,
+                    containers=[client.V1Container(name="pause", image=PAUSE_IMAGE, resources=tiny)],
+                    volumes=[client.V1Volume(name="warmup-bin", empty_dir=client.V1EmptyDirVolumeSource())],
+                    termination_grace_period_seconds=1
+                )
+            )
+        )
+    )
+
+
+class ImageWarmupController:
+    """Periodically reconciles the pre-puller DaemonSet and records pull times."""
+
+    def __init__(self, namespace: str, interval: float, max_images: int,
+                 window_days: int, recent_build_hours: int):
+        self.namespace = namespace
+        self.interval = interval
+        self.max_images = max_images
+        self.window_days = window_days
+        self.recent_build_hours = recent_build_hours
+        self.warm_images: List[Dict] = []
+        self.last_reconciled: Optional[str] = None
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="image-warmup", daemon=True)
+        self._thread.start()
+        logger.info("Image warmup controller started", extra={"extra_fields": {"max_images": self.max_images}})
+
+    def stop(self):
+        self._stop.set()
+        self._wakeup.set()
+        self._thread = None
+
+    def request_refresh(self):
+        """Reconcile now (e.g. right after a successful build); no-op when not running."""
+        self._wakeup.set()
+
+    def _loop(self):
+        while not self._stop.is_set():
+            self.run_once()
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+
+    def run_once(self):
+        try:
+            self.record_pull_events()
+        except Exception:
+            logger.warning("Failed to record image pull events", exc_info=True)
+        try:
+            self.reconcile()
+        except Exception:
+            logger.error("Image warmup reconcile failed", exc_info=True)
+
+    def record_pull_events(self) -> int:
+        events = k8s_core.get_core_client().list_namespaced_event(self.namespace, field_selector="reason=Pulled")
+        pulls = [pull for pull in (parse_pull_event(event) for event in events.items) if pull]
+        return database.save_image_pulls(pulls)
+
+    def reconcile(self) -> bool:
+        """Creates/updates/deletes the DaemonSet; returns True when it changed."""
+        self.warm_images = select_warm_images(self.max_images, self.window_days, self.recent_build_hours)
+        self.last_reconciled = datetime.utcnow().isoformat()
+        images = [entry["image"] for entry in self.warm_images]
+        apps_v1 = k8s_core.get_apps_client()
+        try:
+            existing = apps_v1.read_namespaced_daemon_set(PREPULLER_NAME, self.namespace)
+        except client.exceptions.ApiException as e:
+            if e.status != 404:
+                raise
+            existing = None
+
+        if not images:
+            if existing:
+                apps_v1.delete_namespaced_daemon_set(PREPULLER_NAME, self.namespace)
+                return True
+            return False
+
+        body = prepuller_daemonset(self.namespace, images)
+        if existing is None:
+            apps_v1.create_namespaced_daemon_set(self.namespace, body)
+        elif (existing.metadata.annotations or {}).get(IMAGES_ANNOTATION) != body.metadata.annotations[IMAGES_ANNOTATION]:
+            body.metadata.resource_version = existing.metadata.resource_version
+            apps_v1.replace_namespaced_daemon_set(PREPULLER_NAME, self.namespace, body)
+        else:
+            return False
+        logger.info("Pre-puller DaemonSet updated", extra={"extra_fields": {"images": images}})
+        return True
+
+    def status(self) -> Dict:
+        since = (datetime.utcnow() - timedelta(days=self.window_days)).isoformat()
+        return {
+            "running": self._thread is not None,
+            "last_reconciled": self.last_reconciled,
+            "warm_images": self.warm_images,
+            "pull_stats": database.get_image_pull_stats(since),
+        }
+
+
+warmup_controller = ImageWarmupController(
+    namespace=settings.K8S_NAMESPACE,
+    interval=settings.IMAGE_WARMUP_INTERVAL_SECONDS,
+    max_images=settings.IMAGE_WARMUP_MAX_IMAGES,
+    window_days=settings.IMAGE_WARMUP_WINDOW_DAYS,
+    recent_build_hours=settings.IMAGE_WARMUP_RECENT_BUILD_HOURS
+)
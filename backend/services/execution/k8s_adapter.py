@@ -2,6 +2,7 @@ import json
 from typing import Dict, Any, Optional
 from kubernetes import client
 from config import settings
+from core import database
 from core.logger import logger
 from .resolver import get_tool_config_from_data
 
@@ -125,6 +126,12 @@ except Exception as e:
         logger.error("Failed to create K8s Job", exc_info=True, extra={"extra_fields": {"job_name": job_name, "namespace": K8S_NAMESPACE}})
         raise
 
+    # Execution history drives which images are kept pre-pulled on the nodes
+    try:
+        database.set_execution_image(job_id, tool_data.get('id'), tool_image)
+    except Exception:
+        logger.warning("Failed to record execution image", exc_info=True, extra={"extra_fields": {"execution_id": job_id}})
+
 def delete_k8s_job(job_name: str):
     batch_v1 = client.BatchV1Api()
     try:
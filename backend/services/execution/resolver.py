@@ -1,28 +1,23 @@
-import yaml
 from typing import Dict, Any, Union
 from core import database, utils
+from core.yaml_cache import load_config
 from core.logger import logger
+from services.docker import build_index
+from services.tool.catalogue_cache import canonical_tool_id, catalogue_cache
 
 def resolve_tool(tool_identifier: str) -> Dict[str, Any]:
     """
-    Resolves a tool identifier (ID or Path) to a Database Tool Object.
+    Resolves a tool identifier (ID, Path or file name) to a Database Tool Object.
+    Served from the catalogue's alias index; the database is only read on a miss
+    (a tool created moments ago on another replica).
     """
-    tool_id = tool_identifier
-    
-    if '/' in tool_identifier:
-        parts = tool_identifier.split('/')
-        if len(parts) >= 2:
-            potential_id = f"{parts[-2]}/{parts[-1]}".replace('.py', '')
-            tool = database.get_tool(potential_id)
-            if tool:
-                return tool
-    
-    tool = database.get_tool(tool_id)
+    tool = catalogue_cache.lookup(tool_identifier)
     if tool:
         return tool
 
-    if tool_id.endswith('.py'):
-        tool = database.get_tool(tool_id[:-3])
+    tool_id = canonical_tool_id(tool_identifier)
+    if tool_id:
+        tool = database.get_tool(tool_id)
         if tool:
             return tool
             
@@ -55,7 +50,7 @@ def get_tool_config_from_data(tool_data: Dict[str, Any]) -> dict:
     metadata = {}
     if config_yaml:
         try:
-            metadata = yaml.safe_load(config_yaml) or {}
+            metadata = load_config(config_yaml) or {}
         except Exception as e:
             logger.warning("Error parsing tool configuration YAML", exc_info=True, extra={"extra_fields": {"tool_id": tool_id}})
 
@@ -80,6 +75,16 @@ def get_tool_config_from_data(tool_data: Dict[str, Any]) -> dict:
         # base_image is for BUILD time (FROM python...) not execution time
         config["image"] = "python:3.11-slim" if is_adhoc_test else authoritative_tag
 
+    # Pin images we build to the digest of the tool's current build
+    # (tools built before content-addressed tags keep using :latest)
+    if not is_adhoc_test and (not image_from_config or build_index.is_build_config(docker_config)):
+        try:
+            pinned = build_index.current_image(tool_id)
+            if pinned:
+                config["image"] = pinned
+        except Exception:
+            logger.warning("Could not resolve pinned image", exc_info=True, extra={"extra_fields": {"tool_id": tool_id}})
+
     if resource_config:
         if 'requests' in resource_config:
             config["resources"]["requests"].update(resource_config['requests'])
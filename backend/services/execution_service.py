@@ -5,7 +5,7 @@ import uuid
 import time
 from typing import Dict, Any, AsyncGenerator, Union, Optional
 
-from core import database, kubernetes as k8s_core, utils
+from core import database, json_codec, kubernetes as k8s_core, utils
 from core.logger import logger
 from config import settings
 from kubernetes import client
@@ -96,16 +96,19 @@ def run_tool_k8s_job_sync(tool_identifier_or_data: Union[str, Dict], args: Dict[
         database.update_execution(job_id, status="failed", logs=str(e))
         return {"result": None, "logs": str(e), "exit_code": -1}
 
-async def execute_tool_stream(tool_identifier_or_data: Union[str, Dict[str, Any]], args: Dict[str, Any], job_id: Optional[str] = None, env: Optional[Dict[str, str]] = None) -> AsyncGenerator[str, None]:
+async def execute_tool_events(tool_identifier_or_data: Union[str, Dict[str, Any]], args: Dict[str, Any], job_id: Optional[str] = None, env: Optional[Dict[str, str]] = None, mcp_id: Optional[str] = None) -> AsyncGenerator[Dict[str, Any], None]:
     """
-    Executes a tool as a K8s Job and streams output.
+    Executes a tool as a K8s Job and yields structured output events.
+    In-process consumers (e.g. the MCP server) use this directly to avoid
+    an NDJSON encode/decode round trip per event.
+    mcp_id tags the execution so the MCP server can expose it as a resource.
     """
     if isinstance(tool_identifier_or_data, str):
         try:
             tool_data = resolve_tool(tool_identifier_or_data)
         except Exception as e:
-            yield json.dumps({"type": "stderr", "data": f"Resolution Error: {str(e)}"}) + "\n"
-            yield json.dumps({"type": "exit", "code": 1}) + "\n"
+            yield {"type": "stderr", "data": f"Resolution Error: {str(e)}"}
+            yield {"type": "exit", "code": 1}
             return
     else:
         tool_data = tool_identifier_or_data
@@ -119,7 +122,7 @@ async def execute_tool_stream(tool_identifier_or_data: Union[str, Dict[str, Any]
     tool_name_safe = utils.sanitize_k8s_name(tool_name)
     job_name = f"{tool_name_safe}-{job_id}"
     
-    yield json.dumps({"type": "start", "id": job_id}) + "\n"
+    yield {"type": "start", "id": job_id}
     
     # Check if job already exists (Re-attach mode)
     batch_v1 = client.BatchV1Api()
@@ -145,7 +148,7 @@ async def execute_tool_stream(tool_identifier_or_data: Union[str, Dict[str, Any]
             except:
                  pass
 
-        database.create_execution(job_id, tool_name, tool_path_for_db, args, status="running")
+        database.create_execution(job_id, tool_name, tool_path_for_db, args, status="running", mcp_id=mcp_id)
 
     try:
         if not is_reattach:
@@ -163,7 +166,7 @@ async def execute_tool_stream(tool_identifier_or_data: Union[str, Dict[str, Any]
             await asyncio.sleep(1)
             
         if not pod_name:
-            yield json.dumps({"type": "stderr", "data": "Timeout waiting for pod"}) + "\n"
+            yield {"type": "stderr", "data": "Timeout waiting for pod"}
             database.update_execution(job_id, status="failed", logs="Timeout waiting for pod")
             return
 
@@ -181,7 +184,7 @@ async def execute_tool_stream(tool_identifier_or_data: Union[str, Dict[str, Any]
                 full_logs = await loop.run_in_executor(None, lambda: core_v1.read_namespaced_pod_log(name=pod_name, namespace=K8S_NAMESPACE))
                 if len(full_logs) > last_log_pos:
                     chunk = full_logs[last_log_pos:]
-                    yield json.dumps({"type": "stderr", "data": chunk}) + "\n"
+                    yield {"type": "stderr", "data": chunk}
                     last_log_pos = len(full_logs)
                     acc_logs = full_logs
             except: 
@@ -192,11 +195,11 @@ async def execute_tool_stream(tool_identifier_or_data: Union[str, Dict[str, Any]
             await asyncio.sleep(1)
             
         exit_code = 0 if pod.status.phase == "Succeeded" else 1
-        yield json.dumps({"type": "exit", "code": exit_code}) + "\n"
+        yield {"type": "exit", "code": exit_code}
         
         if "--- RESULT ---" in acc_logs:
             acc_result = acc_logs.split("--- RESULT ---")[-1].strip()
-            yield json.dumps({"type": "stdout", "data": acc_result}) + "\n"
+            yield {"type": "stdout", "data": acc_result}
         else:
             lines = acc_logs.strip().split('\n')
             if lines and exit_code == 0:
@@ -204,7 +207,7 @@ async def execute_tool_stream(tool_identifier_or_data: Union[str, Dict[str, Any]
                     line = line.strip()
                     if (line.startswith('{') and line.endswith('}')) or (line.startswith('[') and line.endswith(']')):
                          acc_result = line
-                         yield json.dumps({"type": "stdout", "data": acc_result}) + "\n"
+                         yield {"type": "stdout", "data": acc_result}
                          break
 
         database.update_execution(job_id, status="success" if exit_code == 0 else "failed", logs=acc_logs, result=acc_result)
@@ -212,10 +215,17 @@ async def execute_tool_stream(tool_identifier_or_data: Union[str, Dict[str, Any]
 
     except Exception as e:
         err_msg = str(e)
-        yield json.dumps({"type": "stderr", "data": f"Error: {err_msg}"}) + "\n"
-        yield json.dumps({"type": "exit", "code": 1}) + "\n"
+        yield {"type": "stderr", "data": f"Error: {err_msg}"}
+        yield {"type": "exit", "code": 1}
         database.update_execution(job_id, status="failed", logs=err_msg)
 
+async def execute_tool_stream(tool_identifier_or_data: Union[str, Dict[str, Any]], args: Dict[str, Any], job_id: Optional[str] = None, env: Optional[Dict[str, str]] = None) -> AsyncGenerator[bytes, None]:
+    """
+    Executes a tool as a K8s Job and streams output as NDJSON.
+    """
+    async for event in execute_tool_events(tool_identifier_or_data, args, job_id, env):
+        yield json_codec.ndjson_line(event)
+
 def stop_execution(job_id: str):
     """Parses jobs to find the correct one by label."""
     try:
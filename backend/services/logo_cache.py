@@ -0,0 +1,136 @@
+"""
+In-memory logo cache.
+Tool, workspace and MCP logos are served from a bounded LRU of encoded
+entries: the SVG bytes, the gzip/brotli encodings stored at upload and the
+content hash used as ETag. Missing logos are cached too. Saves and deletes
+send a NOTIFY (logo_changes) that evicts the entry on every worker; while the
+listener is down, entries are re-read after CATALOGUE_POLL_SECONDS.
+Workspace bundles (every logo of a workspace in one JSON response) are built
+from cached entries and memoized by their combined ETag.
+"""
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Tuple
+
+from config import settings
+from core import database, json_codec
+from core.compression import compress_variants
+from core.notify_listener import NotifyListener
+from core.repositories.logo_repo import LOGO_EVENTS_CHANNEL
+
+# Workspace bundles kept encoded (keyed by ETag)
+BUNDLE_CACHE_SIZE = 64
+
+
+@dataclass(frozen=True)
+class EncodedAsset:
+    """Response body with its ETag and pre-compressed encodings."""
+    body: bytes
+    etag: str
+    media_type: str = "image/svg+xml"
+    encodings: Dict[str, bytes] = field(default_factory=dict)
+
+    @classmethod
+    def build(cls, body: bytes, media_type: str = "image/svg+xml") -> "EncodedAsset":
+        return cls(body, hashlib.sha256(body).hexdigest(), media_type, compress_variants(body))
+
+    @property
+    def text(self) -> str:
+        return self.body.decode('utf-8')
+
+
+def _asset_from_row(row: Dict) -> EncodedAsset:
+    body = row['svg_content'].encode('utf-8')
+    if not row.get('content_hash'):
+        # Logo uploaded before encodings were stored: compress once here
+        return EncodedAsset.build(body)
+    encodings = {name: bytes(row[column]) for name, column in (("gzip", "svg_gzip"), ("br", "svg_br")) if row.get(column)}
+    return EncodedAsset(body, row['content_hash'], encodings=encodings)
+
+
+class LogoCache:
+    def __init__(self, max_entries: int, channel: str = LOGO_EVENTS_CHANNEL):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[Optional[EncodedAsset], float]]" = OrderedDict()
+        self._bundles: "OrderedDict[str, EncodedAsset]" = OrderedDict()
+        # Bumped by every invalidation: a read that raced one is not stored
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._listener = NotifyListener(channel, self._on_notify, on_connect=self.clear)
+
+    def start(self):
+        self._listener.start()
+
+    def stop(self):
+        self._listener.stop()
+
+    def get(self, entity_type: str, entity_id: str) -> Optional[EncodedAsset]:
+        """Logo of an entity (None if it has none)."""
+        self.start()
+        key = (entity_type, entity_id)
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached and (self._listener.listening or time.monotonic() - cached[1] < settings.CATALOGUE_POLL_SECONDS):
+                self._entries.move_to_end(key)
+                return cached[0]
+            generation = self._generation
+        row = database.get_logo_entry(entity_type, entity_id)
+        asset = _asset_from_row(row) if row else None
+        with self._lock:
+            if generation != self._generation:
+                return asset
+            self._entries[key] = (asset, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return asset
+
+    def has(self, entity_type: str, entity_id: str) -> bool:
+        return self.get(entity_type, entity_id) is not None
+
+    def invalidate(self, entity_type: str, entity_id: str):
+        with self._lock:
+            self._generation += 1
+            self._entries.pop((entity_type, entity_id), None)
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+    def _on_notify(self, payload: str):
+        change = json.loads(payload)
+        self.invalidate(change['entity_type'], change['entity_id'])
+
+    def workspace_bundle(self, name: str, tools) -> EncodedAsset:
+        """
+        JSON {"workspace": svg | null, "tools": {tool_id: svg}} with the logos of
+        a workspace and of the given tools (catalogue rows with has_logo).
+        """
+        members = [('category', name)] + [('tool', t['id']) for t in tools if t.get('has_logo')]
+        assets = {key: self.get(*key) for key in members}
+        etag = hashlib.sha256("|".join(
+            f"{t}:{i}:{a.etag if a else '-'}" for (t, i), a in assets.items()).encode('utf-8')).hexdigest()
+        with self._lock:
+            bundle = self._bundles.get(etag)
+            if bundle:
+                self._bundles.move_to_end(etag)
+                return bundle
+        workspace_logo = assets.pop(('category', name))
+        body = json_codec.dumps({
+            "workspace": workspace_logo.text if workspace_logo else None,
+            "tools": {entity_id: asset.text for (_, entity_id), asset in assets.items() if asset}
+        })
+        bundle = EncodedAsset(body, etag, "application/json", compress_variants(body))
+        with self._lock:
+            self._bundles[etag] = bundle
+            while len(self._bundles) > BUNDLE_CACHE_SIZE:
+                self._bundles.popitem(last=False)
+        return bundle
+
+
+logo_cache = LogoCache(settings.LOGO_CACHE_MAX_ENTRIES)
@@ -0,0 +1,113 @@
+"""
+In-memory registry of live MCP SSE sessions.
+Heartbeats are kept in memory and written to mcp_connections in one batched
+upsert per flush interval. Every flush also reaps rows whose last_ping is
+older than the staleness window (sessions of crashed replicas or sessions
+that died without cleanup), so connection counts stay accurate.
+"""
+import asyncio
+import secrets
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Set
+
+from core.logger import logger
+from core.repositories import mcp_repo
+
+
+def _utcnow_iso() -> str:
+    return datetime.utcnow().isoformat()
+
+
+class ConnectionRegistry:
+    """Tracks live SSE sessions of this process and persists them in batches."""
+
+    def __init__(self, flush_interval: float, stale_after: float):
+        self.flush_interval = flush_interval
+        self.stale_after = stale_after
+        self._lock = threading.Lock()
+        self._connections: Dict[str, Dict[str, Any]] = {}
+        self._dirty: Set[str] = set()
+        self._task: Optional[asyncio.Task] = None
+
+    def live_since(self) -> str:
+        """ISO timestamp: connections with an older last_ping are considered dead."""
+        return (datetime.utcnow() - timedelta(seconds=self.stale_after)).isoformat()
+
+    def register(self, mcp_id: str, client_info: str) -> str:
+        conn_id = f"conn_{secrets.token_hex(8)}"
+        now = _utcnow_iso()
+        record = {
+            'id': conn_id, 'mcp_id': mcp_id, 'client_info': client_info,
+            'connected_at': now, 'last_ping': now
+        }
+        with self._lock:
+            self._connections[conn_id] = record
+        # The row is written right away so the connection is visible to other replicas
+        mcp_repo.record_connection(conn_id, mcp_id, client_info)
+        self.ensure_started()
+        return conn_id
+
+    def touch(self, conn_id: str):
+        """Records a heartbeat in memory; persisted on the next flush."""
+        with self._lock:
+            record = self._connections.get(conn_id)
+            if record is not None:
+                record['last_ping'] = _utcnow_iso()
+                self._dirty.add(conn_id)
+
+    def unregister(self, conn_id: str):
+        with self._lock:
+            known = self._connections.pop(conn_id, None) is not None
+            self._dirty.discard(conn_id)
+        if known:
+            mcp_repo.remove_connection(conn_id)
+
+    def flush(self):
+        """Writes pending heartbeats in one batch and reaps stale rows."""
+        cutoff = self.live_since()
+        with self._lock:
+            dead = [cid for cid, c in self._connections.items() if c['last_ping'] < cutoff]
+            for cid in dead:
+                self._connections.pop(cid, None)
+                self._dirty.discard(cid)
+            batch: List[Dict[str, Any]] = [dict(self._connections[cid]) for cid in self._dirty]
+            self._dirty.clear()
+
+        mcp_repo.upsert_connection_pings(batch)
+        mcp_repo.remove_connections(dead)
+        reaped = mcp_repo.delete_stale_connections(cutoff)
+        if reaped:
+            logger.info("Reaped stale MCP connections", extra={"extra_fields": {"count": reaped}})
+
+    def ensure_started(self):
+        """Starts the flush loop on the running event loop (no-op outside one)."""
+        if self._task and not self._task.done():
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._task = loop.create_task(self._run())
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await loop.run_in_executor(None, self.flush)
+            except Exception:
+                logger.error("Error flushing MCP connection heartbeats", exc_info=True)
+
+    async def stop(self):
+        """Stops the flush loop and removes this process' sessions."""
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        with self._lock:
+            conn_ids = list(self._connections)
+            self._connections.clear()
+            self._dirty.clear()
+        if conn_ids:
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, lambda: mcp_repo.remove_connections(conn_ids))
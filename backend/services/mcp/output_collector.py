@@ -0,0 +1,124 @@
+"""
+Bounded collector for tools/call output events.
+Result chunks are accumulated in a list and logs in a ring buffer, so the
+cost of collecting output stays linear in the size of the event stream.
+"""
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+from .resources import LOGS_URI_TEMPLATE, RESULT_URI_TEMPLATE
+
+
+class ToolOutputCollector:
+    """Collects execution events, capping returned result and log sizes."""
+
+    def __init__(self, max_result_chars: int, max_log_chars: int):
+        self.max_result_chars = max_result_chars
+        self.max_log_chars = max_log_chars
+
+        self.execution_id: Optional[str] = None
+        self.exit_code = 0
+
+        self._result_chunks: List[str] = []
+        self._result_kept = 0
+        self.result_total = 0
+
+        self._log_chunks: Deque[str] = deque()
+        self._log_kept = 0
+        self.logs_total = 0
+
+    @property
+    def result_truncated(self) -> bool:
+        return self.result_total > self._result_kept
+
+    @property
+    def logs_truncated(self) -> bool:
+        return self.logs_total > self._log_kept
+
+    def feed(self, event: Dict[str, Any]):
+        """Consume a single execution event."""
+        event_type = event.get('type')
+        if event_type == 'stdout':
+            self._add_result(event.get('data') or "")
+        elif event_type == 'stderr':
+            self._add_log(event.get('data') or "")
+        elif event_type == 'exit':
+            self.exit_code = event.get('code', 0)
+        elif event_type == 'start':
+            self.execution_id = event.get('id')
+
+    def _add_result(self, chunk: str):
+        self.result_total += len(chunk)
+        room = self.max_result_chars - self._result_kept
+        if room <= 0:
+            return
+        if len(chunk) > room:
+            chunk = chunk[:room]
+        self._result_chunks.append(chunk)
+        self._result_kept += len(chunk)
+
+    def _add_log(self, chunk: str):
+        self.logs_total += len(chunk)
+        if self.max_log_chars <= 0:
+            return
+        if len(chunk) >= self.max_log_chars:
+            # A single chunk fills the whole window: keep only its tail
+            self._log_chunks.clear()
+            chunk = chunk[-self.max_log_chars:]
+            self._log_chunks.append(chunk)
+            self._log_kept = len(chunk)
+            return
+
+        self._log_chunks.append(chunk)
+        self._log_kept += len(chunk)
+        while self._log_kept > self.max_log_chars:
+            overflow = self._log_kept - self.max_log_chars
+            head = self._log_chunks[0]
+            if len(head) <= overflow:
+                self._log_chunks.popleft()
+                self._log_kept -= len(head)
+            else:
+                self._log_chunks[0] = head[overflow:]
+                self._log_kept -= overflow
+
+    def result_text(self) -> str:
+        return "".join(self._result_chunks)
+
+    def logs_text(self) -> str:
+        return "".join(self._log_chunks)
+
+    def result_uri(self) -> Optional[str]:
+        if not self.execution_id:
+            return None
+        return RESULT_URI_TEMPLATE.format(execution_id=self.execution_id)
+
+    def logs_uri(self) -> Optional[str]:
+        if not self.execution_id:
+            return None
+        return LOGS_URI_TEMPLATE.format(execution_id=self.execution_id)
+
+    def to_mcp_content(self) -> List[Dict[str, Any]]:
+        """Format collected output as an MCP content array."""
+        content = []
+
+        result_text = self.result_text()
+        if result_text:
+            if self.result_truncated:
+                result_text += (
+                    f"\n\n[Result truncated: showing {self._result_kept} of {self.result_total} characters."
+                    f" Full output: {self.result_uri() or 'unavailable'}]"
+                )
+            content.append({'type': 'text', 'text': result_text})
+
+        # Logs are only returned when the execution failed
+        logs_text = self.logs_text()
+        if logs_text and self.exit_code != 0:
+            header = "\n\n--- Logs ---\n"
+            if self.logs_truncated:
+                header = (
+                    f"\n\n--- Logs (last {self._log_kept} of {self.logs_total} characters,"
+                    f" full logs: {self.logs_uri() or 'unavailable'}) ---\n"
+                )
+            content.append({'type': 'text', 'text': f"{header}{logs_text}"})
+
+        return content
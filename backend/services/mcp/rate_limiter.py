@@ -0,0 +1,127 @@
+"""
+Per-MCP-server rate limiting and concurrent execution quotas for tools/call.
+Limits are configured in the mcp_servers.rate_limits column, e.g.:
+
+    {"requests_per_minute": 30, "burst": 10, "max_concurrent": 4,
+     "tools": {"Web/nuclei_scan": {"requests_per_minute": 5, "max_concurrent": 1}}}
+
+State lives in Postgres (token buckets + execution leases), so the limits hold
+when several backend replicas serve the same MCP server. A lease is renewed
+while its execution runs; it only expires when the replica holding it died.
+"""
+import asyncio
+import secrets
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import settings
+from core import database
+from core.logger import logger
+
+LIMIT_KEYS = ("requests_per_minute", "burst", "max_concurrent")
+
+# Lease renewal tasks of the executions running in this process
+_renewals: Dict[str, asyncio.Task] = {}
+
+
+class RateLimitExceeded(Exception):
+    """Raised when a tools/call is rejected by a rate limit or quota."""
+
+    def __init__(self, scope: str, limit: str, retry_after: float):
+        self.scope = scope
+        self.limit = limit
+        self.retry_after = max(float(retry_after), 0.0)
+        super().__init__(f"Rate limit exceeded for {scope} ({limit}); retry after {self.retry_after:.1f}s")
+
+    def to_error_data(self) -> Dict[str, Any]:
+        return {
+            'retryAfter': round(self.retry_after, 3),
+            'scope': self.scope,
+            'limit': self.limit
+        }
+
+
+def normalize_limits(raw: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Drops empty/invalid values so callers can cheaply tell if limits are configured."""
+    if not isinstance(raw, dict):
+        return {}
+    limits = {k: raw[k] for k in LIMIT_KEYS if isinstance(raw.get(k), (int, float)) and raw[k] > 0}
+    tools = {}
+    for tool_id, tool_limits in (raw.get('tools') or {}).items():
+        normalized = normalize_limits(tool_limits)
+        normalized.pop('tools', None)
+        if normalized:
+            tools[tool_id] = normalized
+    if tools:
+        limits['tools'] = tools
+    return limits
+
+
+def build_plan(mcp_id: str, rate_limits: Dict[str, Any], tool_id: str) -> Tuple[List, List]:
+    """Turns the configured limits into token buckets and concurrency checks."""
+    buckets, concurrency = [], []
+    scopes = [("mcp", f"{mcp_id}", None, rate_limits)]
+    tool_limits = (rate_limits.get('tools') or {}).get(tool_id)
+    if tool_limits:
+        scopes.append((f"tool:{tool_id}", f"{mcp_id}:{tool_id}", tool_id, tool_limits))
+
+    for scope, key, scoped_tool_id, limits in scopes:
+        rpm = limits.get('requests_per_minute')
+        if rpm:
+            burst = limits.get('burst') or rpm
+            buckets.append((scope, key, rpm / 60.0, float(max(burst, 1))))
+        if limits.get('max_concurrent'):
+            concurrency.append((scope, scoped_tool_id, int(limits['max_concurrent'])))
+    return buckets, concurrency
+
+
+async def acquire(mcp_id: str, rate_limits: Optional[Dict[str, Any]], tool_id: str) -> Optional[str]:
+    """
+    Charges the configured limits for one execution.
+    Returns a lease id to release when the execution ends (None if nothing to release).
+    Raises RateLimitExceeded when the call must be rejected.
+    """
+    limits = normalize_limits(rate_limits)
+    if not limits:
+        return None
+
+    buckets, concurrency = build_plan(mcp_id, limits, tool_id)
+    if not buckets and not concurrency:
+        return None
+
+    lease_id = f"lease_{secrets.token_hex(8)}"
+    loop = asyncio.get_running_loop()
+    outcome = await loop.run_in_executor(None, lambda: database.acquire_mcp_execution_slot(
+        mcp_id, lease_id, tool_id, buckets, concurrency,
+        lease_ttl_seconds=settings.MCP_LEASE_TTL_SECONDS,
+        concurrency_retry_seconds=settings.MCP_CONCURRENCY_RETRY_SECONDS
+    ))
+    if not outcome['allowed']:
+        raise RateLimitExceeded(outcome['scope'], outcome['limit'], outcome['retry_after'])
+    if not concurrency:
+        return None
+    _renewals[lease_id] = loop.create_task(_renew(lease_id))
+    return lease_id
+
+
+async def _renew(lease_id: str):
+    """Extends the lease every third of its TTL until release() cancels this task."""
+    loop = asyncio.get_running_loop()
+    ttl = settings.MCP_LEASE_TTL_SECONDS
+    while True:
+        await asyncio.sleep(ttl / 3)
+        try:
+            await loop.run_in_executor(None, lambda: database.renew_mcp_execution_slot(lease_id, ttl))
+        except Exception:
+            logger.warning("Failed to renew MCP execution lease", exc_info=True,
+                           extra={"extra_fields": {"lease_id": lease_id}})
+
+
+async def release(lease_id: Optional[str]):
+    """Releases a concurrency lease obtained from acquire()."""
+    if not lease_id:
+        return
+    renewal = _renewals.pop(lease_id, None)
+    if renewal:
+        renewal.cancel()
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(None, lambda: database.release_mcp_execution_slot(lease_id))
@@ -0,0 +1,106 @@
+"""
+MCP resources backed by the executions table.
+Execution outputs are addressed as execution://<execution_id>/<result|logs>
+and can be read in pages (offset/length) or narrowed to a section of a JSON
+result with a JSON Pointer (RFC 6901), e.g.
+execution://<id>/result?pointer=/Results/0&offset=0&length=65536
+"""
+import json
+from typing import Any, Dict, Optional
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+RESOURCE_SCHEME = "execution"
+RESOURCE_FIELDS = ("result", "logs")
+RESULT_URI_TEMPLATE = "execution://{execution_id}/result"
+LOGS_URI_TEMPLATE = "execution://{execution_id}/logs"
+
+
+def build_uri(execution_id: str, field: str, offset: Optional[int] = None,
+              length: Optional[int] = None, pointer: Optional[str] = None) -> str:
+    """Builds an execution resource URI with optional paging/selection query."""
+    uri = f"{RESOURCE_SCHEME}://{execution_id}/{field}"
+    query = {}
+    if pointer:
+        query['pointer'] = pointer
+    if offset:
+        query['offset'] = offset
+    if length is not None:
+        query['length'] = length
+    if query:
+        uri += "?" + urlencode(query)
+    return uri
+
+
+def parse_uri(uri: str) -> Dict[str, Any]:
+    """
+    Parses an execution resource URI.
+    Raises ValueError for malformed URIs (reported as INVALID_PARAMS).
+    """
+    if not uri:
+        raise ValueError("Resource uri is required")
+    parts = urlsplit(uri)
+    field = parts.path.strip('/')
+    if parts.scheme != RESOURCE_SCHEME or not parts.netloc or field not in RESOURCE_FIELDS:
+        raise ValueError(f"Unsupported resource uri: {uri}")
+
+    query = {k: v[-1] for k, v in parse_qs(parts.query).items()}
+    try:
+        offset = int(query['offset']) if 'offset' in query else 0
+        length = int(query['length']) if 'length' in query else None
+    except ValueError:
+        raise ValueError("offset and length must be integers")
+    if offset < 0 or (length is not None and length < 0):
+        raise ValueError("offset and length must be non-negative")
+
+    return {
+        'execution_id': parts.netloc,
+        'field': field,
+        'offset': offset,
+        'length': length,
+        'pointer': query.get('pointer'),
+    }
+
+
+def resolve_pointer(document: Any, pointer: str) -> Any:
+    """
+    Resolves a JSON Pointer (RFC 6901) against a parsed document.
+    Only "" is the whole document; "/" is the member named "".
+    """
+    if pointer == "":
+        return document
+    if not pointer.startswith('/'):
+        raise ValueError(f"Invalid JSON pointer: {pointer}")
+
+    current = document
+    for token in pointer[1:].split('/'):
+        token = token.replace('~1', '/').replace('~0', '~')
+        if isinstance(current, dict):
+            if token not in current:
+                raise ValueError(f"JSON pointer not found: {pointer}")
+            current = current[token]
+        elif isinstance(current, list):
+            try:
+                current = current[int(token)]
+            except (ValueError, IndexError):
+                raise ValueError(f"JSON pointer not found: {pointer}")
+        else:
+            raise ValueError(f"JSON pointer not found: {pointer}")
+    return current
+
+
+def select_section(text: str, pointer: str) -> str:
+    """Extracts the section of a JSON result addressed by pointer, as JSON text."""
+    try:
+        document = json.loads(text)
+    except ValueError:
+        raise ValueError("Execution result is not JSON; pointer selection is unavailable")
+    section = resolve_pointer(document, pointer)
+    if isinstance(section, str):
+        return section
+    return json.dumps(section, indent=2)
+
+
+def guess_mime_type(field: str, sample: str) -> str:
+    if field == 'result' and sample.lstrip()[:1] in ('{', '['):
+        return "application/json"
+    return "text/plain"
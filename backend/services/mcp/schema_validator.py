@@ -0,0 +1,227 @@
+"""
+Compiled validators for MCP tool inputSchemas.
+A schema is compiled once into a tree of small check functions and cached by
+its content digest, or per tool by the digest of the tool configuration it is
+derived from, so tools/call arguments are validated without rebuilding the
+schema or touching Kubernetes. Supports the JSON Schema subset tools advertise: type, enum,
+const, properties, required, additionalProperties, items, min/max bounds,
+length limits and pattern. Unknown keywords are ignored.
+"""
+import hashlib
+import json
+import re
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from core.yaml_cache import config_digest
+
+# check(value, path, errors) appends human-readable errors
+Check = Callable[[Any, str, List[str]], None]
+
+MAX_CACHED_VALIDATORS = 1024
+
+
+class ArgumentValidationError(ValueError):
+    """Raised when tools/call arguments do not match the tool inputSchema."""
+
+    def __init__(self, tool_name: str, errors: List[str]):
+        self.errors = errors
+        super().__init__(f"Invalid arguments for {tool_name}: {'; '.join(errors)}")
+
+
+def _is_integer(value: Any) -> bool:
+    if isinstance(value, bool):
+        return False
+    return isinstance(value, int) or (isinstance(value, float) and value.is_integer())
+
+
+_TYPE_CHECKS: Dict[str, Callable[[Any], bool]] = {
+    'string': lambda v: isinstance(v, str),
+    'integer': _is_integer,
+    'number': lambda v: isinstance(v, (int, float)) and not isinstance(v, bool),
+    'boolean': lambda v: isinstance(v, bool),
+    'array': lambda v: isinstance(v, list),
+    'object': lambda v: isinstance(v, dict),
+    'null': lambda v: v is None,
+}
+
+JSON_TYPES = frozenset(_TYPE_CHECKS)
+
+
+def _child(path: str, key: Any) -> str:
+    return f"{path}.{key}" if isinstance(key, str) else f"{path}[{key}]"
+
+
+def _compile(schema: Any) -> Check:
+    if not isinstance(schema, dict):
+        # `true`/missing schema accepts anything, `false` rejects everything
+        if schema is False:
+            return lambda value, path, errors: errors.append(f"{path}: not allowed")
+        return lambda value, path, errors: None
+
+    checks: List[Check] = []
+
+    declared = schema.get('type')
+    if declared:
+        names = declared if isinstance(declared, list) else [declared]
+        tests = [_TYPE_CHECKS[n] for n in names if n in _TYPE_CHECKS]
+        if tests:
+            expected = " or ".join(names)
+
+            def check_type(value, path, errors, tests=tests, expected=expected):
+                if not any(t(value) for t in tests):
+                    errors.append(f"{path}: expected {expected}, got {type(value).__name__}")
+                    return False
+                return True
+            checks.append(check_type)
+
+    if 'enum' in schema:
+        allowed = list(schema['enum'])
+
+        def check_enum(value, path, errors):
+            if value not in allowed:
+                errors.append(f"{path}: must be one of {allowed}")
+        checks.append(check_enum)
+
+    if 'const' in schema:
+        const = schema['const']
+
+        def check_const(value, path, errors):
+            if value != const:
+                errors.append(f"{path}: must be {const!r}")
+        checks.append(check_const)
+
+    for keyword, op, message in (
+        ('minimum', lambda v, b: v < b, "must be >= {}"),
+        ('maximum', lambda v, b: v > b, "must be <= {}"),
+        ('exclusiveMinimum', lambda v, b: v <= b, "must be > {}"),
+        ('exclusiveMaximum', lambda v, b: v >= b, "must be < {}"),
+    ):
+        bound = schema.get(keyword)
+        if isinstance(bound, (int, float)) and not isinstance(bound, bool):
+            def check_bound(value, path, errors, bound=bound, op=op, message=message):
+                if _TYPE_CHECKS['number'](value) and op(value, bound):
+                    errors.append(f"{path}: {message.format(bound)}")
+            checks.append(check_bound)
+
+    min_len, max_len = schema.get('minLength'), schema.get('maxLength')
+    pattern = re.compile(schema['pattern']) if isinstance(schema.get('pattern'), str) else None
+    if min_len is not None or max_len is not None or pattern is not None:
+        def check_string(value, path, errors):
+            if not isinstance(value, str):
+                return
+            if min_len is not None and len(value) < min_len:
+                errors.append(f"{path}: shorter than {min_len} characters")
+            if max_len is not None and len(value) > max_len:
+                errors.append(f"{path}: longer than {max_len} characters")
+            if pattern is not None and not pattern.search(value):
+                errors.append(f"{path}: does not match pattern {pattern.pattern!r}")
+        checks.append(check_string)
+
+    properties = {k: _compile(v) for k, v in (schema.get('properties') or {}).items()}
+    required = list(schema.get('required') or [])
+    additional = schema.get('additionalProperties', True)
+    additional_check = _compile(additional) if isinstance(additional, dict) else None
+    if properties or required or additional is not True:
+        def check_object(value, path, errors):
+            if not isinstance(value, dict):
+                return
+            for name in required:
+                if name not in value:
+                    errors.append(f"{_child(path, name)}: is required")
+            for name, item in value.items():
+                prop_check = properties.get(name)
+                if prop_check is not None:
+                    prop_check(item, _child(path, name), errors)
+                elif additional is False:
+                    errors.append(f"{_child(path, name)}: unexpected property")
+                elif additional_check is not None:
+                    additional_check(item, _child(path, name), errors)
+        checks.append(check_object)
+
+    items = schema.get('items')
+    min_items, max_items = schema.get('minItems'), schema.get('maxItems')
+    if items is not None or min_items is not None or max_items is not None:
+        item_check = _compile(items) if items is not None else None
+
+        def check_array(value, path, errors):
+            if not isinstance(value, list):
+                return
+            if min_items is not None and len(value) < min_items:
+                errors.append(f"{path}: fewer than {min_items} items")
+            if max_items is not None and len(value) > max_items:
+                errors.append(f"{path}: more than {max_items} items")
+            if item_check is not None:
+                for index, item in enumerate(value):
+                    item_check(item, _child(path, index), errors)
+        checks.append(check_array)
+
+    def check(value, path, errors):
+        for c in checks:
+            # A failed type check makes the remaining keyword checks meaningless
+            if c(value, path, errors) is False:
+                return
+    return check
+
+
+class CompiledValidator:
+    """Validates instances against one compiled schema."""
+
+    def __init__(self, schema: Dict[str, Any]):
+        self._check = _compile(schema)
+
+    def errors(self, instance: Any) -> List[str]:
+        errors: List[str] = []
+        self._check(instance, "arguments", errors)
+        return errors
+
+
+_cache: Dict[str, CompiledValidator] = {}
+_cache_lock = threading.Lock()
+
+
+def schema_digest(schema: Dict[str, Any]) -> str:
+    canonical = json.dumps(schema, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def get_validator(schema: Dict[str, Any]) -> CompiledValidator:
+    """Returns the cached validator for a schema, compiling it on first use."""
+    digest = schema_digest(schema)
+    validator = _cache.get(digest)
+    if validator is None:
+        validator = CompiledValidator(schema)
+        with _cache_lock:
+            if len(_cache) >= MAX_CACHED_VALIDATORS:
+                _cache.clear()
+            _cache[digest] = validator
+    return validator
+
+
+_tool_cache: Dict[Tuple[str, bytes, str], CompiledValidator] = {}
+
+
+def get_tool_validator(tool_id: str, configuration: Optional[str],
+                       build_schema: Callable[[], Dict[str, Any]], scope: str = "") -> CompiledValidator:
+    """
+    Returns the validator of a tool's inputSchema, keyed by tool id, the
+    digest of its configuration and `scope` (whatever else the schema is built
+    from, e.g. the MCP server and its env_vars). build_schema() only runs when
+    one of them changed (or on first use).
+    """
+    key = (tool_id, config_digest(configuration or ""), scope)
+    validator = _tool_cache.get(key)
+    if validator is None:
+        validator = CompiledValidator(build_schema())
+        with _cache_lock:
+            if len(_tool_cache) >= MAX_CACHED_VALIDATORS:
+                _tool_cache.clear()
+            _tool_cache[key] = validator
+    return validator
+
+
+def validate_arguments(tool_name: str, validator: CompiledValidator, arguments: Any):
+    """Raises ArgumentValidationError if the arguments do not match."""
+    errors = validator.errors(arguments)
+    if errors:
+        raise ArgumentValidationError(tool_name, errors)
@@ -7,8 +7,11 @@ import secrets
 import hashlib
 from typing import List, Dict, Any, Optional
 
+from config import settings
 from core import database
 from core.repositories import mcp_repo
+from services.logo_cache import logo_cache
+from services.mcp.connection_registry import ConnectionRegistry
 
 def generate_api_key() -> str:
     """Generate a secure API key."""
@@ -24,25 +27,25 @@ def verify_api_key(api_key: str, api_key_hash: str) -> bool:
 
 # MCP Server Operations
 
-def create_mcp_server(name: str, description: str, tool_ids: List[str], env_vars: List[Dict[str, Any]] = []) -> Dict[str, Any]:
+def create_mcp_server(name: str, description: str, tool_ids: List[str], env_vars: List[Dict[str, Any]] = [], rate_limits: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
     mcp_id = f"mcp_{secrets.token_hex(8)}"
     api_key = generate_api_key()
     api_key_hash = hash_api_key(api_key)
     
-    result = mcp_repo.create_mcp_server(mcp_id, name, description, api_key_hash, tool_ids, env_vars)
+    result = mcp_repo.create_mcp_server(mcp_id, name, description, api_key_hash, tool_ids, env_vars, rate_limits)
     result['api_key'] = api_key # Only shown once
     return result
 
 def get_mcp_server(mcp_id: str) -> Optional[Dict[str, Any]]:
     mcp = mcp_repo.get_mcp_server(mcp_id)
     if mcp:
-        mcp['has_logo'] = database.get_logo('mcp', mcp_id) is not None
+        mcp['has_logo'] = logo_cache.has('mcp', mcp_id)
     return mcp
 
 def list_mcp_servers() -> List[Dict[str, Any]]:
     servers = mcp_repo.list_mcp_servers()
     for s in servers:
-        s['has_logo'] = database.get_logo('mcp', s['id']) is not None
+        s['has_logo'] = logo_cache.has('mcp', s['id'])
     return servers
 
 def update_mcp_server(mcp_id: str, **kwargs) -> bool:
@@ -50,6 +53,7 @@ def update_mcp_server(mcp_id: str, **kwargs) -> bool:
 
 def delete_mcp_server(mcp_id: str) -> bool:
     database.delete_logo('mcp', mcp_id)
+    logo_cache.invalidate('mcp', mcp_id)
     return mcp_repo.delete_mcp_server(mcp_id)
 
 def regenerate_api_key(mcp_id: str) -> Optional[str]:
@@ -66,17 +70,18 @@ def authenticate_mcp(mcp_id: str, api_key: str) -> bool:
     return verify_api_key(api_key, mcp['api_key_hash'])
 
 # MCP Connection Tracking
+# Heartbeats are batched in memory (see services/mcp/connection_registry.py)
 
-def record_connection(mcp_id: str, client_info: str) -> str:
-    conn_id = f"conn_{secrets.token_hex(8)}"
-    mcp_repo.record_connection(conn_id, mcp_id, client_info)
-    return conn_id
+connection_registry = ConnectionRegistry(
+    flush_interval=settings.MCP_HEARTBEAT_FLUSH_SECONDS,
+    stale_after=settings.MCP_CONNECTION_STALE_SECONDS
+)
 
-def update_connection_ping(connection_id: str):
-    mcp_repo.update_connection_ping(connection_id)
+def record_connection(mcp_id: str, client_info: str) -> str:
+    return connection_registry.register(mcp_id, client_info)
 
 def remove_connection(connection_id: str):
-    mcp_repo.remove_connection(connection_id)
+    connection_registry.unregister(connection_id)
 
 def get_active_connections(mcp_id: str) -> List[Dict[str, Any]]:
     return mcp_repo.get_active_connections(mcp_id)
@@ -85,6 +90,8 @@ def get_active_connections(mcp_id: str) -> List[Dict[str, Any]]:
 
 def save_mcp_logo(mcp_id: str, svg_content: str):
     database.save_logo('mcp', mcp_id, svg_content)
+    logo_cache.invalidate('mcp', mcp_id)
 
 def get_mcp_logo(mcp_id: str) -> Optional[str]:
-    return database.get_logo('mcp', mcp_id)
+    logo = logo_cache.get('mcp', mcp_id)
+    return logo.text if logo else None
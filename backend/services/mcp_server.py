@@ -2,13 +2,17 @@
 MCP (Model Context Protocol) Server
 Implements MCP protocol over SSE (Server-Sent Events) with JSON-RPC 2.0.
 """
-import json
 import asyncio
 from typing import Dict, Any, List, Optional, AsyncGenerator
 from fastapi import Request, HTTPException
 from sse_starlette.sse import EventSourceResponse
 
+from config import settings
+from core import database, json_codec
+from core.yaml_cache import load_config
 from services import tool_service, execution_service, mcp_manager
+from services.mcp import rate_limiter, resources, schema_validator
+from services.mcp.output_collector import ToolOutputCollector
 
 # JSON-RPC 2.0 Error Codes
 PARSE_ERROR = -32700
@@ -16,6 +20,11 @@ INVALID_REQUEST = -32600
 METHOD_NOT_FOUND = -32601
 INVALID_PARAMS = -32602
 INTERNAL_ERROR = -32603
+# Server-defined error: tools/call rejected by rate limit or concurrency quota
+RATE_LIMITED = -32029
+
+# Number of executions listed per resources/list page
+RESOURCES_LIST_PAGE_SIZE = 50
 
 class MCPServer:
     """MCP Protocol Server Implementation"""
@@ -28,19 +37,18 @@ class MCPServer:
         
         self.protocol_version = "2024-11-05"
         self.tools_cache = None
+        # inputSchema embeds this server's env_vars: validators are cached per server and env config
+        self.schema_scope = f"{mcp_id}:{schema_validator.schema_digest({'env_vars': self.mcp_config.get('env_vars')})}"
     
-    def _parse_yaml_metadata(self, yaml_path: str) -> Dict[str, Any]:
-        """Parse script metadata from YAML file (inline from parser.py)."""
-        import yaml
-        import os
+    def _parse_yaml_metadata(self, configuration: Optional[str]) -> Dict[str, Any]:
+        """Parse script metadata from the tool's YAML configuration."""
         meta = {"description": "",  "arguments": []}
         
-        if not yaml_path or not os.path.exists(yaml_path):
+        if not configuration:
             return meta
         
         try:
-            with open(yaml_path) as f:
-                data = yaml.safe_load(f) or {}
+            data = load_config(configuration) or {}
             meta["description"] = data.get("description", "")
             
             # Parse arguments from schema
@@ -54,6 +62,7 @@ class MCPServer:
                     "type": arg_details.get("type", "string"),
                     "description": arg_details.get("description", ""),
                     "default": arg_details.get("default"),
+                    "enum": arg_details.get("enum"),
                     "required": arg_name in required
                 })
         except Exception:
@@ -62,15 +71,13 @@ class MCPServer:
         return meta
         
     def get_tool_by_id(self, tool_id: str) -> Optional[Dict[str, Any]]:
-        """Get tool details by ID."""
-        all_tools = tool_service.scan_tools()
-        for category_tools in all_tools.values():
-            for tool in category_tools:
-                if tool['id'] == tool_id:
-                    # Load full metadata (inline parser functionality)
-                    meta = self._parse_yaml_metadata(tool['yaml_path'])
-                    return {**tool, **meta}
-        return None
+        """Get tool details by ID (catalogue alias index)."""
+        tool = tool_service.find_tool(tool_id)
+        if not tool:
+            return None
+        # Load full metadata (inline parser functionality)
+        meta = self._parse_yaml_metadata(tool.get('configuration'))
+        return {**tool, **meta}
     
     def get_mcp_tools(self) -> List[Dict[str, Any]]:
         """Get tools registered with this MCP in MCP schema format."""
@@ -87,11 +94,19 @@ class MCPServer:
             
             # Convert tool to MCP schema
             mcp_tool = self.tool_to_mcp_schema(tool)
+            # Compile the argument validator alongside the advertised schema
+            self.get_argument_validator(tool, mcp_tool)
             mcp_tools.append(mcp_tool)
         
         self.tools_cache = mcp_tools
         return mcp_tools
     
+    def get_argument_validator(self, tool: Dict[str, Any], mcp_tool: Optional[Dict[str, Any]] = None):
+        """Compiled validator of the tool's inputSchema as advertised by this server."""
+        return schema_validator.get_tool_validator(
+            tool['id'], tool.get('configuration'),
+            lambda: (mcp_tool or self.tool_to_mcp_schema(tool))['inputSchema'], scope=self.schema_scope)
+
     def tool_to_mcp_schema(self, tool: Dict[str, Any]) -> Dict[str, Any]:
         """
         Convert tool metadata to MCP tool schema.
@@ -104,7 +119,7 @@ class MCPServer:
             arg_name = arg['name']
             arg_type = arg.get('type', 'str')
             
-            # Map Python types to JSON schema types
+            # Map Python types to JSON schema types (JSON schema names pass through)
             json_type = {
                 'str': 'string',
                 'int': 'integer',
@@ -112,12 +127,14 @@ class MCPServer:
                 'bool': 'boolean',
                 'list': 'array',
                 'dict': 'object'
-            }.get(arg_type, 'string')
+            }.get(arg_type, arg_type if arg_type in schema_validator.JSON_TYPES else 'string')
             
             properties[arg_name] = {
                 'type': json_type,
                 'description': arg.get('description', '')
             }
+            if arg.get('enum'):
+                properties[arg_name]['enum'] = arg['enum']
             
             # Add default if present
             if 'default' in arg and arg['default'] is not None:
@@ -213,7 +230,8 @@ class MCPServer:
         return {
             'protocolVersion': self.protocol_version,
             'capabilities': {
-                'tools': {}
+                'tools': {},
+                'resources': {}
             },
             'serverInfo': {
                 'name': self.mcp_config['name'],
@@ -268,43 +286,139 @@ class MCPServer:
         if tool_name not in self.mcp_config.get('tool_ids', []):
             raise ValueError(f"Tool not enabled for this MCP: {tool_name}")
         
+        # Reject invalid arguments before any rate-limit or Kubernetes work
+        if arguments is None:
+            arguments = {}
+        schema_validator.validate_arguments(tool_name, self.get_argument_validator(tool), arguments)
+        
         # Execute tool - collect output via streaming
-        result_text = ""
-        logs_text = ""
-        exit_code = 0
+        collector = ToolOutputCollector(
+            max_result_chars=settings.MCP_RESULT_MAX_CHARS,
+            max_log_chars=settings.MCP_LOG_MAX_CHARS
+        )
         
+        # Enforce rate limits / concurrency quotas before any Kubernetes work
+        lease_id = await rate_limiter.acquire(self.mcp_id, self.mcp_config.get('rate_limits'), tool_name)
         try:
-            async for event in execution_service.execute_tool_stream(tool['path'], arguments, env=final_env):
-                event_data = json.loads(event)
-                if event_data['type'] == 'stdout':
-                    result_text += event_data['data']
-                elif event_data['type'] == 'stderr':
-                    logs_text += event_data['data']
-                elif event_data['type'] == 'exit':
-                    exit_code = event_data['code']
+            async for event in execution_service.execute_tool_events(tool['id'], arguments, env=final_env, mcp_id=self.mcp_id):
+                collector.feed(event)
         except Exception as e:
             raise ValueError(f"Tool execution failed: {str(e)}")
+        finally:
+            await rate_limiter.release(lease_id)
         
         # Format response in MCP format
-        content = []
-        
-        # Add result as text
-        if result_text:
-            content.append({
-                'type': 'text',
-                'text': result_text
-            })
-        
-        # Add logs if present and execution failed
-        if logs_text and exit_code != 0:
-            content.append({
-                'type': 'text',
-                'text': f"\n\n--- Logs ---\n{logs_text}"
-            })
+        response = {
+            'content': collector.to_mcp_content(),
+            'isError': collector.exit_code != 0
+        }
+        
+        # Link the full output as MCP resources (see resources/read)
+        if collector.execution_id:
+            response['_meta'] = {
+                'executionId': collector.execution_id,
+                'resources': {
+                    'result': collector.result_uri(),
+                    'logs': collector.logs_uri()
+                },
+                'resultTruncated': collector.result_truncated
+            }
+        
+        return response
+    
+    async def handle_resources_list(self, params: Dict) -> Dict:
+        """Handle resources/list request: outputs of executions started by this MCP."""
+        try:
+            cursor = int(params.get('cursor') or 0)
+        except (TypeError, ValueError):
+            raise ValueError("Invalid cursor")
+        
+        loop = asyncio.get_running_loop()
+        rows = await loop.run_in_executor(
+            None,
+            lambda: database.get_mcp_executions(self.mcp_id, limit=RESOURCES_LIST_PAGE_SIZE + 1, offset=cursor)
+        )
+        
+        items = []
+        for row in rows[:RESOURCES_LIST_PAGE_SIZE]:
+            label = f"{row['tool_name']} ({row['status']}, {row['start_time']})"
+            if row['result_size']:
+                items.append({
+                    'uri': resources.build_uri(row['id'], 'result'),
+                    'name': f"Result: {label}",
+                    'mimeType': resources.guess_mime_type('result', row.get('result_head') or ''),
+                    'size': row['result_size']
+                })
+            if row['logs_size']:
+                items.append({
+                    'uri': resources.build_uri(row['id'], 'logs'),
+                    'name': f"Logs: {label}",
+                    'mimeType': 'text/plain',
+                    'size': row['logs_size']
+                })
+        
+        result = {'resources': items}
+        if len(rows) > RESOURCES_LIST_PAGE_SIZE:
+            result['nextCursor'] = str(cursor + RESOURCES_LIST_PAGE_SIZE)
+        return result
+    
+    async def handle_resources_read(self, params: Dict) -> Dict:
+        """
+        Handle resources/read request.
+        Supports paging via offset/length (URI query or params) and JSON Pointer
+        selection of a section of the result via ?pointer=.
+        """
+        uri = params.get('uri')
+        ref = resources.parse_uri(uri)
+        
+        try:
+            offset = int(params.get('offset', ref['offset']))
+            length = params.get('length', ref['length'])
+            length = int(length) if length is not None else None
+        except (TypeError, ValueError):
+            raise ValueError("offset and length must be integers")
+        if offset < 0 or (length is not None and length < 0):
+            raise ValueError("offset and length must be non-negative")
+        
+        page_max = settings.MCP_RESOURCE_PAGE_MAX_CHARS
+        length = page_max if length is None else min(length, page_max)
+        execution_id, field, pointer = ref['execution_id'], ref['field'], ref['pointer']
+        
+        loop = asyncio.get_running_loop()
+        if pointer:
+            # The section has to be selected from the parsed document
+            row = await loop.run_in_executor(None, lambda: database.read_execution_field(execution_id, field))
+        else:
+            row = await loop.run_in_executor(None, lambda: database.read_execution_field(execution_id, field, offset, length))
+        
+        # Executions of other MCP servers are reported as missing
+        if not row or row.get('mcp_id') != self.mcp_id:
+            raise ValueError(f"Resource not found: {uri}")
+        
+        if pointer:
+            section = resources.select_section(row['chunk'], pointer)
+            total = len(section)
+            chunk = section[offset:offset + length]
+        else:
+            total = row['total']
+            chunk = row['chunk']
+        
+        meta = {
+            'offset': offset,
+            'length': len(chunk),
+            'totalLength': total
+        }
+        next_offset = offset + len(chunk)
+        if chunk and next_offset < total:
+            meta['nextUri'] = resources.build_uri(execution_id, field, next_offset, length, pointer)
         
         return {
-            'content': content,
-            'isError': exit_code != 0
+            'contents': [{
+                'uri': uri,
+                'mimeType': 'application/json' if pointer else resources.guess_mime_type(field, chunk),
+                'text': chunk
+            }],
+            '_meta': meta
         }
     
     async def handle_request(self, request: Dict) -> Dict:
@@ -340,6 +454,10 @@ class MCPServer:
                 result = await self.handle_tools_list(params)
             elif method == 'tools/call':
                 result = await self.handle_tools_call(params)
+            elif method == 'resources/list':
+                result = await self.handle_resources_list(params)
+            elif method == 'resources/read':
+                result = await self.handle_resources_read(params)
             else:
                 return self.create_jsonrpc_response(
                     request_id,
@@ -351,6 +469,24 @@ class MCPServer:
             
             return self.create_jsonrpc_response(request_id, result=result)
             
+        except rate_limiter.RateLimitExceeded as e:
+            return self.create_jsonrpc_response(
+                request.get('id'),
+                error=self.create_jsonrpc_error(
+                    RATE_LIMITED,
+                    str(e),
+                    e.to_error_data()
+                )
+            )
+        except schema_validator.ArgumentValidationError as e:
+            return self.create_jsonrpc_response(
+                request.get('id'),
+                error=self.create_jsonrpc_error(
+                    INVALID_PARAMS,
+                    str(e),
+                    {'errors': e.errors}
+                )
+            )
         except ValueError as e:
             return self.create_jsonrpc_response(
                 request.get('id'),
@@ -407,7 +543,7 @@ async def mcp_sse_endpoint(
             # Send initial connection established event
             yield {
                 'event': 'connected',
-                'data': json.dumps({
+                'data': json_codec.dumps_str({
                     'mcp_id': mcp_id,
                     'protocol_version': mcp_server.protocol_version
                 })
@@ -424,16 +560,15 @@ async def mcp_sse_endpoint(
             # For now, we'll use a different approach via POST endpoint
             while True:
                 await asyncio.sleep(30)
-                mcp_manager.update_connection_ping(connection_id)
+                mcp_manager.connection_registry.touch(connection_id)
                 yield {
                     'event': 'ping',
-                    'data': json.dumps({'timestamp': asyncio.get_event_loop().time()})
+                    'data': json_codec.dumps_str({'timestamp': asyncio.get_event_loop().time()})
                 }
                 
-        except asyncio.CancelledError:
-            # Client disconnected
+        finally:
+            # Client disconnected (cancelled, closed or errored)
             mcp_manager.remove_connection(connection_id)
-            raise
     
     return EventSourceResponse(event_generator())
 
@@ -0,0 +1,223 @@
+"""
+In-memory tool catalogue shared by every reader in the process (GET /api/tools,
+MCP tools/list).
+Every tool/workspace write bumps a revision in Postgres (catalogue_changes) and
+sends a NOTIFY in the same transaction. Each worker LISTENs on that channel and
+reloads only the entity named in the notification, so edits made by any worker
+or replica are visible within milliseconds while reads stay in memory. While
+the listener is down, reads catch up from the change table at most every
+CATALOGUE_POLL_SECONDS.
+The cache also keeps the alias index used to resolve tool identifiers (id,
+virtual path, file name) without database round trips.
+"""
+import itertools
+import json
+import threading
+import time
+from typing import Dict, List, Optional, Set
+
+from config import settings
+from core import database
+from core.logger import logger
+from core.notify_listener import NotifyListener
+from core.repositories.catalogue_repo import CATALOGUE_CHANNEL
+
+# Changes applied incrementally (notified batches, catch-up); beyond that a full reload is cheaper
+CATCH_UP_LIMIT = 200
+
+TOOL_FILE_EXTENSIONS = ('.py', '.yaml', '.yml')
+
+
+def tool_aliases(tool_id: str) -> List[str]:
+    """Identifiers accepted for a tool: id, id + file extension, file name."""
+    name = tool_id.rsplit('/', 1)[-1]
+    return [alias for base in (tool_id, name) for alias in (base, *(base + ext for ext in TOOL_FILE_EXTENSIONS))]
+
+
+def alias_candidates(identifier: str) -> List[str]:
+    """Keys to try for an identifier; paths are reduced to their last two segments."""
+    identifier = identifier.strip('/')
+    candidates = [identifier]
+    parts = identifier.split('/')
+    if len(parts) > 2:
+        candidates.append(f"{parts[-2]}/{parts[-1]}")
+    return candidates
+
+
+def canonical_tool_id(identifier: str) -> Optional[str]:
+    """'category/name' of an id or path (extension stripped), None without a category."""
+    candidate = alias_candidates(identifier)[-1]
+    if '/' not in candidate:
+        return None
+    for ext in TOOL_FILE_EXTENSIONS:
+        if candidate.endswith(ext):
+            return candidate[:-len(ext)]
+    return candidate
+
+
+class CatalogueCache:
+    def __init__(self, channel: str = CATALOGUE_CHANNEL):
+        self.revision = 0
+        self._tools: Dict[str, Dict] = {}
+        self._aliases: Dict[str, Set[str]] = {}
+        self._snapshot: Optional[Dict[str, List[Dict]]] = None
+        self._loaded = False
+        self._checked_at = 0.0
+        # Database reads run outside the lock; each one takes a sequence number
+        # and an entry is only replaced by a read that started after the one
+        # that stored it (tool id -> sequence, older entries implied by _floor)
+        self._sequence = itertools.count(1)
+        self._versions: Dict[str, int] = {}
+        self._floor = 0
+        self._lock = threading.RLock()
+        self._listener = NotifyListener(channel, self._on_notify, on_connect=self.reload)
+
+    def start(self):
+        self._listener.start()
+
+    def stop(self):
+        self._listener.stop()
+
+    def snapshot(self) -> Dict[str, List[Dict]]:
+        """Tools grouped by category, ordered by category and name."""
+        self._ensure_fresh()
+        with self._lock:
+            if self._snapshot is None:
+                result: Dict[str, List[Dict]] = {}
+                for tool in sorted(self._tools.values(), key=lambda t: (t['category'], t['name'])):
+                    result.setdefault(tool['category'], []).append(tool)
+                self._snapshot = result
+            return self._snapshot
+
+    def lookup(self, identifier: str) -> Optional[Dict]:
+        """
+        Tool record for an id, virtual path ("f_restore/Network/nmap.py") or file
+        name. A file name shared by tools of different categories resolves to
+        nothing. Returns a copy the caller may modify.
+        """
+        if not identifier:
+            return None
+        self._ensure_fresh()
+        with self._lock:
+            for candidate in alias_candidates(identifier):
+                tool_ids = self._aliases.get(candidate)
+                if tool_ids and len(tool_ids) == 1:
+                    return dict(self._tools[next(iter(tool_ids))])
+        return None
+
+    def _ensure_fresh(self):
+        self.start()
+        if not self._loaded:
+            self.reload()
+        elif not self._listener.listening:
+            self._catch_up()
+
+    def _put(self, tool: Dict):
+        self._remove(tool['id'])
+        self._tools[tool['id']] = tool
+        for alias in tool_aliases(tool['id']):
+            self._aliases.setdefault(alias, set()).add(tool['id'])
+
+    def _remove(self, tool_id: str):
+        if self._tools.pop(tool_id, None) is None:
+            return
+        for alias in tool_aliases(tool_id):
+            tool_ids = self._aliases.get(alias)
+            if tool_ids:
+                tool_ids.discard(tool_id)
+                if not tool_ids:
+                    del self._aliases[alias]
+
+    def _swap(self, sequence: int, tool_ids: List[str], rows: List[Dict], revision: int):
+        """Replace `tool_ids` by `rows` (read at `sequence`), keeping newer entries. Lock held."""
+        for tool_id in tool_ids:
+            if self._versions.get(tool_id, self._floor) < sequence:
+                self._remove(tool_id)
+                self._versions[tool_id] = sequence
+        for tool in rows:
+            if self._versions.get(tool['id'], self._floor) <= sequence:
+                self._put(tool)
+                self._versions[tool['id']] = sequence
+        self.revision = max(self.revision, revision)
+        self._snapshot = None
+
+    def reload(self):
+        """Full reload (first read and every listener (re)connect)."""
+        sequence = next(self._sequence)
+        # Revision first: a change racing the read is applied again afterwards
+        revision = database.get_catalogue_revision()
+        tools = database.get_all_tools()
+        with self._lock:
+            if sequence < self._floor:
+                return
+            newer = {tool_id: seq for tool_id, seq in self._versions.items() if seq > sequence}
+            kept = [self._tools[tool_id] for tool_id in newer if tool_id in self._tools]
+            self._tools, self._aliases = {}, {}
+            for tool in tools:
+                if tool['id'] not in newer:
+                    self._put(tool)
+            for tool in kept:
+                self._put(tool)
+            self._versions, self._floor = newer, sequence
+            self.revision = max(self.revision, revision)
+            self._snapshot = None
+            self._loaded = True
+            self._checked_at = time.monotonic()
+
+    def refresh(self, entity_type: str, entity_id: str, revision: int = 0):
+        """Reload one tool or one workspace's tools from the database."""
+        if not self._loaded:
+            return
+        sequence = next(self._sequence)
+        if entity_type == 'tool':
+            rows = database.get_all_tools(tool_id=entity_id)
+        elif entity_type == 'workspace':
+            rows = database.get_all_tools(category=entity_id)
+        else:
+            return
+        with self._lock:
+            if entity_type == 'tool':
+                stale = [entity_id]
+            else:
+                stale = [t for t, tool in self._tools.items() if tool['category'] == entity_id]
+            self._swap(sequence, stale, rows, revision)
+
+    def refresh_tools(self, tool_ids: List[str], revision: int = 0):
+        """Reload several tools with one query (bulk sync batches)."""
+        if not self._loaded or not tool_ids:
+            return
+        sequence = next(self._sequence)
+        rows = database.get_all_tools(tool_ids=list(tool_ids))
+        with self._lock:
+            self._swap(sequence, list(tool_ids), rows, revision)
+
+    def _on_notify(self, payload: str):
+        change = json.loads(payload)
+        if 'since' in change:
+            self._apply_changes(database.get_catalogue_changes(change['since'], limit=CATCH_UP_LIMIT + 1))
+        else:
+            self.refresh(change['entity_type'], change['entity_id'], change.get('revision', 0))
+
+    def _apply_changes(self, changes: List[Dict]):
+        if len(changes) > CATCH_UP_LIMIT:
+            self.reload()
+            return
+        tool_ids = [c['entity_id'] for c in changes if c['entity_type'] == 'tool']
+        self.refresh_tools(tool_ids, max((c['revision'] for c in changes), default=0))
+        for change in changes:
+            if change['entity_type'] != 'tool':
+                self.refresh(change['entity_type'], change['entity_id'], change['revision'])
+
+    def _catch_up(self):
+        """Apply the changes recorded since our revision (listener down)."""
+        now = time.monotonic()
+        if now - self._checked_at < settings.CATALOGUE_POLL_SECONDS:
+            return
+        self._checked_at = now
+        try:
+            self._apply_changes(database.get_catalogue_changes(self.revision, limit=CATCH_UP_LIMIT + 1))
+        except Exception:
+            logger.warning("Catalogue catch-up failed, serving cached tools", exc_info=True)
+
+
+catalogue_cache = CatalogueCache()
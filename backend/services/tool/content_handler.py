@@ -1,7 +1,11 @@
+import hashlib
 import json
+import logging
 import yaml
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 from core import database
+from core.yaml_cache import load_config, thaw
+from .catalogue_cache import catalogue_cache
 from core.logger import logger
 
 def is_docker_config_changed(new_config: Dict, existing_config: Optional[Dict]) -> bool:
@@ -41,7 +45,7 @@ def is_docker_config_changed(new_config: Dict, existing_config: Optional[Dict])
         new_pip != old_pip
     )
     
-    if changed:
+    if changed and logger.isEnabledFor(logging.DEBUG):
         logger.debug("Docker config changed", extra={"extra_fields": {
             "mode": f"{old_mode} -> {new_mode}",
             "base": f"{old_base} -> {new_base}",
@@ -99,8 +103,8 @@ def resolve_tool_id_from_path(path: str) -> Optional[str]:
     return None
 
 def get_tool_content(target_id: str, file_type: str = "py", path: str = None) -> str:
-    """Reads script or configuration content from DB."""
-    tool = database.get_tool(target_id)
+    """Reads script or configuration content from DB (through the catalogue cache)."""
+    tool = catalogue_cache.lookup(target_id) or database.get_tool(target_id)
     if not tool:
         raise ValueError(f"Tool '{target_id}' not found")
 
@@ -114,119 +118,229 @@ def get_tool_content(target_id: str, file_type: str = "py", path: str = None) ->
     
     raise ValueError(f"Invalid file type: {file_type}")
 
+def _is_yaml_path(path: Optional[str]) -> bool:
+    return bool(path) and (path.endswith('.yaml') or path.endswith('.yml'))
+
+def content_hash(content: str) -> str:
+    """Hash used by the bulk sync manifest (sha256 of the UTF-8 file content)."""
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+def _stub_tool(target_id: str, path: str) -> Dict:
+    """Tool row created when a synced file names a tool that does not exist yet."""
+    # We need path to extract category and name
+    if not path:
+         raise ValueError(f"Tool '{target_id}' not found and no path provided to create it.")
+         
+    parts = path.split('/')
+    if len(parts) < 2:
+         raise ValueError(f"Cannot infer category/name from path '{path}'")
+         
+    # Normalize category/id
+    category = parts[0]
+    # ID is usually parts[-1] without extension
+    raw_id = parts[-1].replace('.py', '').replace('.yaml', '').replace('.yml', '')
+    
+    # Determine tool name - Default to ID formatted nicely
+    # (we trust target_id, e.g. "Network/nmap_scan", as the tool id)
+    tool_name = raw_id.replace('_', ' ').title()
+    return {
+        "id": target_id, "name": tool_name, "category": category,
+        "script_code": get_default_script_template(tool_name), "arguments": [],
+        "description": "Auto-created via sync", "configuration": ""
+    }
+
+def _arguments_from_metadata(metadata: Dict) -> list:
+    args = []
+    if 'schema' in metadata and 'properties' in metadata['schema']:
+        for arg_name, arg_def in metadata['schema']['properties'].items():
+            args.append({
+                'name': arg_name,
+                'type': arg_def.get('type', 'string'),
+                'description': arg_def.get('description', ''),
+                'required': arg_name in metadata['schema'].get('required', []),
+                'default': arg_def.get('default', '')
+            })
+    
+    # Fallback para arguments (legacy)
+    if not args and 'arguments' in metadata:
+        args = thaw(metadata['arguments'])
+    return args
+
+def _apply_content(tool: Dict, content: str, path: str) -> bool:
+    """
+    Apply a synced .py or .yaml file to a tool row (in place).
+    Returns True if the content differs from what is stored.
+    """
+    if path and path.endswith('.py'):
+        changed = content != tool['script_code']
+        tool['script_code'] = content
+        return changed
+        
+    elif _is_yaml_path(path):
+        try:
+            metadata = load_config(content) or {}
+        except Exception as e:
+            raise ValueError(f"Invalid YAML format: {str(e)}")
+        
+        # Retornamos True se houver mudança no conteúdo (a CLI decide se builda).
+        changed = content != tool.get('configuration', "")
+        if changed:
+            tool['arguments'] = _arguments_from_metadata(metadata)
+            tool['name'] = metadata.get('name', tool['name'])
+            tool['description'] = metadata.get('description', tool.get('description', ""))
+            tool['configuration'] = content
+        return changed
+    else:
+        raise ValueError("Could not determine file type from path")
+
 def save_tool_content(target_id: str, content: str, path: str) -> bool:
     """Saves script or configuration content to DB. Returns True if content actually changed."""
     tool = database.get_tool(target_id)
     if not tool:
         # UPSERT LOGIC: Create tool if it doesn't exist
-        # We need path to extract category and name
-        if not path:
-             raise ValueError(f"Tool '{target_id}' not found and no path provided to create it.")
-             
-        parts = path.split('/')
-        if len(parts) < 2:
-             raise ValueError(f"Cannot infer category/name from path '{path}'")
-             
-        # Normalize category/id
-        category = parts[0]
-        # ID is usually parts[-1] without extension
-        raw_id = parts[-1].replace('.py', '').replace('.yaml', '').replace('.yml', '')
-        
-        # Make sure target_id matches what we inferred, or use target_id as source of truth if path is partial
-        # But we trust target_id (e.g. "Network/nmap_scan")
-        
-        # Determine tool name - Default to ID formatted nicely
-        tool_name = raw_id.replace('_', ' ').title()
-        full_id = target_id
-        
-        # Create stub tool
+        stub = _stub_tool(target_id, path)
         database.save_tool(
-            full_id, tool_name, category, 
-            get_default_script_template(tool_name), [], "Auto-created via sync", ""
+            stub['id'], stub['name'], stub['category'],
+            stub['script_code'], [], stub['description'], ""
         )
         tool = database.get_tool(target_id)
-        
-    category = tool['category']
-    full_id = tool['id']
     
-    if path and path.endswith('.py'):
-        changed = content != tool['script_code']
-        if changed:
-            database.save_tool(
-                full_id, tool['name'], category, 
-                content, tool['arguments'], tool.get('description', ""),
-                tool.get('configuration', "")
-            )
-        return changed
-        
-    elif path and (path.endswith('.yaml') or path.endswith('.yml')):
-        try:
-            metadata = yaml.safe_load(content) or {}
-            
-            # Detecção de mudanças granulares para YAML
-            existing_config = {}
-            if tool.get('configuration'):
-                try:
-                    existing_config = yaml.safe_load(tool['configuration']) or {}
-                except: pass
-            
-            # 1. Verificar se a configuração Docker mudou
-            docker_changed = is_docker_config_changed(
-                metadata.get('docker', {}), 
-                existing_config.get('docker', {})
-            )
-            
-            # 2. Verificar metadados gerais (apenas para persistência, mas docker_changed é o que manda pro build)
-            # No entanto, a CLI quer saber se "algo mudou que justifique build"
-            # Na verdade, a CLI quer saber se o arquivo mudou.
-            # Se mudou apenas a descrição, changed=True mas talvez não disparemos build?
-            # Melhor: changed=True se o conteúdo for diferente. 
-            # A CLI decidirá se builda baseado nisso por enquanto.
-            
-            content_changed = content != tool.get('configuration', "")
-            
-            if content_changed:
-                args = []
-                if 'schema' in metadata and 'properties' in metadata['schema']:
-                    for arg_name, arg_def in metadata['schema']['properties'].items():
-                        args.append({
-                            'name': arg_name,
-                            'type': arg_def.get('type', 'string'),
-                            'description': arg_def.get('description', ''),
-                            'required': arg_name in metadata['schema'].get('required', []),
-                            'default': arg_def.get('default', '')
-                        })
-                
-                # Fallback para arguments (legacy)
-                if not args and 'arguments' in metadata:
-                    args = metadata['arguments']
-
-                # Ensure workspace exists before saving tool (Upsert Category)
-                existing_ws = database.get_workspace(category)
-                if not existing_ws:
-                    database.save_workspace(category, "")
-                    
-                database.save_tool(
-                    full_id, metadata.get('name', tool['name']), category,
-                    tool['script_code'], args, metadata.get('description', tool.get('description', "")),
-                    content
-                )
+    changed = _apply_content(tool, content, path)
+    if changed:
+        if _is_yaml_path(path):
+            # Ensure workspace exists before saving tool (Upsert Category)
+            existing_ws = database.get_workspace(tool['category'])
+            if not existing_ws:
+                database.save_workspace(tool['category'], "")
             
-            # Retornamos True se houver mudança no conteúdo. 
-            # Mas podemos ser mais espertos e diferenciar mudança de build vs mudança de metadados.
-            # Por simplicidade da CLI hoje: retornamos True se mudou.
-            return content_changed
-        except Exception as e:
-            raise ValueError(f"Invalid YAML format or DB error: {str(e)}")
+        database.save_tool(
+            tool['id'], tool['name'], tool['category'],
+            tool['script_code'], tool['arguments'], tool.get('description', ""),
+            tool.get('configuration', "")
+        )
+    return changed
+
+def diff_sync_manifest(entries: List[Dict]) -> List[str]:
+    """
+    Paths of a bulk sync manifest ({path, hash} entries) whose content differs
+    from the catalogue. Answered from the in-memory catalogue, no DB round trip.
+    """
+    changed = []
+    for entry in entries:
+        path = entry['path']
+        tool = catalogue_cache.lookup(path)
+        if path.endswith('.py'):
+            stored = tool['script_code'] if tool else None
+        elif _is_yaml_path(path):
+            stored = (tool.get('configuration') or None) if tool else None
+        else:
+            stored = None
+        if stored is None or content_hash(stored) != entry['hash']:
+            changed.append(path)
+    return changed
+
+def save_tool_contents(files: List[Dict]) -> Dict:
+    """
+    Bulk sync: apply many .py/.yaml files ({path, content}) and write every
+    changed tool in one transaction. A bad file is reported in its result
+    without aborting the batch. Returns per-file results and the changed tool ids.
+    """
+    targets = [(f, _sync_tool_id(f['path'])) for f in files]
+    existing = {t['id']: t for t in database.get_all_tools(tool_ids=sorted({i for _, i in targets if i}))}
+    tools, dirty, results = {}, [], []
+    for file, tool_id in targets:
+        path = file['path']
+        try:
+            if not tool_id:
+                raise ValueError(f"Cannot infer tool id from path '{path}'")
+            tool = tools.get(tool_id)
+            if tool is None:
+                tool = dict(existing[tool_id]) if tool_id in existing else _stub_tool(tool_id, path)
+            changed = _apply_content(tool, file['content'], path) or tool_id not in existing
+        except ValueError as e:
+            results.append({"path": path, "tool_id": tool_id, "changed": False, "error": str(e)})
+            continue
+        tools[tool_id] = tool
+        if changed and tool_id not in dirty:
+            dirty.append(tool_id)
+        results.append({"path": path, "tool_id": tool_id, "changed": changed})
+    
+    if dirty:
+        database.save_tools_batch([tools[tool_id] for tool_id in dirty])
+        catalogue_cache.refresh_tools(dirty)
+    return {"results": results, "changed_tools": dirty}
+
+# Upper bound of changes per change-feed page
+FEED_MAX_LIMIT = 5000
+
+def _config_text(tool: Dict) -> str:
+    """YAML served for a tool (as in get_tool_content)."""
+    return tool.get('configuration') or generate_yaml_metadata(tool)
+
+def get_catalogue_feed(since: int = 0, limit: int = 500) -> Dict:
+    """
+    Change feed for delta pulls: tools changed after catalogue revision `since`,
+    with content hashes, read from the database so hashes match the revision.
+    since=0 (or a revision ahead of the server, e.g. a reset database) lists the
+    whole catalogue with full=True. Pages of `limit` changes: when has_more is
+    set, ask again with since=revision.
+    """
+    limit = max(1, min(limit, FEED_MAX_LIMIT))
+    changes, full = [], since <= 0
+    if not full:
+        changes = database.get_catalogue_changes(since, limit)
+        if not changes and since > database.get_catalogue_revision():
+            full = True
+    if full:
+        revision = database.get_catalogue_revision()
+        tools = database.get_all_tools()
+        changes = [{"revision": revision, "entity_type": "tool", "entity_id": t['id'], "op": "upsert"} for t in tools]
+        has_more = False
     else:
-        raise ValueError("Could not determine file type from path")
+        revision = changes[-1]['revision'] if changes else since
+        has_more = len(changes) == limit
+        tool_ids = [c['entity_id'] for c in changes if c['entity_type'] == 'tool' and c['op'] != 'delete']
+        tools = database.get_all_tools(tool_ids=tool_ids) if tool_ids else []
+    
+    rows = {t['id']: t for t in tools}
+    logo_hashes = database.get_logo_hashes('tool', [t['id'] for t in tools if t.get('has_logo')])
+    entries = []
+    for change in changes:
+        if change['entity_type'] != 'tool':
+            continue
+        tool = rows.get(change['entity_id'])
+        entry = {"id": change['entity_id'], "revision": change['revision'], "op": "upsert" if tool else "delete"}
+        if tool:
+            entry.update({
+                "name": tool['name'],
+                "category": tool['category'],
+                "script_hash": content_hash(tool['script_code'] or ""),
+                "config_hash": content_hash(_config_text(tool)),
+                "has_logo": bool(tool.get('has_logo')),
+                "logo_hash": logo_hashes.get(tool['id'])
+            })
+        entries.append(entry)
+    return {"revision": revision, "full": full, "has_more": has_more, "changes": entries}
+
+def export_tools(tool_ids: List[str]) -> List[Dict]:
+    """Script and YAML of several tools in one call (delta pull)."""
+    return [
+        {"id": t['id'], "name": t['name'], "category": t['category'],
+         "script_code": t['script_code'], "configuration": _config_text(t)}
+        for t in database.get_all_tools(tool_ids=list(tool_ids))
+    ]
+
+def _sync_tool_id(path: str) -> Optional[str]:
+    """Tool id of a synced file: catalogue alias index, else derived from the path."""
+    tool = catalogue_cache.lookup(path)
+    return tool['id'] if tool else resolve_tool_id_from_path(path)
 
 def generate_yaml_metadata(tool_data: Dict, existing_content: str = None) -> str:
     """Generate or update YAML metadata from tool data, preserving extra fields."""
     data = {}
     if existing_content:
         try:
-            data = yaml.safe_load(existing_content) or {}
+            data = thaw(load_config(existing_content)) or {}
         except Exception:
             data = {}
             
@@ -1,10 +1,10 @@
+import logging
 import os
-import yaml
 from typing import Dict, List, Any, Optional
 from datetime import datetime
-from functools import lru_cache
 
 from core import database
+from core.yaml_cache import load_config, thaw
 from core.logger import logger
 from config import settings
 
@@ -14,14 +14,20 @@ from .tool.content_handler import (
     resolve_tool_id_from_path,
     get_tool_content,
     save_tool_content as _save_tool_content_impl,
+    save_tool_contents,
+    diff_sync_manifest,
+    get_catalogue_feed,
+    export_tools,
     generate_yaml_metadata
 )
+from .tool.catalogue_cache import catalogue_cache
+from .logo_cache import logo_cache
 
 def save_tool_content(target_id: str, content: str, path: str) -> bool:
-    """Wrapper to save content and clear cache. Returns True if changed."""
+    """Wrapper to save content and refresh the catalogue. Returns True if changed."""
     changed = _save_tool_content_impl(target_id, content, path)
     if changed:
-        scan_tools.cache_clear()
+        catalogue_cache.refresh('tool', target_id)
     return changed
 
 TOOLS_BASE_DIR = settings.TOOLS_BASE_DIR
@@ -30,17 +36,20 @@ TOOLS_BASE_DIR = settings.TOOLS_BASE_DIR
 # SCANNER FUNCTIONALITY
 # ============================================================================
 
-@lru_cache(maxsize=1)
 def scan_tools() -> Dict[str, List[Dict]]:
-    """Scans tools from database ONLY."""
-    tools = database.get_all_tools()
-    result = {}
-    for tool in tools:
-        cat = tool['category']
-        if cat not in result:
-            result[cat] = []
-        result[cat].append(tool)
-    return result
+    """Tools from the database grouped by category, served from the catalogue cache."""
+    return catalogue_cache.snapshot()
+
+def find_tool(identifier: str) -> Optional[Dict]:
+    """Catalogue record for a tool id, virtual path or file name (alias index, no DB round trip)."""
+    return catalogue_cache.lookup(identifier)
+
+def resolve_tool_id(tool_id: Optional[str] = None, path: Optional[str] = None) -> Optional[str]:
+    """Canonical tool id for the content endpoints; unknown paths map to the id a save would create."""
+    tool = find_tool(tool_id or path)
+    if tool:
+        return tool['id']
+    return tool_id or resolve_tool_id_from_path(path)
 
 # ============================================================================
 # CATEGORY MANAGEMENT
@@ -59,13 +68,13 @@ def list_categories() -> List[Dict]:
             "tool_count": tool_count,
             "description": cat.get('description', ''),
             "is_visible": cat.get('is_visible', True),
-            "has_logo": database.get_logo('category', cat_name) is not None
+            "has_logo": logo_cache.has('category', cat_name)
         })
     return result
 
 def create_category(category_name: str, description: str = ""):
     database.save_workspace(category_name, description)
-    scan_tools.cache_clear()
+    catalogue_cache.refresh('workspace', category_name)
     return True
 
 def update_category(old_name: str, new_name: str = None, description: str = None, is_visible: bool = None):
@@ -82,13 +91,14 @@ def update_category(old_name: str, new_name: str = None, description: str = None
     final_name = new_name if new_name else old_name
 
     database.save_workspace(final_name, final_description, final_is_visible)
-    scan_tools.cache_clear()
+    catalogue_cache.refresh('workspace', final_name)
     return True
 
 def delete_category(name: str):
     database.delete_workspace(name)
     database.delete_logo('category', name)
-    scan_tools.cache_clear()
+    logo_cache.invalidate('category', name)
+    catalogue_cache.refresh('workspace', name)
     return True
 
 # ============================================================================
@@ -97,15 +107,30 @@ def delete_category(name: str):
 
 def save_category_logo(category_name: str, svg_content: str):
     database.save_logo('category', category_name, svg_content)
+    logo_cache.invalidate('category', category_name)
 
 def get_category_logo(category_name: str):
-    return database.get_logo('category', category_name)
+    logo = logo_cache.get('category', category_name)
+    return logo.text if logo else None
 
 def save_tool_logo(category_name: str, tool_name: str, svg_content: str):
     database.save_logo('tool', f"{category_name}/{tool_name}", svg_content)
+    logo_cache.invalidate('tool', f"{category_name}/{tool_name}")
+    catalogue_cache.refresh('tool', f"{category_name}/{tool_name}")
 
 def get_tool_logo(category_name: str, tool_name: str):
-    return database.get_logo('tool', f"{category_name}/{tool_name}")
+    logo = logo_cache.get('tool', f"{category_name}/{tool_name}")
+    return logo.text if logo else None
+
+def delete_tool_logo(category_name: str, tool_name: str):
+    database.delete_logo('tool', f"{category_name}/{tool_name}")
+    logo_cache.invalidate('tool', f"{category_name}/{tool_name}")
+    catalogue_cache.refresh('tool', f"{category_name}/{tool_name}")
+
+def get_workspace_logos(category_name: str):
+    """Workspace logo and every tool logo of the workspace, as one cached JSON asset."""
+    tools = scan_tools().get(category_name, [])
+    return logo_cache.workspace_bundle(category_name, tools)
 
 # ============================================================================
 # TOOL CRUD
@@ -119,27 +144,30 @@ def create_tool(category: str, tool_data: Dict) -> Dict:
     arguments = tool_data.get('arguments', [])
     description = tool_data.get('description', '')
     yaml_content = generate_yaml_metadata(tool_data)
-    logger.debug("Generating tool metadata", extra={"extra_fields": {"tool_name": tool_data['name'], "category": category}})
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Generating tool metadata", extra={"extra_fields": {"tool_name": tool_data['name'], "category": category}})
 
     database.save_tool(full_id, tool_data['name'], category, script_code, arguments, description, yaml_content)
     
     # Trigger Async Build
     build_result = None
     docker_config = tool_data.get('docker')
-    logger.debug("Initiating tool build check", extra={"extra_fields": {"tool_id": tool_id, "has_docker": bool(docker_config)}})
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Initiating tool build check", extra={"extra_fields": {"tool_id": tool_id, "has_docker": bool(docker_config)}})
     if docker_config:
         try:
             from services.docker_build_service import should_build_image, trigger_build_async
+            from services.docker.build_scheduler import PRIORITY_BACKGROUND
             if should_build_image(docker_config):
                 logger.info("Triggering async Docker build", extra={"extra_fields": {"tool_id": tool_id, "category": category}})
-                job_id = trigger_build_async(category, tool_id, docker_config)
-                build_result = {"status": "pending", "job_id": job_id, "message": "Build started in background"}
+                job_id = trigger_build_async(category, tool_id, docker_config, priority=PRIORITY_BACKGROUND)
+                build_result = {"status": "pending", "job_id": job_id, "message": "Build queued in background"}
             else:
                 logger.info("should_build_image returned False", extra={"extra_fields": {"tool_id": tool_id}})
         except Exception as e:
             logger.error("Error during Docker build", exc_info=True, extra={"extra_fields": {"tool_id": tool_id}})
     
-    scan_tools.cache_clear()
+    catalogue_cache.refresh('tool', full_id)
     
     return expand_tool_config({
         "id": tool_id,
@@ -159,11 +187,11 @@ def expand_tool_config(tool: Dict) -> Dict:
         return tool
         
     try:
-        config = yaml.safe_load(tool['configuration']) or {}
+        config = load_config(tool['configuration']) or {}
         if 'docker' in config:
-            tool['docker'] = config['docker']
+            tool['docker'] = thaw(config['docker'])
         if 'resources' in config:
-            tool['resources'] = config['resources']
+            tool['resources'] = thaw(config['resources'])
             
         # Ensure docker_mode is available for frontend
         if 'docker' in tool:
@@ -201,19 +229,20 @@ def update_tool(category: str, tool_id: str, tool_data: Dict) -> Dict:
         existing_docker = {}
         try:
             if existing.get('configuration'):
-                config = yaml.safe_load(existing['configuration']) or {}
+                config = load_config(existing['configuration']) or {}
                 existing_docker = config.get('docker', {})
         except: pass
         
         from .tool.content_handler import is_docker_config_changed
         docker_changed = is_docker_config_changed(docker_config, existing_docker)
     
-    logger.debug("Analyzing tool changes", extra={"extra_fields": {
-        "tool_id": tool_id,
-        "category": category,
-        "script_changed": script_changed,
-        "docker_changed": docker_changed
-    }})
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Analyzing tool changes", extra={"extra_fields": {
+            "tool_id": tool_id,
+            "category": category,
+            "script_changed": script_changed,
+            "docker_changed": docker_changed
+        }})
     
     yaml_content = generate_yaml_metadata({**existing, **tool_data}, existing.get('configuration') or "")
     database.save_tool(full_id, name, category, script_code, arguments, description, yaml_content)
@@ -224,13 +253,14 @@ def update_tool(category: str, tool_id: str, tool_data: Dict) -> Dict:
     if docker_config and (script_changed or docker_changed):
         try:
             from services.docker_build_service import should_build_image, trigger_build_async
+            from services.docker.build_scheduler import PRIORITY_BACKGROUND
             if should_build_image(docker_config):
                 logger.info("Triggering async Docker build on update", extra={"extra_fields": {
                     "tool_id": tool_id,
                     "reason": "script_changed" if script_changed else "docker_config_changed"
                 }})
-                job_id = trigger_build_async(category, tool_id, docker_config)
-                build_result = {"status": "pending", "job_id": job_id, "message": "Build started in background"}
+                job_id = trigger_build_async(category, tool_id, docker_config, priority=PRIORITY_BACKGROUND)
+                build_result = {"status": "pending", "job_id": job_id, "message": "Build queued in background"}
             else:
                 logger.debug("Skipping docker build", extra={"extra_fields": {
                     "tool_id": tool_id,
@@ -246,7 +276,7 @@ def update_tool(category: str, tool_id: str, tool_data: Dict) -> Dict:
             "has_docker_config": bool(docker_config)
         }})
             
-    scan_tools.cache_clear()
+    catalogue_cache.refresh('tool', full_id)
     result = database.get_tool(full_id)
     if build_result:
         result['build_result'] = build_result
@@ -256,5 +286,6 @@ def delete_tool(category: str, tool_id: str) -> bool:
     full_id = f"{category}/{tool_id}"
     database.delete_tool(full_id)
     database.delete_logo('tool', full_id)
-    scan_tools.cache_clear()
+    logo_cache.invalidate('tool', full_id)
+    catalogue_cache.refresh('tool', full_id)
     return True
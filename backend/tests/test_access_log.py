@@ -0,0 +1,81 @@
+import asyncio
+import json
+import logging
+import queue
+import unittest
+
+from api.middleware import AccessLogMiddleware
+from core.logger import ContextQueueHandler, JSONFormatter, request_id_ctx
+
+
+def make_app(status=200, seen=None):
+    async def app(scope, receive, send):
+        if seen is not None:
+            seen.append(request_id_ctx.get())
+        await send({"type": "http.response.start", "status": status, "headers": []})
+        await send({"type": "http.response.body", "body": b"{}"})
+    return app
+
+
+def call(middleware, path="/api/tools", headers=()):
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "method": "GET", "path": path, "client": ("10.0.0.1", 5000),
+             "headers": [(k.encode(), v.encode()) for k, v in headers]}
+    asyncio.run(middleware(scope, receive, send))
+    return dict(sent[0]["headers"])
+
+
+class TestAccessLogMiddleware(unittest.TestCase):
+    def test_request_id_is_propagated_and_logged(self):
+        seen = []
+        with self.assertLogs("security-platform", level="INFO") as logs:
+            headers = call(AccessLogMiddleware(make_app(seen=seen)), headers=[("X-Request-ID", "req-1")])
+            generated = {call(AccessLogMiddleware(make_app(seen=seen)))[b"x-request-id"] for _ in range(3)}
+        self.assertEqual(headers[b"x-request-id"], b"req-1")
+        self.assertEqual(seen[0], "req-1")
+        self.assertEqual(len(generated), 3)
+        fields = logs.records[0].extra_fields
+        self.assertEqual((fields["path"], fields["status"], fields["ip"]), ("/api/tools", 200, "10.0.0.1"))
+        self.assertIsNone(request_id_ctx.get())
+
+    def test_skipped_paths_and_sampling(self):
+        sampled_out = AccessLogMiddleware(make_app(), sample_rate=0, skip_paths=["/health"])
+        failing = AccessLogMiddleware(make_app(status=502), sample_rate=0, skip_paths=["/health"])
+        with self.assertLogs("security-platform", level="INFO") as logs:
+            call(sampled_out)
+            call(sampled_out, path="/health")
+            call(failing)
+            call(failing, path="/health")
+        self.assertEqual([r.extra_fields["status"] for r in logs.records], [502])
+        self.assertTrue(AccessLogMiddleware(make_app(), sample_rate=0, slow_ms=0)._should_log("/api/tools", 200, 5))
+
+
+class TestContextQueueHandler(unittest.TestCase):
+    def test_record_is_resolved_before_leaving_the_thread(self):
+        log_queue = queue.Queue(maxsize=1)
+        handler = ContextQueueHandler(log_queue)
+        token = request_id_ctx.set("req-9")
+        try:
+            raise ValueError("bad input")
+        except ValueError as exc:
+            record = logging.LogRecord("t", logging.ERROR, __file__, 1, "failed %s", ("tool",), (type(exc), exc, None))
+            handler.handle(record)
+        finally:
+            request_id_ctx.reset(token)
+        handler.handle(logging.LogRecord("t", logging.INFO, __file__, 1, "dropped", None, None))
+        self.assertEqual(handler.dropped, 1)
+
+        line = json.loads(JSONFormatter().format(log_queue.get_nowait()))
+        self.assertEqual((line["message"], line["request_id"]), ("failed tool", "req-9"))
+        self.assertIn("ValueError: bad input", line["exception"])
+
+
+if __name__ == '__main__':
+    unittest.main()
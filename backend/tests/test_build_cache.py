@@ -0,0 +1,54 @@
+import unittest
+
+from services.docker import build_cache
+
+KANIKO_LOG = """INFO[0000] Retrieving image manifest python:3.11-slim
+INFO[0001] Found sha256:1111 in local cache
+INFO[0002] Checking for cached layer registry/security-platform-cache:aaa...
+INFO[0002] Using caching version of cmd: RUN apt-get update && apt-get install -y nmap
+INFO[0002] Checking for cached layer registry/security-platform-cache:bbb...
+INFO[0003] No cached layer found for cmd RUN pip install --no-cache-dir requests
+INFO[0003] RUN apt-get update && apt-get install -y nmap
+INFO[0003] Found cached layer, extracting to filesystem
+INFO[0005] RUN pip install --no-cache-dir requests
+INFO[0005] Taking snapshot of full filesystem...
+INFO[0025] WORKDIR /app
+INFO[0026] Pushing image to registry/security-platform-tool-nmap:abc
+INFO[0030] Pushed registry/security-platform-tool-nmap@sha256:2222
+"""
+
+
+class TestKanikoCacheStats(unittest.TestCase):
+    def test_counts_hits_misses_and_time_saved(self):
+        stats = build_cache.KanikoCacheStats()
+        for line in KANIKO_LOG.splitlines():
+            stats.feed(line)
+
+        apt = "RUN apt-get update && apt-get install -y nmap"
+        summary = stats.finish({build_cache.step_key(apt): 62.0})
+        self.assertEqual(summary["cache_hits"], 1)
+        self.assertEqual(summary["cache_misses"], 1)
+        self.assertEqual(summary["base_image_hits"], 1)
+        # 62s uncached before, 2s to extract the cached layer now
+        self.assertEqual(summary["time_saved_seconds"], 60.0)
+
+        timings = stats.uncached_timings()
+        pip = "RUN pip install --no-cache-dir requests"
+        self.assertEqual(timings[build_cache.step_key(pip)]["seconds"], 20.0)
+        self.assertNotIn(build_cache.step_key(apt), timings)
+
+    def test_cache_args(self):
+        cache = build_cache.cache_settings({"build_cache_volume": "kaniko-cache"})
+        args = build_cache.kaniko_cache_args(cache, "registry:5000/security-platform-tool-nmap:abc")
+        self.assertIn("--cache=true", args)
+        self.assertIn("--cache-repo=registry:5000/security-platform-cache", args)
+        self.assertIn(f"--cache-dir={build_cache.CACHE_DIR}", args)
+        self.assertEqual(build_cache.kaniko_cache_args(build_cache.cache_settings({"build_cache_enabled": False}), "x"), [])
+
+    def test_base_images_skip_stage_aliases(self):
+        dockerfile = "FROM golang:1.22 as builder\nRUN go build\nFROM builder\nFROM alpine:3.19\n"
+        self.assertEqual(build_cache.base_images(dockerfile), ["golang:1.22", "alpine:3.19"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+import hashlib
+import io
+import tarfile
+import time
+import unittest
+from unittest import mock
+
+from services.docker import context_store as context_module
+from services.docker.context_store import BuildContextStore, build_context_archive, iter_chunks
+
+
+class FakeContextTable:
+    """build_contexts stand-in shared by every store of a test (one per backend process)."""
+
+    def __init__(self):
+        self.rows = {}
+
+    def save_build_context(self, job_id, sha256, data, ttl_seconds):
+        self.rows[job_id] = (data, sha256, time.monotonic() + ttl_seconds)
+
+    def get_build_context(self, job_id):
+        row = self.rows.get(job_id)
+        return (row[0], row[1]) if row and row[2] >= time.monotonic() else None
+
+    def delete_build_context(self, job_id):
+        self.rows.pop(job_id, None)
+
+
+class TestBuildContextStore(unittest.TestCase):
+    def setUp(self):
+        self.table = FakeContextTable()
+        patcher = mock.patch.object(context_module, 'database', self.table)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_archive_is_deterministic(self):
+        files = {"Dockerfile": b"FROM python:3.11-slim\n"}
+        first = build_context_archive(files)
+        time.sleep(0.01)
+        self.assertEqual(first, build_context_archive(dict(files)))
+        with tarfile.open(fileobj=io.BytesIO(first), mode="r:gz") as tar:
+            self.assertEqual(tar.extractfile("Dockerfile").read(), files["Dockerfile"])
+
+    def test_put_returns_content_hash(self):
+        store = BuildContextStore(max_entries=4, max_bytes=1024, ttl_seconds=60)
+        digest = store.put("job", b"data")
+        self.assertEqual(digest, hashlib.sha256(b"data").hexdigest())
+        self.assertEqual(store.get("job"), (b"data", digest))
+        self.assertEqual(b"".join(iter_chunks(b"x" * 10, chunk_size=3)), b"x" * 10)
+
+    def test_lru_eviction_by_entries_and_bytes(self):
+        store = BuildContextStore(max_entries=2, max_bytes=10, ttl_seconds=60)
+        store.put("a", b"1234")
+        store.put("b", b"1234")
+        store.get("a")
+        store.put("c", b"1234")
+        self.assertNotIn("b", store._entries)
+        self.assertIsNotNone(store.get("a"))
+        store.put("d", b"12345678")
+        self.assertLessEqual(store.stats()["bytes"], 10)
+        self.assertIsNotNone(store.get("d"))
+        # Evicted from memory only: still served from the shared table
+        self.assertEqual(store.get("b")[0], b"1234")
+
+    def test_context_is_served_by_any_process(self):
+        builder = BuildContextStore(max_entries=4, max_bytes=1024, ttl_seconds=60)
+        other_worker = BuildContextStore(max_entries=4, max_bytes=1024, ttl_seconds=60)
+        digest = builder.put("job", b"context")
+        self.assertEqual(other_worker.get("job"), (b"context", digest))
+        self.assertEqual(other_worker.stats(), {"entries": 1, "bytes": 7})
+
+        builder.discard("job")
+        self.assertNotIn("job", self.table.rows)
+        self.assertIsNone(BuildContextStore(max_entries=4, max_bytes=1024, ttl_seconds=60).get("job"))
+
+    def test_entries_expire(self):
+        store = BuildContextStore(max_entries=2, max_bytes=100, ttl_seconds=0)
+        store.put("a", b"1")
+        time.sleep(0.001)
+        self.assertIsNone(store.get("a"))
+        self.assertEqual(store.stats(), {"entries": 0, "bytes": 0})
+
+
+if __name__ == '__main__':
+    unittest.main()
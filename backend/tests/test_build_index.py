@@ -0,0 +1,125 @@
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from core import utils
+from services.docker import build_engine, build_index, image_builder
+from services.docker.image_builder import ImageBuilderService
+
+DOCKER_CONFIG = {"base_image": "python:3.11-slim", "pip_packages": ["requests"]}
+
+
+class TestBuildIndex(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.object(utils, 'get_docker_registry', return_value='registry.local:5000')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_identical_inputs_share_a_tag(self):
+        dockerfile = ImageBuilderService.generate_dockerfile('nmap_scan', DOCKER_CONFIG)
+        tag_a, hash_a = build_index.build_target('Network/nmap_scan', DOCKER_CONFIG, dockerfile)
+        tag_b, hash_b = build_index.build_target('Network/nmap_scan', dict(DOCKER_CONFIG), dockerfile)
+        self.assertEqual((tag_a, hash_a), (tag_b, hash_b))
+        self.assertEqual(tag_a, f"registry.local:5000/security-platform-tool-nmap-scan:{hash_a[:16]}")
+
+    def test_changed_inputs_change_the_hash(self):
+        dockerfile = ImageBuilderService.generate_dockerfile('nmap_scan', DOCKER_CONFIG)
+        changed = ImageBuilderService.generate_dockerfile('nmap_scan', {**DOCKER_CONFIG, "apt_packages": ["nmap"]})
+        base = build_index.compute_build_hash('Network/nmap_scan', dockerfile)
+        self.assertNotEqual(base, build_index.compute_build_hash('Network/nmap_scan', changed))
+        self.assertNotEqual(base, build_index.compute_build_hash('Web/nmap_scan', dockerfile))
+
+    def test_custom_image_name_is_kept(self):
+        config = {**DOCKER_CONFIG, "image": "acme/scanner:1.0"}
+        tag, _ = build_index.build_target('Network/scanner', config, 'FROM python:3.11-slim\n')
+        self.assertEqual(tag, "acme/scanner:1.0")
+
+    def reusable(self, recorded, image_tag, registry_config, in_registry=True):
+        with mock.patch.object(build_index.database, 'get_image_build', return_value=recorded), \
+                mock.patch.object(build_index.database, 'get_registry_config', return_value=registry_config), \
+                mock.patch.object(build_index, 'image_exists', return_value=in_registry) as exists:
+            return build_index.find_reusable_build('h', image_tag), exists
+
+    def test_reuse_requires_same_tag(self):
+        recorded = {'image_tag': 'old-registry/img:abc', 'digest': None}
+        self.assertIsNone(self.reusable(recorded, 'registry.local:5000/img:abc', None)[0])
+        self.assertIsNotNone(self.reusable(recorded, 'old-registry/img:abc', None)[0])
+
+    def test_reuse_matches_the_tag_published_to_an_external_registry(self):
+        digest = "sha256:" + "b" * 64
+        recorded = {'image_tag': 'acme/security-platform-tool-nmap:abc', 'digest': digest}
+        build, exists = self.reusable(recorded, 'registry.local:5000/security-platform-tool-nmap:abc',
+                                      {'type': 'dockerhub', 'namespace': 'acme'})
+        self.assertIs(build, recorded)
+        exists.assert_called_once_with('acme/security-platform-tool-nmap:abc', digest,
+                                       {'type': 'dockerhub', 'namespace': 'acme'})
+
+    def test_no_reuse_once_the_image_left_the_registry(self):
+        recorded = {'image_tag': 'registry.local:5000/img:abc', 'digest': None}
+        self.assertIsNone(self.reusable(recorded, 'registry.local:5000/img:abc', {'type': 'internal'}, False)[0])
+        # Images loaded into a local cluster have no registry to check
+        build, exists = self.reusable(recorded, 'registry.local:5000/img:abc', {'type': 'local'}, False)
+        self.assertIs(build, recorded)
+        exists.assert_not_called()
+
+    def test_image_exists_reads_the_manifest_through_the_push_address(self):
+        from services.docker import registry_adapter
+        client = mock.MagicMock()
+        client.get_manifest.return_value = None
+        with mock.patch.object(registry_adapter.settings, 'DOCKER_REGISTRY', 'registry:5000'), \
+                mock.patch.object(registry_adapter.settings, 'DOCKER_REGISTRY_PUSH', 'localhost:5000'), \
+                mock.patch.object(registry_adapter, 'registry_client', return_value=client) as make_client:
+            self.assertFalse(registry_adapter.image_exists('registry:5000/tool:abc', "sha256:" + "c" * 64))
+        make_client.assert_called_once_with('localhost:5000', None)
+        client.get_manifest.assert_called_once_with('tool', "sha256:" + "c" * 64)
+
+    def test_pin_image_digest(self):
+        digest = "sha256:" + "a" * 64
+        self.assertEqual(utils.pin_image_digest("registry.local:5000/tool:0123", digest),
+                         f"registry.local:5000/tool@{digest}")
+        self.assertEqual(utils.pin_image_digest("registry.local:5000/tool:0123", None),
+                         "registry.local:5000/tool:0123")
+
+
+class TestBuildEngineTags(unittest.TestCase):
+    def setUp(self):
+        for target, attr, value in [
+            (utils, 'get_docker_registry', mock.Mock(return_value='registry.local:5000')),
+            (build_engine, 'database', mock.MagicMock()),
+            (build_index, 'database', mock.MagicMock()),
+        ]:
+            patcher = mock.patch.object(target, attr, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        build_engine.database.get_tool.return_value = {'id': 'Network/nmap_scan'}
+
+    def test_local_build_uses_the_content_addressed_tag(self):
+        dockerfile = ImageBuilderService.generate_dockerfile('nmap_scan', DOCKER_CONFIG)
+        expected_tag, build_hash = build_index.build_target('Network/nmap_scan', DOCKER_CONFIG, dockerfile)
+        process = mock.Mock(stdout=iter(["ok\n"]), returncode=0)
+        push = mock.Mock(side_effect=lambda name, config, job_id, image_tag: {'status': 'success', 'image': image_tag})
+        with mock.patch.object(build_engine.platform_base, 'render_dockerfile', return_value=dockerfile), \
+                mock.patch.object(image_builder.subprocess, 'Popen', return_value=process) as popen, \
+                mock.patch.object(build_engine, 'push_image_to_registry', push):
+            build_engine.run_build_thread('job-1', 'Network', 'nmap_scan', DOCKER_CONFIG)
+
+        cmd = popen.call_args[0][0]
+        self.assertEqual(cmd[cmd.index("-t") + 1], expected_tag)
+        self.assertEqual(push.call_args.kwargs['image_tag'], expected_tag)
+        build_index.database.save_image_build.assert_called_once_with(build_hash, 'Network/nmap_scan', expected_tag, None)
+        build_engine.database.update_build_job.assert_called_with('job-1', "SUCCESS", image_tag=expected_tag)
+
+    def test_generated_tag_without_caller_tag(self):
+        process = mock.Mock(stdout=iter([]), returncode=0)
+        build_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, build_dir, True)
+        with mock.patch.object(image_builder.subprocess, 'Popen', return_value=process):
+            _, tag, _ = ImageBuilderService(build_dir=build_dir).build_tool_image(
+                'nmap_scan', DOCKER_CONFIG, 'job-2', dockerfile_content='FROM python:3.11-slim\n')
+        self.assertEqual(tag, "registry.local:5000/security-platform-tool-nmap-scan:latest")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import asyncio
+import unittest
+from unittest import mock
+
+from api.routes import settings as settings_routes
+from services.docker.build_events import build_events
+
+
+class FakeJob:
+    def __init__(self):
+        self.logs, self.status, self.reads = "", "RUNNING", []
+
+    def read_build_logs(self, job_id, offset=0, length=None):
+        self.reads.append(offset)
+        return {"status": self.status, "total": len(self.logs), "chunk": self.logs[offset:]}
+
+
+class TestBuildLogStream(unittest.TestCase):
+    def setUp(self):
+        self.job = FakeJob()
+        db = mock.MagicMock()
+        db.read_build_logs.side_effect = self.job.read_build_logs
+        for target, name, value in ((settings_routes, 'database', db), (build_events, 'start', mock.MagicMock()),
+                                    (build_events._listener, 'listening', True)):
+            patcher = mock.patch.object(target, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_streams_only_new_lines_on_notify(self):
+        async def scenario():
+            events = []
+            self.job.logs = "step 1\nstep 2 (partial"
+            stream = settings_routes.log_generator("job-1")
+            events.append(await stream.__anext__())
+
+            async def finish():
+                await asyncio.sleep(0.05)
+                self.job.logs += ")\ndone\n"
+                self.job.status = "SUCCESS"
+                build_events.publish("job-1")
+            asyncio.get_running_loop().create_task(finish())
+            async for event in stream:
+                events.append(event)
+            return events
+
+        events = asyncio.run(scenario())
+        self.assertEqual(events[0], "id: 7\ndata: step 1\n\n")
+        self.assertEqual(events[1], "id: 24\ndata: step 2 (partial)\n\n")
+        self.assertEqual(events[2], "id: 29\ndata: done\n\n")
+        self.assertEqual(events[-1], "event: close\ndata: closed\n\n")
+        # One read per change, each from the last delivered offset (no polling while idle)
+        self.assertEqual(self.job.reads, [0, 7])
+
+
+if __name__ == '__main__':
+    unittest.main()
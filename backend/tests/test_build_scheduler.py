@@ -0,0 +1,87 @@
+import threading
+import time
+import unittest
+from unittest import mock
+
+from services.docker import build_scheduler
+from services.docker.build_scheduler import BuildScheduler
+
+
+class FakeQueue:
+    """In-memory stand-in for the build_jobs queue functions."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.jobs = []
+
+    def enqueue_build_job(self, tool_id, category, docker_config, build_hash=None, priority=0):
+        with self.lock:
+            for job in self.jobs:
+                if job['status'] == 'PENDING' and job['tool_id'] == tool_id and job['build_hash'] == build_hash:
+                    job['priority'] = max(job['priority'], priority)
+                    return job['id'], True
+            job = {'id': f"job-{len(self.jobs)}", 'tool_id': tool_id, 'category': category,
+                   'docker_config': docker_config, 'build_hash': build_hash,
+                   'priority': priority, 'status': 'PENDING'}
+            self.jobs.append(job)
+            return job['id'], False
+
+    def claim_next_build_job(self, worker_id):
+        with self.lock:
+            pending = [j for j in self.jobs if j['status'] == 'PENDING']
+            if not pending:
+                return None
+            job = max(pending, key=lambda j: j['priority'])
+            job['status'] = 'RUNNING'
+            return dict(job)
+
+
+class TestBuildScheduler(unittest.TestCase):
+    def setUp(self):
+        self.queue = FakeQueue()
+        db = mock.MagicMock()
+        db.enqueue_build_job.side_effect = self.queue.enqueue_build_job
+        db.claim_next_build_job.side_effect = self.queue.claim_next_build_job
+        db.requeue_stale_build_jobs.return_value = 0
+        patcher = mock.patch.object(build_scheduler, 'database', db)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_duplicate_pending_builds_collapse(self):
+        scheduler = BuildScheduler(max_workers=1, poll_interval=0.05, heartbeat_interval=60, stale_after=90)
+        with mock.patch.object(scheduler, 'start'):
+            first = scheduler.submit('Network', 'nmap', {}, build_hash='abc', priority=0)
+            second = scheduler.submit('Network', 'nmap', {}, build_hash='abc', priority=10)
+            other = scheduler.submit('Network', 'nmap', {}, build_hash='def')
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, other)
+        self.assertEqual(self.queue.jobs[0]['priority'], 10)
+
+    def test_worker_pool_is_bounded(self):
+        scheduler = BuildScheduler(max_workers=2, poll_interval=0.05, heartbeat_interval=60, stale_after=90)
+        running, peak, done = [0], [0], []
+        lock = threading.Lock()
+
+        def fake_run(job):
+            with lock:
+                running[0] += 1
+                peak[0] = max(peak[0], running[0])
+            time.sleep(0.05)
+            with lock:
+                running[0] -= 1
+                done.append(job['id'])
+
+        with mock.patch.object(scheduler, '_run', side_effect=fake_run):
+            for index in range(6):
+                scheduler.submit('Web', f'tool{index}', {})
+            deadline = time.time() + 5
+            while len(done) < 6 and time.time() < deadline:
+                time.sleep(0.02)
+            scheduler.stop()
+
+        self.assertEqual(len(done), 6)
+        self.assertLessEqual(peak[0], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
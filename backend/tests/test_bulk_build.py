@@ -0,0 +1,83 @@
+import unittest
+from unittest import mock
+
+from services import docker_build_service
+from services.docker import bulk_build, platform_base
+from services.docker.bulk_build import BulkBuild
+
+BASE_ID = "_platform/base-python-3-11-slim"
+
+
+def tool(tool_id, **docker_config):
+    return {"tool_id": tool_id, "category": tool_id.split("/")[0], "tool_name": tool_id.split("/")[1],
+            "docker_config": docker_config}
+
+
+class FakeBuilds:
+    """Each submitted job succeeds after `ticks` status refreshes."""
+
+    def __init__(self, ticks=2):
+        self.ticks = ticks
+        self.jobs = {}
+        self.order = []
+        self.peak_tools = 0
+
+    def trigger_build_async(self, category, tool_name, docker_config, priority=10):
+        job_id = f"job-{len(self.jobs)}"
+        self.jobs[job_id] = {"tool_id": f"{category}/{tool_name}", "left": self.ticks}
+        self.order.append(f"{category}/{tool_name}")
+        running = sum(1 for j in self.jobs.values() if j["left"] > 0 and not j["tool_id"].startswith("_platform"))
+        self.peak_tools = max(self.peak_tools, running)
+        return job_id
+
+    def get_build_job_statuses(self, job_ids):
+        statuses = {}
+        for job_id in job_ids:
+            job = self.jobs[job_id]
+            job["left"] -= 1
+            statuses[job_id] = "SUCCESS" if job["left"] <= 0 else "RUNNING"
+        return statuses
+
+
+class TestBulkBuild(unittest.TestCase):
+    def setUp(self):
+        self.builds = FakeBuilds()
+        db = mock.MagicMock()
+        db.get_build_job_statuses.side_effect = self.builds.get_build_job_statuses
+        for target, name, value in ((bulk_build, 'database', db),
+                                    (docker_build_service, 'trigger_build_async', self.builds.trigger_build_async)):
+            patcher = mock.patch.object(target, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def plan(self):
+        base = {"base_image": "python:3.11-slim", "tool_id": BASE_ID,
+                "docker_config": platform_base.base_docker_config("python:3.11-slim", ["curl"], [])}
+        tools = [tool(f"Web/t{i}", apt_packages=["curl"]) for i in range(4)]
+        tools.append(tool("Recon/amass", image="owasp/amass:latest", apt_packages=["git"], platform_base=False))
+        with mock.patch.object(platform_base, 'plan_platform_bases', return_value=[base]):
+            return bulk_build.plan_bulk_build(tools)
+
+    def test_plan_links_tools_to_their_platform_base(self):
+        plan = self.plan()
+        self.assertEqual([b["tool_id"] for b in plan["bases"]], [BASE_ID])
+        depends = {t["tool_id"]: t["depends_on"] for t in plan["tools"]}
+        self.assertEqual(depends["Web/t0"], BASE_ID)
+        self.assertIsNone(depends["Recon/amass"])
+
+    def test_bases_first_then_bounded_parallel_tools(self):
+        bulk = BulkBuild(self.plan(), max_parallel=2, priority=10, poll_interval=0)
+        bulk.run()
+
+        self.assertEqual(self.builds.order[0], BASE_ID)
+        self.assertLessEqual(self.builds.peak_tools, 2)
+        base_done = next(e["seq"] for e in bulk.events if e.get("tool_id") == BASE_ID and e.get("status") == "SUCCESS")
+        for event in bulk.events:
+            if event["type"] == "job" and event["tool_id"].startswith("Web/"):
+                self.assertGreater(event["seq"], base_done)
+        self.assertEqual(bulk.events[-1], {"type": "done", "succeeded": 5, "failed": 0, "seq": len(bulk.events) - 1})
+        self.assertTrue(bulk.finished)
+
+
+if __name__ == '__main__':
+    unittest.main()
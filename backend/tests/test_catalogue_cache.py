@@ -0,0 +1,155 @@
+import json
+import threading
+import unittest
+from unittest import mock
+
+from services.tool import catalogue_cache as catalogue_module
+from services.tool.catalogue_cache import CatalogueCache
+
+
+class FakeCatalogue:
+    """In-memory stand-in for the tools table and catalogue_changes."""
+
+    def __init__(self):
+        self.tools, self.changes, self.queries = {}, [], []
+
+    def put(self, tool_id, name=None):
+        category = tool_id.split('/')[0]
+        self.tools[tool_id] = {"id": tool_id, "name": name or tool_id.split('/')[1], "category": category}
+        self.changes.append({"revision": len(self.changes) + 1, "entity_type": "tool", "entity_id": tool_id})
+
+    def get_all_tools(self, tool_id=None, category=None, tool_ids=None):
+        self.queries.append((tool_id, category) if tool_ids is None else tuple(tool_ids))
+        return [dict(t) for t in self.tools.values()
+                if (tool_id is None or t['id'] == tool_id) and (category is None or t['category'] == category)
+                and (tool_ids is None or t['id'] in tool_ids)]
+
+    def get_catalogue_revision(self):
+        return len(self.changes)
+
+    def get_catalogue_changes(self, since=0, limit=1000):
+        return [c for c in self.changes if c['revision'] > since][:limit]
+
+
+class TestCatalogueCache(unittest.TestCase):
+    def setUp(self):
+        self.db = FakeCatalogue()
+        self.db.put("Network/nmap")
+        self.db.put("Web/nikto")
+        patcher = mock.patch.object(catalogue_module, 'database', self.db)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.cache = CatalogueCache()
+        self.cache.start = mock.MagicMock()
+        self.cache._listener.listening = True
+
+    def test_reads_are_served_from_memory(self):
+        self.assertEqual(list(self.cache.snapshot()), ["Network", "Web"])
+        self.cache.snapshot()
+        self.assertEqual(self.db.queries, [(None, None)])
+        self.assertEqual(self.cache.revision, 2)
+
+    def test_notify_reloads_only_the_changed_entry(self):
+        self.cache.snapshot()
+        self.db.put("Network/masscan")
+        self.cache._on_notify(json.dumps({"revision": 3, "entity_type": "tool", "entity_id": "Network/masscan"}))
+        del self.db.tools["Web/nikto"]
+        self.cache._on_notify(json.dumps({"revision": 4, "entity_type": "tool", "entity_id": "Web/nikto", "op": "delete"}))
+
+        snapshot = self.cache.snapshot()
+        self.assertEqual([t['id'] for t in snapshot["Network"]], ["Network/masscan", "Network/nmap"])
+        self.assertNotIn("Web", snapshot)
+        self.assertEqual(self.db.queries[1:], [("Network/masscan", None), ("Web/nikto", None)])
+        self.assertEqual(self.cache.revision, 4)
+
+    def test_catches_up_from_change_table_without_listener(self):
+        self.cache.snapshot()
+        self.cache._listener.listening = False
+        self.cache._checked_at = 0
+        self.db.put("Web/nikto", name="Nikto 2")
+        with mock.patch.object(catalogue_module.settings, 'CATALOGUE_POLL_SECONDS', 0):
+            snapshot = self.cache.snapshot()
+        self.assertEqual(snapshot["Web"][0]['name'], "Nikto 2")
+        self.assertEqual(self.db.queries[1:], [("Web/nikto",)])
+
+    def test_batch_notify_reloads_changed_tools_in_one_query(self):
+        self.cache.snapshot()
+        self.db.put("Network/masscan")
+        self.db.put("Web/nikto", name="Nikto 2")
+        self.cache._on_notify(json.dumps({"revision": 4, "since": 2}))
+        self.assertEqual(self.db.queries[1:], [("Network/masscan", "Web/nikto")])
+        self.assertEqual(self.cache.lookup("masscan.py")['id'], "Network/masscan")
+        self.assertEqual(self.cache.revision, 4)
+
+    def test_queries_run_outside_the_lock_and_never_overwrite_newer_entries(self):
+        self.cache.snapshot()
+        read_tools = self.db.get_all_tools
+        lock_free = []
+
+        def slow_read(**kwargs):
+            # Rows read before a concurrent refresh stores a newer version
+            rows = read_tools(**kwargs)
+            def probe():
+                lock_free.append(self.cache._lock.acquire(blocking=False))
+                if lock_free[-1]:
+                    self.cache._lock.release()
+            thread = threading.Thread(target=probe)
+            thread.start()
+            thread.join()
+            self.db.get_all_tools = read_tools
+            self.db.put("Web/nikto", name="Nikto 2")
+            self.cache.refresh('tool', "Web/nikto", 3)
+            return rows
+
+        self.db.get_all_tools = slow_read
+        self.cache.refresh('tool', "Web/nikto", 2)
+        self.assertEqual(lock_free, [True])
+        self.assertEqual(self.cache.lookup("Web/nikto")['name'], "Nikto 2")
+        self.assertEqual(self.cache.revision, 3)
+
+    def test_lookup_resolves_aliases_from_memory(self):
+        self.db.put("Web/nmap")
+        for identifier in ("Network/nmap", "Network/nmap.py", "f_restore/Network/nmap.yaml", "nikto", "nikto.py"):
+            self.assertIsNotNone(self.cache.lookup(identifier), identifier)
+        self.assertEqual(self.cache.lookup("/scripts/Web/nikto.py")['id'], "Web/nikto")
+        self.assertIsNone(self.cache.lookup("nmap.py"))  # file name shared by two categories
+        self.assertIsNone(self.cache.lookup("Network/missing"))
+        self.assertEqual(self.db.queries, [(None, None)])
+
+    def test_refresh_updates_alias_index(self):
+        self.cache.snapshot()
+        del self.db.tools["Web/nikto"]
+        self.cache.refresh('tool', "Web/nikto")
+        self.assertIsNone(self.cache.lookup("nikto.py"))
+        self.db.put("Web/nmap")
+        self.cache.refresh('workspace', "Web")
+        self.assertIsNone(self.cache.lookup("nmap"))
+        self.assertEqual(self.cache.lookup("Web/nmap.py")['id'], "Web/nmap")
+
+    def test_resolver_reads_database_only_on_miss(self):
+        from services.execution import resolver
+        db = mock.MagicMock()
+        db.get_tool.return_value = {"id": "Network/masscan"}
+        with mock.patch.object(resolver, 'catalogue_cache', self.cache), mock.patch.object(resolver, 'database', db):
+            self.assertEqual(resolver.resolve_tool("Network/nmap.py")['id'], "Network/nmap")
+            db.get_tool.assert_not_called()
+            self.assertEqual(resolver.resolve_tool("scripts/Network/masscan.py")['id'], "Network/masscan")
+            db.get_tool.assert_called_once_with("Network/masscan")
+
+
+class TestRecordCatalogueChanges(unittest.TestCase):
+    def test_revision_bump_is_serialized_before_insert(self):
+        from core.repositories import catalogue_repo
+        cursor = mock.MagicMock()
+        def insert(cur, sql, rows, fetch=False):
+            cur.execute('INSERT')
+            return [(7,)]
+        with mock.patch.object(catalogue_repo.psycopg2.extras, 'execute_values', side_effect=insert):
+            self.assertEqual(catalogue_repo.record_catalogue_changes(cursor, 'tool', ["Web/nikto"]), 7)
+        statements = [c.args[0] for c in cursor.execute.call_args_list]
+        self.assertIn('pg_advisory_xact_lock', statements[0])
+        self.assertLess(statements.index('INSERT'), statements.index('SELECT pg_notify(%s, %s)'))
+
+
+if __name__ == '__main__':
+    unittest.main()
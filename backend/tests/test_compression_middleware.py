@@ -0,0 +1,71 @@
+import asyncio
+import gzip
+import json
+import unittest
+import zlib
+
+from api.middleware import CompressionMiddleware
+
+
+def app_sending(headers, chunks):
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200,
+                    "headers": [(k.encode(), v.encode()) for k, v in headers.items()]})
+        for i, chunk in enumerate(chunks):
+            await send({"type": "http.response.body", "body": chunk, "more_body": i < len(chunks) - 1})
+    return app
+
+
+def call(app, accept_encoding="gzip"):
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    headers = [(b"accept-encoding", accept_encoding.encode())] if accept_encoding else []
+    scope = {"type": "http", "method": "GET", "path": "/", "headers": headers}
+    asyncio.run(CompressionMiddleware(app, minimum_size=500)(scope, receive, send))
+    start, bodies = sent[0], sent[1:]
+    return {k.decode(): v.decode() for k, v in start["headers"]}, bodies
+
+
+class TestCompressionMiddleware(unittest.TestCase):
+    def test_large_json_is_compressed(self):
+        body = json.dumps([{"id": f"Web/tool_{i}"} for i in range(200)]).encode()
+        headers, bodies = call(app_sending({"content-type": "application/json",
+                                            "content-length": str(len(body))}, [body]))
+        self.assertEqual(headers["content-encoding"], "gzip")
+        self.assertEqual(headers["vary"], "Accept-Encoding")
+        self.assertEqual(int(headers["content-length"]), len(bodies[0]["body"]))
+        self.assertEqual(gzip.decompress(bodies[0]["body"]), body)
+
+    def test_small_unaccepted_or_encoded_bodies_pass_through(self):
+        small = b'{"status":"success"}'
+        cases = [
+            ({"content-type": "application/json"}, [small], "gzip"),
+            ({"content-type": "application/json"}, [small * 100], None),
+            ({"content-type": "image/svg+xml", "content-encoding": "gzip"}, [gzip.compress(small * 100)], "gzip"),
+            ({"content-type": "application/gzip"}, [small * 100], "gzip"),
+        ]
+        for response_headers, chunks, accept in cases:
+            headers, bodies = call(app_sending(response_headers, chunks), accept)
+            self.assertEqual(headers.get("content-encoding"), response_headers.get("content-encoding"))
+            self.assertEqual(bodies[0]["body"], chunks[0])
+
+    def test_ndjson_chunks_are_decodable_as_they_arrive(self):
+        lines = [json.dumps({"type": "stdout", "data": f"line {i}"}).encode() + b"\n" for i in range(5)]
+        headers, bodies = call(app_sending({"content-type": "application/x-ndjson"}, lines))
+        self.assertEqual(headers["content-encoding"], "gzip")
+        self.assertNotIn("content-length", headers)
+        decoder = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        for line, message in zip(lines, bodies):
+            self.assertEqual(decoder.decompress(message["body"]), line)
+        self.assertFalse(bodies[-1]["more_body"])
+        self.assertTrue(decoder.eof)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import unittest
+from datetime import datetime
+from types import SimpleNamespace
+from unittest import mock
+
+from services.execution import image_warmup
+
+
+def event(message, pod="nmap-abc123-xyz", node="node-1", uid="uid-1"):
+    return SimpleNamespace(
+        message=message,
+        involved_object=SimpleNamespace(name=pod),
+        source=SimpleNamespace(host=node),
+        metadata=SimpleNamespace(uid=uid, creation_timestamp=None),
+        last_timestamp=datetime(2024, 5, 1, 10, 0, 0),
+        event_time=None)
+
+
+class TestImageWarmup(unittest.TestCase):
+    def test_parse_go_duration(self):
+        self.assertEqual(image_warmup.parse_go_duration("1m2.5s"), 62.5)
+        self.assertEqual(image_warmup.parse_go_duration("850ms"), 0.85)
+        self.assertIsNone(image_warmup.parse_go_duration(""))
+
+    def test_parse_cold_and_warm_pull_events(self):
+        cold = image_warmup.parse_pull_event(event(
+            'Successfully pulled image "registry:5000/nmap@sha256:ab" in 1m4.2s (1m4.2s including waiting)'))
+        self.assertEqual(cold["image"], "registry:5000/nmap@sha256:ab")
+        self.assertEqual(cold["seconds"], 64.2)
+        self.assertFalse(cold["cached"])
+        self.assertEqual((cold["node"], cold["source"]), ("node-1", "execution"))
+
+        warm = image_warmup.parse_pull_event(event(
+            'Container image "registry:5000/nmap@sha256:ab" already present on machine',
+            pod=f"{image_warmup.PREPULLER_NAME}-x7k2p"))
+        self.assertTrue(warm["cached"])
+        self.assertEqual(warm["source"], "warmup")
+        self.assertIsNone(image_warmup.parse_pull_event(event('Pulling image "x"')))
+
+    def test_hot_images_first_then_recent_builds(self):
+        db = mock.MagicMock()
+        db.get_hot_tools.return_value = [{"tool_id": "Network/nmap", "runs": 40}]
+        db.get_tool.return_value = {"id": "Network/nmap", "name": "nmap", "configuration": ""}
+        db.list_current_image_builds.return_value = [
+            {"tool_id": "Web/nikto", "image_tag": "registry:5000/nikto:abc", "digest": "sha256:01",
+             "updated_at": datetime.utcnow().isoformat()},
+            {"tool_id": "_platform/base-python", "image_tag": "registry:5000/base:abc", "digest": None,
+             "updated_at": datetime.utcnow().isoformat()},
+            {"tool_id": "Web/old", "image_tag": "registry:5000/old:abc", "digest": None,
+             "updated_at": "2000-01-01T00:00:00"},
+        ]
+        with mock.patch.object(image_warmup, 'database', db), \
+             mock.patch('services.execution.resolver.get_tool_config_from_data', return_value={"image": "registry:5000/nmap@sha256:ff"}):
+            images = image_warmup.select_warm_images(max_images=5, window_days=7, recent_build_hours=24)
+        self.assertEqual([i["image"] for i in images], ["registry:5000/nmap@sha256:ff", "registry:5000/nikto@sha256:01"])
+        self.assertEqual([i["reason"] for i in images], ["hot", "recent_build"])
+
+    def test_daemonset_pulls_each_image_in_an_init_container(self):
+        ds = image_warmup.prepuller_daemonset("ns", ["a:1", "b:2"])
+        init = ds.spec.template.spec.init_containers
+        self.assertEqual([c.image for c in init[1:]], ["a:1", "b:2"])
+        self.assertTrue(all(c.command == ["/warmup/busybox", "true"] for c in init[1:]))
+        self.assertEqual(ds.metadata.annotations[image_warmup.IMAGES_ANNOTATION], image_warmup.images_fingerprint(["a:1", "b:2"]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+import datetime
+import decimal
+import importlib
+import json
+import os
+import unittest
+import uuid
+from unittest import mock
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel
+
+from api.responses import FastJSONResponse
+from core import json_codec
+from core.yaml_cache import freeze
+
+
+class Item(BaseModel):
+    name: str
+    tags: list
+
+
+def sample():
+    return {
+        "id": uuid.UUID("12345678-1234-5678-1234-567812345678"),
+        "started": datetime.datetime(2026, 1, 2, 3, 4, 5, 678),
+        "day": datetime.date(2026, 1, 2),
+        "cpu": decimal.Decimal("1.5"),
+        "count": decimal.Decimal("3"),
+        "labels": {"scan"},
+        "config": freeze({"docker": {"apt_packages": ["nmap"]}}),
+        "item": Item(name="nikto", tags=["web"]),
+        "text": "ação",
+    }
+
+
+class TestJsonCodec(unittest.TestCase):
+    def test_matches_jsonable_encoder(self):
+        self.assertEqual(json.loads(json_codec.dumps(sample())), jsonable_encoder(sample()))
+
+    def test_ndjson_line_and_str(self):
+        line = json_codec.ndjson_line({"type": "stdout", "data": "ok"})
+        self.assertTrue(line.endswith(b"\n") and b"\n" not in line[:-1])
+        self.assertEqual(json_codec.dumps_str({"a": 1}), '{"a":1}')
+
+    def test_response_renders_with_codec(self):
+        response = FastJSONResponse([{"id": "Web/nikto", "created_at": datetime.datetime(2026, 1, 1)}])
+        self.assertEqual(response.body, b'[{"id":"Web/nikto","created_at":"2026-01-01T00:00:00"}]')
+        self.assertEqual(response.headers["content-type"], "application/json")
+
+    def test_stdlib_fallback(self):
+        try:
+            with mock.patch.dict(os.environ, {"JSON_BACKEND": "stdlib"}):
+                codec = importlib.reload(json_codec)
+            self.assertEqual(codec.BACKEND, "stdlib")
+            self.assertEqual(json.loads(codec.dumps(sample())), jsonable_encoder(sample()))
+            self.assertEqual(codec.ndjson_line({"a": "é"}), '{"a":"é"}\n'.encode())
+        finally:
+            importlib.reload(json_codec)
+
+
+if __name__ == '__main__':
+    unittest.main()
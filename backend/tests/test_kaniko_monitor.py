@@ -0,0 +1,144 @@
+import asyncio
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from services.docker import kaniko_monitor
+from services.docker.kaniko_monitor import KanikoBuildHandler, KanikoBuildMonitor
+
+DIGEST = "sha256:" + "ab" * 32
+
+KANIKO_LOG = (
+    "2024-05-01T10:00:01.000000000Z INFO[0000] Retrieving image manifest python:3.11-slim\n"
+    "2024-05-01T10:00:02.000000000Z INFO[0001] \x1b[36mRUN pip install requests\x1b[0m\n"
+    "2024-05-01T10:00:09.000000000Z INFO[0008] Pushed registry:5000/security-platform-tool-nmap@" + DIGEST + "\n"
+)
+
+
+def pod(kaniko_state=None, init_state=None, phase="Running"):
+    def status(name, state):
+        return SimpleNamespace(name=name, state=SimpleNamespace(
+            running=state == "running" or None,
+            terminated=state if not isinstance(state, str) else None))
+    return SimpleNamespace(
+        metadata=SimpleNamespace(name="kaniko-build-1234-xyz", labels={"build-id": "job-1"}, resource_version="7"),
+        status=SimpleNamespace(
+            phase=phase,
+            init_container_statuses=[status("context-init", init_state)] if init_state else [],
+            container_statuses=[status("kaniko", kaniko_state)] if kaniko_state else []))
+
+
+class TestKanikoBuildHandler(unittest.TestCase):
+    def setUp(self):
+        self.db = mock.MagicMock()
+        self.db.get_build_step_timings.return_value = {}
+        for target, value in (('database', self.db), ('build_index', mock.MagicMock()), ('context_store', mock.MagicMock())):
+            patcher = mock.patch.object(kaniko_monitor, target, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.monitor = KanikoBuildMonitor(namespace="test", log_poll_interval=0.01, pod_start_timeout=60)
+        self.monitor.core_v1 = mock.MagicMock()
+        self.monitor.core_v1.read_namespaced_pod_log.return_value = KANIKO_LOG
+
+    def run_events(self, handler, *pods):
+        async def feed():
+            for p in pods:
+                await handler.on_pod(p)
+        asyncio.run(feed())
+
+    def logs(self):
+        return "".join(call.args[1] for call in self.db.append_build_logs.call_args_list)
+
+    def test_success_parses_digest_from_stream(self):
+        handler = KanikoBuildHandler(self.monitor, "job-1", "kaniko-build-job-1", "registry:5000/nmap:abc",
+                                     tool_id="Network/nmap", build_hash="h", image_tag="registry:5000/nmap:abc")
+        done = SimpleNamespace(exit_code=0, message="", reason="Completed")
+        self.run_events(handler, pod("running"), pod(done, phase="Succeeded"))
+
+        self.assertTrue(handler.future.result(timeout=1))
+        self.assertEqual(handler.digest, DIGEST)
+        kaniko_monitor.build_index.record_build.assert_called_once_with("Network/nmap", "h", "registry:5000/nmap:abc", DIGEST)
+        self.db.update_build_job.assert_called_once_with("job-1", "SUCCESS", image_tag="registry:5000/nmap:abc")
+        # Each log line is stored once, without ANSI codes, despite repeated reads
+        self.assertEqual(self.logs().count("RUN pip install requests\n"), 1)
+        self.assertNotIn("\x1b", self.logs())
+        kaniko_monitor.context_store.discard.assert_called_once_with("job-1")
+
+    def test_init_container_failure(self):
+        handler = KanikoBuildHandler(self.monitor, "job-1", "kaniko-build-job-1", "dest")
+        failed = SimpleNamespace(exit_code=1, message="", reason="Error")
+        self.monitor.core_v1.read_namespaced_pod_log.return_value = "sha256sum: WARNING: 1 computed checksum did NOT match"
+        self.run_events(handler, pod(init_state=failed, phase="Pending"))
+
+        self.assertFalse(handler.future.result(timeout=1))
+        self.db.update_build_job.assert_called_once_with("job-1", "FAILED")
+        self.assertIn("checksum did NOT match", self.logs())
+
+    def test_nonzero_exit_fails(self):
+        handler = KanikoBuildHandler(self.monitor, "job-1", "kaniko-build-job-1", "dest")
+        self.monitor.core_v1.read_namespaced_pod_log.return_value = ""
+        self.run_events(handler, pod(SimpleNamespace(exit_code=1, message="", reason="Error"), phase="Failed"))
+
+        self.assertFalse(handler.future.result(timeout=1))
+        self.db.update_build_job.assert_called_once_with("job-1", "FAILED")
+
+    def test_concurrent_events_start_one_poller(self):
+        handler = KanikoBuildHandler(self.monitor, "job-1", "kaniko-build-job-1", "dest")
+        done = SimpleNamespace(exit_code=0, message="", reason="Completed")
+
+        async def feed():
+            await asyncio.gather(handler.on_pod(pod("running")), handler.on_pod(pod("running")))
+            await asyncio.sleep(0.05)
+            await asyncio.gather(handler.on_pod(pod(done)), handler.on_pod(pod(done)))
+        asyncio.run(feed())
+
+        self.assertTrue(handler.future.result(timeout=1))
+        self.assertEqual(self.logs().count("Streaming logs"), 1)
+        self.assertEqual(self.logs().count("RUN pip install requests\n"), 1)
+        self.db.update_build_job.assert_called_once()
+
+    def test_log_reads_resume_after_last_line(self):
+        handler = KanikoBuildHandler(self.monitor, "job-1", "kaniko-build-job-1", "dest")
+        handler.pod_name = "kaniko-build-1234-xyz"
+        read = self.monitor.core_v1.read_namespaced_pod_log
+        read.return_value = "2024-05-01T10:00:01.25Z early\n2024-05-01T10:00:01.5Z first\n2024-05-01T10:00:01.5Z same\n"
+        asyncio.run(handler._fetch_new_logs())
+        self.assertNotIn("since_seconds", read.call_args.kwargs)
+
+        # The overlap is re-read; lines sharing the last timestamp are new only beyond those stored
+        read.return_value = ("2024-05-01T10:00:01.25Z early\n2024-05-01T10:00:01.5Z first\n2024-05-01T10:00:01.5Z same\n"
+                             "2024-05-01T10:00:01.5Z third\n2024-05-01T10:00:01.500000001Z second\n")
+        with mock.patch.object(kaniko_monitor.time, 'time', return_value=kaniko_monitor.timestamp_epoch("2024-05-01T10:00:31Z")):
+            asyncio.run(handler._fetch_new_logs())
+        self.assertEqual(read.call_args.kwargs["since_seconds"], 30 + kaniko_monitor.LOG_SINCE_MARGIN_SECONDS)
+        self.assertEqual(self.logs(), "[Kaniko] early\n[Kaniko] first\n[Kaniko] same\n[Kaniko] third\n[Kaniko] second\n")
+
+    def test_start_timeout_waits_for_running_init_containers(self):
+        self.monitor.pod_start_timeout = 0.05
+        handler = KanikoBuildHandler(self.monitor, "job-1", "kaniko-build-job-1", "dest")
+
+        async def feed():
+            handler.arm_timeout(self.monitor.pod_start_timeout)
+            await handler.on_pod(pod(init_state="running", phase="Pending"))
+            await asyncio.sleep(0.15)
+            self.assertFalse(handler.future.done())
+            handler._track_init_progress([])  # init containers gone, kaniko never starts
+            await asyncio.sleep(0.15)
+        asyncio.run(feed())
+
+        self.assertFalse(handler.future.result(timeout=1))
+        self.assertIn("Timeout waiting for builder pod", self.logs())
+
+    def test_registration_reads_a_pod_that_already_finished(self):
+        handler = KanikoBuildHandler(self.monitor, "job-1", "kaniko-build-job-1", "dest")
+        done = SimpleNamespace(exit_code=0, message="", reason="Completed")
+        self.monitor.core_v1.list_namespaced_pod.return_value = SimpleNamespace(items=[pod(done, phase="Succeeded")])
+        asyncio.run(self.monitor._sync_existing_pod(handler))
+
+        self.assertTrue(handler.future.result(timeout=1))
+        self.assertEqual(self.monitor.core_v1.list_namespaced_pod.call_args.kwargs["label_selector"],
+                         "job-type=kaniko-build,build-id=job-1")
+
+
+if __name__ == '__main__':
+    unittest.main()
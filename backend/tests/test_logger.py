@@ -0,0 +1,61 @@
+import json
+import logging
+import unittest
+from unittest import mock
+
+from core import logger as logger_module
+from core.logger import JSONFormatter, RateLimitFilter
+
+
+def make_record(msg="Tool saved", level=logging.INFO, created=1767225600.25, **extra):
+    record = logging.LogRecord("security-platform", level, "/app/services/tool_service.py", 42, msg, None, None)
+    record.created = created
+    record.__dict__.update(extra)
+    return record
+
+
+class TestJSONFormatter(unittest.TestCase):
+    def test_fields_and_timestamp(self):
+        line = JSONFormatter().format(make_record(extra_fields={"tool_id": "Web/nikto"}, request_id="req-1"))
+        self.assertEqual(json.loads(line), {
+            "timestamp": "2026-01-01T00:00:00.250000Z", "level": "INFO", "logger": "security-platform",
+            "module": "tool_service", "function": None, "line": 42, "message": "Tool saved",
+            "request_id": "req-1", "tool_id": "Web/nikto",
+        })
+
+    def test_record_is_encoded_once_for_all_handlers(self):
+        formatter = JSONFormatter()
+        record = make_record()
+        with mock.patch.object(logger_module, 'dumps_str', wraps=logger_module.dumps_str) as dumps:
+            lines = {formatter.format(record) for _ in range(2)}
+            JSONFormatter().format(record)
+        self.assertEqual(len(lines), 1)
+        self.assertEqual(dumps.call_count, 2)
+
+
+class TestRateLimitFilter(unittest.TestCase):
+    def test_repeated_records_are_limited_per_window(self):
+        limiter = RateLimitFilter(burst=3, window_seconds=10)
+        allowed = [limiter.filter(make_record(created=100 + i * 0.1)) for i in range(10)]
+        self.assertEqual(allowed, [True] * 3 + [False] * 7)
+
+        self.assertTrue(limiter.filter(make_record("Other message", created=101)))
+        self.assertTrue(limiter.filter(make_record(created=101, rate_limit=False)))
+
+        next_window = make_record(created=111)
+        self.assertTrue(limiter.filter(next_window))
+        self.assertEqual(json.loads(JSONFormatter().format(next_window))["suppressed"], 7)
+
+    def test_records_with_different_extra_fields_are_limited_separately(self):
+        limiter = RateLimitFilter(burst=1, window_seconds=10)
+        allowed = [limiter.filter(make_record(level=logging.ERROR, created=100, extra_fields={"job_id": job_id}))
+                   for job_id in ("a", "b", "a")]
+        self.assertEqual(allowed, [True, True, False])
+
+    def test_disabled_with_zero_burst(self):
+        limiter = RateLimitFilter(burst=0, window_seconds=10)
+        self.assertTrue(all(limiter.filter(make_record()) for _ in range(100)))
+
+
+if __name__ == '__main__':
+    unittest.main()
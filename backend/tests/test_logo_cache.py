@@ -0,0 +1,70 @@
+import gzip
+import json
+import unittest
+from unittest import mock
+
+from fastapi import Request
+
+from api.responses import cached_asset_response
+from core.compression import choose_encoding, gzip_bytes
+from services import logo_cache as logo_module
+from services.logo_cache import LogoCache
+
+SVG = '<svg xmlns="http://www.w3.org/2000/svg">' + '<rect width="1" height="1"/>' * 40 + '</svg>'
+
+
+def request(**headers):
+    return Request({"type": "http", "method": "GET", "path": "/",
+                    "headers": [(k.replace('_', '-').encode(), v.encode()) for k, v in headers.items()]})
+
+
+class TestLogoCache(unittest.TestCase):
+    def setUp(self):
+        self.db = mock.MagicMock()
+        self.db.get_logo_entry.side_effect = lambda entity_type, entity_id: (
+            {"svg_content": SVG, "content_hash": "h-" + entity_id, "svg_gzip": gzip_bytes(SVG.encode()), "svg_br": None}
+            if entity_id != "Web/missing" else None)
+        patcher = mock.patch.object(logo_module, 'database', self.db)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.cache = LogoCache(max_entries=8)
+        self.cache.start = mock.MagicMock()
+        self.cache._listener.listening = True
+
+    def test_serves_from_memory_until_notified(self):
+        for _ in range(3):
+            self.assertEqual(self.cache.get('tool', "Web/nikto").etag, "h-Web/nikto")
+            self.assertIsNone(self.cache.get('tool', "Web/missing"))
+        self.assertEqual(self.db.get_logo_entry.call_count, 2)
+        self.cache._on_notify(json.dumps({"entity_type": "tool", "entity_id": "Web/nikto"}))
+        self.cache.get('tool', "Web/nikto")
+        self.assertEqual(self.db.get_logo_entry.call_count, 3)
+
+    def test_read_racing_an_invalidation_is_not_stored(self):
+        def read_then_invalidate(entity_type, entity_id):
+            self.cache._on_notify(json.dumps({"entity_type": entity_type, "entity_id": entity_id}))
+            return {"svg_content": SVG, "content_hash": "stale"}
+        self.db.get_logo_entry.side_effect = read_then_invalidate
+        self.assertEqual(self.cache.get('tool', "Web/nikto").etag, "stale")
+        self.assertNotIn(('tool', "Web/nikto"), self.cache._entries)
+
+    def test_etag_and_encoding_negotiation(self):
+        logo = self.cache.get('tool', "Web/nikto")
+        response = cached_asset_response(request(accept_encoding="gzip, deflate"), logo)
+        self.assertEqual((response.headers['content-encoding'], response.headers['etag']), ("gzip", 'W/"h-Web/nikto"'))
+        self.assertEqual(gzip.decompress(response.body).decode(), SVG)
+        self.assertEqual(cached_asset_response(request(), logo).body, SVG.encode())
+        not_modified = cached_asset_response(request(if_none_match='"h-Web/nikto"'), logo)
+        self.assertEqual((not_modified.status_code, not_modified.body), (304, b""))
+        self.assertIsNone(choose_encoding("gzip;q=0, identity", logo.encodings))
+
+    def test_workspace_bundle(self):
+        tools = [{"id": "Web/nikto", "has_logo": True}, {"id": "Web/plain", "has_logo": False}]
+        bundle = self.cache.workspace_bundle("Web", tools)
+        self.assertEqual(json.loads(bundle.body), {"workspace": SVG, "tools": {"Web/nikto": SVG}})
+        self.assertIs(self.cache.workspace_bundle("Web", tools), bundle)
+        self.assertEqual(self.db.get_logo_entry.call_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import unittest
+from datetime import datetime, timedelta
+from unittest import mock
+
+from services.mcp import connection_registry as registry_module
+from services.mcp.connection_registry import ConnectionRegistry
+
+
+class TestConnectionRegistry(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.object(registry_module, 'mcp_repo')
+        self.repo = patcher.start()
+        self.repo.delete_stale_connections.return_value = 0
+        self.addCleanup(patcher.stop)
+        self.registry = ConnectionRegistry(flush_interval=30, stale_after=120)
+
+    def flushed_ids(self):
+        self.registry.flush()
+        return sorted(c['id'] for c in self.repo.upsert_connection_pings.call_args[0][0])
+
+    def test_pings_are_batched_into_one_upsert(self):
+        a = self.registry.register('mcp_a', 'client')
+        b = self.registry.register('mcp_a', 'client')
+        self.repo.record_connection.assert_called_with(b, 'mcp_a', 'client')
+        for _ in range(5):
+            self.registry.touch(a)
+            self.registry.touch(b)
+
+        self.assertEqual(self.flushed_ids(), sorted([a, b]))
+        self.repo.upsert_connection_pings.assert_called_once()
+        self.assertEqual(self.flushed_ids(), [])
+
+    def test_stale_sessions_are_dropped(self):
+        long_ago = (datetime.utcnow() - timedelta(seconds=600)).isoformat()
+        with mock.patch.object(registry_module, '_utcnow_iso', return_value=long_ago):
+            conn_id = self.registry.register('mcp_a', 'client')
+        self.registry.flush()
+
+        self.repo.remove_connections.assert_called_with([conn_id])
+        self.repo.delete_stale_connections.assert_called_once()
+        # Reaped: later heartbeats and unregister no longer reach the database
+        self.registry.touch(conn_id)
+        self.assertEqual(self.flushed_ids(), [])
+        self.registry.unregister(conn_id)
+        self.repo.remove_connection.assert_not_called()
+
+    def test_unregister_removes_row_once(self):
+        conn_id = self.registry.register('mcp_a', 'client')
+        self.registry.unregister(conn_id)
+        self.registry.unregister(conn_id)
+        self.repo.remove_connection.assert_called_once_with(conn_id)
+        self.registry.touch(conn_id)
+        self.assertEqual(self.flushed_ids(), [])
+
+
+class TestActiveConnections(unittest.TestCase):
+    def test_lists_connections_with_a_recent_heartbeat(self):
+        from api.routes import mcps
+        from core.repositories import mcp_repo
+        conn = mock.MagicMock()
+        cursor = conn.cursor.return_value
+        cursor.fetchall.return_value = [{'id': 'conn_a', 'mcp_id': 'mcp_a'}]
+        with mock.patch.object(mcp_repo, 'get_db_connection', return_value=conn), \
+                mock.patch.object(mcp_repo.settings, 'MCP_CONNECTION_STALE_SECONDS', 120):
+            result = mcps.get_mcp_connections('mcp_a')
+
+        self.assertEqual(result, {"live": 1, "connections": [{'id': 'conn_a', 'mcp_id': 'mcp_a'}]})
+        sql, (mcp_id, cutoff) = cursor.execute.call_args[0]
+        self.assertIn('last_ping >= %s', sql)
+        self.assertEqual(mcp_id, 'mcp_a')
+        expected = datetime.utcnow() - timedelta(seconds=120)
+        self.assertLess(abs(datetime.fromisoformat(cutoff) - expected), timedelta(seconds=5))
+        conn.close.assert_called_once()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import unittest
+
+from services.mcp.output_collector import ToolOutputCollector
+
+
+class TestToolOutputCollector(unittest.TestCase):
+    def test_small_output_is_returned_whole(self):
+        collector = ToolOutputCollector(max_result_chars=100, max_log_chars=100)
+        collector.feed({"type": "start", "id": "exec-1"})
+        collector.feed({"type": "stderr", "data": "line 1\n"})
+        collector.feed({"type": "exit", "code": 0})
+        collector.feed({"type": "stdout", "data": '{"ok": true}'})
+
+        content = collector.to_mcp_content()
+        self.assertEqual(content, [{"type": "text", "text": '{"ok": true}'}])
+        self.assertFalse(collector.result_truncated)
+
+    def test_result_is_truncated_with_resource_uri(self):
+        collector = ToolOutputCollector(max_result_chars=10, max_log_chars=100)
+        collector.feed({"type": "start", "id": "exec-2"})
+        collector.feed({"type": "stdout", "data": "a" * 8})
+        collector.feed({"type": "stdout", "data": "b" * 8})
+
+        self.assertTrue(collector.result_truncated)
+        self.assertEqual(collector.result_text(), "a" * 8 + "b" * 2)
+        text = collector.to_mcp_content()[0]["text"]
+        self.assertIn("showing 10 of 16 characters", text)
+        self.assertIn("execution://exec-2/result", text)
+
+    def test_logs_keep_only_the_tail(self):
+        collector = ToolOutputCollector(max_result_chars=10, max_log_chars=10)
+        collector.feed({"type": "start", "id": "exec-3"})
+        for i in range(5):
+            collector.feed({"type": "stderr", "data": f"{i}abcd"})
+        collector.feed({"type": "exit", "code": 1})
+
+        self.assertEqual(collector.logs_text(), "3abcd4abcd")
+        self.assertEqual(collector.logs_total, 25)
+        content = collector.to_mcp_content()
+        self.assertEqual(len(content), 1)
+        self.assertIn("last 10 of 25 characters", content[0]["text"])
+        self.assertTrue(content[0]["text"].endswith("3abcd4abcd"))
+
+    def test_oversized_log_chunk_is_trimmed(self):
+        collector = ToolOutputCollector(max_result_chars=10, max_log_chars=4)
+        collector.feed({"type": "stderr", "data": "xy"})
+        collector.feed({"type": "stderr", "data": "0123456789"})
+        self.assertEqual(collector.logs_text(), "6789")
+
+    def test_logs_hidden_on_success(self):
+        collector = ToolOutputCollector(max_result_chars=10, max_log_chars=10)
+        collector.feed({"type": "stderr", "data": "noise"})
+        collector.feed({"type": "exit", "code": 0})
+        self.assertEqual(collector.to_mcp_content(), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
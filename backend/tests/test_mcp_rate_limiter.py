@@ -0,0 +1,145 @@
+import asyncio
+import unittest
+from unittest import mock
+
+from core.repositories import rate_limit_repo
+from services.mcp import rate_limiter
+from services.mcp.rate_limiter import RateLimitExceeded
+
+LIMITS = {"requests_per_minute": 60, "burst": 2, "max_concurrent": 1,
+          "tools": {"Web/nuclei": {"requests_per_minute": 6, "max_concurrent": 0}, "Web/empty": {}}}
+
+
+class FakeQuotaStore:
+    """Connection stand-in running the statements of rate_limit_repo on dicts, with a settable clock."""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.buckets, self.leases = {}, {}
+        self.result, self.rowcount = None, 0
+
+    def cursor(self):
+        return self
+
+    def execute(self, sql, params=()):
+        sql = " ".join(sql.split())
+        if sql.startswith('SELECT EXTRACT'):
+            self.result = (self.now,)
+        elif sql.startswith('DELETE FROM mcp_execution_leases WHERE mcp_id'):
+            self.leases = {k: v for k, v in self.leases.items() if v['expires_at'] >= params[1]}
+        elif sql.startswith('SELECT COUNT(*)'):
+            self.result = (sum(1 for v in self.leases.values()
+                               if v['mcp_id'] == params[0] and (len(params) == 1 or v['tool_id'] == params[1])),)
+        elif sql.startswith('SELECT tokens'):
+            self.result = self.buckets.get(params[0])
+        elif sql.startswith('INSERT INTO mcp_rate_buckets'):
+            self.buckets[params[0]] = (params[1], params[2])
+        elif sql.startswith('INSERT INTO mcp_execution_leases'):
+            self.leases[params[0]] = {'mcp_id': params[1], 'tool_id': params[2], 'expires_at': params[4]}
+        elif sql.startswith('UPDATE mcp_execution_leases'):
+            lease = self.leases.get(params[1])
+            self.rowcount = 1 if lease else 0
+            if lease:
+                lease['expires_at'] = self.now + params[0]
+        elif sql.startswith('DELETE FROM mcp_execution_leases WHERE id'):
+            self.leases.pop(params[0], None)
+
+    def fetchone(self):
+        return self.result
+
+    def commit(self):
+        pass
+
+    rollback = close = commit
+
+
+class TestLimitPlan(unittest.TestCase):
+    def test_normalize_drops_invalid_and_empty_limits(self):
+        self.assertEqual(rate_limiter.normalize_limits(None), {})
+        self.assertEqual(rate_limiter.normalize_limits({"requests_per_minute": 0, "burst": "10"}), {})
+        self.assertEqual(rate_limiter.normalize_limits(LIMITS), {
+            "requests_per_minute": 60, "burst": 2, "max_concurrent": 1,
+            "tools": {"Web/nuclei": {"requests_per_minute": 6}}})
+
+    def test_plan_has_mcp_and_tool_scopes(self):
+        buckets, concurrency = rate_limiter.build_plan("mcp_a", rate_limiter.normalize_limits(LIMITS), "Web/nuclei")
+        self.assertEqual(buckets, [("mcp", "mcp_a", 1.0, 2.0), ("tool:Web/nuclei", "mcp_a:Web/nuclei", 0.1, 6.0)])
+        self.assertEqual(concurrency, [("mcp", None, 1)])
+        self.assertEqual(rate_limiter.build_plan("mcp_a", {"max_concurrent": 3}, "Web/x"), ([], [("mcp", None, 3)]))
+
+
+class TestAcquireRelease(unittest.TestCase):
+    def setUp(self):
+        self.store = FakeQuotaStore()
+        for target, attr, value in ((rate_limit_repo, 'get_db_connection', lambda: self.store),
+                                    (rate_limiter.settings, 'MCP_LEASE_TTL_SECONDS', 300),
+                                    (rate_limiter.settings, 'MCP_CONCURRENCY_RETRY_SECONDS', 5)):
+            patcher = mock.patch.object(target, attr, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def call(self, limits, tool_id="Web/x"):
+        async def run():
+            lease_id = await rate_limiter.acquire("mcp_a", limits, tool_id)
+            await rate_limiter.release(lease_id)
+            return lease_id
+        return asyncio.run(run())
+
+    def test_bucket_refills_over_time(self):
+        limits = {"requests_per_minute": 60, "burst": 2}
+        self.assertIsNone(self.call(limits))
+        self.call(limits)
+        with self.assertRaises(RateLimitExceeded) as ctx:
+            self.call(limits)
+        self.assertEqual((ctx.exception.limit, ctx.exception.retry_after), ("requests_per_minute", 1.0))
+
+        self.store.now += 0.5
+        with self.assertRaises(RateLimitExceeded) as ctx:
+            self.call(limits)
+        self.assertAlmostEqual(ctx.exception.retry_after, 0.5)
+        self.store.now += 0.5
+        self.call(limits)
+
+    def test_concurrency_quota_exhausted(self):
+        async def run():
+            lease_id = await rate_limiter.acquire("mcp_a", {"max_concurrent": 1}, "Web/x")
+            with self.assertRaises(RateLimitExceeded) as ctx:
+                await rate_limiter.acquire("mcp_a", {"max_concurrent": 1}, "Web/y")
+            self.assertEqual(ctx.exception.to_error_data(), {'retryAfter': 5.0, 'scope': 'mcp', 'limit': 'max_concurrent'})
+            await rate_limiter.release(lease_id)
+            await rate_limiter.release(await rate_limiter.acquire("mcp_a", {"max_concurrent": 1}, "Web/y"))
+        asyncio.run(run())
+        self.assertEqual(self.store.leases, {})
+
+    def test_lease_is_renewed_while_the_execution_runs(self):
+        async def run():
+            with mock.patch.object(rate_limiter.settings, 'MCP_LEASE_TTL_SECONDS', 0.03):
+                lease_id = await rate_limiter.acquire("mcp_a", {"max_concurrent": 1}, "Web/x")
+                self.store.now += 10  # far past the initial expiry
+                await asyncio.sleep(0.05)
+                self.assertGreater(self.store.leases[lease_id]['expires_at'], self.store.now)
+                await rate_limiter.release(lease_id)
+            self.assertEqual(rate_limiter._renewals, {})
+        asyncio.run(run())
+
+    def test_lease_released_when_the_execution_fails(self):
+        from services import mcp_server
+        tool = {'id': 'Web/x', 'configuration': None, 'arguments': []}
+        config = {'name': 'A', 'tool_ids': ['Web/x'], 'env_vars': [], 'rate_limits': {"max_concurrent": 1}}
+
+        async def failing_execution(*args, **kwargs):
+            self.assertEqual(len(self.store.leases), 1)
+            raise RuntimeError("pod evicted")
+            yield
+
+        with mock.patch.object(mcp_server.mcp_manager, 'get_mcp_server', return_value=config), \
+                mock.patch.object(mcp_server.MCPServer, 'get_tool_by_id', return_value=tool), \
+                mock.patch.object(mcp_server.execution_service, 'execute_tool_events', failing_execution):
+            server = mcp_server.MCPServer('mcp_a')
+            with self.assertRaises(ValueError):
+                asyncio.run(server.handle_tools_call({'name': 'Web/x', 'arguments': {}}))
+        self.assertEqual(self.store.leases, {})
+
+
+if __name__ == '__main__':
+    unittest.main()
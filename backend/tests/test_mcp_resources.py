@@ -0,0 +1,61 @@
+import unittest
+
+from services.mcp import resources
+
+
+class TestExecutionResourceUris(unittest.TestCase):
+    def test_parse_plain_uri(self):
+        ref = resources.parse_uri("execution://abc-123/result")
+        self.assertEqual(ref['execution_id'], "abc-123")
+        self.assertEqual(ref['field'], "result")
+        self.assertEqual(ref['offset'], 0)
+        self.assertIsNone(ref['length'])
+        self.assertIsNone(ref['pointer'])
+
+    def test_round_trip_with_paging_and_pointer(self):
+        uri = resources.build_uri("abc", "result", offset=100, length=50, pointer="/Results/0")
+        ref = resources.parse_uri(uri)
+        self.assertEqual((ref['offset'], ref['length'], ref['pointer']), (100, 50, "/Results/0"))
+
+    def test_rejects_unknown_scheme_or_field(self):
+        for uri in ("file:///etc/passwd", "execution://abc/arguments", "execution:///result", ""):
+            with self.assertRaises(ValueError):
+                resources.parse_uri(uri)
+
+    def test_rejects_negative_offsets(self):
+        with self.assertRaises(ValueError):
+            resources.parse_uri("execution://abc/logs?offset=-1")
+
+
+class TestJsonPointerSelection(unittest.TestCase):
+    document = '{"Results": [{"Target": "img", "Vulnerabilities": [{"id": "CVE-1"}]}], "a/b": {"~x": 1}}'
+
+    def test_select_nested_section(self):
+        section = resources.select_section(self.document, "/Results/0/Vulnerabilities/0/id")
+        self.assertEqual(section, "CVE-1")
+
+    def test_escaped_tokens(self):
+        self.assertEqual(resources.select_section(self.document, "/a~1b/~0x"), "1")
+
+    def test_root_and_empty_member(self):
+        self.assertEqual(resources.resolve_pointer({"": 1, "a": 2}, ""), {"": 1, "a": 2})
+        self.assertEqual(resources.resolve_pointer({"": 1, "a": 2}, "/"), 1)
+        with self.assertRaises(ValueError):
+            resources.select_section(self.document, "/")
+
+    def test_mime_type_of_result_preview(self):
+        self.assertEqual(resources.guess_mime_type('result', '{'), "application/json")
+        self.assertEqual(resources.guess_mime_type('result', 'S'), "text/plain")
+        self.assertEqual(resources.guess_mime_type('logs', '{'), "text/plain")
+
+    def test_missing_section(self):
+        with self.assertRaises(ValueError):
+            resources.select_section(self.document, "/Results/5")
+
+    def test_non_json_result(self):
+        with self.assertRaises(ValueError):
+            resources.select_section("plain text output", "/x")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+import unittest
+from unittest import mock
+
+from services.mcp.schema_validator import (
+    ArgumentValidationError, get_tool_validator, get_validator, validate_arguments
+)
+
+SCHEMA = {
+    'type': 'object',
+    'properties': {
+        'target': {'type': 'string', 'minLength': 1},
+        'port': {'type': 'integer', 'minimum': 1, 'maximum': 65535},
+        'mode': {'type': 'string', 'enum': ['fast', 'full']},
+        'flags': {'type': 'array', 'items': {'type': 'string'}},
+        'env': {'type': 'object', 'additionalProperties': {'type': 'string'}},
+    },
+    'required': ['target'],
+}
+
+
+class TestSchemaValidator(unittest.TestCase):
+    def test_valid_arguments(self):
+        validator = get_validator(SCHEMA)
+        self.assertEqual(validator.errors({'target': 'a.com', 'port': 443, 'flags': ['-v']}), [])
+        self.assertEqual(validator.errors({'target': 'a.com', 'port': 80.0}), [])
+
+    def test_reports_each_violation(self):
+        errors = get_validator(SCHEMA).errors({
+            'port': True, 'mode': 'slow', 'flags': ['-v', 3], 'env': {'A': 1}
+        })
+        self.assertIn('arguments.target: is required', errors)
+        self.assertIn('arguments.port: expected integer, got bool', errors)
+        self.assertTrue(any(e.startswith('arguments.mode:') for e in errors))
+        self.assertIn('arguments.flags[1]: expected string, got int', errors)
+        self.assertIn('arguments.env.A: expected string, got int', errors)
+
+    def test_bounds(self):
+        errors = get_validator(SCHEMA).errors({'target': '', 'port': 70000})
+        self.assertEqual(len(errors), 2)
+
+    def test_validator_is_cached_by_content(self):
+        clone = {'required': ['target'], 'properties': dict(SCHEMA['properties']), 'type': 'object'}
+        self.assertIs(get_validator(SCHEMA), get_validator(clone))
+
+    def test_tool_validator_builds_schema_once_per_configuration(self):
+        build = mock.Mock(return_value=SCHEMA)
+        first = get_tool_validator('Web/cache_test', "name: scan\n", build)
+        self.assertIs(get_tool_validator('Web/cache_test', "name: scan\n", build), first)
+        build.assert_called_once()
+        self.assertIsNot(get_tool_validator('Web/cache_test', "name: scan v2\n", build), first)
+        self.assertEqual(build.call_count, 2)
+
+    def test_tool_validator_is_scoped_to_the_mcp_env_vars(self):
+        from services import mcp_server
+        configs = {
+            'mcp-a': {'name': 'A', 'tool_ids': ['Web/scoped'], 'env_vars': [{'name': 'API_KEY', 'required': True}]},
+            'mcp-b': {'name': 'B', 'tool_ids': ['Web/scoped'], 'env_vars': []},
+        }
+        tool = {'id': 'Web/scoped', 'configuration': "name: scoped\n",
+                'arguments': [{'name': 'target', 'type': 'str', 'required': True}]}
+        arguments = {'target': 'x', 'env': {}}
+        with mock.patch.object(mcp_server.mcp_manager, 'get_mcp_server', side_effect=configs.get):
+            server_a, server_b = mcp_server.MCPServer('mcp-a'), mcp_server.MCPServer('mcp-b')
+            self.assertIsNot(server_a.get_argument_validator(tool), server_b.get_argument_validator(tool))
+            self.assertEqual(server_a.get_argument_validator(tool).errors(arguments), ['arguments.env.API_KEY: is required'])
+            self.assertEqual(server_b.get_argument_validator(tool).errors(arguments), [])
+
+            configs['mcp-b']['env_vars'] = [{'name': 'TOKEN', 'required': True}]
+            edited = mcp_server.MCPServer('mcp-b')
+            self.assertEqual(edited.get_argument_validator(tool).errors(arguments), ['arguments.env.TOKEN: is required'])
+
+    def test_validate_arguments_raises_value_error(self):
+        with self.assertRaises(ValueError) as ctx:
+            validate_arguments('Web/scan', get_validator(SCHEMA), 'not-an-object')
+        self.assertIsInstance(ctx.exception, ArgumentValidationError)
+        self.assertEqual(ctx.exception.errors, ['arguments: expected object, got str'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,156 @@
+import hashlib
+import io
+import json
+import os
+import tarfile
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from services.docker import oci_registry
+from services.docker.oci_registry import Blob, RegistryClient
+
+
+class FakeRegistry:
+    """In-process stand-in for a registry with bearer token auth."""
+
+    def __init__(self):
+        self.blobs, self.manifests = {}, {}
+        self.token_requests = 0
+        self.uploads = 0
+        self.lock = threading.Lock()
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def reply(self, status, body=b"", headers=None):
+                self.send_response(status)
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                if self.command != "HEAD":
+                    self.wfile.write(body)
+
+            def authorized(self):
+                if self.headers.get("Authorization") == "Bearer good-token":
+                    return True
+                realm = f"http://127.0.0.1:{registry.port}/token"
+                self.reply(401, headers={"WWW-Authenticate": f'Bearer realm="{realm}",service="fake"'})
+                return False
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                if url.path == "/token":
+                    with registry.lock:
+                        registry.token_requests += 1
+                    return self.reply(200, json.dumps({"token": "good-token", "expires_in": 300}).encode())
+                if not self.authorized():
+                    return
+                if "/manifests/" in url.path:
+                    entry = registry.manifests.get(url.path)
+                    if not entry:
+                        return self.reply(404)
+                    return self.reply(200, entry, {"Docker-Content-Digest": "sha256:" + hashlib.sha256(entry).hexdigest()})
+                self.reply(404)
+
+            def do_HEAD(self):
+                if not self.authorized():
+                    return
+                digest = self.path.rsplit("/", 1)[-1]
+                if digest in registry.blobs:
+                    return self.reply(200, headers={"Content-Length": str(len(registry.blobs[digest]))})
+                self.reply(404)
+
+            def do_POST(self):
+                if not self.authorized():
+                    return
+                self.reply(202, headers={"Location": "/v2/uploads/session"})
+
+            def do_PUT(self):
+                if not self.authorized():
+                    return
+                body = self.rfile.read(int(self.headers["Content-Length"]))
+                url = urlparse(self.path)
+                if "/manifests/" in url.path:
+                    registry.manifests[url.path] = body
+                    return self.reply(201, headers={"Docker-Content-Digest": "sha256:" + hashlib.sha256(body).hexdigest()})
+                digest = parse_qs(url.query)["digest"][0]
+                if "sha256:" + hashlib.sha256(body).hexdigest() != digest:
+                    return self.reply(400)
+                with registry.lock:
+                    registry.blobs[digest] = body
+                    registry.uploads += 1
+                self.reply(201)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.port = self.server.server_address[1]
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def blob(content: bytes, media_type=oci_registry.OCI_LAYER) -> Blob:
+    return Blob("sha256:" + hashlib.sha256(content).hexdigest(), len(content), media_type, data=content)
+
+
+class TestRegistryClient(unittest.TestCase):
+    def setUp(self):
+        oci_registry.token_cache.clear()
+        self.registry = FakeRegistry()
+        self.addCleanup(self.registry.close)
+        self.client = RegistryClient(f"127.0.0.1:{self.registry.port}", insecure=True, max_workers=4)
+
+    def test_push_skips_existing_blobs_and_caches_token(self):
+        config = blob(b'{"architecture":"amd64"}', oci_registry.OCI_CONFIG)
+        layers = [blob(f"layer-{i}".encode() * 1000) for i in range(6)]
+
+        digest, stats = self.client.push_image("tools/nmap", "v1", config, layers)
+        self.assertEqual((stats["uploaded"], stats["skipped"]), (7, 0))
+
+        # Only one layer changed: the rest are skipped after a HEAD
+        layers[0] = blob(b"changed layer")
+        _, stats = self.client.push_image("tools/nmap", "v2", config, layers)
+        self.assertEqual((stats["uploaded"], stats["skipped"]), (1, 6))
+        self.assertEqual(self.registry.token_requests, 1)
+
+        manifest, manifest_digest = self.client.get_manifest("tools/nmap", "v1")
+        self.assertEqual(manifest_digest, digest)
+        self.assertEqual(manifest["config"]["digest"], config.digest)
+        self.assertEqual([layer["digest"] for layer in manifest["layers"]][1:], [layer.digest for layer in layers[1:]])
+        self.assertIsNone(self.client.get_manifest("tools/nmap", "missing"))
+
+    def test_load_saved_image(self):
+        with tempfile.TemporaryDirectory() as workdir:
+            config = b'{"rootfs":{"type":"layers"}}'
+            config_name = hashlib.sha256(config).hexdigest() + ".json"
+            layer = io.BytesIO()
+            with tarfile.open(fileobj=layer, mode="w") as layer_tar:
+                info = tarfile.TarInfo("app/tool.py")
+                info.size = 5
+                layer_tar.addfile(info, io.BytesIO(b"print"))
+            archive_path = os.path.join(workdir, "image.tar")
+            with tarfile.open(archive_path, "w") as archive:
+                for name, data in ((config_name, config), ("abc/layer.tar", layer.getvalue()),
+                                   ("manifest.json", json.dumps([{"Config": config_name, "Layers": ["abc/layer.tar"]}]).encode())):
+                    info = tarfile.TarInfo(name)
+                    info.size = len(data)
+                    archive.addfile(info, io.BytesIO(data))
+
+            config_blob, layers = oci_registry.load_saved_image(archive_path, os.path.join(workdir, "out"))
+            self.assertEqual(config_blob.digest, "sha256:" + config_name[:-5])
+            self.assertEqual(layers[0].digest, "sha256:" + hashlib.sha256(layer.getvalue()).hexdigest())
+            self.assertEqual(layers[0].media_type, oci_registry.OCI_LAYER)
+
+            _, stats = self.client.push_image("tools/saved", "v1", config_blob, layers)
+            self.assertEqual(stats["uploaded"], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
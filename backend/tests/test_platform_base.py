@@ -0,0 +1,44 @@
+import unittest
+
+from services.docker import platform_base
+from services.docker.image_builder import ImageBuilderService
+
+
+def config(apt=(), pip=(), **extra):
+    return {"base_image": "python:3.11-slim", "apt_packages": list(apt), "pip_packages": list(pip), **extra}
+
+
+class TestPlatformBase(unittest.TestCase):
+    def test_shared_packages_need_min_tools(self):
+        configs = [
+            ("Web/a", config(apt=["git", "curl"], pip=["requests"])),
+            ("Web/b", config(apt=["curl", "git", "nmap"], pip=["requests"])),
+            ("Web/c", config(apt=["git"], pip=["requests", "lxml"])),
+            ("Web/d", config(apt=["git"], platform_base=False)),
+            ("Web/e", {"image": "alpine:3.19"}),
+        ]
+        shared = platform_base.compute_shared_packages(configs, min_tools=3)
+        self.assertEqual(shared["python:3.11-slim"]["apt_packages"], ["git"])
+        self.assertEqual(shared["python:3.11-slim"]["pip_packages"], ["requests"])
+        self.assertEqual(shared["python:3.11-slim"]["tool_count"], 3)
+
+    def test_tool_dockerfile_installs_only_sorted_extras(self):
+        base = {"base_image": "python:3.11-slim", "image": "reg/base@sha256:abc",
+                "apt_packages": ["git"], "pip_packages": ["requests"]}
+        dockerfile = ImageBuilderService.generate_dockerfile(
+            "scan", config(apt=["nmap", "git", "curl"], pip=["requests", "lxml"]), platform_base=base)
+        self.assertTrue(dockerfile.startswith("FROM reg/base@sha256:abc as builder"))
+        self.assertIn("    curl \\\n    nmap \\\n", dockerfile)
+        self.assertNotIn("git", dockerfile)
+        self.assertIn("RUN pip install --no-cache-dir lxml\n", dockerfile)
+
+    def test_other_base_images_are_not_rebased(self):
+        base = {"base_image": "python:3.11-slim", "image": "reg/base@sha256:abc", "apt_packages": ["git"]}
+        dockerfile = ImageBuilderService.generate_dockerfile(
+            "scan", {"base_image": "debian:12", "apt_packages": ["git"]}, platform_base=base)
+        self.assertTrue(dockerfile.startswith("FROM debian:12 as builder"))
+        self.assertIn("git", dockerfile)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+import unittest
+from unittest import mock
+
+from services.tool import content_handler
+from services.tool.content_handler import content_hash
+
+SCRIPT = "print('nmap')\n"
+CONFIG = "name: Nmap\nschema:\n  properties:\n    target: {type: string}\n  required: [target]\n"
+
+
+class TestToolSync(unittest.TestCase):
+    def setUp(self):
+        self.tool = {"id": "Network/nmap", "name": "nmap", "category": "Network", "script_code": SCRIPT,
+                     "arguments": [], "description": "", "configuration": CONFIG}
+        self.cache = mock.MagicMock()
+        self.cache.lookup.side_effect = lambda path: dict(self.tool) if path.startswith("Network/nmap") else None
+        self.db = mock.MagicMock()
+        self.db.get_all_tools.return_value = [dict(self.tool)]
+        for name, value in (('catalogue_cache', self.cache), ('database', self.db)):
+            patcher = mock.patch.object(content_handler, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_manifest_lists_only_differing_files(self):
+        changed = content_handler.diff_sync_manifest([
+            {"path": "Network/nmap.py", "hash": content_hash(SCRIPT)},
+            {"path": "Network/nmap.yaml", "hash": content_hash("name: Other\n")},
+            {"path": "Web/nikto.py", "hash": content_hash("x")},
+        ])
+        self.assertEqual(changed, ["Network/nmap.yaml", "Web/nikto.py"])
+        self.db.assert_not_called()
+
+    def test_batch_writes_changed_tools_in_one_transaction(self):
+        result = content_handler.save_tool_contents([
+            {"path": "Network/nmap.py", "content": SCRIPT},
+            {"path": "Network/nmap.yaml", "content": CONFIG.replace("Nmap", "Nmap 7")},
+            {"path": "Web/nikto.py", "content": "print('nikto')\n"},
+            {"path": "Web/broken.yaml", "content": "a: [unclosed"},
+        ])
+        self.assertEqual(result['changed_tools'], ["Network/nmap", "Web/nikto"])
+        self.assertEqual([r['changed'] for r in result['results']], [False, True, True, False])
+        self.assertIn("Invalid YAML", result['results'][3]['error'])
+
+        self.db.save_tools_batch.assert_called_once()
+        saved = {t['id']: t for t in self.db.save_tools_batch.call_args[0][0]}
+        self.assertEqual(saved["Network/nmap"]['name'], "Nmap 7")
+        self.assertEqual(saved["Network/nmap"]['arguments'][0]['name'], "target")
+        self.assertEqual((saved["Web/nikto"]['category'], saved["Web/nikto"]['script_code']), ("Web", "print('nikto')\n"))
+        self.cache.refresh_tools.assert_called_once_with(["Network/nmap", "Web/nikto"])
+        self.db.save_tool.assert_not_called()
+
+    def test_unchanged_batch_writes_nothing(self):
+        result = content_handler.save_tool_contents([{"path": "Network/nmap.py", "content": SCRIPT}])
+        self.assertEqual(result['changed_tools'], [])
+        self.db.save_tools_batch.assert_not_called()
+        self.cache.refresh_tools.assert_not_called()
+
+
+    def test_feed_lists_changes_with_hashes(self):
+        self.db.get_catalogue_changes.return_value = [
+            {"revision": 7, "entity_type": "tool", "entity_id": "Network/nmap", "op": "upsert"},
+            {"revision": 8, "entity_type": "workspace", "entity_id": "Web", "op": "upsert"},
+            {"revision": 9, "entity_type": "tool", "entity_id": "Web/nikto", "op": "upsert"},
+        ]
+        self.db.get_all_tools.return_value = [dict(self.tool, has_logo=True)]
+        self.db.get_logo_hashes.return_value = {"Network/nmap": "abc"}
+
+        feed = content_handler.get_catalogue_feed(since=6)
+        self.db.get_all_tools.assert_called_once_with(tool_ids=["Network/nmap", "Web/nikto"])
+        self.assertEqual((feed['revision'], feed['full'], feed['has_more']), (9, False, False))
+        nmap, nikto = feed['changes']
+        self.assertEqual((nmap['script_hash'], nmap['config_hash'], nmap['logo_hash']),
+                         (content_hash(SCRIPT), content_hash(CONFIG), "abc"))
+        self.assertEqual(nikto, {"id": "Web/nikto", "revision": 9, "op": "delete"})
+
+    def test_feed_without_changes_is_empty(self):
+        self.db.get_catalogue_changes.return_value = []
+        self.db.get_catalogue_revision.return_value = 9
+        feed = content_handler.get_catalogue_feed(since=9)
+        self.assertEqual(feed, {"revision": 9, "full": False, "has_more": False, "changes": []})
+        self.db.get_all_tools.assert_not_called()
+
+    def test_feed_ahead_of_server_returns_full_listing(self):
+        self.db.get_catalogue_changes.return_value = []
+        self.db.get_catalogue_revision.return_value = 3
+        feed = content_handler.get_catalogue_feed(since=40)
+        self.assertTrue(feed['full'])
+        self.assertEqual([c['id'] for c in feed['changes']], ["Network/nmap"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+import copy
+import json
+import unittest
+
+from core.yaml_cache import ParsedConfigCache, thaw
+
+CONFIG = """
+name: Nmap
+docker:
+  docker_mode: custom
+  apt_packages: [nmap]
+schema:
+  properties:
+    target: {type: string}
+"""
+
+
+class TestParsedConfigCache(unittest.TestCase):
+    def test_parses_once_per_text(self):
+        cache = ParsedConfigCache(max_entries=2)
+        first = cache.load(CONFIG)
+        self.assertIs(cache.load(CONFIG), first)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+        cache.load("a: 1")
+        cache.load("b: 2")
+        self.assertIsNot(cache.load(CONFIG), first)  # evicted (LRU of 2)
+
+    def test_cached_values_are_frozen(self):
+        config = ParsedConfigCache(max_entries=4).load(CONFIG)
+        with self.assertRaises(TypeError):
+            config['docker']['docker_mode'] = 'auto'
+        with self.assertRaises(TypeError):
+            config['docker']['apt_packages'].append('curl')
+        self.assertEqual(config['docker']['apt_packages'], ['nmap'])
+        self.assertEqual(json.loads(json.dumps(config))['schema'], {"properties": {"target": {"type": "string"}}})
+
+    def test_thaw_returns_mutable_copy(self):
+        config = ParsedConfigCache(max_entries=4).load(CONFIG)
+        for mutable in (thaw(config), copy.deepcopy(config)):
+            mutable['docker']['apt_packages'].append('curl')
+            self.assertIs(type(mutable['docker']), dict)
+        self.assertEqual(config['docker']['apt_packages'], ['nmap'])
+
+    def test_parse_errors_are_not_cached(self):
+        cache = ParsedConfigCache(max_entries=4)
+        for _ in range(2):
+            with self.assertRaises(Exception):
+                cache.load("a: [unclosed")
+        self.assertEqual(cache.misses, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
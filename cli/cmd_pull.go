@@ -19,7 +19,11 @@ var pullCmd = &cobra.Command{
 recreates the directory structure and .py files locally. 
 
 This is useful for recreating your local 'f' folder from the database or
-setting up a new development environment.`,
+setting up a new development environment.
+
+Pulls are incremental: the catalogue revision is stored in
+.contextworks-pull.json inside the directory and later pulls download only
+the tools changed since then (delete that file to force a full pull).`,
 	Example: `  # Pull scripts to current directory
   contextworks pull
 
@@ -1,6 +1,8 @@
 package main
 
 import (
+	"crypto/sha256"
+	"encoding/hex"
 	"encoding/json"
 	"fmt"
 	"io/ioutil"
@@ -44,6 +46,28 @@ type YAMLMetadata struct {
 	Arguments   []ToolArgument `yaml:"arguments"`
 }
 
+// SyncFile is one local .py/.yaml file sent in a bulk sync batch
+type SyncFile struct {
+	Path    string `json:"path"`
+	Content string `json:"content"`
+}
+
+// SyncManifestEntry identifies a local file by its sha256 for the sync manifest
+type SyncManifestEntry struct {
+	Path string `json:"path"`
+	Hash string `json:"hash"`
+}
+
+type SyncBatchResponse struct {
+	Results []struct {
+		Path    string `json:"path"`
+		ToolID  string `json:"tool_id"`
+		Changed bool   `json:"changed"`
+		Error   string `json:"error"`
+	} `json:"results"`
+	ChangedTools []string `json:"changed_tools"`
+}
+
 type ToolRequest struct {
 	Name         string         `json:"name"`
 	Description  string         `json:"description,omitempty"`
@@ -139,6 +163,11 @@ func syncScripts(baseDir string, baseURL string, token string, prune bool, build
     var toolsToBuild []ToolID
 
     // 1. SYNC UPSTREAM (Add/Update)
+    // Local files are validated and hashed; the server compares the manifest
+    // with its catalogue and only the files that differ are uploaded, in one batch.
+    var localFiles []SyncFile
+    var manifest []SyncManifestEntry
+
 	err = filepath.Walk(baseDir, func(path string, info os.FileInfo, err error) error {
 		if err != nil {
 			return err
@@ -162,13 +191,11 @@ func syncScripts(baseDir string, baseURL string, token string, prune bool, build
 
 			if len(parts) >= 2 {
                 // Check/Create Category
-                categoryName := parts[0]
-                ensureCategory(categoryName)
+                ensureCategory(parts[0])
 
                 // normalizedRelPath structure: Category/Tool.py
                 normalizedRelPath := filepath.ToSlash(relPath)
-                
-                sendUpdate(fmt.Sprintf("📤 Syncing %s...", normalizedRelPath))
+                scriptsProcessed++
                 
                 content, err := ioutil.ReadFile(path)
                 if err != nil {
@@ -191,71 +218,10 @@ func syncScripts(baseDir string, baseURL string, token string, prune bool, build
                         return nil
                     }
                 }
-                
-                type ToolContentRequest struct {
-                    Path    string `json:"path"`
-                    Content string `json:"content"`
-                }
-                
-                reqBody := ToolContentRequest{
-                    Path:    normalizedRelPath,
-                    Content: string(content),
-                }
-
-				jsonBody, _ := json.Marshal(reqBody)
-
-				resp, reqErr := client.Request("POST", "/api/tools/content", jsonBody)
-				if reqErr != nil {
-					logger.Error("Request failed", reqErr)
-					scriptsFailed++
-					return nil
-				}
-				defer resp.Body.Close()
-                
-                if resp.StatusCode >= 200 && resp.StatusCode < 300 {
-                    var contentResp struct {
-                        Status  string `json:"status"`
-                        Changed bool   `json:"changed"`
-                    }
-                    isChanged := true // Default for backward compatibility
-                    if err := json.NewDecoder(resp.Body).Decode(&contentResp); err == nil {
-                        isChanged = contentResp.Changed
-                    }
-                    
-                    if updates == nil { 
-                        if isChanged {
-                            logger.Success("Done (Updated)")
-                        } else {
-                            logger.Info("Done (No changes)")
-                        }
-                    }
-					scriptsUpdated++
-                    
-                    // Track for build ONLY IF content or config changed
-                    if isChanged {
-                        // The Name is parts[1] without extension.
-                        toolShortName := strings.TrimSuffix(parts[1], ext)
-                        
-                        // Avoid adding duplicate if we visit both .py and .yaml
-                        found := false
-                        for _, t := range toolsToBuild {
-                            if t.Category == categoryName && t.Name == toolShortName {
-                                found = true
-                                break
-                            }
-                        }
-                        if !found {
-                            toolsToBuild = append(toolsToBuild, ToolID{Category: categoryName, Name: toolShortName})
-                        }
-                    }
 
-				} else {
-					bodyBytes, _ := ioutil.ReadAll(resp.Body)
-					logger.Error(fmt.Sprintf("Failed (%d)", resp.StatusCode), fmt.Errorf("%s", string(bodyBytes)))
-					scriptsFailed++
-				}
-                
-                scriptsProcessed++
+                sum := sha256.Sum256(content)
+                localFiles = append(localFiles, SyncFile{Path: normalizedRelPath, Content: string(content)})
+                manifest = append(manifest, SyncManifestEntry{Path: normalizedRelPath, Hash: hex.EncodeToString(sum[:])})
             }
         }
         return nil
@@ -265,6 +231,52 @@ func syncScripts(baseDir string, baseURL string, token string, prune bool, build
 		return err
 	}
 
+    sendUpdate(fmt.Sprintf("🔎 Comparing %d files with the server...", len(manifest)))
+    changedPaths, err := diffSyncManifest(client, manifest)
+    if err != nil {
+        return fmt.Errorf("sync manifest failed: %w", err)
+    }
+
+    var changedFiles []SyncFile
+    for _, f := range localFiles {
+        if changedPaths[f.Path] {
+            changedFiles = append(changedFiles, f)
+        }
+    }
+    unchanged := len(localFiles) - len(changedFiles)
+    scriptsUpdated += unchanged
+    if updates == nil {
+        logger.Info(fmt.Sprintf("%d files unchanged, %d to upload", unchanged, len(changedFiles)))
+    }
+
+    if len(changedFiles) > 0 {
+        sendUpdate(fmt.Sprintf("📤 Uploading %d changed files...", len(changedFiles)))
+        batch, err := uploadSyncBatch(client, changedFiles)
+        if err != nil {
+            logger.Error("Batch upload failed", err)
+            scriptsFailed += len(changedFiles)
+        } else {
+            for _, r := range batch.Results {
+                if r.Error != "" {
+                    logger.Error("Failed", fmt.Errorf("%s: %s", r.Path, r.Error))
+                    scriptsFailed++
+                    continue
+                }
+                scriptsUpdated++
+                if updates == nil && r.Changed {
+                    logger.Success(fmt.Sprintf("%s (Updated)", r.Path))
+                }
+            }
+            // Track for build ONLY the tools whose content or config changed
+            for _, id := range batch.ChangedTools {
+                parts := strings.SplitN(id, "/", 2)
+                if len(parts) == 2 {
+                    toolsToBuild = append(toolsToBuild, ToolID{Category: parts[0], Name: parts[1]})
+                }
+            }
+        }
+    }
+
     // 2. PRUNE (Delete remote tools missing locally)
     if prune {
         sendUpdate("Pruning remote tools...")
@@ -378,6 +390,52 @@ func syncScripts(baseDir string, baseURL string, token string, prune bool, build
 	return nil
 }
 
+// diffSyncManifest returns the manifest paths whose content differs on the server
+func diffSyncManifest(client *httpclient.Client, entries []SyncManifestEntry) (map[string]bool, error) {
+	reqBody, _ := json.Marshal(map[string][]SyncManifestEntry{"entries": entries})
+	resp, err := client.Request("POST", "/api/tools/sync/manifest", reqBody)
+	if err != nil {
+		return nil, err
+	}
+	defer resp.Body.Close()
+
+	if resp.StatusCode < 200 || resp.StatusCode >= 300 {
+		body, _ := ioutil.ReadAll(resp.Body)
+		return nil, fmt.Errorf("status %d: %s", resp.StatusCode, string(body))
+	}
+	var manifestResp struct {
+		Changed []string `json:"changed"`
+	}
+	if err := json.NewDecoder(resp.Body).Decode(&manifestResp); err != nil {
+		return nil, err
+	}
+	changed := make(map[string]bool, len(manifestResp.Changed))
+	for _, path := range manifestResp.Changed {
+		changed[path] = true
+	}
+	return changed, nil
+}
+
+// uploadSyncBatch saves the changed files on the server in one transaction
+func uploadSyncBatch(client *httpclient.Client, files []SyncFile) (*SyncBatchResponse, error) {
+	reqBody, _ := json.Marshal(map[string][]SyncFile{"files": files})
+	resp, err := client.Request("POST", "/api/tools/sync/batch", reqBody)
+	if err != nil {
+		return nil, err
+	}
+	defer resp.Body.Close()
+
+	if resp.StatusCode < 200 || resp.StatusCode >= 300 {
+		body, _ := ioutil.ReadAll(resp.Body)
+		return nil, fmt.Errorf("status %d: %s", resp.StatusCode, string(body))
+	}
+	var batch SyncBatchResponse
+	if err := json.NewDecoder(resp.Body).Decode(&batch); err != nil {
+		return nil, err
+	}
+	return &batch, nil
+}
+
 func uploadToolLogo(baseURL string, category string, toolID string, svgContent string, token string) error {
 	client := httpclient.New(baseURL, token)
 	path := fmt.Sprintf("/api/tools/%s/%s/logo", category, toolID)
@@ -398,119 +456,237 @@ func uploadToolLogo(baseURL string, category string, toolID string, svgContent s
 	return nil
 }
 
-func pullScripts(baseDir string, baseURL string, token string) error {
-	logger.Info(fmt.Sprintf("Preparing to pull scripts into '%s'...", baseDir))
+// pullStateFile records, in the pull directory, the catalogue revision of the last pull
+const pullStateFile = ".contextworks-pull.json"
 
-	// 1. Fetch all tools
-	client := httpclient.New(baseURL, token)
-	
-    resp, err := client.Request("GET", "/api/tools", nil)
+// pullExportBatch is the number of tools fetched per /api/tools/sync/export request
+const pullExportBatch = 100
+
+type pullState struct {
+	Server   string `json:"server"`
+	Revision int64  `json:"revision"`
+}
+
+// CatalogueChange is one entry of the server change feed (GET /api/tools/changes)
+type CatalogueChange struct {
+	ID         string `json:"id"`
+	Op         string `json:"op"`
+	Name       string `json:"name"`
+	Category   string `json:"category"`
+	ScriptHash string `json:"script_hash"`
+	ConfigHash string `json:"config_hash"`
+	HasLogo    bool   `json:"has_logo"`
+	LogoHash   string `json:"logo_hash"`
+}
+
+type ExportedTool struct {
+	ID            string `json:"id"`
+	Category      string `json:"category"`
+	ScriptCode    string `json:"script_code"`
+	Configuration string `json:"configuration"`
+}
+
+// loadPullRevision returns the revision of the last pull from the same server (0 = full pull)
+func loadPullRevision(baseDir string, baseURL string) int64 {
+	data, err := ioutil.ReadFile(filepath.Join(baseDir, pullStateFile))
+	if err != nil {
+		return 0
+	}
+	var state pullState
+	if err := json.Unmarshal(data, &state); err != nil || state.Server != baseURL {
+		return 0
+	}
+	return state.Revision
+}
+
+func savePullRevision(baseDir string, baseURL string, revision int64) error {
+	data, _ := json.MarshalIndent(pullState{Server: baseURL, Revision: revision}, "", "  ")
+	return ioutil.WriteFile(filepath.Join(baseDir, pullStateFile), data, 0644)
+}
+
+// fileHash is the sha256 (hex) of a local file, "" if it does not exist
+func fileHash(path string) string {
+	content, err := ioutil.ReadFile(path)
+	if err != nil {
+		return ""
+	}
+	sum := sha256.Sum256(content)
+	return hex.EncodeToString(sum[:])
+}
+
+// shortToolID removes the category prefix of a tool ID
+func shortToolID(id string) string {
+	parts := strings.Split(id, "/")
+	return parts[len(parts)-1]
+}
+
+// fetchCatalogueChanges follows the change feed from a revision and returns the
+// latest change of every tool (in feed order) and the revision reached
+func fetchCatalogueChanges(client *httpclient.Client, since int64) ([]CatalogueChange, int64, error) {
+	latest := make(map[string]int)
+	var changes []CatalogueChange
+	revision := since
+	for {
+		resp, err := client.Request("GET", fmt.Sprintf("/api/tools/changes?since=%d", revision), nil)
+		if err != nil {
+			return nil, 0, err
+		}
+		if resp.StatusCode != 200 {
+			body, _ := ioutil.ReadAll(resp.Body)
+			resp.Body.Close()
+			return nil, 0, fmt.Errorf("status %d: %s", resp.StatusCode, string(body))
+		}
+		var feed struct {
+			Revision int64             `json:"revision"`
+			HasMore  bool              `json:"has_more"`
+			Changes  []CatalogueChange `json:"changes"`
+		}
+		err = json.NewDecoder(resp.Body).Decode(&feed)
+		resp.Body.Close()
+		if err != nil {
+			return nil, 0, fmt.Errorf("failed to decode change feed: %w", err)
+		}
+
+		for _, change := range feed.Changes {
+			if i, seen := latest[change.ID]; seen {
+				changes[i] = change
+			} else {
+				latest[change.ID] = len(changes)
+				changes = append(changes, change)
+			}
+		}
+		revision = feed.Revision
+		if !feed.HasMore {
+			return changes, revision, nil
+		}
+	}
+}
+
+// exportTools downloads script and YAML of several tools in one request
+func exportTools(client *httpclient.Client, toolIDs []string) ([]ExportedTool, error) {
+	reqBody, _ := json.Marshal(map[string][]string{"tool_ids": toolIDs})
+	resp, err := client.Request("POST", "/api/tools/sync/export", reqBody)
 	if err != nil {
-		return fmt.Errorf("failed to fetch tools: %w", err)
+		return nil, err
 	}
 	defer resp.Body.Close()
 
 	if resp.StatusCode != 200 {
 		body, _ := ioutil.ReadAll(resp.Body)
-		return fmt.Errorf("failed to fetch tools (%d): %s", resp.StatusCode, string(body))
+		return nil, fmt.Errorf("status %d: %s", resp.StatusCode, string(body))
+	}
+	var exported struct {
+		Tools []ExportedTool `json:"tools"`
 	}
+	if err := json.NewDecoder(resp.Body).Decode(&exported); err != nil {
+		return nil, err
+	}
+	return exported.Tools, nil
+}
 
-	var categories map[string][]struct {
-		ID       string `json:"id"`
-		Name     string `json:"name"`
-		Category string `json:"category"`
-		HasLogo  bool   `json:"has_logo"`
+func pullScripts(baseDir string, baseURL string, token string) error {
+	logger.Info(fmt.Sprintf("Preparing to pull scripts into '%s'...", baseDir))
+	if err := os.MkdirAll(baseDir, 0755); err != nil {
+		return fmt.Errorf("failed to create directory %s: %w", baseDir, err)
 	}
 
-	if err := json.NewDecoder(resp.Body).Decode(&categories); err != nil {
-		return fmt.Errorf("failed to decode tools list: %w", err)
+	// 1. Tools changed since the last pull (a no-op pull is this single request)
+	client := httpclient.New(baseURL, token)
+	since := loadPullRevision(baseDir, baseURL)
+
+	changes, revision, err := fetchCatalogueChanges(client, since)
+	if err != nil {
+		return fmt.Errorf("failed to fetch tool changes: %w", err)
+	}
+	if len(changes) == 0 {
+		logger.Success(fmt.Sprintf("Already up to date (revision %d)", revision))
+		return savePullRevision(baseDir, baseURL, revision)
 	}
 
-	totalPulled := 0
-	
-	// 2. Iterate through categories and tools
-	for catName, tools := range categories {
-		catDir := filepath.Join(baseDir, catName)
-		if err := os.MkdirAll(catDir, 0755); err != nil {
-			logger.Error(fmt.Sprintf("Failed to create directory %s", catDir), err)
+	// 2. Compare the content hashes with the local files
+	var toFetch []string
+	var logos []CatalogueChange
+	for _, change := range changes {
+		if change.Op == "delete" {
+			logger.Warning(fmt.Sprintf("%s was deleted on the server (local files kept)", change.ID))
 			continue
 		}
+		catDir := filepath.Join(baseDir, change.Category)
+		shortID := shortToolID(change.ID)
+		if fileHash(filepath.Join(catDir, shortID+".py")) != change.ScriptHash ||
+			fileHash(filepath.Join(catDir, shortID+".yaml")) != change.ConfigHash {
+			toFetch = append(toFetch, change.ID)
+		}
+		if change.HasLogo && fileHash(filepath.Join(catDir, shortID+".logo.svg")) != change.LogoHash {
+			logos = append(logos, change)
+		}
+	}
 
-		logger.Info(fmt.Sprintf("Workspace: %s", catName))
+	// 3. Fetch only what changed
+	totalPulled := 0
+	failed := 0
+	for start := 0; start < len(toFetch); start += pullExportBatch {
+		end := start + pullExportBatch
+		if end > len(toFetch) {
+			end = len(toFetch)
+		}
+		tools, err := exportTools(client, toFetch[start:end])
+		if err != nil {
+			return fmt.Errorf("failed to fetch tools: %w", err)
+		}
 
 		for _, tool := range tools {
-			logger.Info(fmt.Sprintf("Pulling %s...", tool.ID))
-
-			// Extract short ID (remove category prefix if present)
-			shortID := tool.ID
-			if strings.Contains(tool.ID, "/") {
-				parts := strings.Split(tool.ID, "/")
-				shortID = parts[len(parts)-1]
-			}
-
-			// Fetch tool details for script code
-			path := fmt.Sprintf("/api/tools/%s/%s", catName, shortID)
-            dResp, err := client.Request("GET", path, nil)
-
-			if err != nil {
-				logger.Error("Detail request failed", nil)
+			catDir := filepath.Join(baseDir, tool.Category)
+			if err := os.MkdirAll(catDir, 0755); err != nil {
+				logger.Error(fmt.Sprintf("Failed to create directory %s", catDir), err)
+				failed++
 				continue
 			}
-			defer dResp.Body.Close()
+			shortID := shortToolID(tool.ID)
 
-			if dResp.StatusCode != 200 {
-				logger.Error("Failed", fmt.Errorf("status %d", dResp.StatusCode))
-				continue
-			}
-
-			var detail struct {
-				ScriptCode string `json:"script_code"`
-			}
-			if err := json.NewDecoder(dResp.Body).Decode(&detail); err != nil {
-				logger.Error("Decode failed", nil)
+			// Write script and YAML
+			if err := ioutil.WriteFile(filepath.Join(catDir, shortID+".py"), []byte(tool.ScriptCode), 0755); err != nil {
+				logger.Error("Failed to write file", err)
+				failed++
 				continue
 			}
-
-			// Write script
-			scriptPath := filepath.Join(catDir, shortID+".py")
-			if err := ioutil.WriteFile(scriptPath, []byte(detail.ScriptCode), 0755); err != nil {
+			if err := ioutil.WriteFile(filepath.Join(catDir, shortID+".yaml"), []byte(tool.Configuration), 0644); err != nil {
 				logger.Error("Failed to write file", err)
+				failed++
 				continue
 			}
+			logger.Success(fmt.Sprintf("Pulled %s", tool.ID))
+			totalPulled++
+		}
+	}
 
-            // Fetch and write YAML
-            yamlPath := fmt.Sprintf("/api/tools/content?tool_id=%s/%s&file_type=yaml", catName, shortID)
-            yResp, err := client.Request("GET", yamlPath, nil)
-            
-            if err == nil && yResp.StatusCode == 200 {
-                var yDetail struct {
-                    Content string `json:"content"`
-                }
-                if err := json.NewDecoder(yResp.Body).Decode(&yDetail); err == nil {
-                    yamlPath := filepath.Join(catDir, shortID+".yaml")
-                    ioutil.WriteFile(yamlPath, []byte(yDetail.Content), 0644)
-                }
-                yResp.Body.Close()
-            }
-
-			// Pull logo if exists
-			if tool.HasLogo {
-				logoPath := fmt.Sprintf("/api/tools/%s/%s/logo", catName, tool.ID)
-				lResp, err := client.Request("GET", logoPath, nil)
-
-				if err == nil && lResp.StatusCode == 200 {
-					logoContent, _ := ioutil.ReadAll(lResp.Body)
-					logoPath := filepath.Join(catDir, shortID+".logo.svg")
-					ioutil.WriteFile(logoPath, logoContent, 0644)
-					lResp.Body.Close()
-				}
+	// Pull changed logos
+	for _, change := range logos {
+		shortID := shortToolID(change.ID)
+		lResp, err := client.Request("GET", fmt.Sprintf("/api/tools/%s/%s/logo", change.Category, shortID), nil)
+		if err != nil {
+			logger.Error("Logo request failed", err)
+			failed++
+			continue
+		}
+		if lResp.StatusCode == 200 {
+			logoContent, _ := ioutil.ReadAll(lResp.Body)
+			os.MkdirAll(filepath.Join(baseDir, change.Category), 0755)
+			if err := ioutil.WriteFile(filepath.Join(baseDir, change.Category, shortID+".logo.svg"), logoContent, 0644); err != nil {
+				logger.Error("Failed to write logo", err)
+				failed++
 			}
-
-			logger.Success("Done")
-			totalPulled++
+		} else {
+			failed++
 		}
+		lResp.Body.Close()
 	}
 
-	logger.Success(fmt.Sprintf("Successfully pulled %d scripts into '%s'!", totalPulled, baseDir))
-	return nil
+	if failed > 0 {
+		// Keep the previous revision so the next pull retries these tools
+		return fmt.Errorf("%d tools could not be pulled", failed)
+	}
+	logger.Success(fmt.Sprintf("Successfully pulled %d changed scripts (%d unchanged) into '%s' (revision %d)!",
+		totalPulled, len(changes)-totalPulled, baseDir, revision))
+	return savePullRevision(baseDir, baseURL, revision)
 }